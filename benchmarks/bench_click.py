@@ -0,0 +1,160 @@
+"""
+点击注入延迟基准测试（Linux）
+
+1. uinput引擎：从调用press()到事件出现在虚拟指针的evdev节点上的延迟（需要/dev/uinput权限）
+2. pynput引擎：press()调用耗时，pynput在返回前与X服务器同步，即事件到达X服务器的延迟（需要DISPLAY）
+
+不可用的一项会被跳过。uinput延迟超出预算时以非零状态码退出，可直接用于CI检查。
+
+用法:
+    sudo python benchmarks/bench_click.py [--rounds N]
+"""
+import os
+import sys
+import time
+import select
+import argparse
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+# uinput按下到事件送达的延迟预算（毫秒）
+UINPUT_MEDIAN_BUDGET_MS = 0.1
+UINPUT_P99_BUDGET_MS = 0.5
+# 等待虚拟设备出现在/proc/bus/input/devices中的超时（秒）
+DEVICE_TIMEOUT = 2.0
+# 单个事件的等待超时（毫秒）
+EVENT_TIMEOUT_MS = 100
+
+
+def summarize(samples):
+    """
+    计算延迟统计
+
+    参数:
+        samples: 延迟列表（毫秒）
+
+    返回:
+        tuple: (中位数, p99)
+    """
+    samples = sorted(samples)
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+
+def open_virtual_device(name):
+    """
+    等待虚拟指针设备出现并打开其事件节点
+
+    参数:
+        name: 设备名称
+
+    返回:
+        int: 文件描述符
+    """
+    from controllers.input_devices import list_input_devices
+    deadline = time.monotonic() + DEVICE_TIMEOUT
+    while time.monotonic() < deadline:
+        for device in list_input_devices():
+            if device.name == name and device.event_node and os.path.exists(device.event_node):
+                return os.open(device.event_node, os.O_RDONLY | os.O_NONBLOCK)
+        time.sleep(0.01)
+    raise SystemExit("虚拟指针设备未出现")
+
+
+def measure_uinput(rounds):
+    """
+    测量uinput引擎的按下到送达延迟
+
+    参数:
+        rounds: 测量次数
+
+    返回:
+        list: 延迟（毫秒），不可用时返回None
+    """
+    from click_engine import UinputClickEngine
+    from uinput_device import DEVICE_NAME, UinputUnavailableError
+    from evdev_input import EVENT_FORMAT
+    try:
+        engine = UinputClickEngine()
+    except UinputUnavailableError as e:
+        print(f"跳过uinput: {e}")
+        return None
+
+    fd = open_virtual_device(DEVICE_NAME)
+    poller = select.poll()
+    poller.register(fd, select.POLLIN)
+    samples = []
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            engine.press("left")
+            if not poller.poll(EVENT_TIMEOUT_MS):
+                raise SystemExit("等待按下事件超时")
+            samples.append((time.perf_counter() - start) * 1000)
+            engine.release("left")
+            # 读走按下和释放两帧事件（各含一个SYN_REPORT）
+            pending = EVENT_FORMAT.size * 4
+            while pending > 0 and poller.poll(EVENT_TIMEOUT_MS):
+                pending -= len(os.read(fd, EVENT_FORMAT.size * 16))
+    finally:
+        os.close(fd)
+        engine.close()
+    return samples
+
+
+def measure_pynput(rounds):
+    """
+    测量pynput引擎的press()调用耗时
+
+    参数:
+        rounds: 测量次数
+
+    返回:
+        list: 延迟（毫秒），不可用时返回None
+    """
+    if not os.environ.get("DISPLAY"):
+        print("跳过pynput: 未设置DISPLAY")
+        return None
+    try:
+        from pynput import mouse
+    except Exception as e:
+        print(f"跳过pynput: {e}")
+        return None
+
+    controller = mouse.Controller()
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        controller.press(mouse.Button.left)
+        samples.append((time.perf_counter() - start) * 1000)
+        controller.release(mouse.Button.left)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="点击注入延迟基准测试")
+    parser.add_argument("--rounds", type=int, default=1000, help="测量次数")
+    args = parser.parse_args()
+
+    failures = []
+    uinput_samples = measure_uinput(args.rounds)
+    if uinput_samples:
+        median, p99 = summarize(uinput_samples)
+        print(f"uinput 按下->evdev送达: 中位数 {median:.3f}ms, p99 {p99:.3f}ms")
+        if median > UINPUT_MEDIAN_BUDGET_MS:
+            failures.append(f"uinput中位数 {median:.3f}ms 超出预算 {UINPUT_MEDIAN_BUDGET_MS}ms")
+        if p99 > UINPUT_P99_BUDGET_MS:
+            failures.append(f"uinput p99 {p99:.3f}ms 超出预算 {UINPUT_P99_BUDGET_MS}ms")
+
+    pynput_samples = measure_pynput(args.rounds)
+    if pynput_samples:
+        median, p99 = summarize(pynput_samples)
+        print(f"pynput 按下->X服务器: 中位数 {median:.3f}ms, p99 {p99:.3f}ms")
+
+    for failure in failures:
+        print(f"失败: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+鼠标指示器显示延迟基准测试
+
+对比预热阶段耗时、首次显示延迟与后续显示延迟，需要图形环境（Linux下可使用Xvfb）。
+
+用法:
+    python benchmarks/bench_cursor_indicator.py [重复次数]
+"""
+import os
+import sys
+import time
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from cursor_indicator import CursorIndicator
+
+
+def wait_for_show(indicator, count, timeout=2.0):
+    """等待指示器记录到第count次显示"""
+    deadline = time.perf_counter() + timeout
+    while len(indicator.show_latencies) < count:
+        if time.perf_counter() > deadline:
+            raise TimeoutError("等待指示器显示超时")
+        time.sleep(0.001)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    indicator = CursorIndicator()
+
+    start = time.perf_counter()
+    indicator.warm_up()
+    indicator.ready.wait()
+    warm_up_time = time.perf_counter() - start
+
+    for i in range(repeat):
+        indicator.start("on" if i % 2 == 0 else "off")
+        wait_for_show(indicator, i + 1)
+        indicator.hide()
+        time.sleep(0.01)
+
+    latencies = [latency * 1000 for latency in indicator.show_latencies]
+    print(f"预热耗时:     {warm_up_time * 1000:8.2f} ms")
+    print(f"首次显示延迟: {latencies[0]:8.2f} ms")
+    if len(latencies) > 1:
+        later = latencies[1:]
+        print(f"后续显示延迟: 中位数 {statistics.median(later):.2f} ms, 最大 {max(later):.2f} ms")
+
+    indicator.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+按键钩子路径的内存分配和垃圾回收停顿基准测试
+
+第一部分用tracemalloc检查稳态下无关按键（非触发键）经过钩子路径时是否分配内存：
+keyboard钩子输入源的事件回调（含打字防误触监视）和evdev输入源的批量读取，
+每条路径先预热，再处理大量事件，统计src目录下代码留存的内存和处理期间的内存峰值增长。
+
+第二部分在子进程中分别以默认回收设置和启动冻结（gc_tuning.freeze_long_lived）运行：
+构造大量长期存活的对象模拟已加载的图形界面，后台线程持续分配对象模拟托盘、指示器等组件，
+钩子线程按固定间隔处理无关按键，统计从预定时间到回调返回的耗时分布（含等待GIL的时间）。
+
+分配量或冻结后的p99耗时超出预算时以非零状态码退出，可直接用于CI检查。
+
+用法:
+    python benchmarks/bench_gc.py [--events N] [--duration S] [--heap N]
+"""
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+import collections
+import tracemalloc
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+from input_source import KeyboardHookSource
+from keycodes import codes_for
+from triggers import TriggerMatcher
+
+# 每条路径处理全部事件后src目录下代码留存内存的预算（字节，与事件数无关）
+RETAINED_BUDGET = 1024
+# 处理期间内存峰值增长的预算（字节）
+PEAK_BUDGET = 16384
+# 冻结后钩子耗时p99的预算（毫秒）
+P99_BUDGET_MS = 2.0
+# 钩子线程处理按键的间隔（秒）
+HOOK_INTERVAL = 0.002
+# 无关按键：不属于任何触发键
+UNRELATED_KEYS = "qwertyuiop"
+
+
+class HookEvent:
+    """keyboard库按键事件中钩子回调用到的字段"""
+    __slots__ = ("scan_code", "event_type", "time", "name")
+
+    def __init__(self, scan_code, event_type, time, name):
+        self.scan_code = scan_code
+        self.event_type = event_type
+        self.time = time
+        self.name = name
+
+
+def make_hook_source(typing):
+    """
+    创建绑定了热键和动作键的keyboard钩子输入源（不安装系统钩子）
+
+    参数:
+        typing: 是否同时监视打字
+
+    返回:
+        tuple: (输入源, 打字防误触或None)
+    """
+    source = KeyboardHookSource()
+    # 没有keyboard库时按evdev键码解析按键名称，匹配路径与扫描码相同
+    source.matcher = TriggerMatcher(resolve=codes_for)
+    source._bind("hot_key", "f1", lambda event: None)
+    source._bind("action:left_click", "f2", lambda event: None)
+    source._bind("action:right_click", "ctrl+f3", lambda event: None)
+    guard = None
+    if typing:
+        from typing_guard import TypingGuard, DEFAULT_TYPING_GUARD
+        guard = TypingGuard(lambda suspend: None, dict(DEFAULT_TYPING_GUARD, enabled=True))
+        source.watch_typing(guard.on_keystroke)
+    return source, guard
+
+
+def make_hook_events(count):
+    """
+    生成无关按键的按下和释放事件
+
+    返回:
+        list: HookEvent列表
+    """
+    events = []
+    for i in range(count // 2):
+        name = UNRELATED_KEYS[i % len(UNRELATED_KEYS)]
+        code = codes_for(name)[0]
+        events.append(HookEvent(code, "down", i * 0.05, name))
+        events.append(HookEvent(code, "up", i * 0.05 + 0.02, name))
+    return events
+
+
+def trace_path(name, run, count):
+    """
+    预热后用tracemalloc统计一条路径处理事件时的内存分配
+
+    参数:
+        name: 路径名称
+        run: 处理全部事件的函数
+        count: 事件数
+
+    返回:
+        list: 超出预算的说明
+    """
+    run()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    source_filter = [tracemalloc.Filter(True, os.path.join(os.path.abspath(SRC_DIR), "*"))]
+    retained = sum(stat.size_diff for stat in after.filter_traces(source_filter).compare_to(
+        before.filter_traces(source_filter), "lineno"))
+    growth = peak - current
+    print(f"{name:<24} {count}个事件: 留存 {retained}B（{retained / count:.4f}B/事件，预算 {RETAINED_BUDGET}B），"
+          f"峰值增长 {growth}B（预算 {PEAK_BUDGET}B）")
+    failures = []
+    if retained > RETAINED_BUDGET:
+        failures.append(f"{name}留存 {retained}B，超出预算")
+        for stat in after.compare_to(before, "lineno")[:5]:
+            print(f"    {stat}")
+    if growth > PEAK_BUDGET:
+        failures.append(f"{name}峰值增长 {growth}B，超出预算")
+    return failures
+
+
+def check_allocations(count):
+    """
+    检查各条钩子路径处理无关按键时的内存分配
+
+    返回:
+        list: 超出预算的说明
+    """
+    failures = []
+    events = make_hook_events(count)
+
+    source, _ = make_hook_source(typing=False)
+
+    def run_hook():
+        on_event = source._on_event
+        for event in events:
+            on_event(event)
+    failures += trace_path("keyboard钩子", run_hook, len(events))
+
+    source, guard = make_hook_source(typing=True)
+
+    def run_typing():
+        on_event = source._on_event
+        for event in events:
+            on_event(event)
+    failures += trace_path("keyboard钩子（监视打字）", run_typing, len(events))
+    guard.stop()
+
+    if sys.platform.startswith("linux"):
+        failures += check_evdev(count)
+    return failures
+
+
+def check_evdev(count):
+    """
+    检查evdev输入源从设备读取无关按键时的内存分配（用管道代替事件设备）
+
+    返回:
+        list: 超出预算的说明
+    """
+    from evdev_input import EvdevInputSource, EVENT_FORMAT, EV_KEY, READ_BATCH
+    from typing_guard import TypingGuard, DEFAULT_TYPING_GUARD
+
+    # 只初始化读取路径用到的字段，不打开键盘设备
+    source = EvdevInputSource.__new__(EvdevInputSource)
+    source.matcher = TriggerMatcher()
+    source.matcher.compile({"hot_key": "f1", "action:left_click": "f2", "action:right_click": "ctrl+f3"})
+    source.callbacks = {}
+    source.reads = source.events_read = source.events_delivered = 0
+    guard = TypingGuard(lambda suspend: None, dict(DEFAULT_TYPING_GUARD, enabled=True))
+    source.on_typing = guard.on_keystroke
+
+    # 一批按下和释放事件，键码16~25为Q~P
+    batch = b"".join(EVENT_FORMAT.pack(i, 0, EV_KEY, 16 + i % 10, (i // 10) % 2)
+                     for i in range(READ_BATCH))
+    reader, writer = os.pipe()
+    batches = max(1, count // READ_BATCH)
+
+    def run():
+        for _ in range(batches):
+            os.write(writer, batch)
+            source._read_device(reader)
+    try:
+        return trace_path("evdev（监视打字）", run, batches * READ_BATCH)
+    finally:
+        guard.stop()
+        os.close(reader)
+        os.close(writer)
+
+
+def run_phase(tuned, duration, heap_size):
+    """
+    子进程中运行一个阶段：构造长期对象和后台分配，测量钩子路径的耗时
+
+    参数:
+        tuned: 是否冻结长期对象并调整回收阈值
+        duration: 测量时间（秒）
+        heap_size: 长期存活对象数
+
+    返回:
+        dict: 耗时分布（毫秒）、回收次数和回收停顿
+    """
+    import touchpad_controller  # noqa: F401
+    import tkinter  # noqa: F401
+
+    # 模拟已加载的图形界面和模块：大量互相引用的长期对象
+    heap = [{"id": i, "children": [], "name": str(i)} for i in range(heap_size)]
+    for i in range(1, heap_size):
+        heap[i]["children"].append(heap[i // 2])
+
+    if tuned:
+        from gc_tuning import freeze_long_lived
+        freeze_long_lived()
+
+    pauses = []
+    started = {}
+
+    def on_gc(phase, info):
+        if phase == "start":
+            started["time"] = time.perf_counter()
+        elif "time" in started:
+            pauses.append((info["generation"], time.perf_counter() - started.pop("time")))
+    gc.callbacks.append(on_gc)
+
+    running = True
+
+    def churn():
+        # 托盘、指示器和日志等组件持续创建对象，每个对象存活约0.6秒，一部分会进入老年代
+        recent = collections.deque(maxlen=60000)
+        while running:
+            for i in range(100):
+                recent.append({"event": i, "args": [i, i + 1]})
+            time.sleep(0.001)
+    churn_thread = threading.Thread(target=churn, daemon=True)
+    churn_thread.start()
+
+    source, guard = make_hook_source(typing=True)
+    events = make_hook_events(1000)
+    latencies = []
+    perf_counter = time.perf_counter
+    on_event = source._on_event
+    gc_before = [generation["collections"] for generation in gc.get_stats()]
+    deadline = perf_counter() + duration
+    scheduled = perf_counter()
+    i = 0
+    while scheduled < deadline:
+        scheduled += HOOK_INTERVAL
+        delay = scheduled - perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        on_event(events[i % len(events)])
+        latencies.append(perf_counter() - scheduled)
+        i += 1
+    running = False
+    churn_thread.join()
+    guard.stop()
+    gc.callbacks.remove(on_gc)
+
+    latencies.sort()
+    full_pauses = [pause for generation, pause in pauses if generation == 2]
+    return {
+        "events": len(latencies),
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1000,
+        "max": latencies[-1] * 1000,
+        "collections": [generation["collections"] - before
+                        for generation, before in zip(gc.get_stats(), gc_before)],
+        "full_pause_ms": max(full_pauses, default=0.0) * 1000,
+        "total_pause_ms": sum(pause for _, pause in pauses) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按键钩子路径的内存分配和垃圾回收停顿基准测试")
+    parser.add_argument("--events", type=int, default=100000, help="每条路径处理的事件数")
+    parser.add_argument("--duration", type=float, default=10.0, help="每个阶段测量钩子耗时的时间（秒）")
+    parser.add_argument("--heap", type=int, default=300000, help="模拟的长期存活对象数")
+    parser.add_argument("--phase", choices=["default", "tuned"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase is not None:
+        print(json.dumps(run_phase(args.phase == "tuned", args.duration, args.heap)))
+        return
+
+    failures = check_allocations(args.events)
+
+    results = {}
+    for phase in ("default", "tuned"):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--phase", phase,
+                                 "--duration", str(args.duration), "--heap", str(args.heap)],
+                                check=True, capture_output=True, text=True).stdout
+        results[phase] = result = json.loads(output.splitlines()[-1])
+        label = "启动冻结" if phase == "tuned" else "默认回收"
+        print(f"{label}: {result['events']}个事件 p50 {result['p50']:.3f}ms  p99 {result['p99']:.3f}ms  "
+              f"最大 {result['max']:.3f}ms  各代回收次数 {result['collections']}  "
+              f"最长完整回收 {result['full_pause_ms']:.1f}ms  回收总停顿 {result['total_pause_ms']:.0f}ms")
+    if results["tuned"]["p99"] > P99_BUDGET_MS:
+        failures.append(f"冻结后钩子耗时p99 {results['tuned']['p99']:.3f}ms，超出预算 {P99_BUDGET_MS}ms")
+
+    for failure in failures:
+        print(f"失败: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
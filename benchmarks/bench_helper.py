@@ -0,0 +1,112 @@
+"""
+特权助手往返延迟基准测试
+
+启动一个助手子进程（监听临时目录中的套接字），通过HelperClient测量心跳请求的往返延迟。
+心跳与切换请求的消息大小和处理路径相同（只差后端本身的执行时间），
+因此其往返延迟就是助手为每次切换额外增加的开销。
+
+超出预算时以非零状态码退出，可直接用于CI检查。
+
+用法:
+    python benchmarks/bench_helper.py [--rounds N]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+from helper_client import HelperClient
+
+# 往返延迟预算（毫秒）：助手增加的开销应远低于1毫秒
+MEDIAN_BUDGET_MS = 0.2
+P99_BUDGET_MS = 0.5
+# 等待助手启动的超时（秒）
+STARTUP_TIMEOUT = 5.0
+WARMUP_ROUNDS = 200
+
+
+def start_helper(path):
+    """
+    启动助手子进程并等待其可以连接
+
+    参数:
+        path: 套接字路径
+
+    返回:
+        tuple: (子进程, 已连接的HelperClient)
+    """
+    process = subprocess.Popen(
+        [sys.executable, "helper.py", "--socket", path, "--user", str(os.getuid())],
+        cwd=SRC_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while True:
+        try:
+            return process, HelperClient(path)
+        except OSError:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                print(process.stderr.read().decode("utf-8", "replace"))
+                raise SystemExit("助手启动失败")
+            time.sleep(0.01)
+
+
+def measure(client, rounds):
+    """
+    测量心跳往返延迟
+
+    参数:
+        client: HelperClient实例
+        rounds: 测量次数
+
+    返回:
+        list: 排序后的延迟（毫秒）
+    """
+    for _ in range(WARMUP_ROUNDS):
+        client.ping()
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        client.ping()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="特权助手往返延迟基准测试")
+    parser.add_argument("--rounds", type=int, default=5000, help="测量次数")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-helper-"), "helper.sock")
+    process, client = start_helper(path)
+    try:
+        samples = measure(client, args.rounds)
+    finally:
+        client.close()
+        process.terminate()
+        process.wait(5)
+        os.rmdir(os.path.dirname(path))
+
+    median = samples[len(samples) // 2]
+    p99 = samples[int(len(samples) * 0.99)]
+    print(f"心跳往返（{args.rounds}次）: 中位数 {median:.3f}ms, p99 {p99:.3f}ms, "
+          f"最小 {samples[0]:.3f}ms, 最大 {samples[-1]:.3f}ms")
+
+    failures = []
+    if median > MEDIAN_BUDGET_MS:
+        failures.append(f"中位数 {median:.3f}ms 超出预算 {MEDIAN_BUDGET_MS}ms")
+    if p99 > P99_BUDGET_MS:
+        failures.append(f"p99 {p99:.3f}ms 超出预算 {P99_BUDGET_MS}ms")
+    for failure in failures:
+        print(f"失败: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
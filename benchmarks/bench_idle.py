@@ -0,0 +1,184 @@
+"""
+空闲唤醒和CPU占用基准测试（Linux）
+
+以无界面方式（可选在Xvfb中加载托盘和鼠标指示器）运行完整服务，使用假的触控板控制器和输入源，
+分两个阶段各空闲一段时间：触控板禁用，以及切换模式下触控板激活但无人操作。
+每个阶段前后读取/proc/self/task/*/stat和status，按线程统计唤醒次数（主动上下文切换）、
+被动上下文切换和CPU时间。
+
+程序大部分时间处于空闲状态，每秒唤醒次数或CPU占用超出预算时以非零状态码退出，可直接用于CI检查。
+
+用法:
+    python benchmarks/bench_idle.py [--duration S] [--gui]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import threading
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+import input_source
+from input_source import InputSource
+from setting import DEFAULT_CONFIG
+from service import TouchpadService
+
+# 每个阶段整个进程每秒唤醒次数的预算
+WAKEUP_BUDGET = {"off": 1.0, "on": 1.0}
+# 加载图形界面时的预算：指示器跟随光标，光标静止时降到每秒4次
+GUI_WAKEUP_BUDGET = {"off": 2.0, "on": 6.0}
+# CPU占用预算（占一个核心的比例）
+CPU_BUDGET = 0.005
+# 切换状态后等待指示器动画、日志等一次性工作结束的时间（秒）
+SETTLE_TIME = 1.0
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+class FakeController:
+    """不操作任何设备的触控板控制器"""
+    backend_name = "fake"
+
+    def toggle(self, enable):
+        return True
+
+    def cleanup(self):
+        pass
+
+
+class NullInputSource(InputSource):
+    """不接收任何按键的输入源，避免依赖键盘设备权限"""
+    name = "null"
+
+    def start(self, on_key, hot_key):
+        pass
+
+    def set_hot_key(self, hot_key):
+        pass
+
+    def bind_actions(self, action_keys, on_action):
+        pass
+
+    def unbind_actions(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def read_tasks():
+    """
+    读取本进程所有线程的调度统计
+
+    返回:
+        dict: 线程id -> (名称, CPU时间（秒）, 主动上下文切换数, 被动上下文切换数)
+    """
+    names = {thread.native_id: thread.name for thread in threading.enumerate()}
+    tasks = {}
+    for tid in os.listdir("/proc/self/task"):
+        try:
+            with open(f"/proc/self/task/{tid}/stat") as f:
+                stat = f.read()
+            with open(f"/proc/self/task/{tid}/status") as f:
+                status = dict(line.split(":", 1) for line in f if ":" in line)
+        except OSError:
+            # 线程已退出
+            continue
+        comm = stat[stat.index("(") + 1:stat.rindex(")")]
+        fields = stat[stat.rindex(")") + 2:].split()
+        # fields[0]是第3个字段（state），utime和stime是第14、15个字段
+        cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        tasks[int(tid)] = (names.get(int(tid), comm), cpu,
+                           int(status["voluntary_ctxt_switches"]), int(status["nonvoluntary_ctxt_switches"]))
+    return tasks
+
+
+def measure_phase(duration):
+    """
+    空闲一段时间并统计各线程的唤醒和CPU时间（不含本线程）
+
+    参数:
+        duration: 持续时间（秒）
+
+    返回:
+        list: (名称, CPU时间, 唤醒次数, 被动切换次数)列表，按唤醒次数降序
+    """
+    own = threading.get_native_id()
+    before = read_tasks()
+    time.sleep(duration)
+    after = read_tasks()
+    rows = []
+    for tid, (name, cpu, voluntary, involuntary) in after.items():
+        if tid == own:
+            continue
+        _, cpu0, voluntary0, involuntary0 = before.get(tid, (name, 0.0, 0, 0))
+        rows.append((name, cpu - cpu0, voluntary - voluntary0, involuntary - involuntary0))
+    return sorted(rows, key=lambda row: -row[2])
+
+
+def start_xvfb():
+    """
+    没有DISPLAY时启动Xvfb
+
+    返回:
+        subprocess.Popen: Xvfb进程，已有DISPLAY时为None
+    """
+    if os.environ.get("DISPLAY"):
+        return None
+    if shutil.which("Xvfb") is None:
+        raise SystemExit("加载图形界面需要DISPLAY或Xvfb")
+    display = ":97"
+    process = subprocess.Popen(["Xvfb", display, "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    os.environ["DISPLAY"] = display
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description="空闲唤醒和CPU占用基准测试")
+    parser.add_argument("--duration", type=float, default=10.0, help="每个阶段的空闲时间（秒）")
+    parser.add_argument("--gui", action="store_true", help="加载系统托盘和鼠标指示器（没有DISPLAY时启动Xvfb）")
+    args = parser.parse_args()
+
+    if not os.path.isdir("/proc/self/task"):
+        raise SystemExit("需要Linux的/proc文件系统")
+
+    xvfb = start_xvfb() if args.gui else None
+    input_source.create_input_source = lambda name, keys: NullInputSource()
+    service = TouchpadService(dict(DEFAULT_CONFIG, mode=1), controller=FakeController(), gui=args.gui)
+    budgets = GUI_WAKEUP_BUDGET if args.gui else WAKEUP_BUDGET
+    failures = []
+    try:
+        service.start()
+        for phase, active in (("off", False), ("on", True)):
+            service.set_active(active)
+            time.sleep(SETTLE_TIME)
+            rows = measure_phase(args.duration)
+            wakeups = sum(row[2] for row in rows) / args.duration
+            cpu = sum(row[1] for row in rows) / args.duration
+            print(f"阶段 {phase}（触控板{'激活' if active else '禁用'}，{args.duration:.0f}秒）: "
+                  f"每秒唤醒 {wakeups:.2f} 次（预算 {budgets[phase]}），CPU占用 {cpu * 100:.3f}%")
+            for name, thread_cpu, voluntary, involuntary in rows:
+                if voluntary or involuntary or thread_cpu:
+                    print(f"    {name:<24} 唤醒 {voluntary:>6}  被动切换 {involuntary:>4}  CPU {thread_cpu * 1000:.0f}ms")
+            if wakeups > budgets[phase]:
+                failures.append(f"阶段{phase}每秒唤醒 {wakeups:.2f} 次，超出预算 {budgets[phase]}")
+            if cpu > CPU_BUDGET:
+                failures.append(f"阶段{phase} CPU占用 {cpu * 100:.3f}%，超出预算 {CPU_BUDGET * 100}%")
+    finally:
+        service.stop()
+        if xvfb is not None:
+            xvfb.terminate()
+
+    for failure in failures:
+        print(f"失败: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+运行指标采集开销基准测试
+
+测量热键回调路径上每次采集的额外开销（两次perf_counter和一次直方图观测）以及计数器加一的开销，
+并在多个线程同时写入时检查汇总结果是否准确（按线程分片，写入不加锁）。
+
+任一开销超出预算或汇总结果不正确时以非零状态码退出，可直接用于CI检查。
+
+用法:
+    python benchmarks/bench_metrics.py [--calls N] [--threads N]
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+from metrics import Registry
+
+# 每次热键回调的采集开销预算（微秒）
+HOOK_BUDGET_US = 1.0
+# 每次计数器加一的开销预算（微秒）
+COUNTER_BUDGET_US = 0.3
+
+
+def measure(func, calls, repeat=5):
+    """
+    测量每次调用的平均耗时
+
+    参数:
+        func: 被测函数，参数为调用次数
+        calls: 调用次数
+        repeat: 重复次数，取最快的一次
+
+    返回:
+        float: 每次调用的耗时（微秒）
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(calls)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="运行指标采集开销基准测试")
+    parser.add_argument("--calls", type=int, default=500000, help="每项测试的调用次数")
+    parser.add_argument("--threads", type=int, default=8, help="并发写入的线程数")
+    args = parser.parse_args()
+
+    registry = Registry()
+    histogram = registry.histogram("bench_seconds", "基准测试")
+    counter = registry.counter("bench_total", "基准测试")
+    perf_counter = time.perf_counter
+
+    def baseline(calls):
+        for _ in range(calls):
+            pass
+
+    def hook(calls):
+        # 与TouchpadController.on_key_event相同的采集方式
+        observe = histogram.observe
+        for _ in range(calls):
+            start = perf_counter()
+            observe(perf_counter() - start)
+
+    def increment(calls):
+        inc = counter.inc
+        for _ in range(calls):
+            inc()
+
+    failures = []
+    loop = measure(baseline, args.calls)
+    hook_us = measure(hook, args.calls) - loop
+    counter_us = measure(increment, args.calls) - loop
+    print(f"热键回调采集开销: {hook_us:.3f}us（预算 {HOOK_BUDGET_US}us）")
+    print(f"计数器加一开销: {counter_us:.3f}us（预算 {COUNTER_BUDGET_US}us）")
+    if hook_us > HOOK_BUDGET_US:
+        failures.append(f"热键回调采集开销 {hook_us:.3f}us 超出预算")
+    if counter_us > COUNTER_BUDGET_US:
+        failures.append(f"计数器加一开销 {counter_us:.3f}us 超出预算")
+
+    # 多线程并发写入后汇总（部分线程结束后分片合并）
+    shared = registry.counter("bench_shared_total", "基准测试")
+    per_thread = args.calls // args.threads
+    threads = [threading.Thread(target=lambda: [shared.inc() for _ in range(per_thread)])
+               for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    expected = per_thread * args.threads
+    print(f"{args.threads}个线程并发计数: {shared.value()}（期望 {expected}）")
+    if shared.value() != expected:
+        failures.append(f"并发计数结果 {shared.value()} 与期望 {expected} 不符")
+
+    for failure in failures:
+        print(f"失败: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+系统高负载下的长按检测准确率基准测试（Linux）
+
+启动若干个占满CPU的进程模拟编译、视频会议等负载，在切换模式下按固定节奏模拟热键的短按和长按
+（按住时间分别比response_time短和长一个余量），由模拟钩子线程直接调用TouchpadController.on_key_event。
+分别在普通调度和实时调度（realtime.enabled）下统计：
+- 判断错误的次数：短按切换了触控板，或长按没有切换
+- 长按定时器相对预定时间的延迟
+- 释放事件相对预定时间的延迟
+
+实时调度下判断错误或定时器延迟p99超出预算时以非零状态码退出，可直接用于CI检查；
+没有提高调度优先级的权限时只输出结果。
+
+用法:
+    python benchmarks/bench_realtime.py [--presses N] [--load N] [--margin S] [--cpus 0,1]
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+import realtime
+import input_source
+from input_source import InputSource, KeyEvent
+from setting import DEFAULT_CONFIG
+from touchpad_controller import TouchpadController
+
+# 热键长按判定时间（秒）
+RESPONSE_TIME = 0.2
+# 两次按键之间的间隔（秒）
+PRESS_GAP = 0.1
+# 实时调度下长按定时器延迟p99的预算（毫秒）
+TIMER_P99_BUDGET_MS = 5.0
+
+
+class FakeController:
+    """不操作任何设备的触控板控制器"""
+    backend_name = "fake"
+
+    def toggle(self, enable):
+        return True
+
+    def cleanup(self):
+        pass
+
+
+class BenchInputSource(InputSource):
+    """不接收任何按键的输入源，热键事件由基准测试直接注入"""
+    name = "bench"
+
+    def start(self, on_key, hot_key):
+        pass
+
+    def set_hot_key(self, hot_key):
+        pass
+
+    def bind_actions(self, action_keys, on_action):
+        pass
+
+    def unbind_actions(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def percentile(values, fraction):
+    """
+    计算分位数
+
+    返回:
+        float: 分位数，没有数据时为0
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def start_load(count):
+    """
+    启动占满CPU的进程
+
+    参数:
+        count: 进程数
+
+    返回:
+        list: subprocess.Popen列表
+    """
+    return [subprocess.Popen([sys.executable, "-c", "while True: pass"]) for _ in range(count)]
+
+
+def run_phase(controller, presses, margin, enabled):
+    """
+    在当前负载下模拟一组短按和长按
+
+    参数:
+        controller: TouchpadController实例（切换模式）
+        presses: 按键次数，短按和长按交替
+        margin: 按住时间与response_time的差（秒）
+        enabled: 是否启用实时调度
+
+    返回:
+        dict: 判断错误次数、定时器延迟和释放延迟（毫秒）以及生效的调度方式
+    """
+    realtime.configure(dict(controller.realtime, enabled=enabled))
+    response_ns = int(RESPONSE_TIME * 1e9)
+    timer_delays = []
+    timer = controller._get_long_press_timer()
+
+    def timed_long_press():
+        timer_delays.append((time.monotonic_ns() - controller.hotkey_pressed_time - response_ns) / 1e6)
+        controller.handle_long_press()
+    timer.callback = timed_long_press
+
+    result = {"errors": 0, "release_delays": [], "policies": []}
+
+    def hook_thread():
+        # 模拟键盘钩子回调线程，与真实的输入线程一样登记
+        realtime.register("input")
+        scheduled = time.monotonic()
+        for i in range(presses):
+            long_press = i % 2 == 1
+            before = controller.touchpad_active
+            time.sleep(max(0.0, scheduled - time.monotonic()))
+            controller.on_key_event(KeyEvent(controller.hot_key, "down"))
+            release = scheduled + RESPONSE_TIME + (margin if long_press else -margin)
+            time.sleep(max(0.0, release - time.monotonic()))
+            result["release_delays"].append((time.monotonic() - release) * 1000)
+            controller.on_key_event(KeyEvent(controller.hot_key, "up"))
+            scheduled = time.monotonic() + PRESS_GAP
+            # 释放后定时器已取消，正在执行的长按处理持有锁，加锁读取的即是最终结果
+            with controller.lock:
+                toggled = controller.touchpad_active != before
+            if toggled != long_press:
+                result["errors"] += 1
+        result["policies"] = sorted({thread["policy"] for thread in realtime.get_stats()["threads"].values()})
+
+    thread = threading.Thread(target=hook_thread, name="bench-hook")
+    thread.start()
+    thread.join()
+    timer.callback = controller.handle_long_press
+    return {
+        "errors": result["errors"],
+        "timer_p99": percentile(timer_delays, 0.99),
+        "timer_max": max(timer_delays, default=0.0),
+        "release_p99": percentile(result["release_delays"], 0.99),
+        "policies": result["policies"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="系统高负载下的长按检测准确率基准测试")
+    parser.add_argument("--presses", type=int, default=100, help="每个阶段的按键次数（短按和长按交替）")
+    parser.add_argument("--load", type=int, default=(os.cpu_count() or 1) * 4, help="占满CPU的进程数")
+    parser.add_argument("--margin", type=float, default=0.03, help="按住时间与response_time的差（秒）")
+    parser.add_argument("--cpus", default="", help="实时调度时绑定的CPU编号，逗号分隔")
+    args = parser.parse_args()
+
+    if not sys.platform.startswith("linux"):
+        raise SystemExit("需要Linux")
+
+    cpus = [int(cpu) for cpu in args.cpus.split(",") if cpu]
+    input_source.create_input_source = lambda name, keys: BenchInputSource()
+    config = dict(DEFAULT_CONFIG, mode=1, response_time=RESPONSE_TIME,
+                  realtime=dict(DEFAULT_CONFIG["realtime"], cpus=cpus))
+    controller = TouchpadController(config, controller=FakeController(), gui=False)
+    controller.start()
+
+    load = start_load(args.load)
+    failures = []
+    try:
+        time.sleep(0.5)
+        for phase, enabled in (("普通调度", False), ("实时调度", True)):
+            result = run_phase(controller, args.presses, args.margin, enabled)
+            print(f"{phase}（{args.load}个负载进程，余量{args.margin * 1000:.0f}ms，调度方式 {'/'.join(result['policies'])}）: "
+                  f"判断错误 {result['errors']}/{args.presses}  "
+                  f"定时器延迟 p99 {result['timer_p99']:.2f}ms 最大 {result['timer_max']:.2f}ms  "
+                  f"释放延迟 p99 {result['release_p99']:.2f}ms")
+            if not enabled:
+                continue
+            if result["policies"] == ["normal"]:
+                print("没有提高调度优先级的权限，不检查预算")
+                continue
+            if result["errors"]:
+                failures.append(f"实时调度下判断错误 {result['errors']} 次")
+            if result["timer_p99"] > TIMER_P99_BUDGET_MS:
+                failures.append(f"实时调度下定时器延迟p99 {result['timer_p99']:.2f}ms，超出预算 {TIMER_P99_BUDGET_MS}ms")
+    finally:
+        for process in load:
+            process.kill()
+        for process in load:
+            process.wait()
+        realtime.configure(dict(DEFAULT_CONFIG["realtime"]))
+        controller._cleanup_resources()
+
+    for failure in failures:
+        print(f"失败: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+退出耗时基准测试
+
+以无图形界面方式启动完整的触控板服务（配置文件监视和写入、本地控制服务、指标文本文件、
+点击引擎、打字防误触和长按定时器），模拟一段使用后关闭触控板，然后测量TouchpadService.stop()的耗时：
+- 正常退出：所有组件按期限内停止，检查总耗时
+- 组件卡住：把托盘和鼠标指示器换成停止时一直阻塞的组件（模拟卡在pystray或Tk中），
+  检查退出仍在组件期限加预算内完成，卡住的组件被记为超时
+
+两种情况都检查触控板最先被恢复（在任何组件停止之前重新启用），退出后保持启用。
+超出预算或触控板未恢复时以非零状态码退出，可直接用于CI检查。
+
+用法:
+    python benchmarks/bench_shutdown.py [--runs N]
+"""
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import tempfile
+import threading
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+import supervisor
+import input_source
+from input_source import InputSource, KeyEvent
+from setting import DEFAULT_CONFIG, SettingsManager
+from service import TouchpadService
+
+# 正常退出耗时的预算（毫秒）
+STOP_BUDGET_MS = 200.0
+# 从开始退出到恢复触控板的预算（毫秒）
+RESTORE_BUDGET_MS = 50.0
+
+
+class FakeController:
+    """记录每次切换的触控板控制器"""
+    backend_name = "fake"
+
+    def __init__(self):
+        self.calls = []  # (时间, 目标状态)
+
+    def toggle(self, enable):
+        self.calls.append((time.perf_counter(), enable))
+        return True
+
+    def cleanup(self):
+        pass
+
+
+class BenchInputSource(InputSource):
+    """不接收任何按键的输入源，热键事件由基准测试直接注入"""
+    name = "bench"
+
+    def start(self, on_key, hot_key):
+        pass
+
+    def set_hot_key(self, hot_key):
+        pass
+
+    def bind_actions(self, action_keys, on_action):
+        pass
+
+    def unbind_actions(self):
+        pass
+
+    def watch_typing(self, on_typing):
+        return True
+
+    def stop(self):
+        pass
+
+
+class HangingComponent:
+    """停止时一直阻塞的图形界面组件，记录开始停止的时间"""
+
+    def __init__(self, release):
+        self.release = release
+        self.stop_started = None
+
+    def _block(self):
+        self.stop_started = time.perf_counter()
+        self.release.wait()
+
+    def start(self, icon_type, auto_hide_duration=None):
+        pass
+
+    def update_touchpad_status(self, is_active):
+        pass
+
+    stop = destroy = _block
+
+
+def run_once(directory, hang):
+    """
+    启动服务、模拟使用后退出
+
+    参数:
+        directory: 存放配置文件、指标文件和控制套接字的临时目录
+        hang: 是否注入停止时卡住的组件
+
+    返回:
+        dict: 退出耗时、恢复触控板耗时（毫秒）、切换记录和各组件的停止结果
+    """
+    from control_server import ControlServer
+
+    # 上一次测量的关闭状态会阻止崩溃的线程重启
+    supervisor.reset()
+
+    config_path = os.path.join(directory, "configure.json")
+    config = dict(DEFAULT_CONFIG, mode=1, response_time=0.05,
+                  typing_guard=dict(DEFAULT_CONFIG["typing_guard"], enabled=True),
+                  metrics=dict(DEFAULT_CONFIG["metrics"], textfile=os.path.join(directory, "touchpad.prom")))
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+
+    settings_manager = SettingsManager(queue.Queue(), config_path)
+    controller = FakeController()
+    service = TouchpadService(settings_manager.load(), settings_manager=settings_manager, controller=controller,
+                              control_server=ControlServer(os.path.join(directory, "control.sock")))
+    service.start()
+    handler = service.handler
+
+    # 长按热键打开触控板再关闭，最后停在关闭状态；留下一处尚未写入的配置修改
+    for _ in range(2):
+        handler.on_key_event(KeyEvent(handler.hot_key, "down"))
+        time.sleep(handler.response_time * 2)
+        handler.on_key_event(KeyEvent(handler.hot_key, "up"))
+    settings_manager.update_config("response_time", 0.06)
+
+    release = threading.Event()
+    hanging = []
+    if hang:
+        hanging = [HangingComponent(release), HangingComponent(release)]
+        handler.tray_manager, handler.cursor_indicator = hanging
+
+    start = time.perf_counter()
+    service.stop()
+    elapsed = time.perf_counter() - start
+    release.set()
+
+    calls = [(when, enable) for when, enable in controller.calls if when >= start]
+    restore_at = calls[0][0] if calls and calls[0][1] else None
+    return {
+        "seconds": elapsed,
+        "restore": restore_at - start if restore_at is not None else None,
+        "restored_first": restore_at is not None and all(restore_at < item.stop_started for item in hanging),
+        "enabled": bool(controller.calls) and controller.calls[-1][1],
+        "steps": supervisor.get_stats()["last_shutdown"]["steps"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="退出耗时基准测试")
+    parser.add_argument("--runs", type=int, default=10, help="正常退出的测量次数")
+    args = parser.parse_args()
+
+    input_source.create_input_source = lambda name, keys: BenchInputSource()
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        results = [run_once(directory, hang=False) for _ in range(args.runs)]
+        hung = run_once(directory, hang=True)
+
+    durations = sorted(result["seconds"] * 1000 for result in results)
+    restores = [result["restore"] * 1000 for result in results if result["restore"] is not None]
+    print(f"正常退出 {args.runs}次: 中位数 {durations[len(durations) // 2]:.1f}ms  最大 {durations[-1]:.1f}ms"
+          f"（预算 {STOP_BUDGET_MS:.0f}ms）  恢复触控板最慢 {max(restores, default=0.0):.2f}ms")
+    slowest = max(results, key=lambda result: result["seconds"])
+    for name, step in slowest["steps"].items():
+        seconds = f"{step['seconds'] * 1000:.1f}ms" if step["seconds"] is not None else "-"
+        print(f"    {name:<18} {step['result']:<8} {seconds}")
+    if durations[-1] > STOP_BUDGET_MS:
+        failures.append(f"正常退出最长 {durations[-1]:.1f}ms，超出预算 {STOP_BUDGET_MS:.0f}ms")
+
+    hang_budget = supervisor.SHUTDOWN_DEADLINE * 1000 + STOP_BUDGET_MS
+    timeouts = sorted(name for name, step in hung["steps"].items() if step["result"] == "timeout")
+    print(f"组件卡住: 退出 {hung['seconds'] * 1000:.1f}ms（预算 {hang_budget:.0f}ms）  超时组件 {', '.join(timeouts) or '无'}")
+    if hung["seconds"] * 1000 > hang_budget:
+        failures.append(f"组件卡住时退出 {hung['seconds'] * 1000:.1f}ms，超出预算 {hang_budget:.0f}ms")
+    if timeouts != ["cursor_indicator", "tray"]:
+        failures.append(f"卡住的组件应记为超时，实际: {timeouts}")
+
+    for result in results + [hung]:
+        if not result["enabled"] or result["restore"] is None:
+            failures.append("退出后触控板未恢复")
+            break
+        if not result["restored_first"] or result["restore"] * 1000 > RESTORE_BUDGET_MS:
+            failures.append(f"触控板没有最先恢复（开始退出后 {result['restore'] * 1000:.1f}ms）")
+            break
+
+    for failure in failures:
+        print(f"失败: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
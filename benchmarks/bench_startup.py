@@ -0,0 +1,128 @@
+"""
+启动耗时基准测试
+
+1. 使用 python -X importtime 统计导入touchpad_controller的耗时分布，
+   并检查启动路径上没有提前加载图形界面库
+2. 统计从进程启动到键盘钩子注册完成的耗时（Linux下需要root权限）
+
+超出预算时以非零状态码退出，可直接用于CI检查。
+
+用法:
+    python benchmarks/bench_startup.py [--skip-hook]
+"""
+import os
+import re
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# 导入touchpad_controller的累计耗时预算（毫秒）
+IMPORT_BUDGET_MS = 150
+# 进程启动到钩子注册完成的耗时预算（毫秒）
+HOOK_BUDGET_MS = 400
+# 启动路径上不允许出现的图形界面模块
+GUI_MODULES = ("tkinter", "PIL", "pystray", "pyautogui", "pynput", "gi")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+# 导入可嵌入API模块（service）的耗时预算（毫秒），导入本身不应有任何副作用
+SERVICE_IMPORT_BUDGET_MS = 5
+
+HOOK_SCRIPT = """
+from setting import DEFAULT_CONFIG
+from touchpad_controller import TouchpadController
+controller = TouchpadController(DEFAULT_CONFIG, gui=False)
+controller.register_hooks()
+print("HOOK_READY", flush=True)
+controller._cleanup_keyboard_hook()
+"""
+
+
+def measure_imports(module="touchpad_controller", preload=""):
+    """
+    统计导入耗时
+
+    参数:
+        module: 要导入的模块名
+        preload: 预先导入的模块（如调用方通常已加载的标准库），不计入耗时
+
+    返回:
+        list: (累计耗时微秒, 模块名, 嵌套深度) 列表
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"{preload}import {module}"],
+        cwd=SRC_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        raise SystemExit(f"导入{module}失败")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            cumulative = int(match.group(2))
+            depth = len(match.group(3)) // 2
+            entries.append((cumulative, match.group(4), depth))
+    return entries
+
+
+def measure_hook_registration():
+    """
+    统计进程启动到钩子注册完成的耗时
+
+    返回:
+        float: 耗时（毫秒）
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", HOOK_SCRIPT],
+        cwd=SRC_DIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline()
+    elapsed = (time.perf_counter() - start) * 1000
+    _, stderr = process.communicate()
+    if not line.startswith("HOOK_READY"):
+        print(stderr)
+        raise SystemExit("钩子注册失败（Linux下需要root权限）")
+    return elapsed
+
+
+def main():
+    failures = []
+
+    entries = measure_imports()
+    total_ms = next(us for us, name, _ in entries if name == "touchpad_controller") / 1000
+    print(f"导入touchpad_controller: {total_ms:.1f} ms (预算 {IMPORT_BUDGET_MS} ms)")
+    print("耗时最多的顶层依赖:")
+    top_level = sorted((e for e in entries if e[2] <= 1), reverse=True)[:10]
+    for us, name, _ in top_level:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    loaded_gui = sorted({name for _, name, _ in entries if name.split(".")[0] in GUI_MODULES})
+    if loaded_gui:
+        failures.append(f"启动路径加载了图形界面模块: {', '.join(loaded_gui)}")
+    if total_ms > IMPORT_BUDGET_MS:
+        failures.append(f"导入耗时 {total_ms:.1f} ms 超出预算")
+
+    service_entries = measure_imports("service", preload="import logging, threading; ")
+    service_ms = next(us for us, name, _ in service_entries if name == "service") / 1000
+    print(f"导入service: {service_ms:.1f} ms (预算 {SERVICE_IMPORT_BUDGET_MS} ms)")
+    if service_ms > SERVICE_IMPORT_BUDGET_MS:
+        failures.append(f"导入service耗时 {service_ms:.1f} ms 超出预算")
+
+    if "--skip-hook" not in sys.argv:
+        hook_ms = measure_hook_registration()
+        print(f"进程启动到钩子注册完成: {hook_ms:.1f} ms (预算 {HOOK_BUDGET_MS} ms)")
+        if hook_ms > HOOK_BUDGET_MS:
+            failures.append(f"钩子注册耗时 {hook_ms:.1f} ms 超出预算")
+
+    for failure in failures:
+        print(f"失败: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
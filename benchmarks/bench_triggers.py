@@ -0,0 +1,143 @@
+"""
+触发键匹配开销基准测试
+
+用同一段模拟按键事件流分别驱动只有1个绑定（f1）和有100个绑定（f1加99个组合键）的TriggerMatcher，
+比较每个事件的平均处理时间。前缀树按(键码, 修饰键状态)查找下一状态，每个事件的开销应与绑定数量无关。
+
+1. 普通输入流：字母和数字输入中夹杂f1，两种情况下触发次数相同，用于比较开销随绑定数量的变化
+2. 混合输入流：再夹杂组合键和双击，100个绑定时大量触发，仅检查每个事件的绝对开销
+
+每个事件的开销超出预算，或100个绑定比1个绑定慢太多时以非零状态码退出，可直接用于CI检查。
+
+用法:
+    python benchmarks/bench_triggers.py [--events N] [--repeat N]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+from keycodes import codes_for
+from triggers import TriggerMatcher
+
+# 每个事件的开销预算（微秒）
+EVENT_BUDGET_US = 2.0
+# 100个绑定相对1个绑定允许的最大开销比例（含计时噪声）
+SCALING_BUDGET = 1.3
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+MODIFIERS = ("ctrl", "shift", "alt", "ctrl+shift", "ctrl+alt")
+
+
+def make_bindings(count):
+    """
+    生成一组互不冲突的绑定：f1、组合键和双击
+
+    参数:
+        count: 绑定数量
+
+    返回:
+        dict: 用途 -> 触发键
+    """
+    triggers = ["f1"]
+    triggers += [f"{modifier}+{letter}" for modifier in MODIFIERS for letter in LETTERS]
+    triggers += [f"f{n}, f{n}" for n in range(13, 25)]
+    return {f"binding{index}": trigger for index, trigger in enumerate(triggers[:count])}
+
+
+def make_events(count, mixed, seed=1):
+    """
+    生成模拟按键事件流：大部分是普通字母输入，夹杂f1
+
+    参数:
+        count: 按下/释放事件的数量
+        mixed: 是否夹杂组合键和双击
+        seed: 随机种子，保证每次测试的事件流相同
+
+    返回:
+        list: (键码, 是否按下, 时间)元组列表
+    """
+    rng = random.Random(seed)
+    events = []
+    now = 0.0
+    while len(events) < count:
+        now += rng.uniform(0.03, 0.15)
+        roll = rng.random()
+        if mixed and roll < 0.1:
+            modifier = codes_for(rng.choice(("left ctrl", "left shift", "left alt")))[0]
+            key = codes_for(rng.choice(LETTERS))[0]
+            events += [(modifier, True, now), (key, True, now + 0.01), (key, False, now + 0.02),
+                       (modifier, False, now + 0.03)]
+        elif mixed and roll < 0.15:
+            key = codes_for(f"f{rng.randint(13, 24)}")[0]
+            events += [(key, True, now), (key, False, now + 0.05), (key, True, now + 0.1), (key, False, now + 0.15)]
+        else:
+            key = codes_for(rng.choice(LETTERS + "".join(str(n) for n in range(10))))[0]
+            if rng.random() < 0.05:
+                key = codes_for("f1")[0]
+            events += [(key, True, now), (key, False, now + 0.02)]
+    return events
+
+
+def measure(bindings, events, repeat):
+    """
+    测量每个事件的平均处理时间
+
+    参数:
+        bindings: 绑定字典
+        events: 事件流
+        repeat: 重复次数，取最快的一次
+
+    返回:
+        tuple: (每个事件的耗时（微秒）, 触发次数)
+    """
+    best = None
+    triggered = 0
+    for _ in range(repeat):
+        matcher = TriggerMatcher()
+        matcher.compile(bindings)
+        feed = matcher.feed
+        triggered = 0
+        start = time.perf_counter()
+        # 所有事件都交给匹配器（与keyboard库输入源一致），比较的是单次状态转移的开销
+        for code, down, now in events:
+            if feed(code, down, now) is not None:
+                triggered += 1
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(events) * 1e6, triggered
+
+
+def main():
+    parser = argparse.ArgumentParser(description="触发键匹配开销基准测试")
+    parser.add_argument("--events", type=int, default=200000, help="事件数量")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    args = parser.parse_args()
+
+    failures = []
+    results = {}
+    for mixed, label in ((False, "普通输入"), (True, "混合输入")):
+        events = make_events(args.events, mixed)
+        for count in (1, 100):
+            per_event, triggered = measure(make_bindings(count), events, args.repeat)
+            results[mixed, count] = per_event
+            print(f"{label} {count:>3}个绑定: 每个事件 {per_event:.3f}us, 触发 {triggered} 次")
+            if per_event > EVENT_BUDGET_US:
+                failures.append(f"{label}{count}个绑定时每个事件 {per_event:.3f}us 超出预算 {EVENT_BUDGET_US}us")
+
+    ratio = results[False, 100] / results[False, 1]
+    print(f"100个绑定/1个绑定: {ratio:.2f}")
+    if ratio > SCALING_BUDGET:
+        failures.append(f"开销随绑定数量增长 {ratio:.2f} 倍，超出预算 {SCALING_BUDGET}")
+
+    for failure in failures:
+        print(f"失败: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
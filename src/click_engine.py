@@ -0,0 +1,268 @@
+import platform
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 支持的鼠标按钮，顺序即特权助手协议中的按钮编号
+BUTTONS = ("left", "right", "middle", "back", "forward")
+
+class ClickEngine:
+    """
+    鼠标点击引擎基类
+
+    负责注入鼠标按钮、指针相对移动和滚轮。记录按下中的按钮，保证同一按钮不会重复按下或释放，
+    退出触控板模式时可一次释放全部按钮
+    """
+    name = None
+
+    def __init__(self):
+        """初始化按钮状态和计数"""
+        self.held = set()  # 按下中的按钮
+        self.presses = 0
+
+    def press(self, button):
+        """
+        按下鼠标按钮
+
+        参数:
+            button: 按钮名称，见BUTTONS
+        """
+        if button in self.held:
+            return
+        self._send(button, True)
+        self.held.add(button)
+        self.presses += 1
+
+    def release(self, button):
+        """
+        释放鼠标按钮
+
+        参数:
+            button: 按钮名称，见BUTTONS
+        """
+        if button not in self.held:
+            return
+        self.held.discard(button)
+        self._send(button, False)
+
+    def release_all(self):
+        """释放所有按下中的按钮"""
+        for button in list(self.held):
+            try:
+                self.release(button)
+            except Exception as e:
+                logger.error(f"释放{button}按钮失败: {e}")
+
+    def _send(self, button, down):
+        """
+        发送按钮事件
+
+        参数:
+            button: 按钮名称
+            down: True按下，False释放
+        """
+        raise NotImplementedError
+
+    def move(self, dx, dy):
+        """
+        相对移动指针
+
+        参数:
+            dx: 水平位移（像素）
+            dy: 垂直位移（像素）
+        """
+        raise NotImplementedError
+
+    def scroll(self, dx, dy):
+        """
+        滚动滚轮
+
+        参数:
+            dx: 水平滚动量（1/120格，向右为正）
+            dy: 垂直滚动量（1/120格，向上为正）
+        """
+        raise NotImplementedError
+
+    def get_stats(self):
+        """
+        获取点击统计信息
+
+        返回:
+            dict: 引擎名称、按下次数和按下中的按钮
+        """
+        return {"name": self.name, "presses": self.presses, "held": sorted(self.held)}
+
+    def close(self):
+        """释放所有按钮并关闭引擎"""
+        self.release_all()
+
+
+class PynputClickEngine(ClickEngine):
+    """
+    基于pynput的点击引擎
+
+    复用触控板控制器上延迟创建的pynput鼠标控制器，Linux下经过Xlib/XTest
+    """
+    name = "pynput"
+
+    def __init__(self, controller):
+        """
+        参数:
+            controller: 触控板控制器，提供mouse属性
+        """
+        super().__init__()
+        self.controller = controller
+        self.buttons = {}  # 按钮名称 -> pynput按钮，首次使用时解析
+        # Windows下pynput按WHEEL_DELTA换算，支持不足一格的滚动；X11只能整格滚动
+        self.fractional_scroll = platform.system() == "Windows"
+        self.scroll_remainder = [0, 0]
+
+    def _send(self, button, down):
+        """通过pynput按下或释放按钮"""
+        target = self.buttons.get(button)
+        if target is None:
+            target = self.buttons[button] = self._resolve(button)
+        if down:
+            self.controller.mouse.press(target)
+        else:
+            self.controller.mouse.release(target)
+
+    def move(self, dx, dy):
+        """通过pynput相对移动指针"""
+        self.controller.mouse.move(dx, dy)
+
+    def scroll(self, dx, dy):
+        """通过pynput滚动，不支持不足一格的滚动时累积到满一格再输出"""
+        from scroll_engine import WHEEL_UNITS
+        if self.fractional_scroll:
+            self.controller.mouse.scroll(dx / WHEEL_UNITS, dy / WHEEL_UNITS)
+            return
+        detents = []
+        for index, delta in enumerate((dx, dy)):
+            total = self.scroll_remainder[index] + delta
+            count = int(total / WHEEL_UNITS)
+            self.scroll_remainder[index] = total - count * WHEEL_UNITS
+            detents.append(count)
+        if any(detents):
+            self.controller.mouse.scroll(*detents)
+
+    @staticmethod
+    def _resolve(button):
+        """
+        获取按钮名称对应的pynput按钮
+
+        参数:
+            button: 按钮名称
+
+        返回:
+            pynput.mouse.Button: 按钮
+
+        异常:
+            ValueError: 当前平台的pynput不支持该按钮
+        """
+        from pynput import mouse
+        # 后退/前进键在Windows下为x1/x2，在X11下为button8/button9
+        candidates = {"back": ("x1", "button8"), "forward": ("x2", "button9")}.get(button, (button,))
+        for name in candidates:
+            target = getattr(mouse.Button, name, None)
+            if target is not None:
+                return target
+        raise ValueError(f"当前平台不支持{button}按钮")
+
+
+class UinputClickEngine(ClickEngine):
+    """
+    基于uinput虚拟指针的点击引擎（Linux）
+
+    每次按下或释放写入预先打包好的EV_KEY+SYN_REPORT帧，只需一次write系统调用；
+    一次移动的x和y位移合并在同一帧中；滚动输出高精度滚轮事件，累计满一格时在同一帧中附带普通滚轮事件，
+    兼容不支持高精度滚轮的程序
+    """
+    name = "uinput"
+
+    def __init__(self, pointer=None):
+        """
+        参数:
+            pointer: VirtualPointer实例，None表示新建
+
+        异常:
+            UinputUnavailableError: 无法创建虚拟指针设备
+        """
+        from uinput_device import (BUTTON_CODES, REL_HWHEEL, REL_HWHEEL_HI_RES, REL_WHEEL, REL_WHEEL_HI_RES,
+                                   REL_X, REL_Y, VirtualPointer, pack_frames)
+        from scroll_engine import WHEEL_UNITS
+        from controllers.input_devices import EV_KEY, EV_REL
+        super().__init__()
+        self.pack_frames = pack_frames
+        self.rel_event = EV_REL
+        self.axes = (REL_X, REL_Y)
+        # (高精度滚轮轴, 普通滚轮轴)，依次为水平和垂直
+        self.wheel_axes = ((REL_HWHEEL_HI_RES, REL_HWHEEL), (REL_WHEEL_HI_RES, REL_WHEEL))
+        self.wheel_units = WHEEL_UNITS
+        self.wheel_remainder = [0, 0]
+        self.pointer = pointer if pointer is not None else VirtualPointer()
+        self.frames = {(button, down): pack_frames([[(EV_KEY, code, int(down))]])
+                       for button, code in BUTTON_CODES.items() for down in (True, False)}
+
+    def _send(self, button, down):
+        """写入按钮事件帧"""
+        self.pointer.write(self.frames[button, down])
+
+    def move(self, dx, dy):
+        """写入一帧相对移动事件"""
+        frame = [(self.rel_event, axis, delta) for axis, delta in zip(self.axes, (dx, dy)) if delta]
+        self.pointer.write(self.pack_frames([frame]))
+
+    def scroll(self, dx, dy):
+        """写入一帧滚轮事件"""
+        frame = []
+        for index, delta in enumerate((dx, dy)):
+            if not delta:
+                continue
+            hi_res_axis, axis = self.wheel_axes[index]
+            total = self.wheel_remainder[index] + delta
+            detents = int(total / self.wheel_units)
+            self.wheel_remainder[index] = total - detents * self.wheel_units
+            frame.append((self.rel_event, hi_res_axis, delta))
+            if detents:
+                frame.append((self.rel_event, axis, detents))
+        if frame:
+            self.pointer.write(self.pack_frames([frame]))
+
+    def get_stats(self):
+        """获取点击统计信息和写入次数"""
+        return dict(super().get_stats(), writes=self.pointer.writes)
+
+    def close(self):
+        """释放所有按钮并销毁虚拟设备"""
+        super().close()
+        self.pointer.close()
+
+
+def create_click_engine(name, controller):
+    """
+    创建鼠标点击引擎
+
+    参数:
+        name: "auto"、"uinput"或"pynput"；auto和uinput在Linux下依次尝试直接打开/dev/uinput、
+              通过特权助手使用其虚拟指针，都不可用时改用pynput
+        controller: 触控板控制器，pynput引擎使用其mouse属性
+
+    返回:
+        ClickEngine: 点击引擎实例
+    """
+    if name in ("auto", "uinput") and platform.system() == "Linux":
+        from uinput_device import UinputUnavailableError
+        from helper_client import HelperClickEngine, HelperError
+        log = logger.warning if name == "uinput" else logger.info
+        try:
+            return UinputClickEngine()
+        except UinputUnavailableError as e:
+            logger.debug(f"无法直接使用uinput: {e}")
+        try:
+            return HelperClickEngine()
+        except (OSError, HelperError) as e:
+            log(f"无法使用uinput点击引擎（{e}），改用pynput")
+    elif name == "uinput":
+        logger.warning("uinput点击引擎仅支持Linux，改用pynput")
+    return PynputClickEngine(controller)
@@ -0,0 +1,312 @@
+import os
+import json
+import time
+import shutil
+import stat
+import tempfile
+import threading
+import logging
+import supervisor
+
+logger = logging.getLogger(__name__)
+
+# 合并写入的等待时间（秒）：这段时间内的多次更新只写一次磁盘
+COALESCE_DELAY = 0.2
+
+class ConfigStore:
+    """
+    配置存储
+
+    在内存中保存已解析的配置，读取不访问磁盘。
+    修改后由后台写入线程合并一段时间内的多次更新，
+    再以“临时文件 + fsync + 重命名”的方式原子写入，避免写入中途崩溃损坏配置文件。
+    """
+    def __init__(self, path, defaults):
+        """
+        初始化配置存储
+
+        参数:
+            path: 配置文件路径
+            defaults: 默认配置字典
+        """
+        self.path = path
+        self.defaults = dict(defaults)
+        self.config = dict(defaults)
+        self.condition = threading.Condition()
+        self.dirty = False  # 是否有待写入的修改
+        self.pending = set()  # 尚未写入磁盘的配置项
+        self.last_written = None  # 最近一次写入的文件标识(设备, inode, 修改时间, 大小)
+        self.backup_pending = False  # 磁盘上的文件无效，首次写入前先备份
+        self.closed = False
+        self.writer_thread = None
+
+    def load(self):
+        """
+        从磁盘读取配置
+
+        文件不存在时写入默认配置；文件损坏时在内存中使用默认配置，
+        但不覆盖原文件，以便用户修复
+
+        返回:
+            dict: 读取到的原始配置字典
+
+        异常:
+            ValueError: 配置文件内容无法解析
+        """
+        try:
+            config = self.read()
+        except FileNotFoundError:
+            logger.warning(f"配置文件不存在，写入默认配置: {self.path}")
+            self.replace(self.defaults)
+            return dict(self.defaults)
+        return config
+
+    def read(self):
+        """
+        直接从磁盘读取并解析配置文件（不修改内存中的配置）
+
+        返回:
+            dict: 配置字典
+
+        异常:
+            FileNotFoundError: 文件不存在
+            ValueError: 配置文件内容无法解析
+        """
+        with open(self.path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        if not isinstance(config, dict):
+            raise ValueError("配置文件顶层必须是JSON对象")
+        return config
+
+    def snapshot(self):
+        """
+        获取内存中配置的副本
+
+        返回:
+            dict: 配置字典
+        """
+        with self.condition:
+            return dict(self.config)
+
+    def set_snapshot(self, config):
+        """
+        替换内存中的配置但不写入磁盘（用于从磁盘重新加载后同步）
+
+        参数:
+            config: 配置字典
+        """
+        with self.condition:
+            self.config = dict(config)
+
+    def mark_invalid(self):
+        """标记磁盘上的配置文件无效：内存中使用默认配置，首次写入前把原文件备份为.bad文件"""
+        with self.condition:
+            self.backup_pending = True
+
+    def merge_external(self, config):
+        """
+        用被外部修改后从磁盘重新读取的配置替换内存中的配置，尚未写入的修改优先保留
+
+        合并写入等待期间的修改（如外部编辑后立即切换模式）不会被丢弃，
+        随后写入的是外部修改与这些修改合并后的配置
+
+        参数:
+            config: 从磁盘读取并校验后的配置字典
+
+        返回:
+            dict: 合并后的配置
+        """
+        with self.condition:
+            merged = dict(config)
+            merged.update((key, self.config[key]) for key in self.pending if key in self.config)
+            self.config = merged
+            self.backup_pending = False
+            return dict(merged)
+
+    def is_own_write(self):
+        """
+        检查磁盘上的配置文件是否就是本存储最近一次写入的文件，用于忽略自身写入引起的文件变化
+
+        返回:
+            bool: 文件未被其他程序替换或修改时为True
+        """
+        try:
+            info = os.stat(self.path)
+        except OSError:
+            return False
+        return self.last_written == (info.st_dev, info.st_ino, info.st_mtime_ns, info.st_size)
+
+    def update(self, key, value):
+        """
+        修改单个配置项并安排写入
+
+        参数:
+            key: 配置项名称
+            value: 新值
+        """
+        with self.condition:
+            self.config[key] = value
+            self.pending.add(key)
+            self._schedule_write()
+
+    def replace(self, config):
+        """
+        替换整个配置并安排写入
+
+        参数:
+            config: 配置字典
+        """
+        with self.condition:
+            self.config = dict(config)
+            self.pending.update(config)
+            self._schedule_write()
+
+    def flush(self):
+        """
+        立即写入待保存的修改
+
+        返回:
+            bool: 是否成功（没有待写入的修改时返回True）
+        """
+        with self.condition:
+            if not self.dirty:
+                return True
+            config = dict(self.config)
+            self.dirty = False
+            self.pending.clear()
+        return self._write(config)
+
+    def close(self):
+        """停止写入线程，并写入尚未保存的修改"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        if self.writer_thread is not None:
+            self.writer_thread.join(1.0)
+            self.writer_thread = None
+        self.flush()
+
+    def _schedule_write(self):
+        """标记有待写入的修改并唤醒写入线程（调用方需持有condition）"""
+        self.dirty = True
+        if self.closed:
+            return
+        if self.writer_thread is None:
+            self.writer_thread = supervisor.spawn(self._writer_loop, "config-writer", restart=True)
+        self.condition.notify()
+
+    def _writer_loop(self):
+        """写入线程：等待修改，合并一段时间内的多次更新后写入"""
+        while True:
+            with self.condition:
+                while not self.dirty and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+
+            # 等待后续更新，合并为一次写入；关闭时不再等待，由close立即写入
+            deadline = time.monotonic() + COALESCE_DELAY
+            with self.condition:
+                while not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                if self.closed:
+                    return
+                if not self.dirty:
+                    continue
+                config = dict(self.config)
+                self.dirty = False
+                self.pending.clear()
+            self._write(config)
+
+    def _write(self, config):
+        """
+        原子写入配置文件
+
+        参数:
+            config: 配置字典
+
+        返回:
+            bool: 是否成功
+        """
+        # 配置文件是符号链接时写入链接指向的文件，保留链接本身
+        path = os.path.realpath(self.path)
+        directory = os.path.dirname(path)
+        temp_path = None
+        try:
+            if self.backup_pending:
+                self._backup()
+            fd, temp_path = tempfile.mkstemp(prefix=".configure.", suffix=".tmp", dir=directory)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                # mkstemp创建的文件权限为0600，改为原文件的权限
+                if hasattr(os, "fchmod"):
+                    os.fchmod(f.fileno(), self._file_mode(path))
+                json.dump(config, f, indent=4, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+                written = os.fstat(f.fileno())
+            os.replace(temp_path, path)
+            self.last_written = (written.st_dev, written.st_ino, written.st_mtime_ns, written.st_size)
+            temp_path = None
+            self._fsync_directory(directory)
+            logger.info(f"配置已保存到: {self.path}")
+            return True
+        except Exception as e:
+            logger.error(f"保存配置失败: {e}")
+            return False
+        finally:
+            if temp_path is not None:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _file_mode(path):
+        """
+        获取写入配置文件时使用的权限
+
+        参数:
+            path: 配置文件路径
+
+        返回:
+            int: 原文件的权限；文件不存在时按umask计算新建文件的默认权限
+        """
+        try:
+            return stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            return 0o666 & ~umask
+
+    def _backup(self):
+        """
+        把无效的配置文件复制为.bad文件，避免首次写入覆盖用户的配置
+
+        异常:
+            OSError: 备份失败，此时不写入配置文件
+        """
+        backup_path = self.path + ".bad"
+        try:
+            shutil.copy2(self.path, backup_path)
+            logger.warning(f"原配置文件无效，已备份到: {backup_path}")
+        except FileNotFoundError:
+            pass
+        self.backup_pending = False
+
+    def _fsync_directory(self, directory):
+        """
+        同步目录项，确保重命名本身已落盘（Windows不支持打开目录，直接跳过）
+
+        参数:
+            directory: 目录路径
+        """
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
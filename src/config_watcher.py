@@ -0,0 +1,104 @@
+import os
+import time
+import select
+import platform
+import logging
+import supervisor
+from inotify_util import IN_CLOSE_WRITE, IN_MOVED_TO, IN_CREATE, watch_directory, read_events
+
+logger = logging.getLogger(__name__)
+
+# 监听掩码：编辑器保存时通常直接写入，或写临时文件后重命名覆盖
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# 去抖时间（秒）：最后一个事件之后保持安静这么久才重新加载
+DEBOUNCE_TIME = 0.25
+
+def is_supported():
+    """
+    检查当前平台是否支持inotify
+
+    返回:
+        bool: 是否支持
+    """
+    return platform.system() == "Linux"
+
+
+class ConfigWatcher:
+    """
+    配置文件监视器
+
+    使用inotify监视配置文件所在目录（兼容写临时文件再重命名的保存方式），
+    对编辑器保存时产生的一连串事件去抖后，在监视线程中调用回调，
+    由回调负责解析和校验，从而不占用键盘钩子线程。
+    """
+    def __init__(self, config_path, on_change):
+        """
+        初始化配置文件监视器
+
+        参数:
+            config_path: 配置文件路径
+            on_change: 配置文件变化且保持稳定后调用的回调（无参数）
+        """
+        self.config_path = os.path.abspath(config_path)
+        self.directory, filename = os.path.split(self.config_path)
+        self.filename = os.fsencode(filename)
+        self.on_change = on_change
+        self.inotify_fd = None
+        self.watch_thread = None
+        self.stop_reader, self.stop_writer = os.pipe()
+
+    def start(self):
+        """创建inotify实例并启动监视线程"""
+        self.inotify_fd = watch_directory(self.directory, WATCH_MASK)
+        self.watch_thread = supervisor.spawn(self._watch, "config-watcher", restart=True)
+        logger.info(f"配置文件监视已启动: {self.config_path}")
+
+    def stop(self):
+        """停止监视线程并释放inotify实例"""
+        if self.watch_thread is None:
+            return
+        os.write(self.stop_writer, b"\0")
+        self.watch_thread.join(1.0)
+        self.watch_thread = None
+        os.close(self.inotify_fd)
+        os.close(self.stop_reader)
+        os.close(self.stop_writer)
+        self.inotify_fd = None
+        logger.info("配置文件监视已停止")
+
+    def _watch(self):
+        """监视线程主循环：等待事件，去抖后触发回调"""
+        poller = select.poll()
+        poller.register(self.inotify_fd, select.POLLIN)
+        poller.register(self.stop_reader, select.POLLIN)
+        deadline = None  # 去抖截止时间，None表示没有待处理的变化
+
+        while True:
+            if deadline is None:
+                timeout = None
+            else:
+                timeout = max(0, (deadline - time.monotonic()) * 1000)
+
+            for fd, _ in poller.poll(timeout):
+                if fd == self.stop_reader:
+                    return
+                if self._read_events():
+                    deadline = time.monotonic() + DEBOUNCE_TIME
+
+            if deadline is not None and time.monotonic() >= deadline:
+                deadline = None
+                try:
+                    self.on_change()
+                except Exception as e:
+                    logger.error(f"处理配置文件变化失败: {e}")
+
+    def _read_events(self):
+        """
+        读取并解析所有待处理的inotify事件
+
+        返回:
+            bool: 是否有事件涉及配置文件
+        """
+        return any(name == self.filename and mask & WATCH_MASK
+                   for name, mask in read_events(self.inotify_fd))
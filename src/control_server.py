@@ -0,0 +1,387 @@
+import os
+import sys
+import json
+import errno
+import struct
+import socket
+import selectors
+import tempfile
+import logging
+import supervisor
+
+logger = logging.getLogger(__name__)
+
+# 控制协议命令
+COMMANDS = ("get-state", "set-active", "toggle-mode", "reload", "stats", "toggle", "show-settings", "exit")
+
+# 单条请求的最大长度（字节）
+MAX_REQUEST_SIZE = 4096
+
+# 单个连接积压的响应上限（字节）：客户端只发请求不读取响应时超过即断开
+MAX_PENDING_REPLY = 1 << 20
+
+class InstanceRunningError(RuntimeError):
+    """控制套接字已被另一个运行中的实例占用"""
+
+
+def owner_uid():
+    """
+    获取服务所属用户的uid
+
+    通过sudo运行时使用调用sudo的用户，使普通用户的客户端能找到同一个套接字
+
+    返回:
+        int: 用户uid
+    """
+    return int(os.environ.get("SUDO_UID", os.getuid()))
+
+def default_socket_path():
+    """
+    获取默认的控制套接字地址
+
+    Linux下使用抽象命名空间套接字（进程退出时自动释放，可兼作单实例锁），
+    其他平台优先使用$XDG_RUNTIME_DIR，否则使用临时目录并以uid区分
+
+    返回:
+        str: 套接字地址，以空字符开头表示抽象命名空间
+    """
+    if sys.platform.startswith("linux"):
+        return f"\0betterTouchpad-{owner_uid()}"
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "betterTouchpad.sock")
+    return os.path.join(tempfile.gettempdir(), f"betterTouchpad-{owner_uid()}.sock")
+
+def is_supported():
+    """
+    检查当前平台是否支持Unix域套接字
+
+    返回:
+        bool: 是否支持
+    """
+    return hasattr(socket, "AF_UNIX")
+
+def send_request(command, path=None, timeout=1.0, **args):
+    """
+    向运行中的服务发送一条控制请求
+
+    协议为每行一个JSON对象：请求 {"cmd": 命令, ...参数}，
+    响应 {"ok": bool, ...结果} 或 {"ok": false, "error": 错误信息}
+
+    参数:
+        command: 命令名称，见COMMANDS
+        path: 套接字路径，None表示使用默认路径
+        timeout: 连接和等待响应的超时时间（秒）
+        **args: 命令参数
+
+    返回:
+        dict: 服务端响应
+
+    异常:
+        OSError: 无法连接到服务
+        ValueError: 服务在响应前关闭了连接，或响应不是有效的JSON对象（如套接字被其他程序占用）
+    """
+    request = dict(args, cmd=command)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(path or default_socket_path())
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = client.recv(MAX_REQUEST_SIZE)
+            if not chunk:
+                break
+            data += chunk
+    if not data.endswith(b"\n"):
+        raise ValueError("服务在返回完整响应前关闭了连接")
+    response = json.loads(data.decode("utf-8"))
+    if not isinstance(response, dict):
+        raise ValueError("服务返回的响应格式错误")
+    return response
+
+
+class ControlServer:
+    """
+    本地控制服务
+
+    在Unix域套接字上监听请求，以行分隔的JSON进行请求/响应，
+    让脚本无需启动完整程序即可查询和切换触控板状态。
+    所有连接由单个线程通过selectors多路复用处理。
+
+    套接字在bind()时即被占用，可在程序启动早期作为单实例锁使用，
+    处理器就绪后再调用start()开始服务。
+    """
+    def __init__(self, path=None):
+        """
+        初始化控制服务
+
+        参数:
+            path: 套接字路径，None表示使用默认路径
+        """
+        self.handler = None
+        self.path = path or default_socket_path()
+        self.abstract = self.path.startswith("\0")
+        self.selector = None
+        self.server_socket = None
+        self.server_thread = None
+        self.running = False
+        self.buffers = {}  # 连接 -> 未处理完的请求数据
+        self.outgoing = {}  # 连接 -> 尚未发出的响应数据
+        # 用于唤醒selector以便退出
+        self.wakeup_reader, self.wakeup_writer = socket.socketpair()
+
+    def bind(self):
+        """
+        绑定并监听套接字
+
+        异常:
+            InstanceRunningError: 套接字已被另一个运行中的实例占用
+        """
+        if not self.abstract:
+            self._remove_stale_socket()
+
+        server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # 仅允许当前用户访问套接字文件
+        old_umask = os.umask(0o177)
+        try:
+            server_socket.bind(self.path)
+        except OSError as e:
+            server_socket.close()
+            if e.errno == errno.EADDRINUSE:
+                raise InstanceRunningError(f"控制套接字已被其他实例占用: {self.path!r}") from e
+            raise
+        finally:
+            os.umask(old_umask)
+        server_socket.listen(8)
+        server_socket.setblocking(False)
+        self.server_socket = server_socket
+
+    def start(self, handler):
+        """
+        启动服务线程，尚未绑定时先绑定套接字
+
+        参数:
+            handler: TouchpadController实例，提供状态查询和控制方法
+        """
+        self.handler = handler
+        if self.server_socket is None:
+            self.bind()
+
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.server_socket, selectors.EVENT_READ, self._accept)
+        self.selector.register(self.wakeup_reader, selectors.EVENT_READ, None)
+
+        self.running = True
+        self.server_thread = supervisor.spawn(self._serve, "control-server", restart=True)
+        logger.info(f"控制服务已启动: {self.path}")
+
+    def stop(self):
+        """停止服务线程并删除套接字文件"""
+        if not self.running:
+            if self.server_socket is not None:
+                self.server_socket.close()
+                self.server_socket = None
+            return
+        self.running = False
+        try:
+            self.wakeup_writer.send(b"\0")
+        except OSError:
+            pass
+        if self.server_thread:
+            self.server_thread.join(1.0)
+
+        for key in list(self.selector.get_map().values()):
+            key.fileobj.close()
+        self.selector.close()
+        self.wakeup_writer.close()
+        self.server_socket = None
+        if not self.abstract:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        logger.info("控制服务已停止")
+
+    def _remove_stale_socket(self):
+        """删除上次异常退出遗留的套接字文件"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            send_request("get-state", self.path, timeout=0.2)
+        except OSError:
+            os.unlink(self.path)
+            logger.info(f"已删除遗留的控制套接字: {self.path}")
+        except ValueError:
+            raise InstanceRunningError(f"控制套接字已被其他程序占用: {self.path}")
+        else:
+            raise InstanceRunningError(f"控制套接字已被其他实例占用: {self.path}")
+
+    def _serve(self):
+        """服务线程主循环"""
+        while self.running:
+            for key, mask in self.selector.select():
+                if key.data is None:
+                    # 收到退出唤醒
+                    return
+                key.data(key.fileobj, mask)
+
+    def _accept(self, server_socket, mask):
+        """接受新连接"""
+        try:
+            conn, _ = server_socket.accept()
+        except BlockingIOError:
+            return
+        if not self._is_trusted_peer(conn):
+            conn.close()
+            return
+        conn.setblocking(False)
+        self.buffers[conn] = b""
+        self.outgoing[conn] = bytearray()
+        self.selector.register(conn, selectors.EVENT_READ, self._on_ready)
+
+    def _is_trusted_peer(self, conn):
+        """
+        检查对端进程是否属于服务所属用户或root
+
+        抽象命名空间套接字没有文件权限保护，因此通过SO_PEERCRED校验对端身份
+
+        参数:
+            conn: 已接受的连接
+
+        返回:
+            bool: 是否允许该连接
+        """
+        if not hasattr(socket, "SO_PEERCRED"):
+            return True
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        pid, uid, _ = struct.unpack("3i", creds)
+        if uid in (0, os.getuid(), owner_uid()):
+            return True
+        logger.warning(f"拒绝来自其他用户的控制连接: pid={pid}, uid={uid}")
+        return False
+
+    def _on_ready(self, conn, mask):
+        """连接可写时先发送积压的响应，可读时读取请求"""
+        if mask & selectors.EVENT_WRITE and not self._flush(conn):
+            return
+        if mask & selectors.EVENT_READ:
+            self._read(conn)
+
+    def _read(self, conn):
+        """读取连接上的请求并逐行处理"""
+        try:
+            data = conn.recv(MAX_REQUEST_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+
+        if not data:
+            self._close(conn)
+            return
+
+        buffer = self.buffers[conn] + data
+        replies = []
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            response = self._handle_line(line)
+            replies.append(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+        if len(buffer) > MAX_REQUEST_SIZE:
+            logger.warning("控制请求过长，关闭连接")
+            self._close(conn)
+            return
+        self.buffers[conn] = buffer
+        if replies:
+            self.outgoing[conn] += b"".join(replies)
+            self._flush(conn)
+
+    def _flush(self, conn):
+        """
+        以非阻塞方式发送积压的响应，发不完时等待连接可写，不阻塞服务线程
+
+        返回:
+            bool: 连接是否仍然打开
+        """
+        pending = self.outgoing[conn]
+        try:
+            sent = conn.send(pending) if pending else 0
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self._close(conn)
+            return False
+        del pending[:sent]
+        if len(pending) > MAX_PENDING_REPLY:
+            logger.warning("控制客户端不读取响应，关闭连接")
+            self._close(conn)
+            return False
+        events = selectors.EVENT_READ | selectors.EVENT_WRITE if pending else selectors.EVENT_READ
+        if self.selector.get_key(conn).events != events:
+            self.selector.modify(conn, events, self._on_ready)
+        return True
+
+    def _close(self, conn):
+        """关闭连接"""
+        self.buffers.pop(conn, None)
+        self.outgoing.pop(conn, None)
+        try:
+            self.selector.unregister(conn)
+        except (KeyError, ValueError):
+            pass
+        conn.close()
+
+    def _handle_line(self, line):
+        """
+        解析并执行一条请求
+
+        参数:
+            line: 请求数据（不含换行符）
+
+        返回:
+            dict: 响应
+        """
+        try:
+            request = json.loads(line.decode("utf-8"))
+            command = request.get("cmd")
+            if command not in COMMANDS:
+                return {"ok": False, "error": f"未知命令: {command}"}
+            result = self._dispatch(command, request)
+            return dict(result, ok=True)
+        except Exception as e:
+            logger.error(f"处理控制请求失败: {e}")
+            return {"ok": False, "error": str(e)}
+
+    def _dispatch(self, command, request):
+        """
+        将命令分发给触控板处理器
+
+        重新加载配置和打开设置窗口等需要在主循环中执行的命令放入命令队列，立即返回当前状态
+
+        参数:
+            command: 命令名称
+            request: 完整请求
+
+        返回:
+            dict: 命令结果
+        """
+        if command == "set-active":
+            if "active" not in request:
+                raise ValueError("set-active 需要 active 参数")
+            self.handler.set_active(bool(request["active"]))
+        elif command == "toggle-mode":
+            self.handler.toggle_mode()
+        elif command == "reload":
+            self.handler.command_queue.put(('reload_config', None))
+        elif command == "toggle":
+            self.handler.toggle_active()
+        elif command == "show-settings":
+            if not self.handler.gui:
+                raise ValueError("无界面模式下没有设置窗口")
+            self.handler.command_queue.put(('open_settings', None))
+        elif command == "exit":
+            self.handler.command_queue.put(('exit', None))
+        elif command == "stats":
+            return self.handler.get_stats()
+        return self.handler.get_state()
@@ -1,9 +1,15 @@
 import platform
 
-def create_controller():
+def create_controller(backend="auto", fallback_backends=(), device_rules=None, exclude=()):
     """
     创建触控板控制器
-    根据当前操作系统创建并返回对应的控制器实例
+    从当前操作系统注册的后端中探测并选择一个，与配置的回退后端组成回退链
+    
+    参数:
+        backend: 配置指定的后端名称，"auto"表示按探测延迟自动选择
+        fallback_backends: 主后端熔断时依次使用的后端名称列表
+        device_rules: 需要控制的设备的匹配规则列表，None表示只控制触控板
+        exclude: 不参与选择的后端名称
     
     返回:
         TouchpadController: 适用于当前操作系统的触控板控制器实例
@@ -11,12 +17,10 @@ def create_controller():
     异常:
         NotImplementedError: 如果当前平台不支持
     """
+    from controllers.registry import select_backend, create_fallbacks
+    from controllers.chain import BackendChain
     system = platform.system()
-    if system == "Windows":
-        from controllers.windows import WindowsTouchpadController
-        return WindowsTouchpadController()
-    elif system == "Linux":
-        from controllers.linux import LinuxTouchpadController
-        return LinuxTouchpadController()
-    else:
-        raise NotImplementedError(f"不支持的平台: {system}")
\ No newline at end of file
+    primary = select_backend(system, backend, device_rules, exclude=exclude)
+    fallback_backends = [name for name in fallback_backends if name not in exclude]
+    fallbacks = create_fallbacks(system, fallback_backends, exclude=primary.backend_name, device_rules=device_rules)
+    return BackendChain([primary] + fallbacks)
\ No newline at end of file
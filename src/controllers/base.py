@@ -1,16 +1,66 @@
-from pynput import mouse
+import threading
 import logging
+from controllers.input_devices import DEFAULT_DEVICE_RULES
 
 logger = logging.getLogger(__name__)
 
+# 并发切换多个设备的工作线程数
+DEVICE_WORKERS = 4
+
+_device_pool = None
+_device_pool_lock = threading.Lock()
+
+def _get_device_pool():
+    """
+    获取并发切换设备的线程池（首次使用时创建）
+    
+    返回:
+        ThreadPoolExecutor: 线程池
+    """
+    global _device_pool
+    with _device_pool_lock:
+        if _device_pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _device_pool = ThreadPoolExecutor(max_workers=DEVICE_WORKERS, thread_name_prefix="device-toggle")
+        return _device_pool
+
 class BaseTouchpadController:
     """
     触控板控制器基类
     定义所有触控板控制器必须实现的接口
+    
+    子类通过controllers.registry.register_backend注册为可选后端，
+    启动时由注册表探测可用性并测量空操作延迟后选择
     """
-    def __init__(self):
-        """初始化控制器并创建鼠标控制器实例"""
-        self.mouse = mouse.Controller()
+    backend_name = None  # 后端名称，注册时设置
+    default_backend = False  # 是否为平台默认后端
+    probe_report = None  # 后端选择时的探测报告
+    
+    def __init__(self, device_rules=None):
+        """
+        初始化控制器，鼠标控制器实例在首次使用时创建
+        
+        参数:
+            device_rules: 设备匹配规则列表，None表示只控制触控板
+        """
+        self._mouse = None
+        self.device_rules = device_rules or DEFAULT_DEVICE_RULES
+        self.breakers = {}  # 各操作方法的熔断器：方法名 -> CircuitBreaker
+        self.last_results = {}  # 最近一次切换各设备的结果：设备名 -> 结果
+    
+    @property
+    def mouse(self):
+        """
+        鼠标控制器实例
+        延迟导入pynput，避免拖慢启动和键盘钩子注册
+        
+        返回:
+            pynput.mouse.Controller: 鼠标控制器
+        """
+        if self._mouse is None:
+            from pynput import mouse
+            self._mouse = mouse.Controller()
+        return self._mouse
     
     def toggle(self, enable):
         """
@@ -25,6 +75,74 @@ class BaseTouchpadController:
         """
         raise NotImplementedError
     
+    def probe(self):
+        """
+        检查后端在当前系统上是否可用
+        
+        返回:
+            bool: 是否可用
+        """
+        return True
+    
+    def noop(self):
+        """
+        执行一次不改变状态的往返操作（如读取当前状态），用于测量后端延迟
+        
+        异常:
+            Exception: 后端无法正常工作
+        """
+        pass
+    
+    def run_on_devices(self, devices, action, parallel=True):
+        """
+        对每个设备执行操作并记录各设备的结果
+        
+        多个设备时在线程池中并发执行，使总耗时不随设备数量线性增长；
+        只有一个设备或操作本身只是系统调用时（parallel=False）直接在当前线程执行
+        
+        参数:
+            devices: 设备列表，设备需有name属性
+            action: 对单个设备执行的函数，返回bool或抛出异常
+            parallel: 是否并发执行
+            
+        返回:
+            bool: 是否所有设备都成功
+        """
+        def run(device):
+            try:
+                return {"ok": bool(action(device)), "error": None}
+            except Exception as e:
+                return {"ok": False, "error": str(e)}
+        
+        if parallel and len(devices) > 1:
+            results = list(_get_device_pool().map(run, devices))
+        else:
+            results = [run(device) for device in devices]
+        
+        self.last_results = {device.name: result for device, result in zip(devices, results)}
+        failed = [name for name, result in self.last_results.items() if not result["ok"]]
+        if failed and len(failed) < len(devices):
+            logger.warning(f"部分设备切换失败: {', '.join(failed)}")
+        return not failed
+    
+    def get_device_results(self):
+        """
+        获取最近一次切换各设备的结果
+        
+        返回:
+            dict: 设备名 -> {"ok": 是否成功, "error": 错误信息}
+        """
+        return self.last_results
+    
+    def get_breaker_states(self):
+        """
+        获取各方法熔断器的状态
+        
+        返回:
+            dict: 方法名 -> 熔断器状态
+        """
+        return {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+    
     def cleanup(self):
         """
         清理资源
@@ -0,0 +1,150 @@
+import time
+import logging
+import metrics
+from controllers.base import BaseTouchpadController
+from controllers.circuit_breaker import CircuitBreaker, BreakerMonitor
+
+logger = logging.getLogger(__name__)
+
+# 各后端的切换耗时和失败次数
+BACKEND_SECONDS = metrics.histogram("backend_toggle_seconds", "各后端切换触控板状态的耗时（秒）", ("backend",))
+BACKEND_FAILURES = metrics.counter("backend_failures_total", "各后端切换触控板状态失败的次数", ("backend",))
+
+class BackendChain(BaseTouchpadController):
+    """
+    后端回退链
+
+    按顺序包装主后端和配置的回退后端，每个后端有独立的熔断器。
+    主后端连续失败熔断后，切换请求直接交给链中下一个可用后端，
+    后台健康检查通过后再恢复使用主后端。
+    """
+    def __init__(self, backends):
+        """
+        初始化回退链
+
+        参数:
+            backends: 控制器实例列表，第一个为主后端
+        """
+        super().__init__()
+        self.backends = list(backends)
+        self.active = self.backends[0]  # 最近一次成功切换使用的后端
+        self.monitor = BreakerMonitor()
+        for backend in self.backends:
+            breaker = CircuitBreaker(backend.backend_name, health_check=backend.noop)
+            self.breakers[backend.backend_name] = breaker
+            self.monitor.register(breaker)
+            # 后端内部各方法的熔断器也由同一线程检查
+            for method_breaker in backend.breakers.values():
+                self.monitor.register(method_breaker)
+        self.monitor.start()
+
+    @property
+    def backend_name(self):
+        """当前使用的后端名称"""
+        return self.active.backend_name
+
+    @property
+    def probe_report(self):
+        """主后端选择时的探测报告"""
+        return self.backends[0].probe_report
+
+    def probe(self):
+        """
+        检查链中是否有可用后端
+
+        返回:
+            bool: 是否可用
+        """
+        return any(backend.probe() for backend in self.backends)
+
+    def noop(self):
+        """对当前后端执行空操作往返"""
+        self.active.noop()
+
+    def toggle(self, enable):
+        """
+        依次尝试链中未熔断的后端切换触控板状态
+
+        参数:
+            enable (bool): True启用触控板，False禁用触控板
+
+        返回:
+            bool: 是否有后端切换成功
+        """
+        attempted = set()
+        for backend in self.backends:
+            if not self.breakers[backend.backend_name].allow():
+                continue
+            attempted.add(backend)
+            if not self._toggle_backend(backend, enable):
+                continue
+            if backend is not self.active:
+                previous, self.active = self.active, backend
+                logger.warning(f"触控板后端切换: {previous.backend_name} -> {backend.backend_name}")
+                # 之前的后端可能还保持着它设置的状态（如回退后端禁用了触控板），
+                # 同步到本次请求的状态，避免主后端恢复后触控板仍被回退后端禁用
+                if previous not in attempted and self.breakers[previous.backend_name].allow():
+                    self._toggle_backend(previous, enable)
+            return True
+
+        logger.error("回退链中所有后端均失败或处于熔断状态")
+        return False
+
+    def _toggle_backend(self, backend, enable):
+        """
+        通过一个后端切换触控板状态，记录耗时并更新其熔断器
+
+        参数:
+            backend: 链中的后端
+            enable (bool): True启用触控板，False禁用触控板
+
+        返回:
+            bool: 是否切换成功
+        """
+        breaker = self.breakers[backend.backend_name]
+        start = time.perf_counter()
+        try:
+            success = backend.toggle(enable)
+            error = None if success else "切换失败"
+        except Exception as e:
+            success, error = False, e
+        BACKEND_SECONDS.labels(backend.backend_name).observe(time.perf_counter() - start)
+        if success:
+            breaker.record_success()
+            return True
+        breaker.record_failure(error)
+        BACKEND_FAILURES.labels(backend.backend_name).inc()
+        logger.error(f"后端{backend.backend_name}切换触控板状态失败: {error}")
+        return False
+
+    def get_device_results(self):
+        """
+        获取当前后端最近一次切换各设备的结果
+
+        返回:
+            dict: 设备名 -> {"ok": 是否成功, "error": 错误信息}
+        """
+        return self.active.get_device_results()
+
+    def get_breaker_states(self):
+        """
+        获取链中所有熔断器的状态
+
+        返回:
+            dict: 后端熔断器按后端名称，方法熔断器按“后端.方法”命名
+        """
+        states = {}
+        for backend in self.backends:
+            states[backend.backend_name] = self.breakers[backend.backend_name].snapshot()
+            for method, breaker in backend.breakers.items():
+                states[f"{backend.backend_name}.{method}"] = breaker.snapshot()
+        return states
+
+    def cleanup(self):
+        """停止健康检查并清理所有后端"""
+        self.monitor.stop()
+        for backend in self.backends:
+            try:
+                backend.cleanup()
+            except Exception as e:
+                logger.error(f"清理后端{backend.backend_name}失败: {e}")
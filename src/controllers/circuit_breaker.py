@@ -0,0 +1,223 @@
+import time
+import threading
+import logging
+import supervisor
+
+logger = logging.getLogger(__name__)
+
+# 熔断器状态
+CLOSED = "closed"  # 正常调用
+OPEN = "open"      # 熔断中，直接跳过
+
+# 连续失败多少次后熔断
+FAILURE_THRESHOLD = 3
+# 熔断冷却时间（秒），之后由后台健康检查决定是否恢复
+COOLDOWN = 30.0
+
+class CircuitOpenError(RuntimeError):
+    """熔断器处于熔断状态，调用被跳过"""
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    连续失败达到阈值后进入熔断状态，调用方直接跳过对应的方法，
+    不再为一个已知损坏的路径付出等待和子进程开销。
+    冷却时间结束后由BreakerMonitor在后台执行健康检查，成功才恢复正常。
+    """
+    def __init__(self, name, health_check=None, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        """
+        初始化熔断器
+
+        参数:
+            name: 名称，用于日志和统计
+            health_check: 健康检查函数（无参数，失败时抛出异常），None表示冷却后直接恢复
+            failure_threshold: 连续失败阈值
+            cooldown: 冷却时间（秒）
+        """
+        self.name = name
+        self.health_check = health_check
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.on_open = None  # 熔断时的回调，由BreakerMonitor设置
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0        # 连续失败次数
+        self.total_failures = 0  # 累计失败次数
+        self.trips = 0           # 累计熔断次数
+        self.opened_at = None
+        self.last_error = None
+
+    def allow(self):
+        """
+        是否允许调用
+
+        返回:
+            bool: 未熔断时为True
+        """
+        return self.state == CLOSED
+
+    @property
+    def retry_at(self):
+        """熔断后可进行健康检查的时间（time.monotonic），未熔断时为None"""
+        opened_at = self.opened_at
+        if self.state != OPEN or opened_at is None:
+            return None
+        return opened_at + self.cooldown
+
+    def call(self, func, *args, **kwargs):
+        """
+        通过熔断器调用函数并记录结果
+
+        参数:
+            func: 被调用的函数
+            *args, **kwargs: 传给函数的参数
+
+        返回:
+            函数的返回值
+
+        异常:
+            CircuitOpenError: 处于熔断状态
+            Exception: 函数抛出的异常（同时记为一次失败）
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name}处于熔断状态")
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def record_success(self):
+        """记录一次成功，清零连续失败次数并恢复正常"""
+        with self.lock:
+            self.failures = 0
+            if self.state == OPEN:
+                self.state = CLOSED
+                self.opened_at = None
+                logger.info(f"熔断器{self.name}已恢复")
+
+    def record_failure(self, error=None):
+        """
+        记录一次失败，连续失败达到阈值时熔断
+
+        参数:
+            error: 失败原因
+        """
+        with self.lock:
+            self.failures += 1
+            self.total_failures += 1
+            self.last_error = str(error) if error is not None else None
+            if self.state == OPEN:
+                # 健康检查失败，重新开始冷却
+                self.opened_at = time.monotonic()
+                return
+            if self.failures < self.failure_threshold:
+                return
+            self.state = OPEN
+            self.trips += 1
+            self.opened_at = time.monotonic()
+            on_open = self.on_open
+        logger.warning(f"熔断器{self.name}连续失败{self.failures}次，{self.cooldown}秒内跳过: {error}")
+        if on_open is not None:
+            on_open()
+
+    def run_health_check(self):
+        """
+        执行健康检查，成功则恢复，失败则重新冷却
+
+        返回:
+            bool: 是否恢复
+        """
+        if self.health_check is not None:
+            try:
+                self.health_check()
+            except Exception as e:
+                self.record_failure(e)
+                logger.debug(f"熔断器{self.name}健康检查失败: {e}")
+                return False
+        self.record_success()
+        return True
+
+    def snapshot(self):
+        """
+        获取熔断器状态
+
+        返回:
+            dict: 状态、连续失败次数、累计失败次数、熔断次数和最近错误
+        """
+        with self.lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "total_failures": self.total_failures,
+                "trips": self.trips,
+                "last_error": self.last_error
+            }
+
+
+class BreakerMonitor:
+    """
+    熔断器后台健康检查
+
+    只在有熔断器处于熔断状态时按冷却时间定时唤醒，其余时间阻塞等待，不产生空转唤醒。
+    """
+    def __init__(self):
+        """初始化健康检查器"""
+        self.breakers = []
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def register(self, breaker):
+        """
+        登记需要监控的熔断器
+
+        参数:
+            breaker: CircuitBreaker实例
+        """
+        breaker.on_open = self.wake
+        with self.condition:
+            self.breakers.append(breaker)
+
+    def wake(self):
+        """有熔断器熔断时唤醒检查线程重新计算等待时间"""
+        with self.condition:
+            self.condition.notify()
+
+    def start(self):
+        """启动检查线程"""
+        if self.thread is not None:
+            return
+        self.running = True
+        self.thread = supervisor.spawn(self._run, "breaker-monitor", restart=True)
+
+    def stop(self):
+        """停止检查线程"""
+        if self.thread is None:
+            return
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join(1.0)
+        self.thread = None
+
+    def _run(self):
+        """检查线程主循环：等到最早的冷却结束，对到期的熔断器执行健康检查"""
+        while True:
+            with self.condition:
+                if not self.running:
+                    return
+                now = time.monotonic()
+                due = [b for b in self.breakers if b.retry_at is not None and b.retry_at <= now]
+                if not due:
+                    deadlines = [b.retry_at for b in self.breakers if b.retry_at is not None]
+                    timeout = min(deadlines) - now if deadlines else None
+                    self.condition.wait(timeout)
+                    continue
+            # 健康检查可能较慢（如启动子进程），不持有锁执行
+            for breaker in due:
+                breaker.run_health_check()
@@ -0,0 +1,128 @@
+import os
+import fcntl
+import struct
+import logging
+from controllers.base import BaseTouchpadController
+from controllers.registry import register_backend
+from controllers.input_devices import match_devices
+
+logger = logging.getLogger(__name__)
+
+# ioctl请求码（见linux/input.h）
+EVIOCGVERSION = 0x80044501  # _IOR('E', 0x01, int)
+EVIOCGRAB = 0x40044590      # _IOW('E', 0x90, int)
+
+@register_backend("evdev", platforms=["Linux"])
+class EvdevGrabTouchpadController(BaseTouchpadController):
+    """
+    通过独占抓取（EVIOCGRAB）设备的事件节点禁用设备
+
+    抓取期间其他程序收不到该设备的事件。抓取随文件描述符存在，
+    程序退出（包括崩溃）时由内核自动释放，设备不会因异常退出而保持禁用。
+    需要对/dev/input/eventN有读权限（root或input组）。
+    """
+    def __init__(self, device_rules=None):
+        """
+        查找匹配的设备并打开其事件节点
+
+        参数:
+            device_rules: 设备匹配规则列表，None表示只控制触控板
+        """
+        super().__init__(device_rules)
+        self.devices = []
+        self.fds = {}         # 事件节点 -> 文件描述符
+        self.grabbed = set()  # 已抓取的事件节点
+        for device in match_devices(self.device_rules):
+            if device.event_node is None:
+                continue
+            try:
+                self.fds[device.event_node] = os.open(device.event_node, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+                self.devices.append(device)
+            except OSError as e:
+                logger.debug(f"无法打开{device.event_node}: {e}")
+
+    def probe(self):
+        """
+        检查是否打开了至少一个事件节点
+
+        返回:
+            bool: 是否可用
+        """
+        return bool(self.devices)
+
+    def noop(self):
+        """查询驱动版本作为空操作往返"""
+        fcntl.ioctl(self.fds[self.devices[0].event_node], EVIOCGVERSION, struct.pack("i", 0))
+
+    def toggle(self, enable):
+        """
+        切换所有匹配设备的状态
+
+        参数:
+            enable (bool): True启用设备（释放抓取），False禁用设备（抓取）
+
+        返回:
+            bool: 是否所有设备都切换成功
+        """
+        if not self.devices:
+            logger.error("未打开任何事件设备，无法切换状态")
+            return False
+        # ioctl不会阻塞，直接在当前线程执行
+        return self.run_on_devices(self.devices, lambda device: self._toggle_device(device, enable),
+                                   parallel=False)
+
+    def _toggle_device(self, device, enable):
+        """
+        抓取或释放单个设备
+
+        参数:
+            device: InputDevice实例
+            enable (bool): True释放抓取，False抓取
+
+        返回:
+            bool: 操作是否成功
+
+        异常:
+            OSError: ioctl失败（EBUSY表示设备已被其他程序抓取）
+        """
+        if (device.event_node in self.grabbed) != enable:
+            logger.info(f"{device.name}当前已{'启用' if enable else '禁用'}，无需更改")
+            return True
+        fd = self.fds[device.event_node]
+        fcntl.ioctl(fd, EVIOCGRAB, 0 if enable else 1)
+        if enable:
+            self.grabbed.discard(device.event_node)
+        else:
+            self.grabbed.add(device.event_node)
+            self._drain(fd)
+        logger.info(f"{device.name}状态已成功设置为: {'启用' if enable else '禁用'}")
+        return True
+
+    def _drain(self, fd):
+        """
+        丢弃已缓冲的事件，避免抓取期间读缓冲区溢出的无用积压
+
+        参数:
+            fd: 事件设备文件描述符
+        """
+        try:
+            while os.read(fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            logger.debug(f"读取事件设备失败: {e}")
+
+    def cleanup(self):
+        """释放抓取并关闭所有事件节点"""
+        for node, fd in self.fds.items():
+            try:
+                if node in self.grabbed:
+                    fcntl.ioctl(fd, EVIOCGRAB, 0)
+            except OSError as e:
+                logger.error(f"释放{node}的抓取失败: {e}")
+            finally:
+                os.close(fd)
+        self.fds = {}
+        self.grabbed = set()
+        self.devices = []
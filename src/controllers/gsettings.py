@@ -0,0 +1,89 @@
+import os
+import shutil
+import subprocess
+import logging
+from controllers.base import BaseTouchpadController
+from controllers.registry import register_backend
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = "org.gnome.desktop.peripherals.touchpad"
+KEY = "send-events"
+
+@register_backend("gsettings", platforms=["Linux"])
+class GsettingsTouchpadController(BaseTouchpadController):
+    """
+    通过GNOME桌面设置禁用触控板
+
+    适用于GNOME Wayland会话，此时xinput无法控制触控板。
+    设置属于当前用户的dconf数据库，以root运行时修改的是root的设置，因此不可用。
+    该设置只作用于触控板，设备匹配规则中的其他设备不受控制。
+    """
+    DEVICE_NAME = "touchpad (gsettings)"
+
+    def probe(self):
+        """
+        检查gsettings命令和触控板设置项是否可用
+
+        返回:
+            bool: 是否可用
+        """
+        if shutil.which("gsettings") is None or os.geteuid() == 0:
+            return False
+        try:
+            available = self._get() in ("enabled", "disabled", "disabled-on-external-mouse")
+        except (OSError, subprocess.CalledProcessError):
+            return False
+        if available and any(rule != {"type": "touchpad"} for rule in self.device_rules):
+            logger.warning("gsettings后端只能控制触控板，其他设备匹配规则被忽略")
+        return available
+
+    def noop(self):
+        """读取设置项作为空操作往返"""
+        self._get()
+
+    def _get(self):
+        """
+        读取send-events设置
+
+        返回:
+            str: 设置值，如"enabled"
+
+        异常:
+            subprocess.CalledProcessError: 如果命令执行失败
+        """
+        output = subprocess.check_output(
+            ["gsettings", "get", SCHEMA, KEY],
+            stderr=subprocess.STDOUT,
+            universal_newlines=True
+        )
+        return output.strip().strip("'")
+
+    def toggle(self, enable):
+        """
+        切换触控板状态
+
+        参数:
+            enable (bool): True启用触控板，False禁用触控板
+
+        返回:
+            bool: 操作是否成功
+        """
+        target = "enabled" if enable else "disabled"
+        try:
+            if self._get() == target:
+                logger.info(f"触控板当前已{'启用' if enable else '禁用'}，无需更改")
+                self.last_results = {self.DEVICE_NAME: {"ok": True, "error": None}}
+                return True
+            subprocess.run(["gsettings", "set", SCHEMA, KEY, target], check=True)
+            success = self._get() == target
+            if success:
+                logger.info(f"触控板状态已成功设置为: {'启用' if enable else '禁用'}")
+            else:
+                logger.error("触控板设置写入后未生效")
+            self.last_results = {self.DEVICE_NAME: {"ok": success, "error": None if success else "写入后未生效"}}
+            return success
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.error(f"设置触控板状态失败: {e}")
+            self.last_results = {self.DEVICE_NAME: {"ok": False, "error": str(e)}}
+            return False
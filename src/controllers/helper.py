@@ -0,0 +1,123 @@
+import os
+import logging
+from controllers.base import BaseTouchpadController
+from controllers.registry import register_backend
+
+logger = logging.getLogger(__name__)
+
+@register_backend("helper", platforms=["Linux"])
+class HelperTouchpadController(BaseTouchpadController):
+    """
+    通过特权助手控制触控板
+
+    界面进程以普通用户运行时，由以root运行的助手（src/helper.py）持有实际的控制后端，
+    本后端只转发2字节的切换请求。助手按设备匹配规则自行探测并选择后端。
+    助手未运行或本进程已是root时不可用（root可以直接使用其他后端）。
+    """
+    def __init__(self, device_rules=None):
+        """
+        初始化控制器，连接在probe时建立
+
+        参数:
+            device_rules: 设备匹配规则列表
+        """
+        super().__init__(device_rules)
+        self.client = None
+        self.remote_backend = None
+
+    def probe(self):
+        """
+        连接助手并让其按设备规则选择后端
+
+        返回:
+            bool: 是否可用
+        """
+        if os.geteuid() == 0:
+            return False
+        from helper_client import HelperError
+        try:
+            self._connect()
+        except (OSError, HelperError) as e:
+            logger.debug(f"特权助手不可用: {e}")
+            return False
+        return True
+
+    def noop(self):
+        """
+        心跳作为空操作往返，连接已断开时重新连接（助手重启后熔断器的健康检查借此恢复）
+
+        异常:
+            OSError: 助手未运行
+            HelperError: 助手无法创建控制器
+        """
+        from helper_client import HelperError
+        if self.client is not None:
+            try:
+                self.client.ping()
+                return
+            except HelperError:
+                logger.warning("与特权助手的连接已断开，尝试重新连接")
+        self._connect()
+
+    def _connect(self):
+        """
+        连接助手并让其按设备规则选择后端
+
+        异常:
+            OSError: 助手未运行
+            HelperError: 助手无法创建控制器
+        """
+        from helper_client import HelperClient
+        self.cleanup()
+        client = HelperClient()
+        try:
+            self.remote_backend = client.setup({"devices": self.device_rules})
+        except Exception:
+            client.close()
+            raise
+        self.client = client
+        logger.info(f"已连接特权助手，助手使用后端: {self.remote_backend}")
+
+    def toggle(self, enable):
+        """
+        通过助手切换设备状态
+
+        参数:
+            enable (bool): True启用，False禁用
+
+        返回:
+            bool: 操作是否成功
+
+        异常:
+            OSError: 助手未运行
+            HelperError: 与助手的连接中断（由熔断器记录并切换到回退后端）
+        """
+        if self.client is None:
+            self._connect()
+        success = self.client.toggle(enable)
+        if success:
+            logger.info(f"设备状态已通过特权助手设置为: {'启用' if enable else '禁用'}")
+        else:
+            logger.error("特权助手切换设备状态失败")
+        return success
+
+    def get_device_results(self):
+        """
+        获取助手中各设备最近一次操作的结果
+
+        返回:
+            dict: 设备名称 -> 结果
+        """
+        if self.client is None:
+            return {}
+        from helper_client import HelperError
+        try:
+            return self.client.stats().get("devices", {})
+        except HelperError as e:
+            return {f"helper:{self.remote_backend}": {"ok": False, "error": str(e)}}
+
+    def cleanup(self):
+        """关闭与助手的连接"""
+        if self.client is not None:
+            self.client.close()
+            self.client = None
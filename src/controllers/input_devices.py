@@ -0,0 +1,278 @@
+import os
+import re
+import struct
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 内核输入设备列表
+PROC_INPUT_DEVICES = "/proc/bus/input/devices"
+# udev数据库目录，事件设备的主设备号为13
+UDEV_DATA_DIR = "/run/udev/data"
+INPUT_MAJOR = 13
+
+TOUCHPAD_IDENTIFIERS = ["Touchpad", "TouchPad"]
+
+# 设备类型 -> (udev分类标志, 缺少udev数据时用于匹配名称的关键字)
+DEVICE_TYPES = {
+    "touchpad": ("ID_INPUT_TOUCHPAD", TOUCHPAD_IDENTIFIERS),
+    "touchscreen": ("ID_INPUT_TOUCHSCREEN", ["Touchscreen", "TouchScreen", "touchscreen"]),
+    "pointingstick": ("ID_INPUT_POINTINGSTICK", ["TrackPoint", "Pointing Stick", "pointing stick"]),
+    "mouse": ("ID_INPUT_MOUSE", ["Mouse", "mouse"]),
+    "tablet": ("ID_INPUT_TABLET", ["Pen", "Stylus", "Tablet"]),
+}
+
+# 事件类型（见linux/input-event-codes.h）
+EV_KEY = 0x01
+EV_REL = 0x02
+EV_ABS = 0x03
+
+# 能力位图中每个字的位数（内核long的长度）
+BITS_PER_WORD = struct.calcsize("L") * 8
+
+# 默认只控制触控板
+DEFAULT_DEVICE_RULES = [{"type": "touchpad"}]
+
+class InputDevice:
+    """
+    内核输入设备描述
+
+    由/proc/bus/input/devices中的一个设备块解析而来，不依赖libinput或xinput命令
+    """
+    def __init__(self, name, sysfs, handlers, bitmaps):
+        """
+        初始化设备描述
+
+        参数:
+            name: 设备名称
+            sysfs: sysfs路径（相对/sys），如/devices/.../input/input5
+            handlers: 处理程序列表，如["mouse0", "event5"]
+            bitmaps: 能力位图字典，如{"EV": "b", "KEY": "..."}
+        """
+        self.name = name
+        self.sysfs = sysfs
+        self.handlers = handlers
+        self.bitmaps = bitmaps
+        self._udev_properties = None
+
+    @property
+    def event_node(self):
+        """设备的/dev/input/eventN路径，不存在时为None"""
+        for handler in self.handlers:
+            if handler.startswith("event"):
+                return f"/dev/input/{handler}"
+        return None
+
+    @property
+    def input_node(self):
+        """设备在/sys/class/input下的inputN目录"""
+        return os.path.join("/sys", self.sysfs.lstrip("/"))
+
+    @property
+    def udev_properties(self):
+        """
+        udev为该设备设置的属性（如ID_INPUT_TOUCHPAD），读取失败时为空字典
+        """
+        if self._udev_properties is None:
+            self._udev_properties = self._read_udev_properties()
+        return self._udev_properties
+
+    def has_udev_flag(self, flag):
+        """
+        检查udev属性标志是否为1
+
+        参数:
+            flag: 属性名称，如"ID_INPUT_TOUCHPAD"
+
+        返回:
+            bool: 是否设置
+        """
+        return self.udev_properties.get(flag) == "1"
+
+    def is_type(self, device_type):
+        """
+        判断设备类型：优先使用udev分类，缺失时按名称判断
+
+        参数:
+            device_type: DEVICE_TYPES中的类型名称
+
+        返回:
+            bool: 是否属于该类型
+        """
+        flag, keywords = DEVICE_TYPES[device_type]
+        if self.udev_properties:
+            return self.has_udev_flag(flag)
+        return any(keyword in self.name for keyword in keywords)
+
+    @property
+    def is_touchpad(self):
+        """是否为触控板"""
+        return self.is_type("touchpad")
+
+    def _has_bit(self, bitmap, bit):
+        """
+        检查能力位图中的某一位
+
+        参数:
+            bitmap: 位图名称，如"EV"、"KEY"
+            bit: 位序号
+
+        返回:
+            bool: 是否置位
+        """
+        # 位图按字以十六进制输出，高位字在前
+        words = self.bitmaps.get(bitmap, "").split()
+        index = bit // BITS_PER_WORD
+        if index >= len(words):
+            return False
+        return bool(int(words[-1 - index], 16) >> (bit % BITS_PER_WORD) & 1)
+
+    def supports_key(self, code):
+        """
+        设备是否能产生某个键码
+
+        参数:
+            code: 键码
+
+        返回:
+            bool: 是否支持
+        """
+        return self._has_bit("KEY", code)
+
+    @property
+    def is_keyboard(self):
+        """
+        是否为键盘类设备（带按键、不是指针设备）
+
+        优先使用udev分类，缺失时根据能力位图判断
+        """
+        if self.udev_properties:
+            return (self.has_udev_flag("ID_INPUT_KEYBOARD") or self.has_udev_flag("ID_INPUT_KEY")) \
+                and not self.has_udev_flag("ID_INPUT_MOUSE") and not self.has_udev_flag("ID_INPUT_TOUCHPAD")
+        return (self._has_bit("EV", EV_KEY)
+                and not self._has_bit("EV", EV_REL) and not self._has_bit("EV", EV_ABS))
+
+    def matches(self, rule):
+        """
+        检查设备是否满足一条匹配规则（规则中的所有条件都满足）
+
+        参数:
+            rule: 匹配规则，可包含type（设备类型）和name（不区分大小写的正则表达式）
+
+        返回:
+            bool: 是否匹配
+        """
+        if "type" in rule and not self.is_type(rule["type"]):
+            return False
+        if "name" in rule and not re.search(rule["name"], self.name, re.IGNORECASE):
+            return False
+        return True
+
+    def _read_udev_properties(self):
+        """
+        从udev数据库读取设备属性
+
+        返回:
+            dict: 属性字典
+        """
+        node = self.event_node
+        if node is None:
+            return {}
+        try:
+            minor = os.minor(os.stat(node).st_rdev)
+            path = os.path.join(UDEV_DATA_DIR, f"c{INPUT_MAJOR}:{minor}")
+            properties = {}
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    if line.startswith("E:") and "=" in line:
+                        key, value = line[2:].rstrip("\n").split("=", 1)
+                        properties[key] = value
+            return properties
+        except OSError:
+            return {}
+
+    def __repr__(self):
+        return f"InputDevice({self.name!r}, {self.event_node})"
+
+
+def list_input_devices():
+    """
+    解析/proc/bus/input/devices，列出所有输入设备
+
+    返回:
+        list: InputDevice列表，读取失败时为空列表
+    """
+    try:
+        with open(PROC_INPUT_DEVICES, 'r', encoding='utf-8', errors='replace') as f:
+            content = f.read()
+    except OSError as e:
+        logger.error(f"读取输入设备列表失败: {e}")
+        return []
+
+    devices = []
+    for block in content.split("\n\n"):
+        name = sysfs = None
+        handlers = []
+        bitmaps = {}
+        for line in block.splitlines():
+            if line.startswith("N: Name="):
+                name = line[len("N: Name="):].strip().strip('"')
+            elif line.startswith("S: Sysfs="):
+                sysfs = line[len("S: Sysfs="):].strip()
+            elif line.startswith("H: Handlers="):
+                handlers = line[len("H: Handlers="):].split()
+            elif line.startswith("B: "):
+                match = re.match(r"B: (\w+)=(.*)", line)
+                if match:
+                    bitmaps[match.group(1)] = match.group(2).strip()
+        if name and sysfs:
+            devices.append(InputDevice(name, sysfs, handlers, bitmaps))
+    return devices
+
+def find_touchpads():
+    """
+    查找所有触控板设备
+
+    返回:
+        list: 触控板InputDevice列表
+    """
+    return [device for device in list_input_devices() if device.is_touchpad]
+
+def match_devices(rules):
+    """
+    查找满足任一匹配规则的设备
+
+    参数:
+        rules: 匹配规则列表，如[{"type": "touchpad"}, {"name": "TrackPoint"}]
+
+    返回:
+        list: 匹配的InputDevice列表
+    """
+    return [device for device in list_input_devices()
+            if any(device.matches(rule) for rule in rules)]
+
+def validate_device_rules(rules):
+    """
+    校验设备匹配规则
+
+    参数:
+        rules: 匹配规则列表
+
+    返回:
+        list: 错误信息列表，为空表示有效
+    """
+    if not isinstance(rules, list) or not rules:
+        return ["devices 必须是非空的匹配规则列表"]
+    errors = []
+    for rule in rules:
+        if not isinstance(rule, dict) or not rule or set(rule) - {"type", "name"}:
+            errors.append(f"设备匹配规则只能包含type和name: {rule}")
+            continue
+        if "type" in rule and rule["type"] not in DEVICE_TYPES:
+            errors.append(f"未知的设备类型: {rule['type']}，可选: {', '.join(DEVICE_TYPES)}")
+        if "name" in rule:
+            try:
+                re.compile(rule["name"])
+            except (re.error, TypeError):
+                errors.append(f"设备名称规则不是有效的正则表达式: {rule['name']}")
+    return errors
@@ -2,6 +2,9 @@ import subprocess
 import logging
 import re
 from controllers.base import BaseTouchpadController
+from controllers.registry import register_backend
+from controllers.circuit_breaker import CircuitBreaker, CircuitOpenError
+from controllers.input_devices import DEFAULT_DEVICE_RULES, match_devices
 
 # 配置日志记录器
 logger = logging.getLogger(__name__)
@@ -9,27 +12,116 @@ logger = logging.getLogger(__name__)
 # 常量定义
 TOUCHPAD_IDENTIFIERS = ["Touchpad", "TouchPad"]
 DEVICE_PREFIX = "Device:"
+SEND_EVENTS_PROPERTY = "libinput Send Events Mode Enabled"
+# xinput list中的从属指针设备行，如"↳ SynPS/2 Synaptics TouchPad    id=12    [slave  pointer  (2)]"
+XINPUT_POINTER_PATTERN = re.compile(r'↳\s+(.*?)\s+id=(\d+)\s+\[slave\s+pointer')
 
+class XinputDevice:
+    """xinput管理的一个指针设备"""
+    def __init__(self, name, device_id):
+        """
+        参数:
+            name: 设备名称
+            device_id: xinput设备ID，未知时为None
+        """
+        self.name = name
+        self.id = device_id
+
+@register_backend("xinput", platforms=["Linux"], default=True)
 class LinuxTouchpadController(BaseTouchpadController):
     """
     Linux系统触控板控制器
-    使用libinput工具检测和xinput管理触控板设备
+    使用内核输入设备列表（或libinput工具）检测设备，使用xinput管理设备
     
     主要功能:
-    1. 自动检测系统中的触控板设备
-    2. 提供启用/禁用触控板的方法
+    1. 按匹配规则检测需要控制的指针设备（触控板、触摸屏、指点杆等）
+    2. 提供同时启用/禁用这些设备的方法，多个设备并发切换
     """
     
-    def __init__(self):
+    def __init__(self, device_rules=None):
         """
         初始化Linux触控板控制器
-        检测系统中的触控板设备并存储其路径和ID
+        检测匹配的设备并存储其名称和ID
+        
+        参数:
+            device_rules: 设备匹配规则列表，None表示只控制触控板
         """
-        super().__init__()
+        super().__init__(device_rules)
         self.touchpad_device = None  # 设备路径
         self.touchpad_id = None      # 设备ID (用于xinput)
         self.touchpad_name = None    # 设备名称
-        self._find_touchpad()
+        self.devices = []            # 需要控制的XinputDevice列表
+        self._find_devices()
+        # 每个设备的每种切换路径各有一个熔断器：一个设备持续失败不影响其他设备，
+        # 健康检查也只针对该设备
+        for device in self.devices:
+            self.breakers.update({
+                f"id:{device.name}": CircuitBreaker(f"xinput.id[{device.name}]",
+                                                    health_check=lambda d=device: self._run_xinput(["list-props", d.id])),
+                f"name:{device.name}": CircuitBreaker(f"xinput.name[{device.name}]",
+                                                      health_check=lambda d=device: self._run_xinput(["list-props", d.name])),
+                f"rescan:{device.name}": CircuitBreaker(f"xinput.rescan[{device.name}]",
+                                                        health_check=lambda: self._run_xinput(["list"]))
+            })
+    
+    def _breaker(self, method, device):
+        """
+        获取设备某种切换路径的熔断器
+        
+        参数:
+            method: "id"、"name"或"rescan"
+            device: XinputDevice实例
+            
+        返回:
+            CircuitBreaker: 熔断器
+        """
+        return self.breakers[f"{method}:{device.name}"]
+    
+    def _find_devices(self):
+        """
+        按匹配规则查找需要控制的设备
+        
+        从内核设备列表中匹配设备，再通过xinput list获取对应的设备ID；
+        内核设备列表不可用且只控制触控板时，沿用libinput查找触控板
+        """
+        names = {device.name for device in match_devices(self.device_rules)}
+        if names:
+            for name, device_id in self._list_xinput_pointers():
+                if name in names:
+                    self.devices.append(XinputDevice(name, device_id))
+        
+        if not self.devices and self.device_rules == DEFAULT_DEVICE_RULES:
+            self._find_touchpad()
+            if self.touchpad_name:
+                self.devices.append(XinputDevice(self.touchpad_name, self.touchpad_id))
+        
+        if self.devices:
+            self.touchpad_name = self.devices[0].name
+            self.touchpad_id = self.devices[0].id
+            logger.info(f"xinput控制的设备: {', '.join(f'{d.name} (id={d.id})' for d in self.devices)}")
+        else:
+            logger.warning("未找到匹配的设备，某些功能可能不可用")
+    
+    def _list_xinput_pointers(self):
+        """
+        列出xinput中的所有从属指针设备
+        
+        返回:
+            list: (设备名称, 设备ID)列表，xinput不可用时为空列表
+        """
+        try:
+            output = subprocess.check_output(
+                ["xinput", "list"],
+                stderr=subprocess.STDOUT,
+                universal_newlines=True
+            )
+        except FileNotFoundError:
+            logger.error("未找到xinput命令，请确保已安装xorg-xinput包")
+            return []
+        except subprocess.CalledProcessError as e:
+            logger.error(f"执行xinput命令失败: {e.output}")
+            return []
+        return [match.groups() for match in map(XINPUT_POINTER_PATTERN.search, output.split('\n')) if match]
     
     def _find_touchpad(self):
         """
@@ -130,24 +222,23 @@ class LinuxTouchpadController(BaseTouchpadController):
         except Exception as e:
             logger.error(f"获取触控板ID失败: {e}", exc_info=True)
     
-    def _check_device_state(self):
+    def _check_device_state(self, device):
         """
-        检查触控板设备当前状态
+        检查设备当前状态
         
+        参数:
+            device: XinputDevice实例
+            
         返回:
             bool - True表示设备已启用，False表示设备已禁用
         """
         try:
-            if not self.touchpad_id:
-                logger.warning("未找到触控板ID，无法检查状态")
+            if not device.id:
+                logger.warning(f"未找到{device.name}的设备ID，无法检查状态")
                 return True
                 
             # 使用xinput命令检查设备状态
-            output = subprocess.check_output(
-                ["xinput", "list-props", self.touchpad_id],
-                stderr=subprocess.STDOUT,
-                universal_newlines=True
-            )
+            output = self._list_props(device)
             
             # 查找"Device Enabled"属性
             for line in output.split('\n'):
@@ -161,117 +252,243 @@ class LinuxTouchpadController(BaseTouchpadController):
             # 命令失败通常意味着设备不可用或已禁用
             return False
         except Exception as e:
-            logger.error(f"检查触控板状态失败: {e}", exc_info=True)
+            logger.error(f"检查{device.name}状态失败: {e}", exc_info=True)
             return True  # 出错时假设设备已启用
     
+    def probe(self):
+        """
+        检查xinput能否访问匹配的设备
+        
+        返回:
+            bool: 是否找到设备ID
+        """
+        return any(device.id for device in self.devices)
+    
+    def noop(self):
+        """读取设备属性作为空操作往返"""
+        self._list_props(self.devices[0])
+    
+    def _list_props(self, device):
+        """
+        读取设备的xinput属性列表
+        
+        参数:
+            device: XinputDevice实例
+            
+        返回:
+            str: xinput list-props的输出
+            
+        异常:
+            subprocess.CalledProcessError: 如果命令执行失败
+        """
+        return subprocess.check_output(
+            ["xinput", "list-props", device.id],
+            stderr=subprocess.STDOUT,
+            universal_newlines=True
+        )
+    
     def toggle(self, enable):
         """
-        切换触控板状态
+        切换所有匹配设备的状态，多个设备并发执行
         
         参数:
-            enable: 布尔值，True启用触控板，False禁用触控板
+            enable: 布尔值，True启用设备，False禁用设备
             
         返回:
-            bool - 操作是否成功
+            bool - 是否所有设备都切换成功（各设备结果见last_results）
         """
-        # 检查是否有可用的触控板设备
-        if not (self.touchpad_id or self.touchpad_name):
-            logger.error("未找到触控板设备ID或名称，无法切换状态")
+        # 检查是否有可用的设备
+        if not self.devices:
+            logger.error("未找到匹配的设备，无法切换状态")
             return False
+        return self.run_on_devices(self.devices, lambda device: self._toggle_device(device, enable))
+    
+    def _toggle_device(self, device, enable):
+        """
+        切换单个设备的状态
         
-        try:
-            # 检查当前状态
-            current_state = self._check_device_state()
-            
-            # 如果状态已经是目标状态，则无需操作
-            if current_state == enable:
-                logger.info(f"触控板当前已{'启用' if enable else '禁用'}，无需更改")
-                return True
-            
-            # 切换设备状态
-            self._set_device_state(enable)
+        参数:
+            device: XinputDevice实例
+            enable: 布尔值，True启用设备，False禁用设备
             
-            # 验证状态是否已更改
-            new_state = self._check_device_state()
-            success = new_state == enable
+        返回:
+            bool - 操作是否成功
+        """
+        # 检查当前状态
+        current_state = self._check_device_state(device)
+        
+        # 如果状态已经是目标状态，则无需操作
+        if current_state == enable:
+            logger.info(f"{device.name}当前已{'启用' if enable else '禁用'}，无需更改")
+            return True
+        
+        # 切换设备状态
+        self._set_device_state(device, enable)
+        
+        # 验证状态是否已更改
+        new_state = self._check_device_state(device)
+        success = new_state == enable
+        
+        # 记录操作结果
+        if success:
+            logger.info(f"{device.name}状态已成功设置为: {'启用' if enable else '禁用'}")
+        else:
+            logger.error(f"{device.name}状态设置失败，当前状态: {'启用' if new_state else '禁用'}")
             
-            # 记录操作结果
-            if success:
-                logger.info(f"触控板状态已成功设置为: {'启用' if enable else '禁用'}")
-            else:
-                logger.error(f"触控板状态设置失败，当前状态: {'启用' if new_state else '禁用'}")
-                
-            return success
+        return success
+    
+    def _run_xinput(self, args):
+        """
+        执行xinput命令，丢弃输出
+        
+        参数:
+            args: xinput参数列表
             
-        except Exception as e:
-            logger.error(f"设置触控板状态失败: {e}", exc_info=True)
-            return False
+        异常:
+            subprocess.CalledProcessError: 如果命令执行失败
+        """
+        subprocess.run(["xinput", *args], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     
-    def _set_device_state(self, enable):
+    def _set_device_state(self, device, enable):
         """
-        设置触控板设备状态
+        设置设备状态
+        
+        依次尝试设备ID、设备名称和重新搜索设备三种方式，
+        处于熔断状态的方式直接跳过
         
         参数:
+            device: XinputDevice实例
             enable: 布尔值，True启用设备，False禁用设备
             
         异常:
-            subprocess.CalledProcessError: 如果命令执行失败
+            RuntimeError: 如果所有方式都失败或处于熔断状态
         """
         action = "enable" if enable else "disable"
         
         # 首先尝试使用设备ID
-        if self.touchpad_id:
+        if device.id:
             try:
-                command = ["xinput", action, self.touchpad_id]
-                logger.info(f"执行命令: {' '.join(command)}")
-                subprocess.run(command, check=True)
+                logger.info(f"执行命令: xinput {action} {device.id}")
+                self._breaker("id", device).call(self._run_xinput, [action, device.id])
                 return
+            except CircuitOpenError:
+                logger.debug("设备ID方式处于熔断状态，跳过")
             except Exception as e:
-                logger.error(f"使用设备ID切换触控板状态失败: {e}")
+                logger.error(f"使用设备ID切换{device.name}状态失败: {e}")
         
         # 如果使用ID失败，尝试使用设备名称
-        if self.touchpad_name:
-            try:
-                command = ["xinput", action, self.touchpad_name]
-                logger.info(f"执行命令: {' '.join(command)}")
-                subprocess.run(command, check=True)
-                return
-            except Exception as e:
-                logger.error(f"使用设备名称切换触控板状态失败: {e}")
-                
-        # 如果所有方法都失败，尝试搜索触控板名称
         try:
-            # 获取所有输入设备列表
-            output = subprocess.check_output(
-                ["xinput", "list"],
-                stderr=subprocess.STDOUT,
-                universal_newlines=True
-            )
-            
-            # 查找任何看起来像触控板的设备
-            for line in output.split('\n'):
-                if "touchpad" in line.lower() or "Touchpad" in line or "DELL" in line and "Touchpad" in line:
-                    # 尝试提取ID
-                    match = re.search(r'id=(\d+)', line, re.IGNORECASE)
-                    if match:
-                        device_id = match.group(1)
-                        try:
-                            command = ["xinput", action, device_id]
-                            logger.info(f"尝试使用搜索到的设备ID: {device_id}, 命令: {' '.join(command)}")
-                            subprocess.run(command, check=True)
-                            # 更新设备ID以便后续使用
-                            self.touchpad_id = device_id
-                            return
-                        except Exception:
-                            pass
+            logger.info(f"执行命令: xinput {action} {device.name}")
+            self._breaker("name", device).call(self._run_xinput, [action, device.name])
+            return
+        except CircuitOpenError:
+            logger.debug("设备名称方式处于熔断状态，跳过")
+        except Exception as e:
+            logger.error(f"使用设备名称切换{device.name}状态失败: {e}")
+        
+        # 如果所有方法都失败，重新搜索设备
+        try:
+            self._breaker("rescan", device).call(self._rescan_and_set, device, action)
+            return
+        except CircuitOpenError:
+            logger.debug("重新搜索方式处于熔断状态，跳过")
         except Exception as e:
-            logger.error(f"搜索触控板设备并切换状态失败: {e}")
+            logger.error(f"搜索{device.name}并切换状态失败: {e}")
             
-        raise RuntimeError("无法找到有效的触控板设备控制方法")
+        raise RuntimeError(f"无法找到{device.name}的有效控制方法")
+    
+    def _rescan_and_set(self, device, action):
+        """
+        重新搜索设备并设置状态，成功时更新设备ID
+        
+        参数:
+            device: XinputDevice实例
+            action: "enable"或"disable"
+            
+        异常:
+            RuntimeError: 如果没有找到可用的设备
+        """
+        is_touchpad = "touchpad" in device.name.lower()
+        for name, device_id in self._list_xinput_pointers():
+            # 名称相同，或者同为触控板（设备名称可能已变化）
+            if name != device.name and not (is_touchpad and "touchpad" in name.lower()):
+                continue
+            try:
+                logger.info(f"尝试使用搜索到的设备ID: {device_id}, 命令: xinput {action} {device_id}")
+                self._run_xinput([action, device_id])
+                # 更新设备ID以便后续使用
+                device.id = device_id
+                self._breaker("id", device).record_success()
+                return
+            except Exception:
+                pass
+        raise RuntimeError(f"重新搜索未找到可用的{device.name}")
     
     def cleanup(self):
         """
         清理资源
         本实现无需特殊操作
         """
-        pass
\ No newline at end of file
+        pass
+
+
+@register_backend("libinput", platforms=["Linux"])
+class LibinputTouchpadController(LinuxTouchpadController):
+    """
+    通过libinput的Send Events Mode属性禁用设备
+    
+    与xinput disable不同，设备在X服务器中保持启用，仅由libinput停止发送事件，
+    不会触发桌面环境的设备移除处理
+    """
+    
+    def probe(self):
+        """
+        检查设备是否提供Send Events Mode属性
+        
+        返回:
+            bool: 是否可用
+        """
+        devices = [device for device in self.devices if device.id]
+        if not devices:
+            return False
+        try:
+            return all(SEND_EVENTS_PROPERTY in self._list_props(device) for device in devices)
+        except (OSError, subprocess.CalledProcessError):
+            return False
+    
+    def _check_device_state(self, device):
+        """
+        检查设备是否在发送事件
+        
+        参数:
+            device: XinputDevice实例
+            
+        返回:
+            bool - True表示设备已启用，False表示设备已禁用
+        """
+        try:
+            for line in self._list_props(device).split('\n'):
+                if SEND_EVENTS_PROPERTY in line and "Default" not in line:
+                    # 属性值为"禁用, 外接鼠标时禁用"两个标志
+                    values = line.split(':')[-1].replace(',', ' ').split()
+                    return values[0] == "0"
+            return True
+        except Exception as e:
+            logger.error(f"检查{device.name}状态失败: {e}", exc_info=True)
+            return True
+    
+    def _set_device_state(self, device, enable):
+        """
+        设置Send Events Mode属性
+        
+        参数:
+            device: XinputDevice实例
+            enable: 布尔值，True启用设备，False禁用设备
+            
+        异常:
+            subprocess.CalledProcessError: 如果命令执行失败
+            CircuitOpenError: 如果设备ID方式处于熔断状态
+        """
+        args = ["set-prop", device.id, SEND_EVENTS_PROPERTY, "0" if enable else "1", "0"]
+        logger.info(f"执行命令: xinput {' '.join(args)}")
+        self._breaker("id", device).call(self._run_xinput, args)
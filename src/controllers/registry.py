@@ -0,0 +1,233 @@
+import time
+import importlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+# 各平台提供后端的模块，选择后端时才导入
+BACKEND_MODULES = {
+    "Windows": ["controllers.windows"],
+    "Linux": ["controllers.linux", "controllers.sysfs", "controllers.evdev", "controllers.gsettings",
+              "controllers.helper"],
+}
+
+# 探测超时（秒）：超时未完成的后端视为不可用
+PROBE_TIMEOUT = 3.0
+# 空操作往返次数，取最小值作为后端延迟
+NOOP_ROUNDS = 3
+
+# 已注册的后端：名称 -> (控制器类, 支持的平台)
+_backends = {}
+
+def register_backend(name, platforms, default=False):
+    """
+    注册触控板控制后端的类装饰器
+
+    参数:
+        name: 后端名称，用于配置覆盖和统计输出
+        platforms: 支持的平台名称列表，与platform.system()一致
+        default: 是否为该平台的默认后端（所有后端都不可用时使用）
+
+    返回:
+        function: 类装饰器
+    """
+    def decorator(cls):
+        cls.backend_name = name
+        cls.default_backend = default
+        _backends[name] = (cls, tuple(platforms))
+        return cls
+    return decorator
+
+def load_backends(system, exclude=()):
+    """
+    导入平台对应的后端模块并返回其中注册的后端
+
+    参数:
+        system: 平台名称
+        exclude: 需要排除的后端名称
+
+    返回:
+        dict: 后端名称 -> 控制器类（按注册顺序）
+    """
+    for module in BACKEND_MODULES.get(system, []):
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.warning(f"加载后端模块{module}失败: {e}")
+    return {name: cls for name, (cls, platforms) in _backends.items()
+            if system in platforms and name not in exclude}
+
+def probe_backend(cls, device_rules=None):
+    """
+    创建后端实例，检查其是否可用并测量空操作往返延迟
+
+    参数:
+        cls: 控制器类
+        device_rules: 设备匹配规则列表
+
+    返回:
+        tuple: (控制器实例或None, 探测结果字典)
+    """
+    start = time.perf_counter()
+    controller = None
+    try:
+        controller = cls(device_rules)
+        if not controller.probe():
+            return controller, {"ok": False, "error": "不可用",
+                                "probe_ms": round((time.perf_counter() - start) * 1000, 3)}
+        latencies = []
+        for _ in range(NOOP_ROUNDS):
+            begin = time.perf_counter()
+            controller.noop()
+            latencies.append(time.perf_counter() - begin)
+        return controller, {"ok": True, "noop_ms": round(min(latencies) * 1000, 3),
+                            "probe_ms": round((time.perf_counter() - start) * 1000, 3)}
+    except Exception as e:
+        return controller, {"ok": False, "error": str(e),
+                            "probe_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+def select_backend(system, preferred="auto", device_rules=None, timeout=PROBE_TIMEOUT, exclude=()):
+    """
+    选择触控板控制后端
+
+    配置指定了后端时只探测该后端，不可用时回退到自动选择。
+    自动选择时并行探测所有候选后端，空操作往返最快的可用后端胜出。
+    所选后端及各候选的探测结果记录在控制器的probe_report属性中。
+
+    参数:
+        system: 平台名称
+        preferred: 配置中指定的后端名称，"auto"表示自动选择
+        device_rules: 设备匹配规则列表
+        timeout: 探测超时（秒）
+        exclude: 不参与选择的后端名称（如特权助手自身不能选择"helper"后端）
+
+    返回:
+        BaseTouchpadController: 所选后端的控制器实例
+
+    异常:
+        NotImplementedError: 当前平台没有任何后端，或没有可用后端且无法退回默认后端
+    """
+    backends = load_backends(system, exclude)
+    if not backends:
+        raise NotImplementedError(f"不支持的平台: {system}")
+
+    report = {"preferred": preferred, "selected": None, "candidates": {}}
+
+    if preferred and preferred != "auto":
+        if preferred in backends:
+            controller, result = probe_backend(backends[preferred], device_rules)
+            report["candidates"][preferred] = result
+            if result["ok"]:
+                return _finish_selection(controller, report, "配置指定")
+            _cleanup_quietly(controller)
+            logger.warning(f"配置指定的后端{preferred}不可用({result['error']})，改为自动选择")
+        else:
+            logger.warning(f"未知的后端: {preferred}，可选: {', '.join(backends)}，改为自动选择")
+
+    candidates = {name: cls for name, cls in backends.items() if name not in report["candidates"]}
+    executor = ThreadPoolExecutor(max_workers=len(candidates) or 1, thread_name_prefix="backend-probe")
+    futures = {executor.submit(probe_backend, cls, device_rules): name for name, cls in candidates.items()}
+    done, pending = wait(futures, timeout=timeout)
+    executor.shutdown(wait=False)
+
+    controllers = {}
+    for future in done:
+        name = futures[future]
+        controller, result = future.result()
+        report["candidates"][name] = result
+        controllers[name] = controller
+    for future in pending:
+        report["candidates"][futures[future]] = {"ok": False, "error": "探测超时"}
+        # 超时的探测完成后释放其资源
+        future.add_done_callback(lambda f: _cleanup_quietly(f.result()[0]))
+
+    # 按注册顺序排列探测结果，便于阅读
+    report["candidates"] = {name: report["candidates"][name] for name in backends
+                            if name in report["candidates"]}
+    working = [name for name in controllers if report["candidates"][name]["ok"]]
+    if working:
+        selected = min(working, key=lambda name: report["candidates"][name]["noop_ms"])
+        reason = "自动选择"
+    else:
+        # 没有可用后端时退回平台默认后端，保持程序可运行；
+        # 默认后端被排除或无法加载时，按注册顺序退回已创建实例的探测后端
+        selected = next((name for name, cls in backends.items() if cls.default_backend), None)
+        if selected is None:
+            selected = next((name for name in backends if controllers.get(name) is not None), None)
+        if selected is None:
+            raise NotImplementedError(f"没有可用的触控板后端: {system}")
+        reason = "无可用后端，使用默认"
+        if controllers.get(selected) is None:
+            controllers[selected] = backends[selected](device_rules)
+
+    for name, controller in controllers.items():
+        if name != selected:
+            _cleanup_quietly(controller)
+    return _finish_selection(controllers[selected], report, reason)
+
+def create_fallbacks(system, names, exclude=None, device_rules=None):
+    """
+    创建回退后端实例，跳过未知和不可用的后端
+
+    参数:
+        system: 平台名称
+        names: 回退后端名称列表（按优先顺序）
+        exclude: 需要排除的后端名称（主后端）
+        device_rules: 设备匹配规则列表
+
+    返回:
+        list: 可用的控制器实例列表
+    """
+    backends = load_backends(system)
+    fallbacks = []
+    for name in names:
+        if name == exclude or name in (b.backend_name for b in fallbacks):
+            continue
+        if name not in backends:
+            logger.warning(f"未知的回退后端: {name}")
+            continue
+        controller, result = probe_backend(backends[name], device_rules)
+        if result["ok"]:
+            fallbacks.append(controller)
+        else:
+            _cleanup_quietly(controller)
+            logger.warning(f"回退后端{name}不可用: {result['error']}")
+    if fallbacks:
+        logger.info(f"回退链: {exclude} -> {' -> '.join(b.backend_name for b in fallbacks)}")
+    return fallbacks
+
+def _finish_selection(controller, report, reason):
+    """
+    记录选择结果并输出日志
+
+    参数:
+        controller: 所选控制器实例
+        report: 探测报告
+        reason: 选择原因
+
+    返回:
+        BaseTouchpadController: 控制器实例
+    """
+    report["selected"] = controller.backend_name
+    controller.probe_report = report
+    summary = ", ".join(
+        f"{name}={result['noop_ms']}ms" if result["ok"] else f"{name}=不可用({result['error']})"
+        for name, result in report["candidates"].items()
+    )
+    logger.info(f"触控板后端: {controller.backend_name}（{reason}）；探测结果: {summary}")
+    return controller
+
+def _cleanup_quietly(controller):
+    """
+    释放未被选中的后端实例
+
+    参数:
+        controller: 控制器实例，可为None
+    """
+    if controller is None:
+        return
+    try:
+        controller.cleanup()
+    except Exception as e:
+        logger.debug(f"释放后端{controller.backend_name}失败: {e}")
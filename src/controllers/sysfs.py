@@ -0,0 +1,105 @@
+import os
+import logging
+from controllers.base import BaseTouchpadController
+from controllers.registry import register_backend
+from controllers.input_devices import match_devices
+
+logger = logging.getLogger(__name__)
+
+@register_backend("sysfs", platforms=["Linux"])
+class SysfsTouchpadController(BaseTouchpadController):
+    """
+    通过sysfs的inhibited属性禁用设备（Linux 5.11+）
+
+    内核层面抑制设备，所有用户态程序（X服务器、Wayland合成器）都不再收到事件。
+    写入需要root权限，不依赖任何外部命令。
+    """
+    def __init__(self, device_rules=None):
+        """
+        查找匹配的设备
+
+        参数:
+            device_rules: 设备匹配规则列表，None表示只控制触控板
+        """
+        super().__init__(device_rules)
+        self.devices = [device for device in match_devices(self.device_rules)
+                        if os.path.exists(self._inhibit_path(device))]
+
+    def _inhibit_path(self, device):
+        """
+        获取设备的inhibited属性文件路径
+
+        参数:
+            device: InputDevice实例
+
+        返回:
+            str: 文件路径
+        """
+        return os.path.join(device.input_node, "inhibited")
+
+    def probe(self):
+        """
+        检查所有设备的inhibited属性是否可写
+
+        返回:
+            bool: 是否可用
+        """
+        return bool(self.devices) and all(os.access(self._inhibit_path(device), os.W_OK)
+                                          for device in self.devices)
+
+    def noop(self):
+        """读取inhibited属性作为空操作往返"""
+        self._read_inhibited(self.devices[0])
+
+    def _read_inhibited(self, device):
+        """
+        读取设备当前是否被抑制
+
+        参数:
+            device: InputDevice实例
+
+        返回:
+            bool: True表示已抑制（设备禁用）
+        """
+        with open(self._inhibit_path(device), 'r') as f:
+            return f.read().strip() == "1"
+
+    def toggle(self, enable):
+        """
+        切换所有匹配设备的状态
+
+        参数:
+            enable (bool): True启用设备，False禁用设备
+
+        返回:
+            bool: 是否所有设备都切换成功
+        """
+        if not self.devices:
+            logger.error("未找到匹配的设备，无法切换状态")
+            return False
+        # 每个设备只是两次sysfs读写，直接在当前线程执行
+        return self.run_on_devices(self.devices, lambda device: self._toggle_device(device, enable),
+                                   parallel=False)
+
+    def _toggle_device(self, device, enable):
+        """
+        切换单个设备的状态
+
+        参数:
+            device: InputDevice实例
+            enable (bool): True启用设备，False禁用设备
+
+        返回:
+            bool: 操作是否成功
+        """
+        if self._read_inhibited(device) != enable:
+            logger.info(f"{device.name}当前已{'启用' if enable else '禁用'}，无需更改")
+            return True
+        with open(self._inhibit_path(device), 'w') as f:
+            f.write("0" if enable else "1")
+        success = self._read_inhibited(device) != enable
+        if success:
+            logger.info(f"{device.name}状态已成功设置为: {'启用' if enable else '禁用'}")
+        else:
+            logger.error(f"{device.name}的inhibited属性写入后未生效")
+        return success
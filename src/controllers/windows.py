@@ -3,6 +3,7 @@ import time
 import logging
 import winreg
 from controllers.base import BaseTouchpadController
+from controllers.registry import register_backend
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,7 @@ KEYEVENTF_KEYUP = 0x0002    # 按键释放
 reg_path = r"SOFTWARE\Microsoft\Windows\CurrentVersion\PrecisionTouchPad\Status"
 value_name = "Enabled"
 
+@register_backend("precision-touchpad", platforms=["Windows"], default=True)
 class WindowsTouchpadController(BaseTouchpadController):
     """
     Windows 精确触摸板控制器
@@ -26,10 +28,33 @@ class WindowsTouchpadController(BaseTouchpadController):
     来自https://learn.microsoft.com/zh-cn/windows-hardware/design/component-guidelines/touchpad-enable-or-disable-toggle-button
     """
     
-    def __init__(self):
-        """初始化Windows触控板控制器"""
-        super().__init__()
+    def __init__(self, device_rules=None):
+        """
+        初始化Windows触控板控制器
+        
+        参数:
+            device_rules: 设备匹配规则列表（Windows下只能控制精确触摸板，忽略此参数）
+        """
+        super().__init__(device_rules)
 
+    def probe(self):
+        """
+        检查精确触摸板状态注册表项是否存在
+        
+        返回:
+            bool: 是否可用
+        """
+        try:
+            self.noop()
+            return True
+        except OSError:
+            return False
+    
+    def noop(self):
+        """读取注册表状态值作为空操作往返"""
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, reg_path) as key:
+            winreg.QueryValueEx(key, value_name)
+    
     def toggle(self, enable):
         """
         切换触控板状态
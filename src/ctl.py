@@ -0,0 +1,47 @@
+import sys
+import json
+import argparse
+from control_server import send_request
+
+def parse_args():
+    """
+    解析命令行参数
+
+    返回:
+        argparse.Namespace: 命令行参数
+    """
+    parser = argparse.ArgumentParser(description="betterTouchpad 控制客户端")
+    parser.add_argument("--socket", metavar="PATH", help="控制套接字路径（Linux下默认使用抽象命名空间套接字，其他平台位于$XDG_RUNTIME_DIR或临时目录）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("get-state", help="查询触控板状态")
+    set_active = subparsers.add_parser("set-active", help="启用或禁用触控板")
+    set_active.add_argument("state", choices=["on", "off"])
+    subparsers.add_parser("toggle-mode", help="在长按模式和切换模式之间切换")
+    subparsers.add_parser("reload", help="重新加载配置文件")
+    subparsers.add_parser("stats", help="查询运行统计")
+    subparsers.add_parser("toggle", help="切换触控板状态")
+    subparsers.add_parser("show-settings", help="打开设置窗口（无界面模式下不可用）")
+    subparsers.add_parser("exit", help="退出服务")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    """
+    控制客户端入口点
+    向运行中的betterTouchpad服务发送一条命令并输出JSON响应
+    """
+    args = parse_args()
+    request_args = {}
+    if args.command == "set-active":
+        request_args["active"] = args.state == "on"
+
+    try:
+        response = send_request(args.command, args.socket, **request_args)
+    except OSError as e:
+        print(f"无法连接到betterTouchpad服务: {e}", file=sys.stderr)
+        sys.exit(2)
+    except ValueError as e:
+        print(f"betterTouchpad服务响应无效: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    print(json.dumps(response, ensure_ascii=False))
+    sys.exit(0 if response.get("ok") else 1)
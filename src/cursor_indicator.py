@@ -1,15 +1,35 @@
 import threading
+import logging
+import collections
 import tkinter as tk
 from PIL import Image, ImageTk
 import pyautogui
 import platform
 import os
 import time
-from configure_logger import configure_logger
+import metrics
+import supervisor
 from path_resolver import get_resource_path, get_application_path
 
 # 初始化日志记录器
-logger = configure_logger()
+logger = logging.getLogger(__name__)
+
+# 从显示请求到窗口可见的耗时
+SHOW_SECONDS = metrics.histogram("indicator_show_seconds", "鼠标指示器从显示请求到窗口可见的耗时（秒）")
+
+# 图标类型与资源文件对应关系
+ICON_FILES = {
+    "default": "cursor_default.png",
+    "on": "cursor_on.png",
+    "off": "cursor_off.png",
+}
+
+# 跟随光标的位置更新间隔（毫秒）：光标移动时使用最短间隔，静止时逐次加倍到最长间隔
+POSITION_INTERVAL_MS = 30
+POSITION_IDLE_INTERVAL_MS = 250
+
+# 等待指示器线程退出的最长时间（秒）
+DESTROY_TIMEOUT = 1.0
 
 class CursorIndicator:
     """
@@ -23,8 +43,30 @@ class CursorIndicator:
         self.window_created = False
         self.indicator_thread = None
         self.tk_img = None
-        self.hide_timer = None
+        self.hide_job = None  # 自动隐藏任务句柄
         self.is_showing = False
+        self.icons = {}  # 预加载的图标缓存
+        self.ready = threading.Event()  # 窗口初始化完成标志
+        self.position_job = None  # 位置更新任务句柄
+        self.position_interval = POSITION_INTERVAL_MS  # 当前的位置更新间隔（毫秒）
+        self.last_cursor = None  # 上一次读取的光标位置
+        self.show_requested_at = None  # 最近一次显示请求的时间戳
+        self.pending_show = None  # 窗口就绪前收到的显示请求(图标类型, 自动隐藏时间)
+        self.show_latencies = collections.deque(maxlen=100)  # 最近的显示请求到窗口可见耗时（秒）
+    
+    def warm_up(self):
+        """
+        预热指示器
+        
+        在后台线程中创建Tk解释器、加载全部图标并构建隐藏窗口，
+        之后的显示/隐藏只需deiconify/withdraw
+        """
+        if self.indicator_thread and self.indicator_thread.is_alive():
+            return
+        
+        self.ready.clear()
+        self.indicator_thread = supervisor.spawn(self._create_window, "cursor-indicator")
+        logger.info("鼠标指示器预热线程已启动")
         
     def start(self, icon_type="default", auto_hide_duration=None):
         """
@@ -34,68 +76,114 @@ class CursorIndicator:
             icon_type: 图标类型 ("default", "on", 或 "off")
             auto_hide_duration: 自动隐藏前的显示时间（秒），None表示不自动隐藏
         """
-        # 取消任何已存在的隐藏计时器
-        if self.hide_timer:
-            self.hide_timer.cancel()
-            self.hide_timer = None
-            
-        # 如果窗口已存在但被隐藏，则显示并更新图标
-        if self.window_created and self.root and self.root.winfo_exists():
-            if not self.is_showing:
-                self.root.deiconify()
-                self.is_showing = True
-                
-            self._update_icon(icon_type)
-            self.is_running = True
-        else:
-            # 首次创建窗口
-            self.is_running = True
-            self.is_showing = True
-            
-            self.indicator_thread = threading.Thread(
-                target=self._create_window, 
-                args=(icon_type,), 
-                daemon=True
-            )
-            self.indicator_thread.start()
-            logger.info(f"鼠标指示器线程已启动，图标类型: {icon_type}")
+        self.show_requested_at = time.perf_counter()
+        if not self.ready.is_set():
+            # 调用方可能持有控制器的锁，不等待Tk初始化：记下请求，窗口就绪后在Tk线程中显示
+            self.pending_show = (icon_type, auto_hide_duration)
+            self.warm_up()
+            if not self.ready.is_set():
+                return
+        if not self.window_created:
+            return
         
-        # 如果提供了持续时间，设置自动隐藏
-        if auto_hide_duration is not None:
-            self.hide_timer = threading.Timer(auto_hide_duration, self.hide)
-            self.hide_timer.daemon = True
-            self.hide_timer.start()
-            logger.info(f"指示器将在 {auto_hide_duration} 秒后自动隐藏")
+        self.is_running = True
+        try:
+            # 切换到Tk线程执行显示、图标更新和自动隐藏计时
+            self.root.after(0, self._show, icon_type, auto_hide_duration)
+        except Exception as e:
+            logger.error(f"显示鼠标指示器失败: {e}")
     
     def hide(self):
         """隐藏指示器但不销毁窗口"""
-        if self.window_created and self.root and self.root.winfo_exists() and self.is_showing:
-            self.root.withdraw()
-            self.is_showing = False
-            logger.info("鼠标指示器已隐藏")
+        if self.window_created and self.root:
+            try:
+                self.root.after(0, self._withdraw)
+            except Exception as e:
+                logger.error(f"隐藏鼠标指示器失败: {e}")
+    
+    def stop(self):
+        """停止显示指示器，取消自动隐藏计时并隐藏窗口"""
+        self.hide()
+    
+    def _show(self, icon_type, auto_hide_duration=None):
+        """在Tk线程中显示窗口、更新图标，并重新开始自动隐藏计时"""
+        self._cancel_hide()
+        if auto_hide_duration is not None:
+            # 自动隐藏由Tk线程的after计时，不为每次显示新建计时线程
+            self.hide_job = self.root.after(int(auto_hide_duration * 1000), self._withdraw)
+            logger.info(f"指示器将在 {auto_hide_duration} 秒后自动隐藏")
+        self._update_icon(icon_type)
+        if not self.is_showing:
+            self.is_showing = True
+            self.position_interval = POSITION_INTERVAL_MS
+            self.last_cursor = None
+            self._update_position()
+            self.root.deiconify()
+        
+        # 记录从请求到窗口可见的延迟
+        self.root.update_idletasks()
+        if self.show_requested_at is not None:
+            latency = time.perf_counter() - self.show_requested_at
+            self.show_latencies.append(latency)
+            SHOW_SECONDS.observe(latency)
+            logger.debug(f"指示器显示延迟: {latency * 1000:.2f}ms (第{len(self.show_latencies)}次)")
+    
+    def _cancel_hide(self):
+        """在Tk线程中取消尚未到期的自动隐藏"""
+        if self.hide_job:
+            self.root.after_cancel(self.hide_job)
+            self.hide_job = None
+    
+    def _withdraw(self):
+        """在Tk线程中隐藏窗口并暂停位置更新"""
+        self._cancel_hide()
+        if not self.is_showing:
+            return
+        self.root.withdraw()
+        self.is_showing = False
+        if self.position_job:
+            self.root.after_cancel(self.position_job)
+            self.position_job = None
+        logger.info("鼠标指示器已隐藏")
     
     def destroy(self):
-        """完全销毁指示器窗口和资源"""
+        """
+        完全销毁指示器窗口和资源
+        
+        窗口在Tk线程中销毁，主循环随之退出；最多等待DESTROY_TIMEOUT秒，
+        Tk线程卡住时不阻塞调用方
+        """
         self.is_running = False
-        self.is_showing = False
         
-        if self.hide_timer:
-            self.hide_timer.cancel()
-            self.hide_timer = None
-            
-        if self.window_created and self.root and self.root.winfo_exists():
+        if self.window_created and self.root:
             try:
-                self.root.destroy()
-                self.window_created = False
-                logger.info("鼠标指示器窗口已销毁")
+                self.root.after(0, self._destroy_window)
             except Exception as e:
                 logger.error(f"销毁指示器窗口失败: {e}")
+                return
+        
+        thread = self.indicator_thread
+        if thread and thread is not threading.current_thread():
+            thread.join(DESTROY_TIMEOUT)
+            if thread.is_alive():
+                logger.warning("鼠标指示器线程未在期限内退出")
+    
+    def _destroy_window(self):
+        """在Tk线程中取消计时任务并销毁窗口"""
+        self._cancel_hide()
+        if self.position_job:
+            self.root.after_cancel(self.position_job)
+            self.position_job = None
+        self.is_showing = False
+        self.window_created = False
+        self.root.destroy()
+        logger.info("鼠标指示器窗口已销毁")
     
-    def _create_window(self, icon_type):
-        """创建指示器窗口和UI组件"""
+    def _create_window(self):
+        """创建隐藏的指示器窗口并预加载所有图标"""
         try:
             self.root = tk.Tk()
-            self.window_created = True
+            self.root.withdraw()  # 初始化期间保持隐藏
             self.root.config(bg='#00ff00')  # 透明色
             
             # 窗口属性
@@ -108,8 +196,10 @@ class CursorIndicator:
             elif platform.system() == 'Linux':
                 self.root.attributes('-alpha', 0.98)
             
-            # 加载图标
-            self._load_icon(icon_type)
+            # 预加载全部图标
+            for icon_type in ICON_FILES:
+                self.icons[icon_type] = self._load_icon(icon_type)
+            self.tk_img = self.icons["default"]
             
             # 创建标签显示图标
             self.label = tk.Label(self.root, image=self.tk_img, bg='#00ff00')
@@ -118,8 +208,17 @@ class CursorIndicator:
             # 设置关闭行为
             self.root.protocol("WM_DELETE_WINDOW", self.hide)
             
-            # 开始位置更新
-            self._update_position()
+            # 完成布局计算，保证首次显示时无需再做初始化工作
+            self.root.update_idletasks()
+            self.window_created = True
+            self.ready.set()
+            logger.info("鼠标指示器窗口已预热完成")
+            
+            # 显示就绪前收到的最近一次请求
+            pending, self.pending_show = self.pending_show, None
+            if pending is not None:
+                self.is_running = True
+                self._show(*pending)
             
             # 进入主循环
             self.root.mainloop()
@@ -128,17 +227,25 @@ class CursorIndicator:
             logger.error(f"创建指示器窗口失败: {e}")
             self.is_running = False
             self.window_created = False
+            self.ready.set()
             if self.command_queue:
                 self.command_queue.put(('cursor_indicator_failed', None))
     
     def _update_position(self):
-        """更新窗口位置以跟随鼠标光标"""
-        if not self.is_running or not self.window_created:
+        """更新窗口位置以跟随鼠标光标（仅在窗口显示时运行，光标静止时降低频率）"""
+        self.position_job = None
+        if not self.is_running or not self.window_created or not self.is_showing:
             return
             
         try:
-            # 获取鼠标坐标
+            # 获取鼠标坐标，光标静止时逐次加倍更新间隔，移动后恢复
             x, y = pyautogui.position()
+            if (x, y) == self.last_cursor:
+                self.position_interval = min(self.position_interval * 2, POSITION_IDLE_INTERVAL_MS)
+                self.position_job = self.root.after(self.position_interval, self._update_position)
+                return
+            self.last_cursor = (x, y)
+            self.position_interval = POSITION_INTERVAL_MS
             
             # 计算窗口位置（右下角偏移）
             offset = 20
@@ -160,7 +267,7 @@ class CursorIndicator:
             self.root.geometry(f"+{win_x}+{win_y}")
             
             # 安排下一次更新
-            self.root.after(30, self._update_position)
+            self.position_job = self.root.after(self.position_interval, self._update_position)
             
         except Exception as e:
             logger.error(f"更新指示器位置失败: {e}")
@@ -171,7 +278,10 @@ class CursorIndicator:
             return
             
         try:
-            self._load_icon(icon_type)
+            icon = self.icons.get(icon_type) or self.icons.get("default")
+            if icon is None or icon is self.tk_img:
+                return
+            self.tk_img = icon
             
             # 更新标签
             if hasattr(self, 'label') and self.label.winfo_exists():
@@ -181,16 +291,15 @@ class CursorIndicator:
             logger.error(f"更新指示器图标失败: {e}")
     
     def _load_icon(self, icon_type):
-        """加载指定类型的图标"""
+        """
+        加载指定类型的图标
+        
+        返回:
+            ImageTk.PhotoImage: 加载的图标
+        """
         try:
             # 使用path_resolver获取图标路径
-            icon_files = {
-                "default": "cursor_default.png",
-                "on": "cursor_on.png",
-                "off": "cursor_off.png",
-            }
-            
-            icon_file = icon_files.get(icon_type, "cursor_default.png")
+            icon_file = ICON_FILES.get(icon_type, "cursor_default.png")
             icon_path = get_resource_path(icon_file)
             
             # 检查图标是否存在，如不存在则创建默认图标
@@ -206,14 +315,19 @@ class CursorIndicator:
             
             # 加载图标
             img = Image.open(icon_path)
-            self.tk_img = ImageTk.PhotoImage(img)
+            return ImageTk.PhotoImage(img)
             
         except Exception as e:
             logger.error(f"加载指示器图标失败: {e}")
-            self._create_default_icon_memory(icon_type)
+            return self._create_default_icon_memory(icon_type)
     
     def _create_default_icon_memory(self, icon_type):
-        """在内存中创建默认图标"""
+        """
+        在内存中创建默认图标
+        
+        返回:
+            ImageTk.PhotoImage: 创建的图标
+        """
         size = 24
         img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
         
@@ -230,7 +344,7 @@ class CursorIndicator:
         draw = ImageDraw.Draw(img)
         draw.ellipse([(2, 2), (size-2, size-2)], fill=color)
         
-        self.tk_img = ImageTk.PhotoImage(img)
+        return ImageTk.PhotoImage(img)
     
     def _create_default_icon(self, save_path, icon_type):
         """创建并保存默认图标"""
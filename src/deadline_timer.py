@@ -0,0 +1,72 @@
+import time
+import threading
+import logging
+import supervisor
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineTimer:
+    """
+    可重复使用的单次定时器
+
+    常驻一个线程，按绝对截止时间（time.monotonic_ns()）调用回调。每次计时只更新截止时间，
+    不新建线程：threading.Timer从新线程开始运行才开始计时，系统高负载时新线程迟迟得不到调度，
+    触发时间会随之推迟；截止时间从调用方记录的时刻算起，线程晚醒也不会累积误差。
+    """
+    def __init__(self, callback, name="deadline-timer"):
+        """
+        参数:
+            callback: 到期回调，无参数，在定时线程中调用
+            name: 线程名称
+        """
+        self.callback = callback
+        self.condition = threading.Condition()
+        self.deadline = None  # 截止时间（纳秒），None表示未计时
+        self.running = True
+        self.fired = 0
+        self.thread = supervisor.spawn(self._run, name, restart=True)
+
+    def schedule(self, deadline):
+        """
+        开始计时，替换尚未到期的截止时间
+
+        参数:
+            deadline: 截止时间（time.monotonic_ns()）
+        """
+        with self.condition:
+            self.deadline = deadline
+            self.condition.notify()
+
+    def cancel(self):
+        """取消尚未到期的计时，已开始执行的回调不受影响"""
+        with self.condition:
+            self.deadline = None
+
+    def _run(self):
+        """定时线程主循环：未计时时阻塞，计时中睡到截止时间"""
+        while True:
+            with self.condition:
+                while self.running:
+                    if self.deadline is None:
+                        self.condition.wait()
+                        continue
+                    remaining = self.deadline - time.monotonic_ns()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining / 1e9)
+                if not self.running:
+                    return
+                self.deadline = None
+                self.fired += 1
+            try:
+                self.callback()
+            except Exception as e:
+                logger.error(f"定时回调失败: {e}")
+
+    def stop(self):
+        """停止定时线程"""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join(1.0)
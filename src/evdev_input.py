@@ -0,0 +1,404 @@
+import os
+import errno
+import fcntl
+import ctypes
+import select
+import struct
+import threading
+import logging
+import realtime
+import supervisor
+from input_source import InputSource, KeyEvent
+from keycodes import MOUSE_BUTTONS
+from triggers import TriggerMatcher, parse_trigger, validate_trigger
+from inotify_util import IN_ATTRIB, IN_CREATE, IN_DELETE, watch_directory, read_events
+from controllers.input_devices import EV_KEY, list_input_devices
+
+logger = logging.getLogger(__name__)
+
+INPUT_DIR = "/dev/input"
+
+# input_event结构：timeval(秒, 微秒), type, code, value
+EVENT_FORMAT = struct.Struct("llHHi")
+# 每次read最多读取的事件数，一次系统调用处理一批事件
+READ_BATCH = 64
+
+# 按键事件的取值
+KEY_UP = 0
+KEY_REPEAT = 2
+
+# EVIOCSMASK请求码：_IOW('E', 0x93, struct input_mask)，结构为type, codes_size, codes_ptr
+EVIOCSMASK = 0x40104593
+INPUT_MASK_FORMAT = struct.Struct("IIQ")
+EV_CNT = 0x20
+KEY_CNT = 0x300
+# 键盘按键的键码范围（KEY_ESC到KEY_MICMUTE以后），报告打字时监听这些按键
+TYPING_CODES = frozenset(range(1, 0x100))
+
+class EvdevUnavailableError(Exception):
+    """没有可读取的键盘设备或配置的按键无法映射到键码"""
+
+
+class EvdevInputSource(InputSource):
+    """
+    基于evdev的键盘输入源（Linux）
+
+    只打开键盘类事件设备（绑定了鼠标按钮时也打开带这些按钮的指针设备），
+    用一个epoll循环同时等待所有设备和热插拔通知，每次读取一批事件。
+    通过EVIOCSMASK让内核只投递触发键用到的按键事件，其他按键不会唤醒本进程；新插入的键盘自动加入。
+    只有报告打字期间才让内核投递所有键盘按键，一批事件中的打字按键合并为一次回调。
+    组合键和按键序列由TriggerMatcher匹配，每个事件一次状态转移。
+
+    evdev只读取事件，不能阻止热键传递到系统，热键短按时也就无需再模拟一次。
+    """
+    name = "evdev"
+    suppresses_keys = False
+    supports_mouse_buttons = True
+
+    def __init__(self, keys):
+        """
+        打开所有可读取的键盘设备
+
+        参数:
+            keys: 需要监听的所有按键名称，用于检查能否映射到键码
+
+        异常:
+            EvdevUnavailableError: 按键无法映射或没有可读取的键盘设备
+        """
+        errors = [error for key in keys for error in validate_trigger(key)]
+        if errors:
+            raise EvdevUnavailableError("; ".join(errors))
+
+        self.lock = threading.Lock()
+        self.bindings = {}    # 用途（"hot_key"或"action:动作名称"） -> (触发键, 回调)
+        self.matcher = TriggerMatcher()  # 所有绑定编译后的触发键自动机
+        self.callbacks = {}   # 用途 -> 回调，整体替换，读取线程无需加锁
+        self.on_typing = None # 打字回调
+        self.mask_codes = frozenset()  # 内核过滤放行的键码
+        # 触发键中包含鼠标按钮时同时打开指针设备
+        self.watch_buttons = any(name in MOUSE_BUTTONS for key in keys for _, name in parse_trigger(key))
+        self.devices = {}     # 文件描述符 -> InputDevice
+        self.rejected = set() # 已判断为非键盘的事件节点名
+        self.mask_supported = True
+        self.events_read = 0
+        self.events_delivered = 0
+        self.reads = 0
+        self.thread = None
+
+        self.epoll = select.epoll()
+        self.stop_reader, self.stop_writer = os.pipe()
+        self.epoll.register(self.stop_reader, select.EPOLLIN)
+        self.hotplug_fd = None
+
+        for device in list_input_devices():
+            self._try_open(device)
+        if not self.devices:
+            self._close_all()
+            raise EvdevUnavailableError("没有可读取的键盘设备（需要root或input组权限）")
+
+        try:
+            self.hotplug_fd = watch_directory(INPUT_DIR, IN_CREATE | IN_ATTRIB | IN_DELETE)
+            self.epoll.register(self.hotplug_fd, select.EPOLLIN)
+        except OSError as e:
+            logger.warning(f"无法监视键盘热插拔: {e}")
+        logger.info(f"evdev输入源已打开键盘: {', '.join(d.name for d in self.devices.values())}")
+
+    # ----- InputSource接口 -----
+    def start(self, on_key, hot_key):
+        """开始在读取线程中接收热键事件"""
+        self._bind("hot_key", hot_key, on_key)
+        self.thread = supervisor.spawn(self._run, "evdev-input", restart=True)
+        realtime.register("input", self.thread)
+
+    def set_hot_key(self, hot_key):
+        """更换热键并更新内核事件过滤"""
+        _, on_key = self.bindings["hot_key"]
+        self._bind("hot_key", hot_key, on_key)
+
+    def bind_actions(self, action_keys, on_action):
+        """开始接收动作按键事件"""
+        for action, key in action_keys.items():
+            self._bind(f"action:{action}", key, lambda event, action=action: on_action(action, event))
+
+    def unbind_actions(self):
+        """停止接收动作按键事件"""
+        for purpose in [purpose for purpose in self.bindings if purpose.startswith("action:")]:
+            self._unbind(purpose)
+
+    def watch_typing(self, on_typing):
+        """让内核投递所有键盘按键并报告打字"""
+        with self.lock:
+            self.on_typing = on_typing
+            self._update_mask()
+        return True
+
+    def unwatch_typing(self):
+        """恢复只投递触发键的内核过滤"""
+        with self.lock:
+            self.on_typing = None
+            self._update_mask()
+
+    def get_stats(self):
+        """获取已打开的键盘和事件计数"""
+        return {
+            "name": self.name,
+            "keyboards": [device.name for device in self.devices.values()],
+            "kernel_filter": self.mask_supported,
+            "reads": self.reads,
+            "events_read": self.events_read,
+            "events_delivered": self.events_delivered,
+            "typing": self.on_typing is not None
+        }
+
+    def stop(self):
+        """停止读取线程并关闭所有设备"""
+        if self.thread is not None:
+            os.write(self.stop_writer, b"\0")
+            self.thread.join(1.0)
+            self.thread = None
+        self._close_all()
+
+    # ----- 按键绑定 -----
+    def _bind(self, purpose, key, callback):
+        """
+        设置一个用途的按键绑定
+
+        参数:
+            purpose: 绑定用途，如"hot_key"
+            key: 触发键
+            callback: 事件回调
+        """
+        with self.lock:
+            previous = self.bindings.get(purpose)
+            self.bindings[purpose] = (key, callback)
+            try:
+                self._update_watched()
+            except ValueError as e:
+                logger.error(f"无法监听触发键{key}: {e}")
+                if previous is None:
+                    del self.bindings[purpose]
+                else:
+                    self.bindings[purpose] = previous
+                self._update_watched()
+
+    def _unbind(self, purpose):
+        """
+        移除一个用途的按键绑定
+
+        参数:
+            purpose: 绑定用途
+        """
+        with self.lock:
+            if self.bindings.pop(purpose, None) is not None:
+                self._update_watched()
+
+    def _update_watched(self):
+        """
+        根据绑定重新编译触发键并更新所有设备的内核过滤（调用方需持有锁）
+
+        异常:
+            ValueError: 触发键无效或互相冲突
+        """
+        self.matcher.compile({purpose: key for purpose, (key, _) in self.bindings.items()})
+        self.callbacks = {purpose: callback for purpose, (_, callback) in self.bindings.items()}
+        self._update_mask()
+        if not self.watch_buttons and not self.matcher.codes.isdisjoint(MOUSE_BUTTONS.values()):
+            # 新绑定了鼠标按钮，打开之前跳过的指针设备
+            self.watch_buttons = True
+            self.rejected.clear()
+            open_nodes = {device.event_node for device in self.devices.values()}
+            for device in list_input_devices():
+                if device.event_node not in open_nodes:
+                    self._try_open(device)
+
+    def _update_mask(self):
+        """按触发键和是否报告打字更新所有设备的内核过滤（调用方需持有锁）"""
+        codes = self.matcher.codes
+        self.mask_codes = codes | TYPING_CODES if self.on_typing is not None else codes
+        for fd in list(self.devices):
+            self._apply_mask(fd)
+
+    def _apply_mask(self, fd):
+        """
+        设置设备的内核事件过滤：只投递被监听键码（和报告打字时的键盘按键）的按键事件
+
+        内核不支持EVIOCSMASK（4.4以前）时由读取线程在用户态过滤
+
+        参数:
+            fd: 设备文件描述符
+        """
+        if not self.mask_supported:
+            return
+        try:
+            for event_type, bits, count in ((0, (EV_KEY,), EV_CNT), (EV_KEY, self.mask_codes, KEY_CNT)):
+                mask = bytearray(count // 8)
+                for bit in bits:
+                    mask[bit // 8] |= 1 << bit % 8
+                buffer = (ctypes.c_ubyte * len(mask)).from_buffer(mask)
+                request = INPUT_MASK_FORMAT.pack(event_type, len(mask), ctypes.addressof(buffer))
+                fcntl.ioctl(fd, EVIOCSMASK, request)
+        except OSError as e:
+            if e.errno in (errno.ENOTTY, errno.EINVAL):
+                self.mask_supported = False
+                logger.info(f"内核不支持事件过滤，改为在用户态过滤: {e}")
+            else:
+                # 设备可能刚被移除
+                logger.debug(f"设置事件过滤失败: {e}")
+
+    # ----- 设备管理 -----
+    def _try_open(self, device):
+        """
+        打开键盘类设备（或需要监听的鼠标按钮所在的指针设备）并加入epoll
+
+        参数:
+            device: InputDevice实例
+
+        返回:
+            bool: 是否打开
+        """
+        node = device.event_node
+        if node is None or not (device.is_keyboard or self._is_button_device(device)):
+            if node is not None:
+                self.rejected.add(os.path.basename(node))
+            return False
+        try:
+            fd = os.open(node, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+        except OSError as e:
+            logger.debug(f"无法打开{node}: {e}")
+            return False
+        self.devices[fd] = device
+        self._apply_mask(fd)
+        self.epoll.register(fd, select.EPOLLIN)
+        return True
+
+    def _is_button_device(self, device):
+        """
+        判断是否需要打开指针设备以监听鼠标按钮
+
+        内核不支持事件过滤时不打开，避免指针移动事件唤醒读取线程；
+        不打开本程序自己的uinput虚拟指针
+
+        参数:
+            device: InputDevice实例
+
+        返回:
+            bool: 是否打开
+        """
+        if not self.watch_buttons or not self.mask_supported:
+            return False
+        from uinput_device import DEVICE_NAME
+        return device.name != DEVICE_NAME and any(device.supports_key(code) for code in MOUSE_BUTTONS.values())
+
+    def _close_device(self, fd, removed=True):
+        """
+        关闭设备
+
+        参数:
+            fd: 设备文件描述符
+            removed: 是否因设备被拔出而关闭
+        """
+        with self.lock:
+            device = self.devices.pop(fd, None)
+            try:
+                self.epoll.unregister(fd)
+            except (OSError, ValueError):
+                pass
+            os.close(fd)
+        if device is not None and removed:
+            logger.info(f"键盘已移除: {device.name}")
+
+    def _handle_hotplug(self):
+        """处理/dev/input的变化：新节点出现或权限变化时尝试打开"""
+        open_nodes = {os.path.basename(device.event_node) for device in self.devices.values()}
+        candidates = set()
+        for name, mask in read_events(self.hotplug_fd):
+            node = os.fsdecode(name)
+            if not node.startswith("event"):
+                continue
+            if mask & IN_DELETE:
+                self.rejected.discard(node)
+            elif node not in open_nodes and node not in self.rejected:
+                candidates.add(node)
+        if not candidates:
+            return
+        with self.lock:
+            for device in list_input_devices():
+                if device.event_node and os.path.basename(device.event_node) in candidates:
+                    if self._try_open(device):
+                        logger.info(f"键盘已加入: {device.name}")
+
+    def _close_all(self):
+        """关闭所有设备和内部文件描述符"""
+        for fd in list(self.devices):
+            self._close_device(fd, removed=False)
+        for fd in (self.hotplug_fd, self.stop_reader, self.stop_writer):
+            if fd is not None:
+                os.close(fd)
+        self.hotplug_fd = self.stop_reader = self.stop_writer = None
+        self.epoll.close()
+
+    # ----- 读取线程 -----
+    def _run(self):
+        """读取线程主循环：等待任意设备可读，批量读取并分发事件"""
+        while True:
+            for fd, mask in self.epoll.poll():
+                if fd == self.stop_reader:
+                    return
+                if fd == self.hotplug_fd:
+                    self._handle_hotplug()
+                elif mask & (select.EPOLLERR | select.EPOLLHUP):
+                    self._close_device(fd)
+                else:
+                    self._read_device(fd)
+
+    def _read_device(self, fd):
+        """
+        读取一批事件并分发被监听按键的按下和释放，报告打字时一批事件最多回调一次
+
+        参数:
+            fd: 设备文件描述符
+        """
+        try:
+            data = os.read(fd, EVENT_FORMAT.size * READ_BATCH)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            if e.errno == errno.ENODEV:
+                self._close_device(fd)
+            else:
+                logger.error(f"读取键盘事件失败: {e}")
+            return
+
+        self.reads += 1
+        matcher = self.matcher
+        codes = matcher.codes
+        callbacks = self.callbacks
+        on_typing = self.on_typing
+        typed = False
+        for seconds, microseconds, event_type, code, value in EVENT_FORMAT.iter_unpack(data):
+            self.events_read += 1
+            # 只处理被监听按键的按下和释放，自动重复直接丢弃
+            if event_type != EV_KEY or value == KEY_REPEAT:
+                continue
+            if code not in codes:
+                typed |= value != KEY_UP and code in TYPING_CODES
+                continue
+            # 序列的时间间隔使用内核事件时间戳，不受读取延迟影响
+            result = matcher.feed(code, value != KEY_UP, seconds + microseconds / 1e6)
+            if result is None:
+                typed |= value != KEY_UP
+                continue
+            purpose, key, key_event_type = result
+            callback = callbacks.get(purpose)
+            if callback is None:
+                continue
+            self.events_delivered += 1
+            try:
+                callback(KeyEvent(key, key_event_type, code))
+            except Exception as e:
+                logger.error(f"按键事件处理失败: {e}")
+        if typed and on_typing is not None:
+            try:
+                on_typing()
+            except Exception as e:
+                logger.error(f"打字事件处理失败: {e}")
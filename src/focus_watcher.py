@@ -0,0 +1,151 @@
+import os
+import select
+import platform
+import logging
+import supervisor
+
+logger = logging.getLogger(__name__)
+
+def is_supported():
+    """
+    检查当前环境是否可以跟踪X11焦点窗口
+
+    返回:
+        bool: Linux下设置了DISPLAY且安装了python-xlib时返回True
+    """
+    if platform.system() != "Linux" or not os.environ.get("DISPLAY"):
+        return False
+    try:
+        import Xlib.display  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class FocusWatcher:
+    """
+    X11焦点窗口监视器
+
+    在根窗口上订阅PropertyNotify事件，窗口管理器更新_NET_ACTIVE_WINDOW时读取新焦点窗口的WM_CLASS。
+    监视线程阻塞在X连接上，没有焦点变化时不产生任何唤醒，也不轮询。
+    """
+    def __init__(self, on_focus):
+        """
+        初始化焦点窗口监视器
+
+        参数:
+            on_focus: 焦点窗口的WM_CLASS变化时在监视线程中调用的回调，
+                      参数为(instance, class)元组，无法获取时为None
+        """
+        self.on_focus = on_focus
+        self.display = None
+        self.watch_thread = None
+        self.wm_class = None  # 当前焦点窗口的WM_CLASS
+        self.changes = 0
+        self.stop_reader, self.stop_writer = os.pipe()
+
+    def start(self):
+        """
+        连接X服务器、订阅根窗口属性变化并启动监视线程
+
+        异常:
+            Exception: 无法连接X服务器
+        """
+        from Xlib import X, display
+        self.display = display.Display()
+        self.root = self.display.screen().root
+        self.active_window_atom = self.display.intern_atom("_NET_ACTIVE_WINDOW")
+        self.root.change_attributes(event_mask=X.PropertyChangeMask)
+        self.display.flush()
+        # 启动时先报告一次当前焦点窗口
+        self._check_active_window()
+        self.watch_thread = supervisor.spawn(self._watch, "focus-watcher", restart=True)
+        logger.info("焦点窗口监视已启动")
+
+    def stop(self):
+        """停止监视线程并断开X连接"""
+        if self.watch_thread is None:
+            return
+        os.write(self.stop_writer, b"\0")
+        self.watch_thread.join(1.0)
+        self.watch_thread = None
+        try:
+            self.display.close()
+        except Exception as e:
+            logger.debug(f"关闭X连接失败: {e}")
+        self.display = None
+        os.close(self.stop_reader)
+        os.close(self.stop_writer)
+        logger.info("焦点窗口监视已停止")
+
+    def _watch(self):
+        """监视线程主循环：等待X事件，只处理_NET_ACTIVE_WINDOW的变化"""
+        from Xlib import X
+        from Xlib.error import ConnectionClosedError
+        poller = select.poll()
+        poller.register(self.display.fileno(), select.POLLIN)
+        poller.register(self.stop_reader, select.POLLIN)
+
+        while True:
+            # 读取焦点窗口时的X往返期间到达的事件已被python-xlib读入内部队列，套接字上不会再就绪，
+            # 因此每次等待前先处理完队列中的事件（包括启动时首次检查期间到达的事件）
+            try:
+                changed = False
+                while self.display.pending_events():
+                    event = self.display.next_event()
+                    if event.type == X.PropertyNotify and event.atom == self.active_window_atom:
+                        changed = True
+                # 一批事件中的多次焦点变化只处理最后一次，之后重新检查队列
+                if changed:
+                    self._check_active_window()
+                    continue
+            except ConnectionClosedError as e:
+                logger.error(f"X连接已断开，停止焦点窗口监视: {e}")
+                return
+            except Exception as e:
+                logger.error(f"处理焦点窗口事件失败: {e}")
+            for fd, _ in poller.poll():
+                if fd == self.stop_reader:
+                    return
+
+    def _check_active_window(self):
+        """读取当前焦点窗口的WM_CLASS，发生变化时调用回调"""
+        wm_class = self._get_active_wm_class()
+        if wm_class == self.wm_class:
+            return
+        self.wm_class = wm_class
+        self.changes += 1
+        logger.debug(f"焦点窗口: {wm_class}")
+        try:
+            self.on_focus(wm_class)
+        except Exception as e:
+            logger.error(f"处理焦点窗口变化失败: {e}")
+
+    def _get_active_wm_class(self):
+        """
+        获取当前焦点窗口的WM_CLASS
+
+        返回:
+            tuple: (instance, class)，没有焦点窗口或窗口已关闭时返回None
+        """
+        from Xlib import X
+        from Xlib.error import XError
+        try:
+            prop = self.root.get_full_property(self.active_window_atom, X.AnyPropertyType)
+            if prop is None or not prop.value or not prop.value[0]:
+                return None
+            window = self.display.create_resource_object("window", prop.value[0])
+            return window.get_wm_class()
+        except XError as e:
+            # 窗口在读取属性前已关闭
+            logger.debug(f"读取焦点窗口属性失败: {e}")
+            return None
+
+    def get_stats(self):
+        """
+        获取焦点窗口统计信息
+
+        返回:
+            dict: 当前焦点窗口的WM_CLASS和焦点变化次数
+        """
+        return {"wm_class": list(self.wm_class) if self.wm_class else None, "changes": self.changes}
@@ -0,0 +1,443 @@
+"""
+betterTouchpad特权助手（Linux）
+
+以root运行的小进程，持有触控板控制后端和键盘事件设备，
+界面进程以普通用户运行，通过本地套接字和紧凑的二进制协议（见helper_protocol）与之通信。
+
+用法:
+    sudo python src/helper.py [--user UID]
+"""
+import os
+import sys
+import json
+import errno
+import socket
+import struct
+import argparse
+import selectors
+import threading
+import logging
+import helper_protocol as protocol
+from click_engine import BUTTONS
+from input_source import ACTIONS
+
+logger = logging.getLogger(__name__)
+
+class HelperServer:
+    """
+    特权助手服务
+
+    所有连接由单个线程通过selectors多路复用处理，请求在该线程中同步执行并立即回复。
+    订阅连接（OP_SUBSCRIBE）接收evdev读取线程推送的按键事件。
+    发出过切换命令的连接断开时（界面进程退出或崩溃），重新启用被禁用的设备，避免触控板一直不可用；
+    使用虚拟指针的连接断开时释放所有按下中的鼠标按钮。
+    """
+    def __init__(self, path, allowed_uid):
+        """
+        初始化助手服务
+
+        参数:
+            path: 套接字地址
+            allowed_uid: 允许连接的用户uid（root始终允许）
+        """
+        self.path = path
+        self.allowed_uid = allowed_uid
+        self.selector = None
+        self.server_socket = None
+        self.controller = None
+        self.setup_config = None
+        self.input_source = None
+        self.click_engine = None
+        self.pointer_owner = None  # 使用虚拟指针的连接
+        self.subscriber = None
+        self.subscriber_lock = threading.Lock()
+        self.owner = None          # 最后一个发出切换命令的连接
+        self.disabled = False      # 最后一次切换是否禁用了设备
+        self.running = False
+        self.requests = 0
+        self.events_sent = 0
+        self.events_dropped = 0
+        # 用于唤醒selector以便退出
+        self.wakeup_reader, self.wakeup_writer = socket.socketpair()
+
+    def bind(self):
+        """
+        绑定并监听套接字
+
+        异常:
+            OSError: 套接字已被占用或无法绑定
+        """
+        server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        try:
+            server_socket.bind(self.path)
+        except OSError:
+            server_socket.close()
+            raise
+        server_socket.listen(4)
+        server_socket.setblocking(False)
+        self.server_socket = server_socket
+
+    def serve_forever(self):
+        """运行服务主循环，直到stop()被调用"""
+        if self.server_socket is None:
+            self.bind()
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.server_socket, selectors.EVENT_READ, self._accept)
+        self.selector.register(self.wakeup_reader, selectors.EVENT_READ, None)
+        self.running = True
+        logger.info(f"特权助手已启动: {self.path!r}，允许用户uid={self.allowed_uid}")
+        try:
+            while self.running:
+                for key, _ in self.selector.select():
+                    if key.data is None:
+                        self.running = False
+                        break
+                    key.data(key.fileobj)
+        finally:
+            self._cleanup()
+
+    def stop(self):
+        """请求服务主循环退出（可从其他线程或信号处理函数调用）"""
+        try:
+            self.wakeup_writer.send(b"\0")
+        except OSError:
+            pass
+
+    # ----- 连接管理 -----
+    def _accept(self, server_socket):
+        """接受新连接"""
+        try:
+            conn, _ = server_socket.accept()
+        except BlockingIOError:
+            return
+        if not self._is_trusted_peer(conn):
+            conn.close()
+            return
+        self.selector.register(conn, selectors.EVENT_READ, self._read)
+
+    def _is_trusted_peer(self, conn):
+        """
+        通过SO_PEERCRED检查对端是否为允许的用户或root
+
+        参数:
+            conn: 已接受的连接
+
+        返回:
+            bool: 是否允许该连接
+        """
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        pid, uid, _ = struct.unpack("3i", creds)
+        if uid in (0, self.allowed_uid):
+            return True
+        logger.warning(f"拒绝来自其他用户的助手连接: pid={pid}, uid={uid}")
+        return False
+
+    def _read(self, conn):
+        """读取并处理一条消息"""
+        try:
+            message = conn.recv(protocol.MAX_MESSAGE_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            message = b""
+        if not message:
+            self._close(conn)
+            return
+
+        self.requests += 1
+        try:
+            op, arg, payload = protocol.decode(message)
+            reply = self._handle(conn, op, arg, payload)
+        except Exception as e:
+            logger.error(f"处理助手请求失败: {e}")
+            reply = protocol.encode(protocol.REPLY, 0, str(e).encode("utf-8"))
+        try:
+            conn.send(reply)
+        except OSError:
+            self._close(conn)
+
+    def _close(self, conn):
+        """关闭连接，订阅连接关闭时停止转发按键事件"""
+        try:
+            self.selector.unregister(conn)
+        except (KeyError, ValueError):
+            pass
+        with self.subscriber_lock:
+            was_subscriber = conn is self.subscriber
+            if was_subscriber:
+                self.subscriber = None
+        if was_subscriber and self.input_source is not None:
+            self.input_source.unbind_actions()
+            self.input_source.unwatch_typing()
+        if conn is self.pointer_owner:
+            self.pointer_owner = None
+            self.click_engine.release_all()
+        if conn is self.owner:
+            self.owner = None
+            if self.disabled and self.controller is not None:
+                logger.warning("界面进程已断开，重新启用设备")
+                self.disabled = not self.controller.toggle(True)
+        conn.close()
+
+    # ----- 请求处理 -----
+    def _handle(self, conn, op, arg, payload):
+        """
+        执行一条请求
+
+        参数:
+            conn: 请求所在连接
+            op: 操作码
+            arg: 1字节参数
+            payload: 负载
+
+        返回:
+            bytes: 回复消息
+        """
+        if op == protocol.OP_PING:
+            return protocol.encode(protocol.REPLY, 1)
+        if op == protocol.OP_TOGGLE:
+            controller = self._get_controller()
+            self.owner = conn
+            ok = controller.toggle(bool(arg))
+            if ok:
+                self.disabled = not arg
+            return protocol.encode(protocol.REPLY, int(bool(ok)))
+        if op == protocol.OP_SETUP:
+            config = json.loads(payload.decode("utf-8"))
+            controller = self._get_controller(config)
+            return protocol.encode(protocol.REPLY, 1, controller.backend_name.encode("utf-8"))
+        if op == protocol.OP_STATS:
+            return protocol.encode(protocol.REPLY, 1, json.dumps(self.get_stats(), ensure_ascii=False).encode("utf-8"))
+        if op == protocol.OP_SUBSCRIBE:
+            self._get_input_source()
+            with self.subscriber_lock:
+                self.subscriber = conn
+            return protocol.encode(protocol.REPLY, 1)
+        if op == protocol.OP_WATCH_HOT_KEY:
+            source = self._get_input_source()
+            hot_key = payload.decode("utf-8")
+            if source.thread is None:
+                source.start(lambda event: self._forward(protocol.PURPOSE_HOT_KEY, event), hot_key)
+            else:
+                source.set_hot_key(hot_key)
+            return protocol.encode(protocol.REPLY, 1)
+        if op == protocol.OP_WATCH_ACTIONS:
+            keys = payload.decode("utf-8").split("\0")
+            action_keys = {action: key for action, key in zip(ACTIONS, keys) if key}
+            self._get_input_source().bind_actions(action_keys, self._forward_action)
+            return protocol.encode(protocol.REPLY, 1)
+        if op == protocol.OP_UNWATCH_ACTIONS:
+            if self.input_source is not None:
+                self.input_source.unbind_actions()
+            return protocol.encode(protocol.REPLY, 1)
+        if op == protocol.OP_WATCH_TYPING:
+            if arg:
+                self._get_input_source().watch_typing(self._forward_typing)
+            elif self.input_source is not None:
+                self.input_source.unwatch_typing()
+            return protocol.encode(protocol.REPLY, 1)
+        if op == protocol.OP_POINTER_OPEN:
+            self._get_click_engine()
+            self.pointer_owner = conn
+            return protocol.encode(protocol.REPLY, 1)
+        if op == protocol.OP_BUTTON:
+            engine = self._get_click_engine()
+            self.pointer_owner = conn
+            button = BUTTONS[arg >> 1]
+            if arg & 1:
+                engine.press(button)
+            else:
+                engine.release(button)
+            return protocol.encode(protocol.REPLY, 1)
+        if op == protocol.OP_MOVE:
+            self.pointer_owner = conn
+            self._get_click_engine().move(*protocol.MOVE_FORMAT.unpack(payload))
+            return protocol.encode(protocol.REPLY, 1)
+        if op == protocol.OP_SCROLL:
+            self.pointer_owner = conn
+            self._get_click_engine().scroll(*protocol.SCROLL_FORMAT.unpack(payload))
+            return protocol.encode(protocol.REPLY, 1)
+        return protocol.encode(protocol.REPLY, 0, f"未知操作码: {op}".encode("utf-8"))
+
+    def _get_controller(self, config=None):
+        """
+        获取触控板控制器，首次使用或设备配置变化时重新选择后端
+
+        参数:
+            config: 界面进程发来的配置（backend、fallback_backends、devices），None表示沿用当前配置
+
+        返回:
+            BackendChain: 控制器实例
+        """
+        if config is None:
+            config = self.setup_config or {}
+        if self.controller is not None and config == self.setup_config:
+            return self.controller
+        from controllers import create_controller
+        if self.controller is not None:
+            self.controller.cleanup()
+        self.controller = create_controller(config.get("backend", "auto"),
+                                            config.get("fallback_backends", []),
+                                            config.get("devices"),
+                                            exclude=("helper",))
+        self.setup_config = config
+        return self.controller
+
+    def _get_input_source(self):
+        """
+        获取evdev输入源，首次使用时打开键盘设备
+
+        返回:
+            EvdevInputSource: 输入源实例
+
+        异常:
+            EvdevUnavailableError: 没有可读取的键盘设备
+        """
+        if self.input_source is None:
+            from evdev_input import EvdevInputSource
+            self.input_source = EvdevInputSource([])
+        return self.input_source
+
+    def _get_click_engine(self):
+        """
+        获取uinput点击引擎，首次使用时创建虚拟指针设备
+
+        返回:
+            UinputClickEngine: 点击引擎实例
+
+        异常:
+            UinputUnavailableError: 无法创建虚拟指针设备
+        """
+        if self.click_engine is None:
+            from click_engine import UinputClickEngine
+            self.click_engine = UinputClickEngine()
+        return self.click_engine
+
+    def _forward_action(self, action, event):
+        """
+        转发动作按键事件（在evdev读取线程中调用）
+
+        参数:
+            action: 按键绑定的动作名称
+            event: 按键事件
+        """
+        self._forward(protocol.PURPOSE_ACTION_BASE + ACTIONS.index(action), event)
+
+    def _forward_typing(self):
+        """转发打字按键（在evdev读取线程中调用，一批事件最多一次）"""
+        self._send_event(protocol.encode(protocol.EVENT_KEY, protocol.PURPOSE_TYPING << 1 | 1))
+
+    def _forward(self, purpose, event):
+        """
+        把按键事件转发给订阅连接（在evdev读取线程中调用）
+
+        参数:
+            purpose: 按键用途编号
+            event: 按键事件
+        """
+        self._send_event(protocol.encode(protocol.EVENT_KEY, purpose << 1 | (event.event_type == "down")))
+
+    def _send_event(self, message):
+        """
+        把事件消息发送给订阅连接，连接阻塞时丢弃
+
+        参数:
+            message: 已编码的事件消息
+        """
+        with self.subscriber_lock:
+            subscriber = self.subscriber
+            if subscriber is None:
+                return
+            try:
+                subscriber.send(message, socket.MSG_DONTWAIT)
+                self.events_sent += 1
+            except BlockingIOError:
+                # 界面进程长时间不读取时丢弃事件，不阻塞读取线程
+                self.events_dropped += 1
+            except OSError as e:
+                if e.errno not in (errno.EPIPE, errno.ECONNRESET):
+                    logger.error(f"转发按键事件失败: {e}")
+
+    def get_stats(self):
+        """
+        获取助手统计信息
+
+        返回:
+            dict: 统计信息
+        """
+        controller = self.controller
+        return {
+            "backend": controller.backend_name if controller else None,
+            "backend_probe": controller.probe_report if controller else None,
+            "breakers": controller.get_breaker_states() if controller else {},
+            "devices": controller.get_device_results() if controller else {},
+            "input": self.input_source.get_stats() if self.input_source else None,
+            "clicks": self.click_engine.get_stats() if self.click_engine else None,
+            "requests": self.requests,
+            "events_sent": self.events_sent,
+            "events_dropped": self.events_dropped
+        }
+
+    def _cleanup(self):
+        """关闭所有连接并释放设备"""
+        for key in list(self.selector.get_map().values()):
+            if key.data == self._read:
+                self._close(key.fileobj)
+        self.selector.close()
+        self.server_socket.close()
+        if not self.path.startswith("\0"):
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        self.wakeup_reader.close()
+        self.wakeup_writer.close()
+        if self.click_engine is not None:
+            try:
+                self.click_engine.close()
+            except Exception as e:
+                logger.exception(f"关闭虚拟指针失败: {e}", exc_info=True)
+        if self.input_source is not None:
+            try:
+                self.input_source.stop()
+            except Exception as e:
+                logger.exception(f"停止输入源失败: {e}", exc_info=True)
+        if self.controller is not None:
+            try:
+                self.controller.cleanup()
+            except Exception as e:
+                logger.exception(f"清理控制器失败: {e}", exc_info=True)
+        logger.info("特权助手已停止")
+
+
+def parse_args():
+    """
+    解析命令行参数
+
+    返回:
+        argparse.Namespace: 命令行参数
+    """
+    from control_server import owner_uid
+    parser = argparse.ArgumentParser(description="betterTouchpad 特权助手")
+    parser.add_argument("--user", type=int, default=owner_uid(), metavar="UID",
+                        help="允许连接的界面进程用户uid（默认为调用sudo的用户）")
+    parser.add_argument("--socket", metavar="PATH",
+                        help="套接字地址（默认使用按uid区分的抽象命名空间套接字）")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    import signal
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if os.geteuid() != 0:
+        logger.warning("特权助手未以root运行，可能无法访问输入设备")
+
+    server = HelperServer(args.socket or protocol.helper_socket_path(args.user), args.user)
+    try:
+        server.bind()
+    except OSError as e:
+        logger.error(f"无法绑定助手套接字（可能已有助手在运行）: {e}")
+        sys.exit(1)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: server.stop())
+    server.serve_forever()
@@ -0,0 +1,437 @@
+import json
+import time
+import socket
+import struct
+import threading
+import logging
+import realtime
+import supervisor
+import helper_protocol as protocol
+from input_source import ACTIONS, InputSource, KeyEvent
+from click_engine import BUTTONS, ClickEngine
+
+logger = logging.getLogger(__name__)
+
+# 请求超时（秒）：助手在设置时需要探测后端，其余请求都在亚毫秒级完成
+REQUEST_TIMEOUT = 5.0
+# 按键接收连接中断后重新连接的等待时间：从RECONNECT_DELAY起每次失败翻倍，最长MAX_RECONNECT_DELAY秒；
+# 连接保持超过MAX_RECONNECT_DELAY秒后恢复为RECONNECT_DELAY
+RECONNECT_DELAY = 0.1
+MAX_RECONNECT_DELAY = 5.0
+
+class HelperError(RuntimeError):
+    """助手返回失败或连接中断"""
+
+
+def connect(path=None, timeout=REQUEST_TIMEOUT):
+    """
+    连接特权助手
+
+    参数:
+        path: 套接字地址，None表示使用当前用户的默认地址
+        timeout: 超时时间（秒）
+
+    返回:
+        socket.socket: 已连接的套接字
+
+    异常:
+        OSError: 助手未运行或拒绝连接
+        PermissionError: 监听该地址的不是root进程
+    """
+    from control_server import owner_uid
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    conn.settimeout(timeout)
+    try:
+        conn.connect(path or protocol.helper_socket_path(owner_uid()))
+        # 抽象地址任何本地用户都可以抢先绑定，只信任root监听的助手
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        pid, uid, _ = struct.unpack("3i", creds)
+        if uid != 0:
+            raise PermissionError(f"助手地址被非root进程占用: pid={pid}, uid={uid}")
+    except OSError:
+        conn.close()
+        raise
+    return conn
+
+
+class HelperClient:
+    """
+    特权助手的同步请求连接
+
+    每次请求发送一条消息并等待一条回复，多个线程共用时由锁保证请求与回复一一对应
+    """
+    def __init__(self, path=None):
+        """
+        连接特权助手
+
+        参数:
+            path: 套接字地址，None表示使用默认地址
+
+        异常:
+            OSError: 助手未运行或拒绝连接
+        """
+        self.lock = threading.Lock()
+        self.conn = connect(path)
+
+    def request(self, op, arg=0, payload=b""):
+        """
+        发送请求并等待回复
+
+        参数:
+            op: 操作码
+            arg: 1字节参数
+            payload: 负载
+
+        返回:
+            tuple: (是否成功, 回复负载)
+
+        异常:
+            HelperError: 连接中断或回复格式错误
+        """
+        with self.lock:
+            try:
+                self.conn.send(protocol.encode(op, arg, payload))
+                reply = self.conn.recv(protocol.MAX_MESSAGE_SIZE)
+            except OSError as e:
+                raise HelperError(f"助手连接中断: {e}") from e
+        if not reply:
+            raise HelperError("助手已关闭连接")
+        reply_op, status, payload = protocol.decode(reply)
+        if reply_op != protocol.REPLY:
+            raise HelperError(f"意外的回复: {reply_op}")
+        return bool(status), payload
+
+    def ping(self):
+        """
+        心跳
+
+        返回:
+            bool: 助手是否响应
+        """
+        return self.request(protocol.OP_PING)[0]
+
+    def toggle(self, enable):
+        """
+        切换设备状态
+
+        参数:
+            enable: True启用，False禁用
+
+        返回:
+            bool: 操作是否成功
+        """
+        return self.request(protocol.OP_TOGGLE, int(bool(enable)))[0]
+
+    def setup(self, config):
+        """
+        让助手按配置选择后端
+
+        参数:
+            config: 包含backend、fallback_backends、devices的字典
+
+        返回:
+            str: 助手选择的后端名称
+
+        异常:
+            HelperError: 助手无法创建控制器
+        """
+        ok, payload = self.request(protocol.OP_SETUP, 0, json.dumps(config).encode("utf-8"))
+        if not ok:
+            raise HelperError(payload.decode("utf-8", "replace"))
+        return payload.decode("utf-8")
+
+    def stats(self):
+        """
+        获取助手统计信息
+
+        返回:
+            dict: 统计信息
+        """
+        ok, payload = self.request(protocol.OP_STATS)
+        return json.loads(payload.decode("utf-8")) if ok else {}
+
+    def close(self):
+        """关闭连接"""
+        self.conn.close()
+
+
+class HelperInputSource(InputSource):
+    """
+    通过特权助手接收按键事件的输入源
+
+    助手以root读取evdev键盘设备，把热键和点击按键的事件以2字节消息推送到本进程，
+    界面进程无需root权限。与evdev输入源一样不能阻止热键传递到系统。
+    连接中断（如助手重启）时接收线程按退避时间不断重新连接，直到停止输入源，
+    连接成功后恢复订阅；不受supervisor崩溃重启次数的限制。
+    """
+    name = "helper"
+    suppresses_keys = False
+    supports_mouse_buttons = True
+
+    def __init__(self, path=None):
+        """
+        连接特权助手并订阅按键事件
+
+        参数:
+            path: 套接字地址，None表示使用默认地址
+
+        异常:
+            OSError: 助手未运行
+            HelperError: 助手无法读取键盘设备
+        """
+        self.path = path
+        self.client = self._subscribe(path)
+        self.callbacks = {}  # 用途编号 -> (按键名称, 事件回调)
+        self.action_payload = None  # 最近一次订阅动作按键的负载，重新连接时重发
+        self.on_typing = None  # 打字回调
+        self.events = 0
+        self.reconnects = 0
+        self.disconnected = False  # 连接已中断，需要重新连接
+        self.stopping = threading.Event()  # 停止输入源时置位，中断重新连接的等待
+        self.thread = None
+
+    @staticmethod
+    def _subscribe(path):
+        """
+        连接助手并订阅按键事件
+
+        返回:
+            HelperClient: 已订阅的连接
+
+        异常:
+            OSError: 助手未运行
+            HelperError: 助手无法读取键盘设备
+        """
+        client = HelperClient(path)
+        try:
+            ok, payload = client.request(protocol.OP_SUBSCRIBE)
+        except HelperError:
+            client.close()
+            raise
+        if not ok:
+            client.close()
+            raise HelperError(payload.decode("utf-8", "replace"))
+        return client
+
+    def start(self, on_key, hot_key):
+        """开始接收热键事件"""
+        self.set_hot_key(hot_key, on_key)
+        self.thread = supervisor.spawn(self._run, "helper-input", restart=True)
+        realtime.register("input", self.thread)
+
+    def set_hot_key(self, hot_key, on_key=None):
+        """更换热键"""
+        if on_key is None:
+            on_key = self.callbacks[protocol.PURPOSE_HOT_KEY][1]
+        self.callbacks[protocol.PURPOSE_HOT_KEY] = (hot_key, on_key)
+        self._send(protocol.OP_WATCH_HOT_KEY, hot_key.encode("utf-8"))
+
+    def bind_actions(self, action_keys, on_action):
+        """开始接收动作按键事件"""
+        for index, action in enumerate(ACTIONS):
+            if action in action_keys:
+                self.callbacks[protocol.PURPOSE_ACTION_BASE + index] = (
+                    action_keys[action], lambda event, action=action: on_action(action, event))
+        keys = "\0".join(action_keys.get(action, "") for action in ACTIONS)
+        self.action_payload = keys.encode("utf-8")
+        self._send(protocol.OP_WATCH_ACTIONS, self.action_payload)
+
+    def unbind_actions(self):
+        """停止接收动作按键事件"""
+        self._send(protocol.OP_UNWATCH_ACTIONS)
+        self.action_payload = None
+        for purpose in range(protocol.PURPOSE_ACTION_BASE, protocol.PURPOSE_ACTION_BASE + len(ACTIONS)):
+            self.callbacks.pop(purpose, None)
+
+    def watch_typing(self, on_typing):
+        """让助手报告打字按键"""
+        self.on_typing = on_typing
+        self._send(protocol.OP_WATCH_TYPING, arg=1)
+        return True
+
+    def unwatch_typing(self):
+        """让助手停止报告打字按键"""
+        self._send(protocol.OP_WATCH_TYPING, arg=0)
+        self.on_typing = None
+
+    def get_stats(self):
+        """获取收到的事件数和重新连接次数"""
+        return {"name": self.name, "events": self.events, "reconnects": self.reconnects}
+
+    def stop(self):
+        """关闭连接并停止接收线程"""
+        self.stopping.set()
+        try:
+            self.client.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        if self.thread is not None:
+            self.thread.join(1.0)
+            self.thread = None
+        self.client.close()
+
+    def _send(self, op, payload=b"", arg=0):
+        """
+        发送一条订阅控制消息，回复由接收线程消费
+
+        参数:
+            op: 操作码
+            payload: 负载
+            arg: 1字节参数
+        """
+        with self.client.lock:
+            try:
+                self.client.conn.send(protocol.encode(op, arg, payload))
+            except OSError as e:
+                logger.error(f"发送助手请求失败: {e}")
+
+    def _reconnect(self):
+        """
+        重新连接助手，恢复订阅的热键、动作按键和打字监视
+
+        异常:
+            OSError: 助手未运行
+            HelperError: 助手无法读取键盘设备
+        """
+        client = self._subscribe(self.path)
+        self.client.close()
+        self.client = client
+        if self.stopping.is_set():
+            # 重新连接期间输入源已停止，stop()关闭的是旧连接
+            client.close()
+            return
+        self.disconnected = False
+        self.reconnects += 1
+        self._send(protocol.OP_WATCH_HOT_KEY, self.callbacks[protocol.PURPOSE_HOT_KEY][0].encode("utf-8"))
+        if self.action_payload is not None:
+            self._send(protocol.OP_WATCH_ACTIONS, self.action_payload)
+        if self.on_typing is not None:
+            self._send(protocol.OP_WATCH_TYPING, arg=1)
+        logger.info("已重新连接特权助手")
+
+    def _run(self):
+        """接收线程主循环：接收事件，连接中断时按退避时间重新连接，直到停止输入源"""
+        delay = RECONNECT_DELAY
+        while True:
+            if self.disconnected:
+                if self.stopping.wait(delay):
+                    return
+                try:
+                    self._reconnect()
+                except (OSError, HelperError) as e:
+                    delay = min(delay * 2, MAX_RECONNECT_DELAY)
+                    logger.warning(f"重新连接特权助手失败: {e}，{delay:.1f}秒后重试")
+                    continue
+            connected_at = time.monotonic()
+            self._receive()
+            if self.stopping.is_set():
+                return
+            self.disconnected = True
+            if time.monotonic() - connected_at > MAX_RECONNECT_DELAY:
+                delay = RECONNECT_DELAY
+            logger.warning("助手连接中断，准备重新连接")
+
+    def _receive(self):
+        """接收并分发按键和打字事件，忽略订阅控制消息的回复，连接中断或关闭时返回"""
+        conn = self.client.conn
+        conn.settimeout(None)
+        while True:
+            try:
+                message = conn.recv(protocol.MAX_MESSAGE_SIZE)
+            except OSError:
+                return
+            if not message:
+                return
+            op, arg, payload = protocol.decode(message)
+            if op == protocol.REPLY:
+                if not arg:
+                    logger.error(f"助手请求失败: {payload.decode('utf-8', 'replace')}")
+                continue
+            if op != protocol.EVENT_KEY:
+                continue
+            if arg >> 1 == protocol.PURPOSE_TYPING:
+                on_typing = self.on_typing
+                if on_typing is not None:
+                    try:
+                        on_typing()
+                    except Exception as e:
+                        logger.error(f"打字事件处理失败: {e}")
+                continue
+            binding = self.callbacks.get(arg >> 1)
+            if binding is None:
+                continue
+            key, callback = binding
+            self.events += 1
+            try:
+                callback(KeyEvent(key, "down" if arg & 1 else "up"))
+            except Exception as e:
+                logger.error(f"按键事件处理失败: {e}")
+
+
+class HelperClickEngine(ClickEngine):
+    """
+    通过特权助手的uinput虚拟指针注入点击
+
+    界面进程没有/dev/uinput权限时使用，每次按下或释放是一个2字节请求
+    """
+    name = "helper"
+
+    def __init__(self, path=None):
+        """
+        连接特权助手并让其创建虚拟指针
+
+        参数:
+            path: 套接字地址，None表示使用默认地址
+
+        异常:
+            OSError: 助手未运行
+            HelperError: 助手无法创建虚拟指针
+        """
+        super().__init__()
+        self.client = HelperClient(path)
+        try:
+            ok, payload = self.client.request(protocol.OP_POINTER_OPEN)
+        except HelperError:
+            self.client.close()
+            raise
+        if not ok:
+            self.client.close()
+            raise HelperError(payload.decode("utf-8", "replace"))
+
+    def _send(self, button, down):
+        """
+        发送按钮请求
+
+        异常:
+            HelperError: 助手返回失败或连接中断
+        """
+        ok, payload = self.client.request(protocol.OP_BUTTON, BUTTONS.index(button) << 1 | down)
+        if not ok:
+            raise HelperError(payload.decode("utf-8", "replace"))
+
+    def move(self, dx, dy):
+        """
+        发送相对移动请求
+
+        异常:
+            HelperError: 助手返回失败或连接中断
+        """
+        ok, payload = self.client.request(protocol.OP_MOVE, 0, protocol.MOVE_FORMAT.pack(dx, dy))
+        if not ok:
+            raise HelperError(payload.decode("utf-8", "replace"))
+
+    def scroll(self, dx, dy):
+        """
+        发送滚轮滚动请求
+
+        异常:
+            HelperError: 助手返回失败或连接中断
+        """
+        ok, payload = self.client.request(protocol.OP_SCROLL, 0, protocol.SCROLL_FORMAT.pack(dx, dy))
+        if not ok:
+            raise HelperError(payload.decode("utf-8", "replace"))
+
+    def close(self):
+        """释放所有按钮并关闭连接"""
+        super().close()
+        self.client.close()
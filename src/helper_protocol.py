@@ -0,0 +1,83 @@
+import struct
+
+# 特权助手协议
+#
+# 使用SOCK_SEQPACKET，每条消息就是一个数据报，无需分帧。
+# 消息 = 1字节操作码 + 1字节参数 + 可选负载。热路径上的消息（切换、心跳、按键事件）只有2字节，
+# 只有低频的设置和统计消息携带JSON或按键名称负载。
+
+# 客户端 -> 助手
+OP_PING = 0x01          # 心跳，测量往返延迟
+OP_TOGGLE = 0x02        # 参数：1启用 / 0禁用
+OP_SETUP = 0x03         # 负载：JSON配置（devices等），助手据此选择后端
+OP_STATS = 0x04         # 回复负载：JSON统计信息
+OP_SUBSCRIBE = 0x05     # 把当前连接设为按键事件连接
+OP_WATCH_HOT_KEY = 0x06 # 负载：热键名称
+OP_WATCH_ACTIONS = 0x07 # 负载：按input_source.ACTIONS顺序以\0分隔的按键名称，空字符串表示不绑定
+OP_UNWATCH_ACTIONS = 0x08
+OP_POINTER_OPEN = 0x09  # 准备uinput虚拟指针
+OP_BUTTON = 0x0a        # 参数：按钮编号 << 1 | 是否按下
+OP_MOVE = 0x0b          # 负载：MOVE_FORMAT打包的相对位移
+OP_SCROLL = 0x0c        # 负载：SCROLL_FORMAT打包的滚动量
+OP_WATCH_TYPING = 0x0d  # 参数：1开始 / 0停止报告打字按键
+
+# 助手 -> 客户端
+REPLY = 0x80            # 参数：1成功 / 0失败
+EVENT_KEY = 0x81        # 参数：用途 << 1 | 是否按下
+
+# 按键用途：0为热键，动作按键为PURPOSE_ACTION_BASE + 动作编号，打字按键为PURPOSE_TYPING
+PURPOSE_HOT_KEY = 0
+PURPOSE_ACTION_BASE = 1
+PURPOSE_TYPING = 0x7f
+
+HEADER = struct.Struct("BB")
+# 指针相对位移(dx, dy)
+MOVE_FORMAT = struct.Struct("hh")
+# 滚轮滚动量(dx, dy)，单位为1/120格
+SCROLL_FORMAT = struct.Struct("hh")
+# 单条消息的最大长度（字节）
+MAX_MESSAGE_SIZE = 4096
+
+def encode(op, arg=0, payload=b""):
+    """
+    编码一条消息
+
+    参数:
+        op: 操作码
+        arg: 1字节参数
+        payload: 负载
+
+    返回:
+        bytes: 消息
+    """
+    return HEADER.pack(op, arg) + payload
+
+def decode(message):
+    """
+    解码一条消息
+
+    参数:
+        message: 收到的数据报
+
+    返回:
+        tuple: (操作码, 参数, 负载)
+
+    异常:
+        ValueError: 消息过短
+    """
+    if len(message) < HEADER.size:
+        raise ValueError("消息过短")
+    op, arg = HEADER.unpack_from(message)
+    return op, arg, message[HEADER.size:]
+
+def helper_socket_path(uid):
+    """
+    获取助手的套接字地址（抽象命名空间，按允许连接的用户区分）
+
+    参数:
+        uid: 允许连接的用户uid
+
+    返回:
+        str: 套接字地址
+    """
+    return f"\0betterTouchpad-helper-{uid}"
@@ -0,0 +1,199 @@
+import os
+import time
+import fcntl
+import select
+import struct
+import platform
+import threading
+import logging
+import supervisor
+
+logger = logging.getLogger(__name__)
+
+# EVIOCSCLOCKID请求码：_IOW('E', 0xa0, int)，让事件时间戳使用CLOCK_MONOTONIC
+EVIOCSCLOCKID = 0x400445a0
+CLOCK_MONOTONIC = 1
+
+# 截止时间检查时每次read最多读取的事件数
+READ_BATCH = 256
+
+def is_supported():
+    """
+    检查当前平台能否检测触控板空闲
+
+    返回:
+        bool: Linux下返回True（还需要读取事件设备的权限）
+    """
+    return platform.system() == "Linux"
+
+
+class IdleWatcher:
+    """
+    触控板空闲检测
+
+    计时开始后打开受控设备的事件节点，但不等待它们可读：监视线程只睡到一个截止时间，
+    到期时一次读空各节点缓冲区中的事件，取最后一个事件的内核时间戳重新计算截止时间；
+    期间没有事件时调用空闲回调。触控板持续使用时每个超时周期只唤醒一次，
+    与触控板的事件频率无关；停止计时后关闭事件节点，线程完全阻塞。
+    """
+    def __init__(self, on_idle, rules):
+        """
+        参数:
+            on_idle: 空闲回调，参数为计时编号（见arm），在监视线程中调用
+            rules: 设备匹配规则，与控制器的devices配置相同
+        """
+        self.on_idle = on_idle
+        self.rules = rules
+        self.lock = threading.Lock()
+        self.fds = {}          # 文件描述符 -> 时间戳换算到time.monotonic()的偏移
+        self.timeout = None    # 空闲超时（秒），None表示未计时
+        self.deadline = None
+        self.generation = 0    # 每次开始计时加1，用于丢弃过期的空闲通知
+        self.wakeups = 0
+        self.rearms = 0
+        self.idle_count = 0
+        self.wake_reader, self.wake_writer = os.pipe()
+        self.thread = supervisor.spawn(self._run, "idle-watcher", restart=True)
+
+    def arm(self, timeout):
+        """
+        开始（或重新开始）计时，从现在起timeout秒内没有触控板事件时调用空闲回调
+
+        参数:
+            timeout: 空闲超时（秒）
+
+        返回:
+            int: 计时编号，随空闲回调一起传回；无法读取任何事件节点时为None（不计时）
+        """
+        with self.lock:
+            if not self.fds:
+                self._open_devices()
+            if not self.fds:
+                logger.warning("无法读取触控板事件节点（需要root或input组权限），自动关闭不会生效")
+                return None
+            self.generation += 1
+            self.timeout = timeout
+            self.deadline = time.monotonic() + timeout
+        os.write(self.wake_writer, b"\0")
+        return self.generation
+
+    def disarm(self):
+        """停止计时并关闭事件节点"""
+        with self.lock:
+            self.generation += 1
+            self.timeout = self.deadline = None
+            self._close_devices()
+        os.write(self.wake_writer, b"\0")
+
+    def _open_devices(self):
+        """打开受控设备的事件节点（调用方需持有锁），时间戳尽量切换为CLOCK_MONOTONIC"""
+        from controllers.input_devices import match_devices
+        for device in match_devices(self.rules):
+            node = device.event_node
+            if node is None:
+                continue
+            try:
+                fd = os.open(node, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+            except OSError as e:
+                logger.debug(f"无法打开{node}: {e}")
+                continue
+            try:
+                fcntl.ioctl(fd, EVIOCSCLOCKID, struct.pack("i", CLOCK_MONOTONIC))
+                self.fds[fd] = 0.0
+            except OSError:
+                # 旧内核只支持CLOCK_REALTIME时间戳
+                self.fds[fd] = None
+
+    def _close_devices(self):
+        """关闭所有事件节点（调用方需持有锁）"""
+        fds, self.fds = self.fds, {}
+        for fd in fds:
+            os.close(fd)
+
+    def _last_event_time(self):
+        """
+        读空所有事件节点，获取最后一个事件的时间（调用方需持有锁）
+
+        返回:
+            float: 最后一个事件的time.monotonic()时间，没有事件时为None
+        """
+        from evdev_input import EVENT_FORMAT
+        last = None
+        for fd, offset in list(self.fds.items()):
+            data = b""
+            while True:
+                try:
+                    chunk = os.read(fd, EVENT_FORMAT.size * READ_BATCH)
+                except BlockingIOError:
+                    break
+                except OSError as e:
+                    # 设备已移除
+                    logger.debug(f"读取触控板事件失败: {e}")
+                    del self.fds[fd]
+                    os.close(fd)
+                    break
+                if not chunk:
+                    break
+                data = chunk
+            if len(data) < EVENT_FORMAT.size:
+                continue
+            seconds, microseconds, _, _, _ = EVENT_FORMAT.unpack_from(data, len(data) - EVENT_FORMAT.size)
+            if offset is None:
+                offset = time.monotonic() - time.time()
+            stamp = seconds + microseconds / 1e6 + offset
+            last = stamp if last is None else max(last, stamp)
+        return last
+
+    def _run(self):
+        """监视线程主循环：未计时时阻塞，计时中睡到截止时间再检查"""
+        poller = select.poll()
+        poller.register(self.wake_reader, select.POLLIN)
+        while True:
+            with self.lock:
+                deadline = self.deadline
+            timeout = None if deadline is None else max(0, (deadline - time.monotonic()) * 1000)
+            if poller.poll(timeout):
+                if not os.read(self.wake_reader, 64):
+                    return
+                continue
+            self.wakeups += 1
+            with self.lock:
+                if self.deadline is None or time.monotonic() < self.deadline:
+                    continue
+                last = self._last_event_time()
+                if last is not None and last + self.timeout > time.monotonic():
+                    # 期间有触控板事件，从最后一个事件起重新计时
+                    self.deadline = last + self.timeout
+                    self.rearms += 1
+                    continue
+                generation = self.generation
+                self.timeout = self.deadline = None
+                self._close_devices()
+                self.idle_count += 1
+            try:
+                self.on_idle(generation)
+            except Exception as e:
+                logger.error(f"处理触控板空闲失败: {e}")
+
+    def get_stats(self):
+        """
+        获取空闲检测统计信息
+
+        返回:
+            dict: 是否计时中、打开的事件节点数、唤醒次数、重新计时次数和触发次数
+        """
+        return {
+            "armed": self.deadline is not None,
+            "devices": len(self.fds),
+            "wakeups": self.wakeups,
+            "rearms": self.rearms,
+            "idle": self.idle_count
+        }
+
+    def stop(self):
+        """停止监视线程并关闭所有文件描述符"""
+        os.close(self.wake_writer)
+        self.thread.join(1.0)
+        with self.lock:
+            self._close_devices()
+        os.close(self.wake_reader)
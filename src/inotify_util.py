@@ -0,0 +1,64 @@
+import os
+import struct
+import ctypes
+import ctypes.util
+
+# inotify常量（见linux/inotify.h）
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# inotify_event结构头：wd, mask, cookie, len
+EVENT_HEADER = struct.Struct("iIII")
+
+def watch_directory(directory, mask):
+    """
+    创建非阻塞inotify实例并监视目录
+
+    参数:
+        directory: 目录路径
+        mask: 事件掩码
+
+    返回:
+        int: inotify文件描述符，由调用方负责关闭
+
+    异常:
+        OSError: 创建实例或添加监视失败
+    """
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1失败")
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        errno = ctypes.get_errno()
+        os.close(fd)
+        raise OSError(errno, f"无法监视目录: {directory}")
+    return fd
+
+def read_events(fd):
+    """
+    读取并解析所有待处理的inotify事件
+
+    参数:
+        fd: inotify文件描述符（非阻塞）
+
+    返回:
+        list: (文件名bytes, 事件掩码)列表
+    """
+    events = []
+    while True:
+        try:
+            data = os.read(fd, 4096)
+        except BlockingIOError:
+            return events
+
+        offset = 0
+        while offset < len(data):
+            _, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            events.append((data[offset:offset + name_len].rstrip(b"\0"), mask))
+            offset += name_len
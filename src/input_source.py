@@ -0,0 +1,375 @@
+import platform
+import logging
+from click_engine import BUTTONS
+
+logger = logging.getLogger(__name__)
+
+# 可以绑定按键的动作：鼠标按钮、指针移动方向和滚动方向，顺序即特权助手协议中的动作编号
+ACTIONS = BUTTONS + ("move_up", "move_down", "move_left", "move_right",
+                     "scroll_up", "scroll_down", "scroll_left", "scroll_right")
+
+class KeyEvent:
+    """
+    按键事件
+
+    与keyboard库的事件对象具有相同的name和event_type属性，
+    TouchpadController的事件处理函数可以同时处理两种来源的事件
+    """
+    __slots__ = ("name", "event_type", "scan_code")
+
+    def __init__(self, name, event_type, scan_code=None):
+        """
+        参数:
+            name: 按键名称，如"f1"
+            event_type: "down"或"up"
+            scan_code: 键码
+        """
+        self.name = name
+        self.event_type = event_type
+        self.scan_code = scan_code
+
+
+class InputSource:
+    """
+    键盘输入源基类
+
+    负责把热键和点击按键的事件交给TouchpadController，
+    并封装与具体输入方式相关的按键拦截操作
+    """
+    name = None
+    suppresses_keys = False  # 能否阻止热键传递到系统
+    supports_mouse_buttons = False  # 能否把鼠标按钮（如"mouse back"）用作触发键
+
+    def resolve_key(self, name):
+        """
+        获取按键名称对应的键码，用于在接受配置前检查按键名称能否被本输入源识别
+
+        参数:
+            name: 按键名称
+
+        返回:
+            tuple: 键码元组，无法识别时返回空元组
+        """
+        from keycodes import codes_for
+        return codes_for(name)
+
+    def start(self, on_key, hot_key):
+        """
+        开始接收按键事件
+
+        参数:
+            on_key: 热键事件回调，参数为事件对象，返回False表示拦截
+            hot_key: 热键名称
+        """
+        raise NotImplementedError
+
+    def set_hot_key(self, hot_key):
+        """
+        更换热键
+
+        参数:
+            hot_key: 新的热键名称
+        """
+        raise NotImplementedError
+
+    def bind_actions(self, action_keys, on_action):
+        """
+        开始接收动作按键（点击、移动等）事件
+
+        参数:
+            action_keys: 动作名称（见ACTIONS） -> 对应按键名称
+            on_action: 动作按键事件回调，参数为(动作名称, 事件对象)
+        """
+        raise NotImplementedError
+
+    def unbind_actions(self):
+        """停止接收动作按键事件"""
+        raise NotImplementedError
+
+    def watch_typing(self, on_typing):
+        """
+        开始报告打字按键（不触发任何绑定的按键按下），用于打字防误触
+
+        参数:
+            on_typing: 打字回调，无参数，在输入线程中调用
+
+        返回:
+            bool: 输入源是否支持
+        """
+        return False
+
+    def unwatch_typing(self):
+        """停止报告打字按键"""
+
+    def hold_hot_key(self):
+        """长按触发后拦截热键的重复按下事件"""
+
+    def unhold_hot_key(self):
+        """取消hold_hot_key的拦截"""
+
+    def release_key(self, key):
+        """
+        发送按键释放事件，防止被拦截的按键粘滞
+
+        参数:
+            key: 按键名称
+        """
+
+    def replay_hot_key(self):
+        """
+        短按时把热键传递给系统
+
+        返回:
+            bool: 是否发送了模拟按键（之后会收到对应的模拟事件）
+        """
+        return False
+
+    def restore_hot_key(self):
+        """模拟按键结束后恢复热键拦截"""
+
+    def get_stats(self):
+        """
+        获取输入源统计信息
+
+        返回:
+            dict: 统计信息
+        """
+        return {"name": self.name}
+
+    def stop(self):
+        """停止接收事件并释放资源"""
+        raise NotImplementedError
+
+
+class KeyboardHookSource(InputSource):
+    """
+    基于keyboard库全局钩子的输入源
+
+    Windows下可以拦截热键；Linux下需要root权限，且钩子收到所有按键事件。
+    组合键和按键序列由keyboard库负责拦截，由TriggerMatcher按扫描码匹配后交给回调；
+    单个按键的动作按键直接使用hook_key拦截并转交
+    """
+    name = "keyboard"
+    suppresses_keys = True
+
+    def __init__(self):
+        """初始化输入源，keyboard库在启动时导入"""
+        self.keyboard = None
+        self.hot_key = None
+        self.press_hotkey = None  # 热键拦截句柄
+        self.hotkey_down = None   # 长按期间的热键按下拦截句柄
+        self.action_hooks = []  # 动作按键的钩子句柄
+        self.action_hotkeys = []  # 组合键动作按键的拦截句柄
+        self.matcher = None  # 热键和组合键动作按键的触发键自动机
+        self.bindings = {}  # 用途 -> 触发键
+        self.callbacks = {}  # 用途 -> 回调
+        self.action_codes = frozenset()  # 单个按键的动作按键扫描码，不计为打字
+        self.on_typing = None  # 打字回调
+        self.hook_thread_registered = False  # keyboard库调用钩子回调的线程是否已登记为输入线程
+
+    def start(self, on_key, hot_key):
+        """注册全局键盘钩子并拦截热键"""
+        import keyboard
+        from triggers import TriggerMatcher
+        self.keyboard = keyboard
+        self.hot_key = hot_key
+        self.matcher = TriggerMatcher(resolve=self.resolve_key)
+        self._bind("hot_key", hot_key, on_key)
+        # 注册键盘钩子
+        keyboard.hook(self._on_event)
+        # 确保热键被拦截，不会传递到系统
+        self.press_hotkey = keyboard.add_hotkey(hot_key, lambda: None, suppress=True)
+
+    def set_hot_key(self, hot_key):
+        """
+        先拦截新热键，成功后再移除旧热键的拦截
+
+        异常:
+            ValueError: keyboard库无法识别新热键，此时旧热键保持有效
+        """
+        press_hotkey = self.keyboard.add_hotkey(hot_key, lambda: None, suppress=True)
+        try:
+            if self.press_hotkey:
+                self.keyboard.remove_hotkey(self.press_hotkey)
+        except Exception as e:
+            logger.error(f"清理热键失败: {e}")
+        self.press_hotkey = press_hotkey
+        self.hot_key = hot_key
+        self._bind("hot_key", hot_key, self.callbacks["hot_key"])
+
+    def bind_actions(self, action_keys, on_action):
+        """拦截动作按键并转交回调，跳过keyboard库无法识别的按键"""
+        from triggers import is_compound, validate_trigger
+        for action, key in action_keys.items():
+            errors = validate_trigger(key, self.resolve_key)
+            if errors:
+                logger.error(f"无法绑定{action}按键{key!r}: {'; '.join(errors)}")
+                continue
+            if is_compound(key):
+                self.action_hotkeys.append(self.keyboard.add_hotkey(key, lambda: None, suppress=True))
+                self._bind(f"action:{action}", key, lambda event, action=action: on_action(action, event))
+            else:
+                self.action_hooks.append(self.keyboard.hook_key(
+                    key, lambda event, action=action: on_action(action, event), suppress=True))
+                self.action_codes |= frozenset(self.resolve_key(key))
+
+    def unbind_actions(self):
+        """移除动作按键的钩子"""
+        hooks, self.action_hooks = self.action_hooks, []
+        for hook in hooks:
+            self.keyboard.unhook(hook)
+        hotkeys, self.action_hotkeys = self.action_hotkeys, []
+        for hotkey in hotkeys:
+            self.keyboard.remove_hotkey(hotkey)
+        self.action_codes = frozenset()
+        for purpose in [purpose for purpose in self.bindings if purpose.startswith("action:")]:
+            del self.bindings[purpose]
+        self._compile()
+
+    def watch_typing(self, on_typing):
+        """全局钩子收到所有按键，直接在钩子回调中报告"""
+        self.on_typing = on_typing
+        return True
+
+    def unwatch_typing(self):
+        """停止报告打字按键"""
+        self.on_typing = None
+
+    def _bind(self, purpose, key, callback):
+        """
+        设置一个用途的触发键并重新编译
+
+        参数:
+            purpose: 绑定用途
+            key: 触发键
+            callback: 事件回调
+        """
+        self.bindings[purpose] = key
+        self.callbacks[purpose] = callback
+        self._compile()
+
+    def _compile(self):
+        """重新编译所有触发键"""
+        try:
+            self.matcher.compile(self.bindings)
+        except ValueError as e:
+            logger.error(f"触发键绑定失败: {e}")
+
+    def resolve_key(self, name):
+        """
+        获取按键名称对应的扫描码（尚未启动时导入keyboard库）
+
+        参数:
+            name: 按键名称
+
+        返回:
+            tuple: 扫描码元组，未知名称返回空元组
+        """
+        keyboard = self.keyboard
+        if keyboard is None:
+            import keyboard
+        return tuple(keyboard.key_to_scan_codes(name, False))
+
+    def _on_event(self, event):
+        """
+        全局钩子回调：按扫描码匹配触发键，触发时把事件交给对应回调，其他按键按下时报告打字
+
+        参数:
+            event: keyboard库的事件对象
+        """
+        if not self.hook_thread_registered:
+            # 钩子回调线程由keyboard库创建，收到第一个事件时登记
+            import realtime
+            realtime.register("input")
+            self.hook_thread_registered = True
+        down = event.event_type == "down"
+        result = self.matcher.feed(event.scan_code, down, event.time)
+        if result is None:
+            on_typing = self.on_typing
+            if on_typing is not None and down and event.scan_code not in self.action_codes:
+                on_typing()
+            return
+        purpose, key, event_type = result
+        callback = self.callbacks.get(purpose)
+        if callback is not None:
+            callback(KeyEvent(key, event_type, event.scan_code))
+
+    def hold_hot_key(self):
+        """拦截长按期间热键（组合键和序列的最后一个按键）的重复按下事件"""
+        from triggers import parse_trigger
+        _, key = parse_trigger(self.hot_key)[-1]
+        self.hotkey_down = self.keyboard.on_press_key(key, lambda e: None, suppress=True)
+
+    def unhold_hot_key(self):
+        """移除长按期间的热键拦截"""
+        if self.hotkey_down is not None:
+            self.keyboard.unhook(self.hotkey_down)
+            self.hotkey_down = None
+
+    def release_key(self, key):
+        """发送按键释放事件"""
+        self.keyboard.release(key)
+
+    def replay_hot_key(self):
+        """暂时移除热键拦截并模拟按下热键"""
+        try:
+            if self.press_hotkey:
+                self.keyboard.remove_hotkey(self.press_hotkey)
+        except KeyError:
+            pass
+        from triggers import is_compound
+        if is_compound(self.hot_key):
+            self.keyboard.send(self.hot_key)
+        else:
+            import pyautogui
+            pyautogui.press(self.hot_key)
+        return True
+
+    def restore_hot_key(self):
+        """重新拦截热键"""
+        self.press_hotkey = self.keyboard.add_hotkey(self.hot_key, lambda: None, suppress=True)
+
+    def stop(self):
+        """卸载所有键盘钩子"""
+        if self.keyboard is not None:
+            self.keyboard.unhook_all()
+
+
+def create_input_source(name, keys):
+    """
+    创建键盘输入源
+
+    参数:
+        name: "auto"、"helper"、"evdev"或"keyboard"；
+              auto在Linux下以普通用户运行时优先使用特权助手，其次evdev
+        keys: 需要监听的所有触发键（热键和动作按键）
+
+    返回:
+        InputSource: 输入源实例
+    """
+    if platform.system() != "Linux":
+        if name in ("helper", "evdev"):
+            logger.warning(f"{name}输入源仅支持Linux，改用keyboard库")
+        return KeyboardHookSource()
+
+    import os
+    if name == "helper" or (name == "auto" and os.geteuid() != 0):
+        from triggers import validate_trigger
+        from helper_client import HelperInputSource, HelperError
+        errors = [error for key in keys for error in validate_trigger(key)]
+        try:
+            if errors:
+                raise HelperError("; ".join(errors))
+            return HelperInputSource()
+        except (OSError, HelperError) as e:
+            log = logger.warning if name == "helper" else logger.info
+            log(f"无法使用特权助手输入源（{e}），改用其他输入源")
+
+    if name in ("auto", "evdev"):
+        from evdev_input import EvdevInputSource, EvdevUnavailableError
+        try:
+            return EvdevInputSource(keys)
+        except EvdevUnavailableError as e:
+            log = logger.warning if name == "evdev" else logger.info
+            log(f"无法使用evdev输入源（{e}），改用keyboard库")
+    return KeyboardHookSource()
@@ -0,0 +1,53 @@
+# Linux输入事件键码（见linux/input-event-codes.h），按keyboard库的按键名称索引
+# 不区分左右的修饰键对应两个键码
+
+_LETTERS = {
+    "q": 16, "w": 17, "e": 18, "r": 19, "t": 20, "y": 21, "u": 22, "i": 23, "o": 24, "p": 25,
+    "a": 30, "s": 31, "d": 32, "f": 33, "g": 34, "h": 35, "j": 36, "k": 37, "l": 38,
+    "z": 44, "x": 45, "c": 46, "v": 47, "b": 48, "n": 49, "m": 50,
+}
+
+_DIGITS = {str(digit): 1 + digit for digit in range(1, 10)}
+_DIGITS["0"] = 11
+
+_FUNCTION_KEYS = {f"f{n}": 58 + n for n in range(1, 11)}        # F1-F10: 59-68
+_FUNCTION_KEYS.update({"f11": 87, "f12": 88})
+_FUNCTION_KEYS.update({f"f{n}": 170 + n for n in range(13, 25)})  # F13-F24: 183-194
+
+_NAMED_KEYS = {
+    "esc": 1, "-": 12, "=": 13, "backspace": 14, "tab": 15, "[": 26, "]": 27, "enter": 28,
+    ";": 39, "'": 40, "`": 41, "\\": 43, ",": 51, ".": 52, "/": 53, "space": 57,
+    "caps lock": 58, "num lock": 69, "scroll lock": 70, "print screen": 99,
+    "home": 102, "up": 103, "page up": 104, "left": 105, "right": 106, "end": 107,
+    "down": 108, "page down": 109, "insert": 110, "delete": 111, "pause": 119, "menu": 127,
+    "left ctrl": 29, "right ctrl": 97, "left shift": 42, "right shift": 54,
+    "left alt": 56, "right alt": 100, "left windows": 125, "right windows": 126,
+}
+
+# 可以作为触发键的鼠标按钮（BTN_MIDDLE、BTN_SIDE、BTN_EXTRA）
+MOUSE_BUTTONS = {"mouse middle": 0x112, "mouse back": 0x113, "mouse forward": 0x114}
+
+_EITHER_SIDE = {
+    "ctrl": ("left ctrl", "right ctrl"),
+    "shift": ("left shift", "right shift"),
+    "alt": ("left alt", "right alt"),
+    "windows": ("left windows", "right windows"),
+}
+
+# 按键名称 -> 键码元组
+NAME_TO_CODES = {name: (code,) for table in (_LETTERS, _DIGITS, _FUNCTION_KEYS, _NAMED_KEYS, MOUSE_BUTTONS)
+                 for name, code in table.items()}
+NAME_TO_CODES.update({name: tuple(NAME_TO_CODES[side][0] for side in sides)
+                      for name, sides in _EITHER_SIDE.items()})
+
+def codes_for(name):
+    """
+    获取按键名称对应的键码
+
+    参数:
+        name: keyboard库风格的按键名称，如"f1"、"space"、"ctrl"
+
+    返回:
+        tuple: 键码元组，未知名称返回空元组
+    """
+    return NAME_TO_CODES.get(name.lower(), ())
@@ -1,10 +1,70 @@
-from touchpad_controller import TouchpadController
+import sys
+import argparse
+from single_instance import SingleInstance
+
+def parse_args():
+    """
+    解析命令行参数
+
+    返回:
+        argparse.Namespace: 命令行参数
+    """
+    parser = argparse.ArgumentParser(description="betterTouchpad 触控板控制工具")
+    parser.add_argument("--headless", action="store_true",
+                        help="无界面模式：不启动系统托盘和鼠标指示器，通过本地控制套接字控制")
+    parser.add_argument("--socket", metavar="PATH",
+                        help="本地控制套接字路径（Linux下默认使用抽象命名空间套接字）")
+    intent = parser.add_mutually_exclusive_group()
+    intent.add_argument("--settings", dest="intent", action="store_const", const="show-settings",
+                        help="已有实例运行时：打开其设置窗口（默认；无界面模式下不可用）")
+    intent.add_argument("--toggle", dest="intent", action="store_const", const="toggle",
+                        help="已有实例运行时：切换触控板状态")
+    intent.add_argument("--exit", dest="intent", action="store_const", const="exit",
+                        help="已有实例运行时：退出该实例")
+    args = parser.parse_args()
+    # 无界面实例没有设置窗口，默认只查询状态
+    if args.headless and args.intent == "show-settings":
+        parser.error("--settings不能与--headless同时使用")
+    if args.intent is None:
+        args.intent = "get-state" if args.headless else "show-settings"
+    return args
 
 if __name__ == "__main__":
     """
     程序入口点
-    创建并运行触控板控制器
+    已有实例运行时转发意图后立即退出，否则配置日志、加载配置并运行触控板服务
     """
-    controller = TouchpadController()
-    controller.run()
-    print("程序已退出")
\ No newline at end of file
+    args = parse_args()
+
+    # 单实例检测在导入其他模块之前完成，保证第二个实例快速退出
+    instance = SingleInstance(args.socket)
+    if not instance.acquire():
+        response = instance.forward(args.intent)
+        if response is None:
+            print("betterTouchpad已在运行")
+            sys.exit(1)
+        print(f"已转发到运行中的实例: {args.intent}")
+        sys.exit(0 if response.get("ok") else 1)
+
+    import queue
+    from configure_logger import configure_logger
+    from setting import SettingsManager
+    from service import TouchpadService
+
+    configure_logger()
+    command_queue = queue.Queue()
+    settings_manager = SettingsManager(command_queue)
+    config = settings_manager.load()
+
+    service = TouchpadService(
+        config,
+        settings_manager=settings_manager,
+        gui=not args.headless,
+        command_queue=command_queue,
+        control_server=instance.control_server
+    )
+    try:
+        service.run_forever()
+    finally:
+        instance.release()
+    print("程序已退出")
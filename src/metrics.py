@@ -0,0 +1,527 @@
+import os
+import math
+import bisect
+import threading
+import logging
+import supervisor
+
+logger = logging.getLogger(__name__)
+
+# 所有指标名称的前缀
+PREFIX = "bettertouchpad_"
+
+# 耗时直方图的默认分桶上界（秒）：50微秒到1秒
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# 默认导出参数
+DEFAULT_METRICS = {
+    "textfile": "",   # 定期写入的Prometheus文本文件路径，空字符串表示不写入
+    "interval": 15,   # 写入文本文件的间隔（秒）
+    "http_port": 0    # 仅监听127.0.0.1的HTTP端口（GET /metrics），0表示不监听
+}
+
+def validate_metrics(metrics):
+    """
+    校验指标导出参数
+
+    参数:
+        metrics: 导出参数字典
+
+    返回:
+        list: 错误信息列表，为空表示有效
+    """
+    if not isinstance(metrics, dict):
+        return ["metrics 必须是对象"]
+    errors = []
+    unknown = set(metrics) - set(DEFAULT_METRICS)
+    if unknown:
+        errors.append(f"metrics 包含未知参数: {', '.join(sorted(unknown))}")
+    settings = dict(DEFAULT_METRICS, **metrics)
+    if not isinstance(settings["textfile"], str):
+        errors.append("metrics.textfile 必须是字符串")
+    interval = settings["interval"]
+    if isinstance(interval, bool) or not isinstance(interval, (int, float)) or not 1 <= interval <= 3600:
+        errors.append("metrics.interval 必须在1到3600之间")
+    port = settings["http_port"]
+    if isinstance(port, bool) or not isinstance(port, int) or not 0 <= port <= 65535:
+        errors.append("metrics.http_port 必须是0到65535之间的整数")
+    return errors
+
+def _format_value(value):
+    """
+    按Prometheus文本格式输出数值
+
+    参数:
+        value: 数值
+
+    返回:
+        str: 文本
+    """
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+def _escape(value):
+    """
+    转义标签值中的反斜杠、双引号和换行
+
+    参数:
+        value: 标签值
+
+    返回:
+        str: 转义后的文本
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names, values, extra=""):
+    """
+    输出标签集合
+
+    参数:
+        names: 标签名称元组
+        values: 标签值元组
+        extra: 额外的已格式化标签，如'le="0.1"'
+
+    返回:
+        str: 形如{a="1",b="2"}的文本，没有标签时为空字符串
+    """
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Sharded:
+    """
+    按线程分片的计数数组
+
+    每个线程只写自己的分片，写入路径不加锁也不产生竞争；
+    首次写入时登记分片，读取时汇总所有分片，已结束线程的分片合并后释放
+    """
+    def __init__(self, size):
+        """
+        参数:
+            size: 每个分片的计数个数
+        """
+        self.size = size
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.shards = []            # (线程, 分片)
+        self.retired = [0] * size   # 已结束线程的分片累计值
+
+    def _new_shard(self):
+        """
+        为当前线程创建并登记分片
+
+        返回:
+            list: 分片
+        """
+        shard = [0] * self.size
+        self.local.shard = shard
+        with self.lock:
+            self.shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _totals(self):
+        """
+        汇总所有分片
+
+        返回:
+            list: 各计数的总和
+        """
+        with self.lock:
+            live = []
+            for thread, shard in self.shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    for index, value in enumerate(shard):
+                        self.retired[index] += value
+            self.shards = live
+            totals = list(self.retired)
+        for _, shard in live:
+            for index, value in enumerate(shard):
+                totals[index] += value
+        return totals
+
+
+class Counter(_Sharded):
+    """只增计数器"""
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount=1):
+        """
+        增加计数
+
+        参数:
+            amount: 增加量
+        """
+        try:
+            shard = self.local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[0] += amount
+
+    def value(self):
+        """
+        获取当前计数
+
+        返回:
+            int: 计数
+        """
+        return self._totals()[0]
+
+
+class Histogram(_Sharded):
+    """
+    固定分桶直方图
+
+    分片依次保存各分桶（最后一个为+Inf）的计数和观测值总和，
+    每次观测只有一次二分查找和两次列表加法
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        参数:
+            buckets: 升序的分桶上界
+        """
+        super().__init__(len(buckets) + 2)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value):
+        """
+        记录一个观测值
+
+        参数:
+            value: 观测值（耗时为秒）
+        """
+        try:
+            shard = self.local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[bisect.bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self):
+        """
+        获取累计分桶计数、总数和总和
+
+        返回:
+            tuple: ([(上界, 累计计数)], 总数, 总和)，最后一个上界为+Inf
+        """
+        totals = self._totals()
+        cumulative = []
+        count = 0
+        for bound, value in zip(self.buckets + (math.inf,), totals[:-1]):
+            count += value
+            cumulative.append((bound, count))
+        return cumulative, count, totals[-1]
+
+
+class MetricFamily:
+    """
+    同名指标的集合，按标签值区分
+
+    调用方应在模块加载或初始化时用labels()取得子指标并保存，热路径上直接调用子指标的方法
+    """
+    def __init__(self, kind, name, help_text, labelnames, factory):
+        """
+        参数:
+            kind: "counter"或"histogram"
+            name: 不含前缀的指标名称
+            help_text: 说明
+            labelnames: 标签名称元组
+            factory: 创建子指标的函数
+        """
+        self.kind = kind
+        self.name = PREFIX + name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.factory = factory
+        self.children = {}  # 标签值元组 -> 子指标
+        self.lock = threading.Lock()
+
+    def labels(self, *values):
+        """
+        获取标签值对应的子指标，首次使用时创建
+
+        参数:
+            *values: 与labelnames一一对应的标签值
+
+        返回:
+            Counter或Histogram: 子指标
+        """
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}需要标签: {', '.join(self.labelnames)}")
+            with self.lock:
+                child = self.children.setdefault(values, self.factory())
+        return child
+
+    def render(self):
+        """
+        按Prometheus文本格式输出
+
+        返回:
+            list: 文本行
+        """
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self.children.copy().items(), key=lambda item: item[0]):
+            if self.kind == "counter":
+                lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {child.value()}")
+                continue
+            cumulative, count, total = child.snapshot()
+            for bound, bucket_count in cumulative:
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, values)} {_format_value(float(total))}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, values)} {count}")
+        return lines
+
+
+class Registry:
+    """
+    指标注册表
+
+    计数器和直方图在写入时只修改当前线程的分片，导出时才汇总；
+    仪表（gauge）不保存数值，导出时调用登记的函数读取
+    """
+    def __init__(self):
+        self.families = {}  # 名称 -> MetricFamily
+        self.gauges = {}    # 名称 -> (说明, 读取函数)
+        self.lock = threading.Lock()
+
+    def _family(self, kind, name, help_text, labelnames, factory):
+        """
+        获取或创建指标集合
+
+        返回:
+            MetricFamily: 指标集合
+        """
+        with self.lock:
+            family = self.families.get(PREFIX + name)
+            if family is None:
+                family = MetricFamily(kind, name, help_text, labelnames, factory)
+                self.families[family.name] = family
+            return family
+
+    def counter(self, name, help_text, labelnames=()):
+        """
+        获取或创建计数器
+
+        参数:
+            name: 不含前缀的指标名称，应以_total结尾
+            help_text: 说明
+            labelnames: 标签名称元组
+
+        返回:
+            MetricFamily或Counter: 有标签时返回指标集合，否则直接返回计数器
+        """
+        family = self._family("counter", name, help_text, labelnames, Counter)
+        return family if labelnames else family.labels()
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """
+        获取或创建直方图
+
+        参数:
+            name: 不含前缀的指标名称
+            help_text: 说明
+            labelnames: 标签名称元组
+            buckets: 分桶上界
+
+        返回:
+            MetricFamily或Histogram: 有标签时返回指标集合，否则直接返回直方图
+        """
+        family = self._family("histogram", name, help_text, labelnames, lambda: Histogram(buckets))
+        return family if labelnames else family.labels()
+
+    def gauge(self, name, help_text, read):
+        """
+        登记仪表，同名仪表会被替换
+
+        参数:
+            name: 不含前缀的指标名称
+            help_text: 说明
+            read: 返回当前数值的函数，返回None时不输出
+        """
+        with self.lock:
+            self.gauges[PREFIX + name] = (help_text, read)
+
+    def render(self):
+        """
+        按Prometheus文本格式输出所有指标
+
+        返回:
+            str: 文本
+        """
+        with self.lock:
+            families = list(self.families.values())
+            gauges = list(self.gauges.items())
+        lines = []
+        for family in families:
+            lines.extend(family.render())
+        for name, (help_text, read) in gauges:
+            try:
+                value = read()
+            except Exception as e:
+                logger.debug(f"读取指标{name}失败: {e}")
+                continue
+            if value is None:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+        return "\n".join(lines) + "\n"
+
+
+# 进程内唯一的注册表
+REGISTRY = Registry()
+
+def counter(name, help_text, labelnames=()):
+    """在默认注册表中获取或创建计数器，参数见Registry.counter"""
+    return REGISTRY.counter(name, help_text, labelnames)
+
+def histogram(name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """在默认注册表中获取或创建直方图，参数见Registry.histogram"""
+    return REGISTRY.histogram(name, help_text, labelnames, buckets)
+
+def gauge(name, help_text, read):
+    """在默认注册表中登记仪表，参数见Registry.gauge"""
+    REGISTRY.gauge(name, help_text, read)
+
+
+class MetricsExporter:
+    """
+    指标导出
+
+    可同时定期写入Prometheus文本文件（供node_exporter的textfile收集器读取，先写临时文件再原子替换）
+    和在127.0.0.1上提供HTTP拉取。HTTP服务在一个线程中阻塞等待连接，没有请求时不唤醒；
+    只有配置了文本文件时才按间隔定期唤醒
+    """
+    def __init__(self, settings, registry=REGISTRY):
+        """
+        参数:
+            settings: 导出参数，缺省项使用DEFAULT_METRICS
+            registry: 指标注册表
+        """
+        settings = dict(DEFAULT_METRICS, **settings)
+        self.registry = registry
+        self.textfile = settings["textfile"]
+        self.interval = settings["interval"]
+        self.http_port = settings["http_port"]
+        self.stop_event = threading.Event()
+        self.writer_thread = None
+        self.http_server = None
+        self.http_thread = None
+        self.wakeup_reader = self.wakeup_writer = None
+        self.writes = 0
+        self.scrapes = 0
+
+    @property
+    def enabled(self):
+        """是否配置了任一导出方式"""
+        return bool(self.textfile) or self.http_port > 0
+
+    def start(self):
+        """
+        开始导出
+
+        异常:
+            OSError: HTTP端口已被占用
+        """
+        if self.http_port > 0:
+            self._start_http()
+        if self.textfile:
+            self.writer_thread = supervisor.spawn(self._write_loop, "metrics-textfile", restart=True)
+        logger.info(f"指标导出已启动 [文本文件:{self.textfile or '无'}, HTTP端口:{self.http_port or '无'}]")
+
+    def write_textfile(self):
+        """把当前指标写入文本文件（先写临时文件再替换，读取方不会看到写了一半的文件）"""
+        temp_path = f"{self.textfile}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(self.registry.render())
+            os.replace(temp_path, self.textfile)
+            self.writes += 1
+        except OSError as e:
+            logger.error(f"写入指标文件失败: {e}")
+
+    def _write_loop(self):
+        """文本文件写入线程：启动时和每个间隔写入一次，停止时再写入最终值"""
+        self.write_textfile()
+        while not self.stop_event.wait(self.interval):
+            self.write_textfile()
+        self.write_textfile()
+
+    def _start_http(self):
+        """在127.0.0.1上监听HTTP端口并启动服务线程"""
+        import socket
+        from http.server import HTTPServer, BaseHTTPRequestHandler
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            """只响应GET /metrics"""
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.registry.render().encode("utf-8")
+                exporter.scrapes += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"指标请求: {format % args}")
+
+        # 只绑定回环地址，不对外暴露
+        self.http_server = HTTPServer(("127.0.0.1", self.http_port), MetricsHandler)
+        self.wakeup_reader, self.wakeup_writer = socket.socketpair()
+        self.http_thread = supervisor.spawn(self._serve_http, "metrics-http")
+
+    def _serve_http(self):
+        """HTTP服务线程：阻塞等待连接或停止通知，不使用serve_forever的定时轮询"""
+        import selectors
+        selector = selectors.DefaultSelector()
+        selector.register(self.http_server.socket, selectors.EVENT_READ, self.http_server)
+        selector.register(self.wakeup_reader, selectors.EVENT_READ, None)
+        try:
+            while True:
+                for key, _ in selector.select():
+                    if key.data is None:
+                        return
+                    self.http_server.handle_request()
+        finally:
+            selector.close()
+
+    def get_stats(self):
+        """
+        获取导出统计信息
+
+        返回:
+            dict: 文本文件写入次数和HTTP拉取次数
+        """
+        return {"textfile": self.textfile or None, "writes": self.writes,
+                "http_port": self.http_port or None, "scrapes": self.scrapes}
+
+    def stop(self):
+        """停止写入线程和HTTP服务"""
+        self.stop_event.set()
+        if self.writer_thread is not None:
+            self.writer_thread.join(2.0)
+            self.writer_thread = None
+        if self.http_server is not None:
+            try:
+                self.wakeup_writer.send(b"\0")
+            except OSError:
+                pass
+            self.http_thread.join(2.0)
+            self.http_server.server_close()
+            self.wakeup_reader.close()
+            self.wakeup_writer.close()
+            self.http_server = None
+        logger.info("指标导出已停止")
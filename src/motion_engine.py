@@ -0,0 +1,185 @@
+import math
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 方向 -> 单位向量（屏幕坐标，y轴向下）
+DIRECTIONS = {
+    "up": (0, -1),
+    "down": (0, 1),
+    "left": (-1, 0),
+    "right": (1, 0),
+}
+
+# 加速曲线：输入为按住时间占加速时间的比例（0-1），输出为速度在最小和最大速度之间的比例（0-1）
+CURVES = {
+    "constant": lambda x: 0.0,
+    "linear": lambda x: x,
+    "quadratic": lambda x: x * x,
+    "cubic": lambda x: x * x * x,
+    "smoothstep": lambda x: x * x * (3 - 2 * x),
+}
+
+# 默认移动参数
+DEFAULT_MOTION = {
+    "rate": 500,          # 节拍频率（Hz）
+    "curve": "quadratic", # 加速曲线
+    "min_speed": 100,     # 起始速度（像素/秒）
+    "max_speed": 1500,    # 最大速度（像素/秒）
+    "accel_time": 0.6     # 从起始速度加速到最大速度所需时间（秒）
+}
+
+def validate_motion(motion):
+    """
+    校验移动参数
+
+    参数:
+        motion: 移动参数字典
+
+    返回:
+        list: 错误信息列表，为空表示有效
+    """
+    if not isinstance(motion, dict):
+        return ["motion 必须是对象"]
+    errors = []
+    unknown = set(motion) - set(DEFAULT_MOTION)
+    if unknown:
+        errors.append(f"motion 包含未知参数: {', '.join(sorted(unknown))}")
+    settings = dict(DEFAULT_MOTION, **motion)
+    for name in ("rate", "min_speed", "max_speed", "accel_time"):
+        value = settings[name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            errors.append(f"motion.{name} 必须是正数")
+    if not errors:
+        if not 30 <= settings["rate"] <= 1000:
+            errors.append("motion.rate 必须在30到1000之间")
+        if settings["max_speed"] < settings["min_speed"]:
+            errors.append("motion.max_speed 不能小于 min_speed")
+    if settings["curve"] not in CURVES:
+        errors.append(f"motion.curve 必须是{'、'.join(CURVES)}之一")
+    return errors
+
+
+class MotionEngine:
+    """
+    键盘驱动的指针移动引擎
+
+    按住方向键时在节拍线程中按加速曲线计算速度，每个节拍把x和y方向的位移合并为一次相对移动，
+    小数部分累积到下一节拍，低速时也能平滑移动。没有按住方向键时向节拍线程报告空闲。
+    """
+    def __init__(self, output, scheduler, motion=None):
+        """
+        参数:
+            output: 指针输出，提供move(dx, dy)方法（点击引擎）
+            scheduler: TickScheduler实例
+            motion: 移动参数，缺省项使用DEFAULT_MOTION
+        """
+        self.output = output
+        self.scheduler = scheduler
+        self.held = set()     # 按住的方向
+        self.started = None   # 本次移动开始时间，用于计算加速
+        self.remainder_x = 0.0
+        self.remainder_y = 0.0
+        self.moves = 0
+        self.configure(motion or {})
+        scheduler.register(self.tick)
+
+    def configure(self, motion):
+        """
+        应用移动参数
+
+        参数:
+            motion: 移动参数字典
+        """
+        settings = dict(DEFAULT_MOTION, **motion)
+        self.curve = CURVES[settings["curve"]]
+        self.min_speed = settings["min_speed"]
+        self.max_speed = settings["max_speed"]
+        self.accel_time = settings["accel_time"]
+        self.scheduler.set_rate(settings["rate"])
+
+    def key_down(self, direction):
+        """
+        方向键按下
+
+        参数:
+            direction: 方向名称，见DIRECTIONS
+        """
+        if direction in self.held:
+            return
+        if not self.held:
+            self.started = time.monotonic()
+            self.remainder_x = self.remainder_y = 0.0
+        self.held.add(direction)
+        self.scheduler.wake()
+
+    def key_up(self, direction):
+        """
+        方向键释放
+
+        参数:
+            direction: 方向名称
+        """
+        self.held.discard(direction)
+
+    def release_all(self):
+        """停止所有移动"""
+        self.held.clear()
+
+    def speed(self, elapsed):
+        """
+        计算按住一段时间后的速度
+
+        参数:
+            elapsed: 按住时间（秒）
+
+        返回:
+            float: 速度（像素/秒）
+        """
+        progress = min(1.0, elapsed / self.accel_time)
+        return self.min_speed + (self.max_speed - self.min_speed) * self.curve(progress)
+
+    def tick(self, now, interval):
+        """
+        节拍回调：计算本节拍的位移并输出
+
+        参数:
+            now: 当前时间
+            interval: 距上一节拍的间隔（秒）
+
+        返回:
+            bool: 是否仍有方向键按住
+        """
+        held = list(self.held)
+        if not held:
+            return False
+        vx = sum(DIRECTIONS[direction][0] for direction in held)
+        vy = sum(DIRECTIONS[direction][1] for direction in held)
+        if not vx and not vy:
+            # 相反方向同时按住
+            return True
+        # 斜向移动时保持总速度不变
+        scale = self.speed(now - self.started) * interval / math.hypot(vx, vy)
+        x = self.remainder_x + vx * scale
+        y = self.remainder_y + vy * scale
+        dx, dy = int(x), int(y)
+        self.remainder_x, self.remainder_y = x - dx, y - dy
+        if dx or dy:
+            try:
+                self.output.move(dx, dy)
+                self.moves += 1
+            except Exception as e:
+                logger.error(f"移动指针失败: {e}")
+                self.held.clear()
+                return False
+        return True
+
+    def get_stats(self):
+        """
+        获取移动统计信息
+
+        返回:
+            dict: 指针移动输出次数
+        """
+        return {"moves": self.moves}
@@ -0,0 +1,48 @@
+import os
+import platform
+import logging
+
+logger = logging.getLogger(__name__)
+
+def get_rss_bytes():
+    """
+    获取当前进程的常驻内存大小
+
+    Linux下读取/proc/self/statm，Windows下调用GetProcessMemoryInfo
+
+    返回:
+        int: 常驻内存字节数，无法获取时返回None
+    """
+    try:
+        system = platform.system()
+        if system == "Linux":
+            with open('/proc/self/statm', 'r') as f:
+                resident_pages = int(f.read().split()[1])
+            return resident_pages * os.sysconf('SC_PAGE_SIZE')
+
+        if system == "Windows":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+    except Exception as e:
+        logger.debug(f"获取进程内存信息失败: {e}")
+    return None
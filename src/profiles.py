@@ -0,0 +1,126 @@
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 应用配置方案可以覆盖的配置项（后端、输入源等进程级配置不随焦点窗口变化）
+PROFILE_SETTINGS = (
+    "response_time", "hot_key", "mode", "drag_lock",
+    "left_click", "right_click", "middle_click", "back_click", "forward_click",
+    "move_up", "move_down", "move_left", "move_right", "motion",
+    "scroll_up", "scroll_down", "scroll_left", "scroll_right", "scroll", "typing_guard", "auto_off",
+)
+
+# WM_CLASS匹配结果缓存的最大条目数，超出时清空重建
+CACHE_SIZE = 256
+
+def validate_profiles(config, resolve=None):
+    """
+    校验配置中的应用配置方案：每个方案覆盖后的完整配置也必须有效
+
+    参数:
+        config: 配置字典
+        resolve: 输入源的按键名称 -> 键码元组函数，None表示只检查语法
+
+    返回:
+        list: 错误信息列表，为空表示有效
+    """
+    profiles = config.get("profiles")
+    if not isinstance(profiles, list):
+        return ["profiles 必须是列表"]
+    from setting import validate_config
+    errors = []
+    for index, profile in enumerate(profiles):
+        label = f"profiles[{index}]"
+        if not isinstance(profile, dict):
+            errors.append(f"{label} 必须是对象")
+            continue
+        pattern = profile.get("wm_class")
+        if not isinstance(pattern, str) or not pattern:
+            errors.append(f"{label}.wm_class 必须是非空字符串")
+        else:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                errors.append(f"{label}.wm_class 不是有效的正则表达式: {e}")
+        unknown = set(profile) - set(PROFILE_SETTINGS) - {"name", "wm_class"}
+        if unknown:
+            errors.append(f"{label} 包含不能按应用覆盖的配置项: {', '.join(sorted(unknown))}")
+            continue
+        merged = dict(config, **{key: profile[key] for key in PROFILE_SETTINGS if key in profile}, profiles=[])
+        errors.extend(f"{label}: {error}" for error in validate_config(merged, resolve))
+    return errors
+
+
+class Profile:
+    """
+    编译后的应用配置方案
+
+    保存覆盖后的完整配置，切换时整体替换，不需要在按键路径上逐项查找
+    """
+    def __init__(self, name, pattern, config):
+        """
+        参数:
+            name: 方案名称，None表示默认配置
+            pattern: 编译后的WM_CLASS正则表达式，默认配置为None
+            config: 覆盖后的完整配置字典
+        """
+        self.name = name
+        self.pattern = pattern
+        self.config = config
+
+    def matches(self, wm_class):
+        """
+        检查窗口是否匹配该方案
+
+        参数:
+            wm_class: (instance, class)元组
+
+        返回:
+            bool: instance或class任一匹配时返回True
+        """
+        return any(self.pattern.search(name) for name in wm_class if name)
+
+
+class ProfileTable:
+    """
+    应用配置方案表
+
+    加载配置时把每个方案编译为覆盖后的完整配置，按WM_CLASS缓存匹配结果，
+    焦点变化时查找方案只需一次字典查询
+    """
+    def __init__(self, config):
+        """
+        编译配置中的所有方案
+
+        参数:
+            config: 已校验的配置字典
+        """
+        self.default = Profile(None, None, dict(config))
+        self.profiles = []
+        for index, profile in enumerate(config.get("profiles", [])):
+            overrides = {key: profile[key] for key in PROFILE_SETTINGS if key in profile}
+            self.profiles.append(Profile(profile.get("name") or f"profile-{index}",
+                                         re.compile(profile["wm_class"], re.IGNORECASE),
+                                         dict(config, **overrides)))
+        self.cache = {}  # WM_CLASS -> Profile
+
+    def resolve(self, wm_class):
+        """
+        获取窗口对应的方案，按顺序第一个匹配的方案生效，都不匹配时使用默认配置
+
+        参数:
+            wm_class: (instance, class)元组，None表示未知窗口
+
+        返回:
+            Profile: 方案
+        """
+        profile = self.cache.get(wm_class)
+        if profile is None:
+            profile = self.default
+            if wm_class is not None:
+                profile = next((item for item in self.profiles if item.matches(wm_class)), self.default)
+            if len(self.cache) >= CACHE_SIZE:
+                self.cache.clear()
+            self.cache[wm_class] = profile
+        return profile
@@ -0,0 +1,230 @@
+import os
+import sys
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 默认实时调度参数
+DEFAULT_REALTIME = {
+    "enabled": False,  # 是否提高输入线程和执行线程的调度优先级
+    "priority": 10,    # SCHED_FIFO优先级（1~99，Linux）
+    "nice": -10,       # 不允许使用SCHED_FIFO时改用的nice值（-20~19，Linux）
+    "cpus": []         # 绑定的CPU编号，空列表表示不绑定
+}
+
+# 线程角色：输入线程接收按键，执行线程负责长按计时、切换设备、指针移动和打字暂停
+ROLES = ("input", "actuator")
+
+# Windows线程优先级
+THREAD_PRIORITY_NORMAL = 0
+THREAD_PRIORITY_TIME_CRITICAL = 15
+THREAD_SET_INFORMATION = 0x0020
+THREAD_QUERY_INFORMATION = 0x0040
+
+def validate_realtime(realtime):
+    """
+    校验实时调度参数
+
+    参数:
+        realtime: 参数字典
+
+    返回:
+        list: 错误信息列表，为空表示有效
+    """
+    if not isinstance(realtime, dict):
+        return ["realtime 必须是对象"]
+    errors = []
+    unknown = set(realtime) - set(DEFAULT_REALTIME)
+    if unknown:
+        errors.append(f"realtime 包含未知参数: {', '.join(sorted(unknown))}")
+    settings = dict(DEFAULT_REALTIME, **realtime)
+    if not isinstance(settings["enabled"], bool):
+        errors.append("realtime.enabled 必须是true或false")
+    priority = settings["priority"]
+    if isinstance(priority, bool) or not isinstance(priority, int) or not 1 <= priority <= 99:
+        errors.append("realtime.priority 必须是1到99之间的整数")
+    nice = settings["nice"]
+    if isinstance(nice, bool) or not isinstance(nice, int) or not -20 <= nice <= 19:
+        errors.append("realtime.nice 必须是-20到19之间的整数")
+    cpus = settings["cpus"]
+    if not isinstance(cpus, list) or not all(isinstance(cpu, int) and not isinstance(cpu, bool) and cpu >= 0
+                                             for cpu in cpus):
+        errors.append("realtime.cpus 必须是CPU编号（非负整数）列表")
+    return errors
+
+
+class ThreadPriorities:
+    """
+    输入线程和执行线程的调度优先级
+
+    登记的线程在启用时提高调度优先级并按配置绑定CPU：Linux下优先使用SCHED_FIFO，
+    没有权限（需要root或CAP_SYS_NICE）时改用负的nice值，仍不允许时保持普通调度；
+    Windows下使用THREAD_PRIORITY_TIME_CRITICAL。调度参数按线程设置，不影响托盘、
+    指示器等其他线程；修改配置时对已登记的线程重新设置，关闭时恢复为进程启动时的调度参数。
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.settings = dict(DEFAULT_REALTIME)
+        self.threads = {}  # 线程 -> (角色, 生效的调度方式)
+        self.default_nice = os.getpriority(os.PRIO_PROCESS, 0) if hasattr(os, "getpriority") else 0
+        self.default_cpus = os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else None
+        self.warned = False
+
+    def configure(self, settings):
+        """
+        更新调度参数并重新设置所有已登记的线程
+
+        参数:
+            settings: 实时调度参数，缺省项使用DEFAULT_REALTIME
+        """
+        with self.lock:
+            previous, self.settings = self.settings, dict(DEFAULT_REALTIME, **settings)
+            if previous == self.settings:
+                return
+            self.warned = False
+            for thread, (role, _) in list(self.threads.items()):
+                if thread.is_alive():
+                    self.threads[thread] = (role, self._apply(thread))
+                else:
+                    del self.threads[thread]
+
+    def register(self, role, thread=None):
+        """
+        登记一个输入线程或执行线程，启用时立即提高其优先级，已结束的线程在下次登记时移除
+
+        参数:
+            role: 线程角色，见ROLES
+            thread: 已启动的线程，None表示当前线程
+        """
+        thread = thread if thread is not None else threading.current_thread()
+        with self.lock:
+            for dead in [item for item in self.threads if not item.is_alive()]:
+                del self.threads[dead]
+            self.threads[thread] = (role, self._apply(thread) if self.settings["enabled"] else "normal")
+
+    def _apply(self, thread):
+        """
+        按当前参数设置一个线程的调度优先级和CPU亲和性（调用方需持有锁）
+
+        返回:
+            str: 生效的调度方式，fifo、nice、time_critical、normal或unsupported
+        """
+        native_id = getattr(thread, "native_id", None)
+        if native_id is None:
+            # Python 3.8以下无法获取线程的系统编号
+            return "unsupported"
+        try:
+            if sys.platform.startswith("linux"):
+                return self._apply_linux(native_id)
+            if sys.platform == "win32":
+                return self._apply_windows(native_id)
+        except OSError as e:
+            logger.warning(f"设置线程{thread.name}调度优先级失败: {e}")
+            return "normal"
+        return "unsupported"
+
+    def _apply_linux(self, tid):
+        """
+        Linux下按线程编号设置调度策略、nice值和CPU亲和性
+
+        参数:
+            tid: 线程编号
+
+        返回:
+            str: 生效的调度方式
+        """
+        settings = self.settings
+        if not settings["enabled"]:
+            os.sched_setscheduler(tid, os.SCHED_OTHER, os.sched_param(0))
+            os.setpriority(os.PRIO_PROCESS, tid, self.default_nice)
+            os.sched_setaffinity(tid, self.default_cpus)
+            return "normal"
+
+        if settings["cpus"]:
+            try:
+                os.sched_setaffinity(tid, settings["cpus"])
+            except OSError as e:
+                self._warn(f"无法绑定CPU {settings['cpus']}: {e}")
+        try:
+            # 这些线程新建的线程（如托盘、空闲检测）不继承实时调度
+            os.sched_setscheduler(tid, os.SCHED_FIFO | os.SCHED_RESET_ON_FORK, os.sched_param(settings["priority"]))
+            return "fifo"
+        except PermissionError:
+            pass
+        try:
+            os.setpriority(os.PRIO_PROCESS, tid, settings["nice"])
+            self._warn("没有使用SCHED_FIFO的权限（需要root或CAP_SYS_NICE），改用nice值")
+            return "nice"
+        except PermissionError:
+            self._warn("没有提高调度优先级的权限（需要root或CAP_SYS_NICE），保持普通调度")
+            return "normal"
+
+    def _apply_windows(self, tid):
+        """
+        Windows下按线程编号设置线程优先级和CPU亲和性
+
+        参数:
+            tid: 线程编号
+
+        返回:
+            str: 生效的调度方式
+        """
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenThread(THREAD_SET_INFORMATION | THREAD_QUERY_INFORMATION, False, tid)
+        if not handle:
+            raise ctypes.WinError()
+        try:
+            settings = self.settings
+            if settings["enabled"] and settings["cpus"]:
+                mask = sum(1 << cpu for cpu in settings["cpus"])
+            else:
+                process_mask, system_mask = ctypes.c_size_t(), ctypes.c_size_t()
+                kernel32.GetProcessAffinityMask(kernel32.GetCurrentProcess(),
+                                                ctypes.byref(process_mask), ctypes.byref(system_mask))
+                mask = process_mask.value
+            if mask and not kernel32.SetThreadAffinityMask(handle, ctypes.c_size_t(mask)):
+                self._warn(f"无法绑定CPU {settings['cpus']}: {ctypes.WinError()}")
+            priority = THREAD_PRIORITY_TIME_CRITICAL if settings["enabled"] else THREAD_PRIORITY_NORMAL
+            if not kernel32.SetThreadPriority(handle, priority):
+                raise ctypes.WinError()
+            return "time_critical" if settings["enabled"] else "normal"
+        finally:
+            kernel32.CloseHandle(handle)
+
+    def _warn(self, message):
+        """每次修改配置后同一问题只警告一次（调用方需持有锁）"""
+        if not self.warned:
+            self.warned = True
+            logger.warning(message)
+
+    def get_stats(self):
+        """
+        获取已登记线程的调度状态
+
+        返回:
+            dict: 是否启用、绑定的CPU和各线程的角色及生效的调度方式
+        """
+        with self.lock:
+            threads = {thread.name: {"role": role, "policy": policy}
+                       for thread, (role, policy) in self.threads.items() if thread.is_alive()}
+            return {"enabled": self.settings["enabled"], "cpus": self.settings["cpus"], "threads": threads}
+
+
+# 进程内唯一的线程优先级管理
+PRIORITIES = ThreadPriorities()
+
+def configure(settings):
+    """更新实时调度参数，见ThreadPriorities.configure"""
+    PRIORITIES.configure(settings)
+
+
+def register(role, thread=None):
+    """登记输入线程或执行线程，见ThreadPriorities.register"""
+    PRIORITIES.register(role, thread)
+
+
+def get_stats():
+    """获取已登记线程的调度状态，见ThreadPriorities.get_stats"""
+    return PRIORITIES.get_stats()
@@ -0,0 +1,180 @@
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 一格滚轮对应的高精度单位数（与Linux的REL_WHEEL_HI_RES和Windows的WHEEL_DELTA一致）
+WHEEL_UNITS = 120
+
+# 方向 -> 单位向量（滚轮坐标：x向右为正，y向上为正）
+DIRECTIONS = {
+    "up": (0, 1),
+    "down": (0, -1),
+    "left": (-1, 0),
+    "right": (1, 0),
+}
+
+# 默认滚动参数
+DEFAULT_SCROLL = {
+    "speed": 15,           # 按住时的滚动速度（格/秒）
+    "ease_time": 0.1,      # 按下后加速到目标速度的时间常数（秒），0表示立即达到
+    "momentum_time": 0.25  # 松开后惯性滚动衰减的时间常数（秒），0表示立即停止
+}
+
+# 惯性滚动速度低于该值（格/秒）时停止
+STOP_SPEED = 0.5
+
+def validate_scroll(scroll):
+    """
+    校验滚动参数
+
+    参数:
+        scroll: 滚动参数字典
+
+    返回:
+        list: 错误信息列表，为空表示有效
+    """
+    if not isinstance(scroll, dict):
+        return ["scroll 必须是对象"]
+    errors = []
+    unknown = set(scroll) - set(DEFAULT_SCROLL)
+    if unknown:
+        errors.append(f"scroll 包含未知参数: {', '.join(sorted(unknown))}")
+    settings = dict(DEFAULT_SCROLL, **scroll)
+    speed = settings["speed"]
+    if isinstance(speed, bool) or not isinstance(speed, (int, float)) or not 0 < speed <= 200:
+        errors.append("scroll.speed 必须大于0且不超过200")
+    for name in ("ease_time", "momentum_time"):
+        value = settings[name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 5:
+            errors.append(f"scroll.{name} 必须在0到5之间")
+    return errors
+
+
+class ScrollEngine:
+    """
+    键盘驱动的平滑滚动引擎
+
+    按住滚动键时速度按指数缓动接近目标速度，松开后按惯性逐渐衰减。
+    每个节拍把水平和垂直方向的滚动量合并为一次高精度滚轮输出（1/120格），
+    小数部分累积到下一节拍；速度衰减到停止后向节拍线程报告空闲。
+    """
+    def __init__(self, output, scheduler, scroll=None):
+        """
+        参数:
+            output: 滚轮输出，提供scroll(dx, dy)方法（点击引擎）
+            scheduler: TickScheduler实例
+            scroll: 滚动参数，缺省项使用DEFAULT_SCROLL
+        """
+        self.output = output
+        self.scheduler = scheduler
+        self.held = set()  # 按住的方向
+        self.velocity_x = 0.0  # 当前速度（高精度单位/秒）
+        self.velocity_y = 0.0
+        self.remainder_x = 0.0
+        self.remainder_y = 0.0
+        self.frames = 0
+        self.configure(scroll or {})
+        scheduler.register(self.tick)
+
+    def configure(self, scroll):
+        """
+        应用滚动参数
+
+        参数:
+            scroll: 滚动参数字典
+        """
+        settings = dict(DEFAULT_SCROLL, **scroll)
+        self.speed = settings["speed"] * WHEEL_UNITS
+        self.ease_time = settings["ease_time"]
+        self.momentum_time = settings["momentum_time"]
+
+    def key_down(self, direction):
+        """
+        滚动键按下
+
+        参数:
+            direction: 方向名称，见DIRECTIONS
+        """
+        if direction in self.held:
+            return
+        self.held.add(direction)
+        self.scheduler.wake()
+
+    def key_up(self, direction):
+        """
+        滚动键释放，之后按惯性继续滚动
+
+        参数:
+            direction: 方向名称
+        """
+        self.held.discard(direction)
+
+    def release_all(self):
+        """立即停止所有滚动，包括惯性滚动"""
+        self.held.clear()
+        self.velocity_x = self.velocity_y = 0.0
+
+    def tick(self, now, interval):
+        """
+        节拍回调：更新速度，计算本节拍的滚动量并输出
+
+        参数:
+            now: 当前时间
+            interval: 距上一节拍的间隔（秒）
+
+        返回:
+            bool: 是否仍在滚动
+        """
+        held = list(self.held)
+        if held:
+            target_x = sum(DIRECTIONS[direction][0] for direction in held) * self.speed
+            target_y = sum(DIRECTIONS[direction][1] for direction in held) * self.speed
+            blend = 1 - math.exp(-interval / self.ease_time) if self.ease_time > 0 else 1.0
+            self.velocity_x += (target_x - self.velocity_x) * blend
+            self.velocity_y += (target_y - self.velocity_y) * blend
+        elif self.momentum_time > 0:
+            decay = math.exp(-interval / self.momentum_time)
+            self.velocity_x *= decay
+            self.velocity_y *= decay
+            if math.hypot(self.velocity_x, self.velocity_y) < STOP_SPEED * WHEEL_UNITS:
+                return self._stop()
+        else:
+            return self._stop()
+
+        x = self.remainder_x + self.velocity_x * interval
+        y = self.remainder_y + self.velocity_y * interval
+        dx, dy = int(x), int(y)
+        self.remainder_x, self.remainder_y = x - dx, y - dy
+        if dx or dy:
+            try:
+                self.output.scroll(dx, dy)
+                self.frames += 1
+            except Exception as e:
+                logger.error(f"滚动失败: {e}")
+                self.held.clear()
+                return self._stop()
+        return True
+
+    def _stop(self):
+        """
+        停止滚动并清除累积的小数部分
+
+        返回:
+            bool: 固定为False（空闲）
+        """
+        self.velocity_x = self.velocity_y = 0.0
+        self.remainder_x = self.remainder_y = 0.0
+        return False
+
+    def get_stats(self):
+        """
+        获取滚动统计信息
+
+        返回:
+            dict: 滚轮输出次数和当前速度（格/秒）
+        """
+        return {
+            "frames": self.frames,
+            "speed": round(math.hypot(self.velocity_x, self.velocity_y) / WHEEL_UNITS, 2)
+        }
@@ -0,0 +1,88 @@
+import logging
+import supervisor
+
+logger = logging.getLogger(__name__)
+
+class TouchpadService:
+    """
+    可嵌入的触控板服务
+
+    对TouchpadController的轻量封装，供外部工具以编程方式驱动触控板。
+    导入本模块不会读取配置文件、配置日志或加载图形界面库，
+    这些都由调用方显式注入：
+
+        service = TouchpadService(config)
+        service.start()
+        service.set_active(True)
+        service.stop()
+    """
+    def __init__(self, config, settings_manager=None, controller=None, gui=False, command_queue=None,
+                 control_server=None):
+        """
+        初始化触控板服务
+
+        参数:
+            config: 配置字典，包含response_time、hot_key、left_click、right_click、mode及后端设置
+            settings_manager: 设置管理器，None表示不持久化配置
+            controller: 触控板控制器，None表示按当前平台自动创建
+            gui: 是否加载系统托盘和鼠标指示器
+            command_queue: 跨线程命令队列，None表示新建
+            control_server: 已绑定的ControlServer实例，None表示不启动控制服务
+        """
+        from touchpad_controller import TouchpadController
+        self.handler = TouchpadController(
+            config,
+            settings_manager=settings_manager,
+            controller=controller,
+            gui=gui,
+            command_queue=command_queue,
+            control_server=control_server
+        )
+        self.serve_thread = None
+
+    @property
+    def command_queue(self):
+        """跨线程命令队列"""
+        return self.handler.command_queue
+
+    @property
+    def is_active(self):
+        """触控板当前是否处于激活状态"""
+        return self.handler.touchpad_active
+
+    def start(self):
+        """注册键盘钩子并在后台线程中处理命令队列"""
+        if self.serve_thread and self.serve_thread.is_alive():
+            return
+
+        self.handler.should_exit = False
+        self.handler.start()
+        self.serve_thread = supervisor.spawn(self.handler.serve, "command-loop", restart=True)
+        logger.info("触控板服务已启动")
+
+    def stop(self, timeout=2.0):
+        """
+        停止服务并清理资源
+
+        参数:
+            timeout: 等待命令处理线程退出的最长时间（秒）
+        """
+        self.handler.request_exit()
+        if self.serve_thread:
+            self.serve_thread.join(timeout)
+            self.serve_thread = None
+        self.handler._cleanup_resources()
+        logger.info("触控板服务已停止")
+
+    def set_active(self, active):
+        """
+        设置触控板状态
+
+        参数:
+            active (bool): True启用触控板，False禁用触控板
+        """
+        self.handler.set_active(active)
+
+    def run_forever(self):
+        """在当前线程中阻塞运行服务，直到收到退出命令"""
+        self.handler.run()
@@ -1,20 +1,178 @@
-import json
 import os
-import tkinter as tk
-from tkinter import ttk, messagebox
-import threading
-from configure_logger import configure_logger
-import platform
-from path_resolver import get_config_path, get_resource_path
+import logging
+from path_resolver import get_config_path
+from config_store import ConfigStore
 
-logger = configure_logger()
+logger = logging.getLogger(__name__)
+
+# 默认配置
+DEFAULT_CONFIG = {
+    "response_time": 0.2,
+    "hot_key": "f1",
+    "left_click": "f2",
+    "right_click": "f3",
+    "middle_click": "",
+    "back_click": "",
+    "forward_click": "",
+    "drag_lock": False,
+    "click_engine": "auto",
+    "move_up": "",
+    "move_down": "",
+    "move_left": "",
+    "move_right": "",
+    "motion": {"rate": 500, "curve": "quadratic", "min_speed": 100, "max_speed": 1500, "accel_time": 0.6},
+    "scroll_up": "",
+    "scroll_down": "",
+    "scroll_left": "",
+    "scroll_right": "",
+    "scroll": {"speed": 15, "ease_time": 0.1, "momentum_time": 0.25},
+    "typing_guard": {"enabled": False, "min_window": 0.3, "max_window": 1.0, "burst_keys": 2},
+    "auto_off": 0,
+    "metrics": {"textfile": "", "interval": 15, "http_port": 0},
+    "realtime": {"enabled": False, "priority": 10, "nice": -10, "cpus": []},
+    "mode": 0,
+    "backend": "auto",
+    "fallback_backends": [],
+    "devices": [{"type": "touchpad"}],
+    "input_source": "auto",
+    "profiles": []
+}
+
+def validate_config(config, resolve=None):
+    """
+    校验配置内容
+    
+    参数:
+        config: 配置字典
+        resolve: 输入源的按键名称 -> 键码元组函数，用于检查按键名称能否识别；
+                 None表示只检查语法（输入源尚未创建）
+        
+    返回:
+        list: 错误信息列表，为空表示配置有效
+    """
+    errors = []
+    response_time = config.get("response_time")
+    if isinstance(response_time, bool) or not isinstance(response_time, (int, float)):
+        errors.append("response_time 必须是数字")
+    elif not 0 < response_time <= 10:
+        errors.append("response_time 必须大于0且不超过10")
+    
+    keys = []
+    for name in ("hot_key", "left_click", "right_click"):
+        value = config.get(name)
+        if not isinstance(value, str) or not value:
+            errors.append(f"{name} 必须是非空字符串")
+        else:
+            keys.append(value)
+    # 中键、后退、前进点击按键和指针移动、滚动按键可以为空字符串（不绑定）
+    for name in ("middle_click", "back_click", "forward_click", "move_up", "move_down", "move_left", "move_right",
+                 "scroll_up", "scroll_down", "scroll_left", "scroll_right"):
+        value = config.get(name)
+        if not isinstance(value, str):
+            errors.append(f"{name} 必须是字符串")
+        elif value:
+            keys.append(value)
+    if len(set(keys)) != len(keys):
+        errors.append("触发键和各点击按键对应按键不能相同")
+    else:
+        # 组合键、按键序列的语法和前缀冲突；按键名称能否识别取决于输入源
+        from triggers import TriggerMatcher
+        try:
+            TriggerMatcher(resolve=resolve or (lambda name: (name,))).compile(dict(enumerate(keys)))
+        except ValueError as e:
+            errors.append(str(e))
+    
+    if not isinstance(config.get("drag_lock"), bool):
+        errors.append("drag_lock 必须是true或false")
+    
+    if config.get("click_engine") not in ("auto", "uinput", "pynput"):
+        errors.append("click_engine 必须是auto、uinput或pynput")
+    
+    from motion_engine import validate_motion
+    errors.extend(validate_motion(config.get("motion")))
+    
+    from scroll_engine import validate_scroll
+    errors.extend(validate_scroll(config.get("scroll")))
+    
+    from typing_guard import validate_typing_guard
+    errors.extend(validate_typing_guard(config.get("typing_guard")))
+    
+    if config.get("mode") not in (0, 1):
+        errors.append("mode 必须是0或1")
+    
+    auto_off = config.get("auto_off")
+    if isinstance(auto_off, bool) or not isinstance(auto_off, (int, float)) or not 0 <= auto_off <= 86400:
+        errors.append("auto_off 必须在0到86400之间（0表示不自动关闭）")
+    
+    backend = config.get("backend")
+    if not isinstance(backend, str) or not backend:
+        errors.append("backend 必须是非空字符串")
+    
+    fallback_backends = config.get("fallback_backends")
+    if not isinstance(fallback_backends, list) or not all(isinstance(name, str) for name in fallback_backends):
+        errors.append("fallback_backends 必须是后端名称列表")
+    
+    from controllers.input_devices import validate_device_rules
+    errors.extend(validate_device_rules(config.get("devices")))
+    
+    from metrics import validate_metrics
+    errors.extend(validate_metrics(config.get("metrics")))
+    
+    from realtime import validate_realtime
+    errors.extend(validate_realtime(config.get("realtime")))
+    
+    if config.get("input_source") not in ("auto", "helper", "evdev", "keyboard"):
+        errors.append("input_source 必须是auto、helper、evdev或keyboard")
+    
+    if not errors:
+        from profiles import validate_profiles
+        errors.extend(validate_profiles(config, resolve))
+    return errors
 
 class SettingsManager:
-    def __init__(self, command_queue):
+    """
+    设置管理器
+    
+    负责配置文件的读写和设置窗口的管理。构造时不访问磁盘，
+    需要显式调用load()加载配置。
+    """
+    def __init__(self, command_queue, config_path=None):
+        """
+        初始化设置管理器
+        
+        参数:
+            command_queue: 用于跨线程通信的命令队列
+            config_path: 配置文件路径，None表示在load()时自动查找
+        """
         self.command_queue = command_queue
         self.settings_window_open = False
-        self.config_path = self._get_config_path()
-        self._load_global_config()
+        self.settings_window = None  # 常驻的设置窗口（延迟创建）
+        self.config_path = config_path
+        self.store = None  # 配置存储，load()时创建
+        self.key_resolver = None  # 当前输入源的按键名称解析函数，输入源创建后设置
+        self.mouse_buttons = False  # 当前输入源能否把鼠标按钮用作触发键
+    
+    def set_input_source(self, input_source):
+        """
+        记录当前使用的输入源，之后接受的配置按该输入源能识别的按键名称校验
+        
+        参数:
+            input_source: InputSource实例
+        """
+        self.key_resolver = input_source.resolve_key
+        self.mouse_buttons = input_source.supports_mouse_buttons
+    
+    def validate(self, config):
+        """
+        按当前输入源校验配置
+        
+        参数:
+            config: 配置字典
+            
+        返回:
+            list: 错误信息列表，为空表示配置有效
+        """
+        return validate_config(config, self.key_resolver)
     
     def _get_config_path(self):
         config_path = get_config_path()
@@ -23,290 +181,156 @@ class SettingsManager:
             config_path = os.path.join(current_dir, 'configure.json')
         return config_path
     
-    def _load_global_config(self):
+    def load(self):
+        """
+        从配置文件加载配置
+        
+        文件不存在时写入默认配置；文件损坏或无效时本次使用默认配置，
+        之后保存修改前先把原文件备份为.bad文件
+        
+        返回:
+            dict: 加载后的配置字典
+        """
+        if self.config_path is None:
+            self.config_path = self._get_config_path()
+        self.store = ConfigStore(self.config_path, DEFAULT_CONFIG)
+        
         try:
-            global RESPONSE_TIME, HOT_KEY, LEFT_CLICK, RIGHT_CLICK, MODE
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                
-            RESPONSE_TIME = config.get("response_time", 0.2)
-            HOT_KEY = config.get("hot_key", "f1")
-            LEFT_CLICK = config.get("left_click", "f2")
-            RIGHT_CLICK = config.get("right_click", "f3")
-            MODE = config.get("mode", 0)
-            
+            config = self._merge_with_defaults(self.store.load())
+            errors = validate_config(config)
+            if errors:
+                raise ValueError('; '.join(errors))
+            self.store.set_snapshot(config)
             logger.info(f"已从 {self.config_path} 加载配置")
-            
         except Exception as e:
-            logger.error(f"读取配置文件失败: {e}，使用默认配置")
-            RESPONSE_TIME = 0.2
-            HOT_KEY = 'f1'
-            LEFT_CLICK = 'f2'
-            RIGHT_CLICK = 'f3'
-            MODE = 0
-            self._save_config(self.get_config())
+            logger.error(f"读取配置文件失败: {e}，本次使用默认配置（保存修改前先备份原文件）")
+            self.store.mark_invalid()
+        
+        return self.get_config()
+    
+    def _merge_with_defaults(self, config):
+        """
+        用默认值补全配置中缺失的项
+        
+        参数:
+            config: 从文件读取的配置字典
+            
+        返回:
+            dict: 补全后的配置字典
+        """
+        return {key: config.get(key, default) for key, default in DEFAULT_CONFIG.items()}
     
     def get_config(self):
-        return {
-            "response_time": RESPONSE_TIME,
-            "hot_key": HOT_KEY,
-            "left_click": LEFT_CLICK,
-            "right_click": RIGHT_CLICK,
-            "mode": MODE
-        }
+        """
+        获取内存中的配置快照（不访问磁盘）
+        
+        返回:
+            dict: 配置字典
+        """
+        if self.store is None:
+            return dict(DEFAULT_CONFIG)
+        return self.store.snapshot()
     
     def update_config(self, key, value):
+        """
+        修改单个配置项，由后台线程合并后原子写入
+        
+        参数:
+            key: 配置项名称
+            value: 新值
+            
+        返回:
+            bool: 是否成功
+        """
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            config[key] = value
-            return self._save_config(config)
+            self.store.update(key, value)
+            return True
         except Exception as e:
             logger.error(f"更新配置失败: {e}")
             return False
     
     def _save_config(self, config):
+        """
+        替换整个配置，由后台线程合并后原子写入
+        
+        参数:
+            config: 配置字典
+            
+        返回:
+            bool: 是否成功
+        """
         try:
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
-            logger.info(f"配置已保存到: {self.config_path}")
+            self.store.replace(self._merge_with_defaults(config))
             return True
         except Exception as e:
             logger.error(f"保存配置失败: {e}")
             return False
     
     def reload_config(self):
+        """
+        重新读取配置文件，文件无效时保留当前配置；尚未写入的修改与文件内容合并，不会被丢弃
+        
+        返回:
+            tuple: (是否成功, 新的配置字典或None)
+        """
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = self._merge_with_defaults(self.store.read())
+            
+            errors = self.validate(config)
+            if errors:
+                logger.error(f"配置文件无效，保留当前配置: {'; '.join(errors)}")
+                return False, None
             
-            global RESPONSE_TIME, HOT_KEY, LEFT_CLICK, RIGHT_CLICK, MODE
-            RESPONSE_TIME = config.get("response_time", 0.2)
-            HOT_KEY = config.get("hot_key", "f1")
-            LEFT_CLICK = config.get("left_click", "f2")
-            RIGHT_CLICK = config.get("right_click", "f3")
-            MODE = config.get("mode", 0)
+            config = self.store.merge_external(config)
             
-            logger.info(f"重新加载配置: 响应时间={RESPONSE_TIME}, 热键={HOT_KEY}, 左键={LEFT_CLICK}, 右键={RIGHT_CLICK}, 模式={MODE}")
-            return True, self.get_config()
+            logger.info("重新加载配置: 响应时间={response_time}, 热键={hot_key}, 左键={left_click}, 右键={right_click}, 模式={mode}".format(**config))
+            return True, config
         except Exception as e:
             logger.error(f"重新加载配置文件失败: {e}")
             return False, None
     
+    def is_own_write(self):
+        """
+        配置文件是否仍是本程序最近一次写入的版本
+        
+        返回:
+            bool: 是否未被外部修改
+        """
+        return self.store is not None and self.store.is_own_write()
+    
+    def close(self):
+        """写入尚未保存的配置修改"""
+        if self.store is not None:
+            self.store.close()
+    
+    def prepare_settings_window(self):
+        """在后台预先构建隐藏的设置窗口"""
+        self._get_settings_window().prepare()
+    
     def create_settings_window(self):
         if self.settings_window_open:
             self.command_queue.put(('settings_window_already_open', None))
             return False
         
-        def run_settings_window():
-            try:
-                settings_window = tk.Tk()
-                settings_window.title("Better Touchpad 设置")
-                settings_window.geometry("450x500")
-                settings_window.resizable(False, False)
-                settings_window.attributes('-topmost', True)
-                settings_window.update()
-                settings_window.attributes('-topmost', False)
-                
-                try:
-                    if platform.system() == "Windows":
-                        icon_path = get_resource_path('setting_icon.ico')
-                        if icon_path and os.path.exists(icon_path):
-                            settings_window.iconbitmap(icon_path)
-                except Exception as e:
-                    logger.error(f"设置窗口图标失败: {e}")
-                
-                def on_window_close():
-                    self.settings_window_open = False
-                    self.command_queue.put(('settings_window_closed', None))
-                    settings_window.destroy()
-                    logger.info("设置窗口已关闭")
-                
-                settings_window.protocol("WM_DELETE_WINDOW", on_window_close)
-                
-                config_data = self._load_settings_config()
-                main_frame = ttk.Frame(settings_window, padding=25)
-                main_frame.pack(fill=tk.BOTH, expand=True)
-                
-                ttk.Label(main_frame, text="Better Touchpad 设置", font=("Arial", 14, "bold")).pack(pady=(0, 25))
-                self._create_settings_controls(main_frame, config_data)
-                self._create_settings_buttons(main_frame, settings_window, None, config_data)
-                self._adjust_settings_window(settings_window)
-                settings_window.update_idletasks()
-                settings_window.deiconify()
-                settings_window.focus_force()
-                settings_window.mainloop()
-                
-            except Exception as e:
-                logger.error(f"创建设置窗口线程内部错误: {e}")
-                self.settings_window_open = False
-                self.command_queue.put(('settings_window_failed', None))
-        
         self.settings_window_open = True
-        window_thread = threading.Thread(target=run_settings_window)
-        window_thread.daemon = True
-        window_thread.start()
-        logger.info(f"设置窗口线程已启动: {window_thread.name}")
+        if not self._get_settings_window().show():
+            self.settings_window_open = False
+            return False
         return True
     
-    def _load_settings_config(self):
-        try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            return {
-                "response_time": config.get("response_time", 0.2),
-                "hot_key": config.get("hot_key", "f1"),
-                "left_click": config.get("left_click", "f2"),
-                "right_click": config.get("right_click", "f3"),
-                "mode": config.get("mode", 0),
-                "config_path": self.config_path
-            }
-        except Exception as e:
-            logger.error(f"读取配置失败: {e}")
-            return {
-                "response_time": RESPONSE_TIME,
-                "hot_key": HOT_KEY,
-                "left_click": LEFT_CLICK,
-                "right_click": RIGHT_CLICK,
-                "mode": MODE,
-                "config_path": self.config_path
-            }
-    
-    def _create_settings_controls(self, parent_frame, config_data):
-        settings_frame = ttk.Frame(parent_frame)
-        settings_frame.pack(fill=tk.BOTH, expand=True)
-        row_pady = 12  # 增加行间距
-        
-        function_keys = ["f1", "f2", "f3", "f4", "f5", "f6", "f7", "f8", "f9", "f10", 
-                        "f11", "f12", "f13", "f14", "f15", "f16", "f17", "f18", "f19", "f20"]
-        
-        # 响应时间设置
-        ttk.Label(settings_frame, text="长按响应时间 (秒):").grid(
-            row=1, column=0, sticky=tk.W, pady=row_pady)
-        response_time_var = tk.StringVar(value=str(config_data["response_time"]))
-        response_time_entry = ttk.Entry(settings_frame, textvariable=response_time_var, width=15)
-        response_time_entry.insert(0, str(config_data["response_time"]))  # 提前插入值
-        response_time_entry.grid(row=1, column=1, sticky=tk.W, pady=row_pady, padx=10)
-        config_data["response_time_entry"] = response_time_entry
-        
-        # 触发键设置
-        ttk.Label(settings_frame, text="触发键:").grid(
-            row=2, column=0, sticky=tk.W, pady=row_pady)
-        hot_key_combo = ttk.Combobox(settings_frame, values=function_keys, width=12, state="readonly")
-        hot_key_combo.set(config_data["hot_key"])
-        hot_key_combo.grid(row=2, column=1, sticky=tk.W, pady=row_pady, padx=10)
-        config_data["hot_key_combo"] = hot_key_combo
-        
-        # 左键点击设置
-        ttk.Label(settings_frame, text="左键点击:").grid(
-            row=3, column=0, sticky=tk.W, pady=row_pady)
-        left_click_combo = ttk.Combobox(settings_frame, values=function_keys, width=12, state="readonly")
-        left_click_combo.set(config_data["left_click"])
-        left_click_combo.grid(row=3, column=1, sticky=tk.W, pady=row_pady, padx=10)
-        config_data["left_click_combo"] = left_click_combo
-        
-        # 右键点击设置
-        ttk.Label(settings_frame, text="右键点击:").grid(
-            row=4, column=0, sticky=tk.W, pady=row_pady)
-        right_click_combo = ttk.Combobox(settings_frame, values=function_keys, width=12, state="readonly")
-        right_click_combo.set(config_data["right_click"])
-        right_click_combo.grid(row=4, column=1, sticky=tk.W, pady=row_pady, padx=10)
-        config_data["right_click_combo"] = right_click_combo
-        
-        # 模式切换组
-        mode_frame = ttk.LabelFrame(settings_frame, text="操作模式", padding=10)
-        mode_frame.grid(row=5, column=0, columnspan=3, sticky="ew", pady=5)
-        
-        # 新增: 左侧标签 + 滑动条 + 右侧标签水平排列
-        left_label = ttk.Label(mode_frame, text="切换模式")
-        left_label.grid(row=0, column=0, padx=15)
-        
-        mode_scale = tk.Scale(mode_frame, from_=0, to=1, orient='horizontal', length=50, 
-                              showvalue=0, borderwidth=1, highlightthickness=1)
-        mode_scale.set(config_data.get("mode", 0))
-        mode_scale.grid(row=0, column=1, padx=15)
-        config_data["mode_scale"] = mode_scale
-
-        right_label = ttk.Label(mode_frame, text="长按模式")
-        right_label.grid(row=0, column=2, padx=15)
-        
-        
-
-        # 刷新并聚焦
-        parent_frame.update_idletasks()
-        parent_frame.focus_force()
+    def destroy_settings_window(self):
+        """销毁常驻的设置窗口（尚未创建时忽略）"""
+        if self.settings_window is not None:
+            self.settings_window.destroy()
     
-    def _create_settings_buttons(self, parent_frame, settings_window, parent, config_data):
-        button_frame = ttk.Frame(parent_frame)
-        button_frame.pack(fill=tk.X, pady=(25, 0))
+    def _get_settings_window(self):
+        """
+        获取设置窗口对象，首次调用时才导入tkinter相关模块
         
-        def save_settings():
-            try:
-                response_time_val = float(config_data["response_time_entry"].get())
-                if response_time_val <= 0 or response_time_val > 10:
-                    messagebox.showerror("错误", "响应时间必须是大于0且不超过10的数值")
-                    return
-                
-                logger.info(config_data["mode_scale"].get())
-                hot_key = config_data["hot_key_combo"].get()
-                left_click = config_data["left_click_combo"].get()
-                right_click = config_data["right_click_combo"].get()
-                mode = config_data["mode_scale"].get()
-                
-                if (left_click == right_click or
-                    left_click == hot_key or
-                    right_click == hot_key):
-                    messagebox.showerror("错误", "触发键、左键点击和右键点击对应按键不能相同")
-                    return
-                
-                new_config = {
-                    "response_time": response_time_val,
-                    "hot_key": hot_key,
-                    "left_click": left_click,
-                    "right_click": right_click,
-                    "mode": mode
-                }
-                
-                if not self._save_config(new_config):
-                    messagebox.showerror("错误", "保存配置文件失败")
-                    return
-                
-                self.command_queue.put(('config_updated', new_config))
-                self.settings_window_open = False
-                settings_window.destroy()
-                logger.info("用户更新了配置并应用")
-            except ValueError:
-                messagebox.showerror("错误", "响应时间必须是数字")
-            except Exception as e:
-                messagebox.showerror("错误", f"保存配置失败: {str(e)}")
-                logger.error(f"保存配置失败: {e}")
-                self.settings_window_open = False
-                self.command_queue.put(('settings_window_closed', None))
-        
-        def cancel_settings():
-            self.settings_window_open = False
-            self.command_queue.put(('settings_window_closed', None))
-            settings_window.destroy()
-            logger.info("用户取消了设置")
-        
-        save_button = ttk.Button(button_frame, text="保存", command=save_settings, width=10)
-        save_button.pack(side=tk.RIGHT, padx=8)
-        cancel_button = ttk.Button(button_frame, text="取消", command=cancel_settings, width=10)
-        cancel_button.pack(side=tk.RIGHT, padx=8)
-    
-    def _adjust_settings_window(self, window):
-        window.update()
-        screen_width = window.winfo_screenwidth()
-        screen_height = window.winfo_screenheight()
-        width = 450
-        height = 500
-        x = (screen_width // 2) - (width // 2)
-        y = (screen_height // 2) - (height // 2)
-        window.geometry(f'{width}x{height}+{x}+{y}')
-        window.lift()
-
-RESPONSE_TIME = 0.2
-HOT_KEY = 'f1'
-LEFT_CLICK = 'f2'
-RIGHT_CLICK = 'f3'
-MODE = 0
\ No newline at end of file
+        返回:
+            SettingsWindow: 设置窗口对象
+        """
+        if self.settings_window is None:
+            from settings_window import SettingsWindow
+            self.settings_window = SettingsWindow(self)
+        return self.settings_window
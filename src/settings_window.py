@@ -0,0 +1,309 @@
+import os
+import logging
+import platform
+import threading
+import supervisor
+import tkinter as tk
+from tkinter import ttk, messagebox
+from path_resolver import get_resource_path
+from process_stats import get_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+# 等待设置窗口线程退出的最长时间（秒）
+DESTROY_TIMEOUT = 1.0
+
+class SettingsWindow:
+    """
+    常驻的设置窗口
+    
+    窗口只构建一次，关闭时隐藏而不销毁，再次打开时用当前配置就地刷新控件。
+    由SettingsManager在首次需要时创建，避免启动阶段导入tkinter。
+    """
+    def __init__(self, manager):
+        """
+        初始化设置窗口
+        
+        参数:
+            manager: SettingsManager实例，提供配置读写和命令队列
+        """
+        self.manager = manager
+        self.settings_window = None  # Tk根窗口
+        self.settings_controls = None  # 设置窗口控件引用
+        self.window_thread = None
+        self.window_ready = threading.Event()  # 设置窗口构建完成标志
+        self.show_on_ready = False  # 构建完成后是否立即显示
+    
+    def prepare(self):
+        """在后台预先构建隐藏的设置窗口"""
+        if self.window_thread and self.window_thread.is_alive():
+            return
+        
+        self.window_ready.clear()
+        self.window_thread = supervisor.spawn(self._run_settings_window, "settings-window")
+        logger.info(f"设置窗口线程已启动: {self.window_thread.name}")
+    
+    def show(self):
+        """
+        显示设置窗口，尚未构建时先构建
+        
+        返回:
+            bool: 是否成功请求显示
+        """
+        self.show_on_ready = True
+        if self.window_ready.is_set() and self.settings_window:
+            # 窗口已常驻，切换到Tk线程刷新并显示
+            try:
+                self.settings_window.after(0, self._show_settings_window)
+            except Exception as e:
+                logger.error(f"显示设置窗口失败: {e}")
+                return False
+        else:
+            self.prepare()
+        return True
+    
+    def destroy(self):
+        """
+        销毁常驻的设置窗口并结束其线程
+        
+        窗口在Tk线程中销毁，主循环随之退出；最多等待DESTROY_TIMEOUT秒，
+        Tk线程卡住时不阻塞调用方
+        """
+        window = self.settings_window
+        if window is not None:
+            try:
+                window.after(0, window.destroy)
+            except Exception as e:
+                logger.error(f"销毁设置窗口失败: {e}")
+                return
+        
+        thread = self.window_thread
+        if thread and thread is not threading.current_thread():
+            thread.join(DESTROY_TIMEOUT)
+            if thread.is_alive():
+                logger.warning("设置窗口线程未在期限内退出")
+                return
+        self.settings_window = None
+        self.window_ready.clear()
+    
+    def _run_settings_window(self):
+        """设置窗口线程：构建窗口并进入主循环"""
+        try:
+            rss_before = get_rss_bytes()
+            settings_window = tk.Tk()
+            settings_window.withdraw()
+            settings_window.title("Better Touchpad 设置")
+            settings_window.geometry("450x500")
+            settings_window.resizable(False, False)
+            
+            try:
+                if platform.system() == "Windows":
+                    icon_path = get_resource_path('setting_icon.ico')
+                    if icon_path and os.path.exists(icon_path):
+                        settings_window.iconbitmap(icon_path)
+            except Exception as e:
+                logger.error(f"设置窗口图标失败: {e}")
+            
+            settings_window.protocol("WM_DELETE_WINDOW", self._close_settings_window)
+            self.settings_window = settings_window
+            
+            config_data = dict(self.manager.get_config())
+            main_frame = ttk.Frame(settings_window, padding=25)
+            main_frame.pack(fill=tk.BOTH, expand=True)
+            
+            ttk.Label(main_frame, text="Better Touchpad 设置", font=("Arial", 14, "bold")).pack(pady=(0, 25))
+            self._create_settings_controls(main_frame, config_data)
+            self._create_settings_buttons(main_frame, settings_window, None, config_data)
+            self.settings_controls = config_data
+            self._adjust_settings_window(settings_window)
+            
+            rss_after = get_rss_bytes()
+            if rss_before is not None and rss_after is not None:
+                logger.info(f"设置窗口已构建，常驻内存增加约 {(rss_after - rss_before) / 1024:.0f} KB")
+            
+            self.window_ready.set()
+            if self.show_on_ready:
+                self._show_settings_window()
+            settings_window.mainloop()
+            
+        except Exception as e:
+            logger.error(f"创建设置窗口线程内部错误: {e}")
+            self.settings_window = None
+            self.manager.settings_window_open = False
+            self.window_ready.clear()
+            self.manager.command_queue.put(('settings_window_failed', None))
+    
+    def _show_settings_window(self):
+        """在Tk线程中用当前配置刷新控件并显示窗口"""
+        self.show_on_ready = False
+        self._refresh_settings_controls(self.manager.get_config())
+        window = self.settings_window
+        window.deiconify()
+        window.attributes('-topmost', True)
+        window.lift()
+        window.attributes('-topmost', False)
+        window.focus_force()
+        logger.info("设置窗口已显示")
+    
+    def _hide_settings_window(self):
+        """隐藏设置窗口但保留其控件供下次使用"""
+        self.manager.settings_window_open = False
+        if self.settings_window:
+            self.settings_window.withdraw()
+    
+    def _close_settings_window(self):
+        """处理窗口关闭按钮"""
+        self._hide_settings_window()
+        self.manager.command_queue.put(('settings_window_closed', None))
+        logger.info("设置窗口已关闭")
+    
+    def _refresh_settings_controls(self, config):
+        """
+        使用配置快照就地刷新设置控件
+        
+        参数:
+            config: 配置字典
+        """
+        controls = self.settings_controls
+        if not controls:
+            return
+        controls["response_time_entry"].delete(0, tk.END)
+        controls["response_time_entry"].insert(0, str(config["response_time"]))
+        controls["hot_key_combo"].set(config["hot_key"])
+        controls["left_click_combo"].set(config["left_click"])
+        controls["right_click_combo"].set(config["right_click"])
+        controls["mode_scale"].set(config["mode"])
+    
+    def _create_settings_controls(self, parent_frame, config_data):
+        settings_frame = ttk.Frame(parent_frame)
+        settings_frame.pack(fill=tk.BOTH, expand=True)
+        row_pady = 12  # 增加行间距
+        
+        # 也可以直接输入组合键（如ctrl+f1）、按键序列（如f8, f8）或鼠标按钮（如mouse back，仅evdev/helper输入源）
+        function_keys = ["f1", "f2", "f3", "f4", "f5", "f6", "f7", "f8", "f9", "f10", 
+                        "f11", "f12", "f13", "f14", "f15", "f16", "f17", "f18", "f19", "f20",
+                        "ctrl+f1", "f8, f8"]
+        if self.manager.mouse_buttons:
+            function_keys += ["mouse back", "mouse forward"]
+        
+        # 响应时间设置
+        ttk.Label(settings_frame, text="长按响应时间 (秒):").grid(
+            row=1, column=0, sticky=tk.W, pady=row_pady)
+        response_time_entry = ttk.Entry(settings_frame, width=15)
+        response_time_entry.insert(0, str(config_data["response_time"]))
+        response_time_entry.grid(row=1, column=1, sticky=tk.W, pady=row_pady, padx=10)
+        config_data["response_time_entry"] = response_time_entry
+        
+        # 触发键设置
+        ttk.Label(settings_frame, text="触发键:").grid(
+            row=2, column=0, sticky=tk.W, pady=row_pady)
+        hot_key_combo = ttk.Combobox(settings_frame, values=function_keys, width=12)
+        hot_key_combo.set(config_data["hot_key"])
+        hot_key_combo.grid(row=2, column=1, sticky=tk.W, pady=row_pady, padx=10)
+        config_data["hot_key_combo"] = hot_key_combo
+        
+        # 左键点击设置
+        ttk.Label(settings_frame, text="左键点击:").grid(
+            row=3, column=0, sticky=tk.W, pady=row_pady)
+        left_click_combo = ttk.Combobox(settings_frame, values=function_keys, width=12)
+        left_click_combo.set(config_data["left_click"])
+        left_click_combo.grid(row=3, column=1, sticky=tk.W, pady=row_pady, padx=10)
+        config_data["left_click_combo"] = left_click_combo
+        
+        # 右键点击设置
+        ttk.Label(settings_frame, text="右键点击:").grid(
+            row=4, column=0, sticky=tk.W, pady=row_pady)
+        right_click_combo = ttk.Combobox(settings_frame, values=function_keys, width=12)
+        right_click_combo.set(config_data["right_click"])
+        right_click_combo.grid(row=4, column=1, sticky=tk.W, pady=row_pady, padx=10)
+        config_data["right_click_combo"] = right_click_combo
+        
+        # 模式切换组
+        mode_frame = ttk.LabelFrame(settings_frame, text="操作模式", padding=10)
+        mode_frame.grid(row=5, column=0, columnspan=3, sticky="ew", pady=5)
+        
+        # 新增: 左侧标签 + 滑动条 + 右侧标签水平排列
+        left_label = ttk.Label(mode_frame, text="切换模式")
+        left_label.grid(row=0, column=0, padx=15)
+        
+        mode_scale = tk.Scale(mode_frame, from_=0, to=1, orient='horizontal', length=50, 
+                              showvalue=0, borderwidth=1, highlightthickness=1)
+        mode_scale.set(config_data.get("mode", 0))
+        mode_scale.grid(row=0, column=1, padx=15)
+        config_data["mode_scale"] = mode_scale
+
+        right_label = ttk.Label(mode_frame, text="长按模式")
+        right_label.grid(row=0, column=2, padx=15)
+        
+        
+
+        # 刷新布局
+        parent_frame.update_idletasks()
+    
+    def _create_settings_buttons(self, parent_frame, settings_window, parent, config_data):
+        button_frame = ttk.Frame(parent_frame)
+        button_frame.pack(fill=tk.X, pady=(25, 0))
+        
+        def save_settings():
+            try:
+                response_time_val = float(config_data["response_time_entry"].get())
+                if response_time_val <= 0 or response_time_val > 10:
+                    messagebox.showerror("错误", "响应时间必须是大于0且不超过10的数值")
+                    return
+                
+                logger.info(config_data["mode_scale"].get())
+                hot_key = config_data["hot_key_combo"].get()
+                left_click = config_data["left_click_combo"].get()
+                right_click = config_data["right_click_combo"].get()
+                mode = config_data["mode_scale"].get()
+                
+                # 保留设置窗口不涉及的配置项（后端、设备规则等）
+                new_config = self.manager.get_config()
+                new_config.update({
+                    "response_time": response_time_val,
+                    "hot_key": hot_key,
+                    "left_click": left_click,
+                    "right_click": right_click,
+                    "mode": mode
+                })
+                
+                # 校验按键（当前输入源能否识别、重复、组合键语法和按键序列冲突）
+                errors = self.manager.validate(new_config)
+                if errors:
+                    messagebox.showerror("错误", "\n".join(errors))
+                    return
+                
+                if not self.manager._save_config(new_config):
+                    messagebox.showerror("错误", "保存配置文件失败")
+                    return
+                
+                self.manager.command_queue.put(('config_updated', new_config))
+                self._hide_settings_window()
+                logger.info("用户更新了配置并应用")
+            except ValueError:
+                messagebox.showerror("错误", "响应时间必须是数字")
+            except Exception as e:
+                messagebox.showerror("错误", f"保存配置失败: {str(e)}")
+                logger.error(f"保存配置失败: {e}")
+                self.manager.settings_window_open = False
+                self.manager.command_queue.put(('settings_window_closed', None))
+        
+        def cancel_settings():
+            self._hide_settings_window()
+            self.manager.command_queue.put(('settings_window_closed', None))
+            logger.info("用户取消了设置")
+        
+        save_button = ttk.Button(button_frame, text="保存", command=save_settings, width=10)
+        save_button.pack(side=tk.RIGHT, padx=8)
+        cancel_button = ttk.Button(button_frame, text="取消", command=cancel_settings, width=10)
+        cancel_button.pack(side=tk.RIGHT, padx=8)
+    
+    def _adjust_settings_window(self, window):
+        window.update_idletasks()
+        screen_width = window.winfo_screenwidth()
+        screen_height = window.winfo_screenheight()
+        width = 450
+        height = 500
+        x = (screen_width // 2) - (width // 2)
+        y = (screen_height // 2) - (height // 2)
+        window.geometry(f'{width}x{height}+{x}+{y}')
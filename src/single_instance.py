@@ -0,0 +1,98 @@
+import platform
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Windows互斥量名称及错误码
+MUTEX_NAME = "Local\\betterTouchpad"
+ERROR_ALREADY_EXISTS = 183
+
+class SingleInstance:
+    """
+    单实例守护
+
+    支持Unix域套接字的平台上，以控制套接字本身作为锁：
+    绑定成功即获得锁，后续启动的进程通过同一个套接字把意图转发给运行中的实例。
+    Windows下使用命名互斥量，仅做互斥，不支持转发。
+
+    本模块不导入任何图形界面库，第二个实例可在毫秒级内完成转发并退出。
+    """
+    def __init__(self, socket_path=None):
+        """
+        初始化单实例守护
+
+        参数:
+            socket_path: 控制套接字路径，None表示使用默认路径
+        """
+        self.socket_path = socket_path
+        self.control_server = None  # 获得锁后持有的已绑定控制服务
+        self.mutex_handle = None
+
+    def acquire(self):
+        """
+        尝试成为唯一运行的实例
+
+        返回:
+            bool: True表示获得锁，False表示已有实例在运行
+        """
+        from control_server import ControlServer, InstanceRunningError, is_supported
+        if is_supported():
+            server = ControlServer(self.socket_path)
+            try:
+                server.bind()
+            except InstanceRunningError:
+                return False
+            self.control_server = server
+            return True
+
+        if platform.system() == "Windows":
+            return self._acquire_mutex()
+
+        logger.warning("当前平台不支持单实例检测")
+        return True
+
+    def forward(self, intent):
+        """
+        将意图转发给运行中的实例
+
+        参数:
+            intent: 控制命令，如"show-settings"、"toggle"或"exit"
+
+        返回:
+            dict: 运行中实例的响应，无法转发时返回None
+        """
+        from control_server import send_request, is_supported
+        if not is_supported():
+            logger.warning("当前平台不支持向运行中的实例转发命令")
+            return None
+        try:
+            return send_request(intent, self.socket_path)
+        except (OSError, ValueError) as e:
+            logger.error(f"转发命令到运行中的实例失败: {e}")
+            return None
+
+    def release(self):
+        """释放锁（控制服务由TouchpadController负责停止）"""
+        if self.mutex_handle is not None:
+            import ctypes
+            ctypes.windll.kernel32.CloseHandle(self.mutex_handle)
+            self.mutex_handle = None
+
+    def _acquire_mutex(self):
+        """
+        通过Windows命名互斥量检测已运行的实例
+
+        返回:
+            bool: 是否获得锁
+        """
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.CreateMutexW(None, False, MUTEX_NAME)
+        if not handle:
+            logger.error("创建单实例互斥量失败")
+            return True
+        if kernel32.GetLastError() == ERROR_ALREADY_EXISTS:
+            kernel32.CloseHandle(handle)
+            return False
+        self.mutex_handle = handle
+        return True
@@ -0,0 +1,231 @@
+import time
+import threading
+import collections
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 崩溃后重启前的等待时间：第n次连续崩溃等待RESTART_DELAY * 2**(n-1)秒，最长MAX_RESTART_DELAY秒
+RESTART_DELAY = 0.1
+MAX_RESTART_DELAY = 5.0
+# RESTART_WINDOW秒内崩溃超过RESTART_LIMIT次时不再重启
+RESTART_LIMIT = 5
+RESTART_WINDOW = 60.0
+# 关闭时每个组件的默认期限（秒）
+SHUTDOWN_DEADLINE = 1.0
+
+
+class Worker:
+    """
+    受监督的工作线程
+
+    目标函数抛出异常时记录崩溃；允许重启时在同一线程中退避后重新运行目标函数，
+    线程编号不变，已设置的调度优先级（见realtime）和持有线程对象的组件都不受影响。
+    目标函数正常返回表示线程结束，不会重启。
+    """
+    def __init__(self, supervisor, target, name, restart):
+        """
+        参数:
+            supervisor: 所属的Supervisor
+            target: 线程主函数，无参数
+            name: 线程名称
+            restart: 崩溃后是否重启
+        """
+        self.supervisor = supervisor
+        self.target = target
+        self.restart = restart
+        self.crashes = 0
+        self.restarts = 0
+        self.last_error = None
+        self.recent_crashes = collections.deque()  # 最近的崩溃时间
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def _run(self):
+        """运行目标函数，崩溃后按退避时间重启"""
+        while True:
+            try:
+                self.target()
+                return
+            except Exception as e:
+                self.crashes += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.exception(f"线程{self.thread.name}崩溃: {e}", exc_info=True)
+            delay = self._restart_delay()
+            # 关闭过程中不再重启
+            if delay is None or self.supervisor.stopping.wait(delay):
+                return
+            self.restarts += 1
+            logger.warning(f"重启线程{self.thread.name}（第{self.restarts}次）")
+
+    def _restart_delay(self):
+        """
+        计算重启前的等待时间
+
+        返回:
+            float: 等待时间（秒），不应重启时为None
+        """
+        if not self.restart:
+            return None
+        now = time.monotonic()
+        self.recent_crashes.append(now)
+        while now - self.recent_crashes[0] > RESTART_WINDOW:
+            self.recent_crashes.popleft()
+        if len(self.recent_crashes) > RESTART_LIMIT:
+            logger.error(f"线程{self.thread.name}在{RESTART_WINDOW:.0f}秒内崩溃{len(self.recent_crashes)}次，不再重启")
+            return None
+        return min(RESTART_DELAY * 2 ** (len(self.recent_crashes) - 1), MAX_RESTART_DELAY)
+
+    def get_stats(self):
+        """
+        获取线程状态
+
+        返回:
+            dict: 是否运行中、是否自动重启、崩溃次数、重启次数和最近一次错误
+        """
+        return {
+            "alive": self.thread.is_alive(),
+            "restart": self.restart,
+            "crashes": self.crashes,
+            "restarts": self.restarts,
+            "last_error": self.last_error
+        }
+
+
+class Supervisor:
+    """
+    工作线程监督者
+
+    程序中的后台线程都通过spawn创建：统一命名、记录崩溃并按需重启，运行统计中可以看到每个线程的状态。
+    shutdown按阶段关闭组件：同一阶段的组件在各自线程中并行停止，每个组件有自己的期限，
+    超过期限的组件（如卡在Tk或pystray中的停止操作）不再等待，不会拖住整个退出过程。
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.workers = {}  # 线程 -> Worker
+        self.finished = {"workers": 0, "restarts": 0}  # 已结束线程的累计
+        self.stopping = threading.Event()  # 关闭过程中置位，崩溃的线程不再重启
+        self.last_shutdown = None
+
+    def spawn(self, target, name, restart=False):
+        """
+        创建并启动受监督的工作线程
+
+        参数:
+            target: 线程主函数，无参数
+            name: 线程名称
+            restart: 崩溃后是否在同一线程中重启，目标函数需要可以重新进入
+
+        返回:
+            threading.Thread: 已启动的线程
+        """
+        worker = Worker(self, target, name, restart)
+        with self.lock:
+            self._prune()
+            self.workers[worker.thread] = worker
+        worker.thread.start()
+        return worker.thread
+
+    def _prune(self):
+        """移除已结束且没有崩溃过的线程，崩溃过的保留以便查看错误（调用方需持有锁）"""
+        for thread, worker in list(self.workers.items()):
+            if thread.is_alive() or worker.crashes:
+                continue
+            del self.workers[thread]
+            self.finished["workers"] += 1
+            self.finished["restarts"] += worker.restarts
+
+    def shutdown(self, stages):
+        """
+        按阶段关闭组件
+
+        参数:
+            stages: 阶段列表，每个阶段是(名称, 停止函数, 期限秒数)的列表；同一阶段的停止函数并行执行，
+                    全部完成或超过各自期限后才进入下一阶段
+
+        返回:
+            dict: 总耗时（秒）和各组件的结果（ok、error或timeout）及耗时
+        """
+        # 超过期限的组件可能仍在运行，关闭开始后一直不再重启崩溃的线程
+        self.stopping.set()
+        start = time.perf_counter()
+        steps = {}
+        for stage in stages:
+            steps.update(self._run_stage(stage))
+        self.last_shutdown = {"seconds": time.perf_counter() - start, "steps": steps}
+        return self.last_shutdown
+
+    def reset(self):
+        """结束关闭状态，允许再次重启崩溃的线程（用于同一进程中多次启动和关闭服务，如基准测试）"""
+        self.stopping.clear()
+
+    def _run_stage(self, stage):
+        """
+        并行执行一个阶段的停止函数，等待各自的期限
+
+        返回:
+            dict: 组件名称 -> {"result": 结果, "seconds": 耗时}
+        """
+        pending = []
+        for name, stop, deadline in stage:
+            step = {"result": "timeout", "seconds": None, "done": threading.Event()}
+
+            def run(stop=stop, step=step, name=name):
+                started = time.perf_counter()
+                try:
+                    stop()
+                    step["result"] = "ok"
+                except Exception as e:
+                    step["result"] = "error"
+                    logger.exception(f"停止{name}失败: {e}", exc_info=True)
+                step["seconds"] = time.perf_counter() - started
+                step["done"].set()
+            threading.Thread(target=run, name=f"stop-{name}", daemon=True).start()
+            pending.append((name, step, time.monotonic() + deadline))
+
+        results = {}
+        for name, step, deadline in pending:
+            if not step["done"].wait(max(0.0, deadline - time.monotonic())):
+                logger.warning(f"停止{name}超过期限，不再等待")
+                results[name] = {"result": "timeout", "seconds": None}
+                continue
+            results[name] = {"result": step["result"], "seconds": step["seconds"]}
+        return results
+
+    def get_stats(self):
+        """
+        获取工作线程统计信息
+
+        返回:
+            dict: 各线程状态、已结束线程的累计和最近一次关闭的结果
+        """
+        with self.lock:
+            self._prune()
+            workers = {}
+            for thread, worker in self.workers.items():
+                # 同名线程（如重新创建的组件）加上线程编号区分
+                key = thread.name if thread.name not in workers else f"{thread.name}#{thread.ident}"
+                workers[key] = worker.get_stats()
+            return {"workers": workers, "finished": dict(self.finished), "last_shutdown": self.last_shutdown}
+
+
+# 进程内唯一的工作线程监督者
+SUPERVISOR = Supervisor()
+
+def spawn(target, name, restart=False):
+    """创建并启动受监督的工作线程，见Supervisor.spawn"""
+    return SUPERVISOR.spawn(target, name, restart)
+
+
+def shutdown(stages):
+    """按阶段关闭组件，见Supervisor.shutdown"""
+    return SUPERVISOR.shutdown(stages)
+
+
+def reset():
+    """结束关闭状态，见Supervisor.reset"""
+    SUPERVISOR.reset()
+
+
+def get_stats():
+    """获取工作线程统计信息，见Supervisor.get_stats"""
+    return SUPERVISOR.get_stats()
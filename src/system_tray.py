@@ -1,14 +1,25 @@
-import threading
+import logging
 import os
-import pystray
 import platform
 import time
+import metrics
+import supervisor
 from PIL import Image, ImageDraw
-from configure_logger import configure_logger
 from path_resolver import get_resource_path, get_application_path
 
-# Linux系统下设置pystray使用AppIndicator后端
-if platform.system() == 'Linux':
+# 初始化日志记录器
+logger = logging.getLogger(__name__)
+
+# 托盘图标更新耗时
+UPDATE_SECONDS = metrics.histogram("tray_update_seconds", "系统托盘图标更新耗时（秒）")
+
+def _setup_linux_backend():
+    """
+    Linux系统下设置pystray使用AppIndicator后端
+    
+    必须在首次导入pystray之前调用，因此放在托盘线程中延迟执行，
+    避免启动阶段加载gi/AppIndicator
+    """
     import gi
     gi.require_version('AppIndicator3', '0.1')
     os.environ['PYSTRAY_BACKEND'] = 'appindicator'
@@ -42,8 +53,6 @@ if platform.system() == 'Linux':
     except ImportError:
         pass
 
-# 初始化日志记录器
-logger = configure_logger()
 
 class SystemTrayController:
     """
@@ -68,8 +77,7 @@ class SystemTrayController:
     
     def start(self):
         """启动系统托盘图标（在后台线程中）"""
-        self.tray_thread = threading.Thread(target=self._start_tray_icon, daemon=True)
-        self.tray_thread.start()
+        self.tray_thread = supervisor.spawn(self._start_tray_icon, "tray")
         logger.info("系统托盘图标线程已启动")
     
     def stop(self):
@@ -92,6 +100,8 @@ class SystemTrayController:
     
     def _start_tray_icon(self):
         """在独立线程中创建并运行系统托盘图标"""
+        if platform.system() == 'Linux':
+            _setup_linux_backend()
         self.tray_icon = self._create_tray_icon()
         self._update_tray_icon()  # 初始化图标状态
         self.tray_icon.run()
@@ -103,6 +113,8 @@ class SystemTrayController:
         返回:
             pystray.Icon: 创建的系统托盘图标对象
         """
+        import pystray
+        
         # 使用path_resolver获取图标路径
         icon_path = get_resource_path('default.png')
         
@@ -179,8 +191,10 @@ class SystemTrayController:
                 return
                 
             # 加载图标并更新
+            start = time.perf_counter()
             icon_image = Image.open(icon_path)
             self.tray_icon.icon = icon_image
+            UPDATE_SECONDS.observe(time.perf_counter() - start)
             logger.info(f"已更新系统托盘图标为: {icon_name}")
             
         except Exception as e:
@@ -0,0 +1,128 @@
+import time
+import threading
+import logging
+import realtime
+import supervisor
+
+logger = logging.getLogger(__name__)
+
+# 落后超过该节拍数时不再补发，直接从当前时间重新对齐
+MAX_LAG_TICKS = 4
+
+class TickScheduler:
+    """
+    固定频率的节拍线程
+
+    有客户端处于活动状态时按绝对截止时间（起点 + n * 周期）调度，
+    处理耗时和睡眠误差不会累积成漂移；所有客户端都空闲时线程阻塞在条件变量上，不产生任何唤醒。
+    客户端回调收到当前时间和距上一节拍的实际间隔，按实际间隔计算位移，偶尔落后也不会改变速度。
+    """
+    def __init__(self, rate, name="tick-scheduler"):
+        """
+        初始化节拍线程，线程在首次唤醒时启动
+
+        参数:
+            rate: 节拍频率（Hz）
+            name: 线程名称
+        """
+        self.period = 1.0 / rate
+        self.name = name
+        self.clients = []
+        self.condition = threading.Condition()
+        self.pending = False  # 有客户端请求开始节拍
+        self.running = False
+        self.thread = None
+        self.ticks = 0
+        self.resyncs = 0
+        self.active_periods = 0
+
+    def set_rate(self, rate):
+        """
+        修改节拍频率，下一节拍起生效
+
+        参数:
+            rate: 节拍频率（Hz）
+        """
+        self.period = 1.0 / rate
+
+    def register(self, callback):
+        """
+        注册节拍客户端
+
+        参数:
+            callback: 节拍回调，参数为(当前时间, 距上一节拍的间隔秒数)，返回是否仍处于活动状态
+        """
+        self.clients.append(callback)
+
+    def wake(self):
+        """客户端进入活动状态时调用，空闲中的节拍线程开始计时"""
+        with self.condition:
+            self.pending = True
+            if self.thread is None:
+                self.running = True
+                self.thread = supervisor.spawn(self._run, self.name, restart=True)
+                realtime.register("actuator", self.thread)
+            self.condition.notify()
+
+    def get_stats(self):
+        """
+        获取节拍统计信息
+
+        返回:
+            dict: 频率、节拍总数、重新对齐次数和活动段数
+        """
+        return {
+            "rate": round(1.0 / self.period),
+            "ticks": self.ticks,
+            "resyncs": self.resyncs,
+            "active_periods": self.active_periods
+        }
+
+    def stop(self):
+        """停止节拍线程"""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(1.0)
+            self.thread = None
+
+    def _run(self):
+        """节拍线程主循环"""
+        while True:
+            with self.condition:
+                while not self.pending and self.running:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                self.pending = False
+            self.active_periods += 1
+            self._run_active()
+
+    def _run_active(self):
+        """按固定频率调用客户端，直到所有客户端空闲"""
+        last = time.monotonic()
+        deadline = last + self.period
+        while self.running:
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.monotonic()
+            active = False
+            for callback in self.clients:
+                try:
+                    active = callback(now, now - last) or active
+                except Exception as e:
+                    logger.error(f"节拍回调失败: {e}")
+            last = now
+            self.ticks += 1
+            if not active:
+                with self.condition:
+                    # 回调返回后又有客户端被唤醒时继续节拍
+                    if not self.pending:
+                        return
+                    self.pending = False
+            deadline += self.period
+            if now - deadline > self.period * MAX_LAG_TICKS:
+                deadline = now + self.period
+                self.resyncs += 1
@@ -1,39 +1,34 @@
 import time
 import threading
 import queue
-import keyboard
-import pyautogui
-from pynput import mouse
-from controllers import create_controller
-from configure_logger import configure_logger
-from system_tray import SystemTrayController
-from setting import SettingsManager
-from cursor_indicator import CursorIndicator
+import platform
+import logging
+import metrics
+import realtime
+import supervisor
 
-# 初始化日志记录器
-logger = configure_logger()
+logger = logging.getLogger(__name__)
 
-# ============================== 配置加载 ==============================
-def load_config():
-    """
-    从配置文件加载设置，如果加载失败则使用默认值
-    
-    返回:
-        tuple: (响应时间, 热键, 左键点击按键, 右键点击按键, 模式)
-    """
-    settings_manager = SettingsManager(queue.Queue())
-    config = settings_manager.get_config()
-    
-    return (
-        config["response_time"],
-        config["hot_key"],
-        config["left_click"],
-        config["right_click"],
-        config["mode"]
-    )
+# 运行指标（热路径上直接使用保存的子指标）
+_toggles = metrics.counter("toggles_total", "触控板切换次数", ("result",))
+TOGGLES_OK = _toggles.labels("ok")
+TOGGLES_FAILED = _toggles.labels("failed")
+TOGGLE_SECONDS = metrics.histogram("toggle_seconds", "触控板切换耗时（秒）")
+_callback_seconds = metrics.histogram("hook_callback_seconds", "按键事件回调耗时（秒）", ("callback",))
+HOT_KEY_SECONDS = _callback_seconds.labels("hot_key")
+ACTION_SECONDS = _callback_seconds.labels("action")
+TYPING_TOGGLES = metrics.counter("typing_toggles_total", "打字时暂停和恢复触控板的次数")
+AUTO_OFF = metrics.counter("auto_off_total", "空闲自动禁用触控板的次数")
+COMMAND_ERRORS = metrics.counter("command_errors_total", "处理命令队列出错次数")
 
-# 初始化全局配置变量
-RESPONSE_TIME, HOT_KEY, LEFT_CLICK, RIGHT_CLICK, MODE = load_config()
+# 主循环等待命令的超时（秒）：None表示一直阻塞直到有命令；
+# Windows下阻塞的锁等待不响应Ctrl+C，因此定期醒来一次
+COMMAND_WAIT_TIMEOUT = 1.0 if platform.system() == "Windows" else None
+
+# 退出时恢复触控板的期限（秒）：部分后端通过子进程切换设备
+RESTORE_DEADLINE = 2.0
+# 退出时写入配置文件的期限（秒）
+SETTINGS_DEADLINE = 2.0
 
 class TouchpadController:
     """
@@ -41,133 +36,683 @@ class TouchpadController:
     
     负责检测热键事件并根据不同模式（长按/切换）处理触控板状态，
     管理鼠标点击模拟，并通过命令队列与其他组件通信。
+    
+    配置、设置管理器和触控板控制器均可由调用方注入，
+    构造时不读取配置文件，也不配置日志。
     """
-    def __init__(self):
-        """初始化触控板事件处理器及其所有组件"""
+    def __init__(self, config, settings_manager=None, controller=None, gui=True, command_queue=None,
+                 control_server=None):
+        """
+        初始化触控板事件处理器及其所有组件
+        
+        参数:
+            config: 配置字典，包含response_time、hot_key、left_click、right_click、mode及后端设置
+            settings_manager: 设置管理器，None表示不提供配置持久化和设置窗口
+            controller: 触控板控制器，None表示按当前平台自动创建
+            gui: 是否加载系统托盘和鼠标指示器
+            command_queue: 跨线程命令队列，None表示新建
+            control_server: 已绑定的ControlServer实例，None表示不启动控制服务
+        """
         # 创建控制器和通信组件
-        self.controller = create_controller()
+        if controller is None:
+            from controllers import create_controller
+            controller = create_controller(config.get("backend", "auto"), config.get("fallback_backends", []),
+                                           config.get("devices"))
+        self.controller = controller
         self.should_exit = False
+        self.shutting_down = False  # 正在退出，不再切换触控板
         self.lock = threading.Lock()  # 线程锁，确保线程安全
         
+        # ----- 配置 -----
+        self._apply_config(config)
+        
         # ----- 状态跟踪变量 -----
         # 热键状态
-        self.hotkey_pressed_time = 0    # 热键按下的时间戳
+        self.hotkey_pressed_time = 0    # 热键按下的时间（time.monotonic_ns()）
         self.hotkey_is_pressed = False  # 热键是否处于按下状态
         self.long_press_triggered = False  # 是否已触发长按事件
         self.is_simulating = False      # 是否正在模拟按键
         
         # 触控板和鼠标状态
         self.touchpad_active = False    # 触控板是否激活
-        self.left_click_pressed = False  # 左键是否按下
-        self.right_click_pressed = False  # 右键是否按下
+        self.click_keys_down = set()  # 按下中的点击按键对应的鼠标按钮，用于过滤自动重复
+        self.locked_buttons = set()  # 拖动锁定中的鼠标按钮
+        self.action_keys_bound = False  # 点击、移动和滚动等动作按键是否已绑定
+        self.click_engine = None  # 鼠标点击引擎，启动时创建
+        self.tick_scheduler = None  # 指针移动和滚动共用的节拍线程，首次使用时创建
+        self.motion_engine = None  # 键盘指针移动引擎，首次使用时创建
+        self.scroll_engine = None  # 键盘平滑滚动引擎，首次使用时创建
+        self.typing_guard_engine = None  # 打字防误触，首次启用时创建
+        self.typing_watched = False  # 输入源是否正在报告打字按键
+        self.typing_suspended = False  # 触控板是否因打字被暂停
+        self.idle_watcher = None  # 触控板空闲检测，首次启用自动关闭时创建
+        self.idle_generation = None  # 当前空闲计时的编号，None表示未计时
         
-        # 定时器和钩子
-        self.long_press_timer = None  # 长按检测定时器
-        self.press_hotkey = None  # 热键绑定句柄
-        self.hotkey_down = None  # 热键按下钩子
+        # 定时器和输入源
+        self.long_press_timer = None  # 长按检测定时器，首次按下热键时创建
+        self.input_source = None  # 键盘输入源，注册钩子时创建
         
         # 跨线程通信
-        self.command_queue = queue.Queue()
+        self.command_queue = command_queue if command_queue is not None else queue.Queue()
         
         # 创建管理器组件
-        self.tray_manager = SystemTrayController(self.controller, self.command_queue)
-        self.config_manager = SettingsManager(self.command_queue)
+        self.config_manager = settings_manager
         self.settings_window_open = False  # 设置窗口状态
         
-        # 创建鼠标指示器
-        self.cursor_indicator = CursorIndicator(self.command_queue)
+        # 图形界面组件在键盘钩子注册后于后台加载
+        self.gui = gui
+        self.tray_manager = None
+        self.cursor_indicator = None
+        self.gui_thread = None
+        self.created_at = time.perf_counter()  # 用于统计钩子注册耗时
+        
+        # 本地控制服务
+        self.control_server = control_server
+        
+        # 配置文件监视器
+        self.config_watcher = None
+        
+        # 按焦点窗口切换的应用配置方案
+        self.profile_table = None  # 编译后的方案表，未配置方案时为None
+        self.active_profile = None  # 当前生效的方案
+        self.focus_wm_class = None  # 当前焦点窗口的WM_CLASS
+        self.focus_watcher = None
+        self._compile_profiles(config)
+        
+        # 运行指标导出
+        self.metrics_exporter = None
+        
+        # 运行统计
+        self.toggle_count = 0  # 触控板切换次数
+        self.toggle_failures = 0  # 触控板切换失败次数
+        self.last_toggle_latency = None  # 最近一次切换耗时（秒）
+        self.typing_toggles = 0  # 打字暂停/恢复实际切换设备的次数
+        self.typing_skips = 0  # 状态未变或触控板未激活而跳过的暂停/恢复次数
+    
+    def _apply_config(self, config):
+        """
+        将配置字典应用到运行时参数
+        
+        参数:
+            config: 配置字典
+        """
+        self.response_time = config["response_time"]
+        self.hot_key = config["hot_key"]
+        self.left_click = config["left_click"]
+        self.right_click = config["right_click"]
+        self.middle_click = config.get("middle_click", "")
+        self.back_click = config.get("back_click", "")
+        self.forward_click = config.get("forward_click", "")
+        self.drag_lock = config.get("drag_lock", False)
+        self.click_engine_name = config.get("click_engine", "auto")
+        self.move_up = config.get("move_up", "")
+        self.move_down = config.get("move_down", "")
+        self.move_left = config.get("move_left", "")
+        self.move_right = config.get("move_right", "")
+        self.motion = dict(config.get("motion", {}))
+        self.scroll_up = config.get("scroll_up", "")
+        self.scroll_down = config.get("scroll_down", "")
+        self.scroll_left = config.get("scroll_left", "")
+        self.scroll_right = config.get("scroll_right", "")
+        self.scroll = dict(config.get("scroll", {}))
+        self.typing_guard = dict(config.get("typing_guard", {}))
+        self.auto_off = config.get("auto_off", 0)
+        self.metrics = dict(config.get("metrics", {}))
+        self.realtime = dict(config.get("realtime", {}))
+        self.mode = config["mode"]
+        self.backend = config.get("backend", "auto")
+        self.fallback_backends = list(config.get("fallback_backends", []))
+        self.devices = config.get("devices")
+        self.input_source_name = config.get("input_source", "auto")
+        self.profiles = list(config.get("profiles", []))
+    
+    def get_config(self):
+        """
+        获取当前生效的配置
+        
+        返回:
+            dict: 配置字典
+        """
+        return {
+            "response_time": self.response_time,
+            "hot_key": self.hot_key,
+            "left_click": self.left_click,
+            "right_click": self.right_click,
+            "middle_click": self.middle_click,
+            "back_click": self.back_click,
+            "forward_click": self.forward_click,
+            "drag_lock": self.drag_lock,
+            "click_engine": self.click_engine_name,
+            "move_up": self.move_up,
+            "move_down": self.move_down,
+            "move_left": self.move_left,
+            "move_right": self.move_right,
+            "motion": self.motion,
+            "scroll_up": self.scroll_up,
+            "scroll_down": self.scroll_down,
+            "scroll_left": self.scroll_left,
+            "scroll_right": self.scroll_right,
+            "scroll": self.scroll,
+            "typing_guard": self.typing_guard,
+            "auto_off": self.auto_off,
+            "metrics": self.metrics,
+            "realtime": self.realtime,
+            "mode": self.mode,
+            "backend": self.backend,
+            "fallback_backends": self.fallback_backends,
+            "devices": self.devices,
+            "input_source": self.input_source_name,
+            "profiles": self.profiles
+        }
     
     # ============================== 鼠标点击处理 ==============================
-    def on_left_click(self, event):
+    def get_click_keys(self):
+        """
+        获取已配置的点击按键
+        
+        返回:
+            dict: 鼠标按钮名称 -> 对应按键名称（未配置的按钮不包含在内）
+        """
+        keys = {
+            "left": self.left_click,
+            "right": self.right_click,
+            "middle": self.middle_click,
+            "back": self.back_click,
+            "forward": self.forward_click
+        }
+        return {button: key for button, key in keys.items() if key}
+    
+    def get_action_keys(self):
+        """
+        获取触控板模式下绑定的所有动作按键
+        
+        返回:
+            dict: 动作名称（鼠标按钮、"move_"或"scroll_"加方向） -> 对应按键名称
+        """
+        keys = {
+            "move_up": self.move_up,
+            "move_down": self.move_down,
+            "move_left": self.move_left,
+            "move_right": self.move_right,
+            "scroll_up": self.scroll_up,
+            "scroll_down": self.scroll_down,
+            "scroll_left": self.scroll_left,
+            "scroll_right": self.scroll_right
+        }
+        return dict(self.get_click_keys(), **{action: key for action, key in keys.items() if key})
+    
+    def on_action(self, action, event):
         """
-        处理左键点击事件
+        处理动作按键事件，分发给点击、指针移动或滚动
         
         参数:
+            action: 按键对应的动作名称
             event: 键盘事件对象
         """
-        if event.name == LEFT_CLICK:
-            if event.event_type == 'down' and not self.left_click_pressed:
-                self.controller.mouse.press(mouse.Button.left)
-                self.left_click_pressed = True
-            elif event.event_type == 'up':
-                self.controller.mouse.release(mouse.Button.left)
-                self.left_click_pressed = False
-
-    def on_right_click(self, event):
+        start = time.perf_counter()
+        if action.startswith("move_"):
+            self.on_move_key(action[5:], event)
+        elif action.startswith("scroll_"):
+            self.on_scroll_key(action[7:], event)
+        else:
+            self.on_click(action, event)
+        ACTION_SECONDS.observe(time.perf_counter() - start)
+    
+    def on_move_key(self, direction, event):
         """
-        处理右键点击事件
+        处理指针移动按键事件：按住期间由移动引擎在节拍线程中持续移动指针
         
         参数:
+            direction: 移动方向（up、down、left、right）
             event: 键盘事件对象
         """
-        if event.name == RIGHT_CLICK:
-            if event.event_type == 'down' and not self.right_click_pressed:
-                self.controller.mouse.press(mouse.Button.right)
-                self.right_click_pressed = True
-            elif event.event_type == 'up':
-                self.controller.mouse.release(mouse.Button.right)
-                self.right_click_pressed = False
-
+        engine = self._get_motion_engine()
+        if event.event_type == 'down':
+            engine.key_down(direction)
+        elif event.event_type == 'up':
+            engine.key_up(direction)
+    
+    def _get_motion_engine(self):
+        """
+        获取指针移动引擎，首次使用时创建
+        
+        返回:
+            MotionEngine: 移动引擎实例
+        """
+        if self.motion_engine is None:
+            from motion_engine import MotionEngine
+            self.motion_engine = MotionEngine(self._get_click_engine(), self._get_tick_scheduler(), self.motion)
+        return self.motion_engine
+    
+    def on_scroll_key(self, direction, event):
+        """
+        处理滚动按键事件：按住期间平滑滚动，松开后按惯性减速停止
+        
+        参数:
+            direction: 滚动方向（up、down、left、right）
+            event: 键盘事件对象
+        """
+        engine = self._get_scroll_engine()
+        if event.event_type == 'down':
+            engine.key_down(direction)
+        elif event.event_type == 'up':
+            engine.key_up(direction)
+    
+    def _get_scroll_engine(self):
+        """
+        获取平滑滚动引擎，首次使用时创建
+        
+        返回:
+            ScrollEngine: 滚动引擎实例
+        """
+        if self.scroll_engine is None:
+            from scroll_engine import ScrollEngine
+            self.scroll_engine = ScrollEngine(self._get_click_engine(), self._get_tick_scheduler(), self.scroll)
+        return self.scroll_engine
+    
+    def _get_tick_scheduler(self):
+        """
+        获取指针移动和滚动共用的节拍线程，首次使用时创建（线程在首次按下方向键时启动）
+        
+        返回:
+            TickScheduler: 节拍线程实例
+        """
+        if self.tick_scheduler is None:
+            from tick_scheduler import TickScheduler
+            self.tick_scheduler = TickScheduler(self.motion.get("rate", 500), name="pointer-ticks")
+        return self.tick_scheduler
+    
+    def on_click(self, button, event):
+        """
+        处理点击按键事件
+        
+        拖动锁定开启时，左键点击按键按下一次后左键保持按下，再次按下时才释放
+        
+        参数:
+            button: 按键对应的鼠标按钮名称
+            event: 键盘事件对象
+        """
+        engine = self._get_click_engine()
+        if event.event_type == 'down':
+            # 忽略按住按键时的自动重复
+            if button in self.click_keys_down:
+                return
+            self.click_keys_down.add(button)
+            if button in self.locked_buttons:
+                self.locked_buttons.discard(button)
+                engine.release(button)
+                return
+            engine.press(button)
+            if self.drag_lock and button == "left":
+                self.locked_buttons.add(button)
+                logger.info("左键已锁定，再次按下左键点击按键释放")
+        elif event.event_type == 'up':
+            self.click_keys_down.discard(button)
+            if button not in self.locked_buttons:
+                engine.release(button)
+    
+    def _get_click_engine(self):
+        """
+        获取鼠标点击引擎，首次使用时创建
+        
+        返回:
+            ClickEngine: 点击引擎实例
+        """
+        if self.click_engine is None:
+            from click_engine import create_click_engine
+            self.click_engine = create_click_engine(self.click_engine_name, self.controller)
+            logger.info(f"鼠标点击引擎: {self.click_engine.name}")
+        return self.click_engine
+    
+    def _release_buttons(self):
+        """释放所有按下中和拖动锁定中的鼠标按钮，并停止指针移动和滚动"""
+        self.click_keys_down.clear()
+        self.locked_buttons.clear()
+        if self.motion_engine is not None:
+            self.motion_engine.release_all()
+        if self.scroll_engine is not None:
+            self.scroll_engine.release_all()
+        if self.click_engine is not None:
+            self.click_engine.release_all()
+    
+    # ============================== 打字防误触 ==============================
+    def _update_typing_watch(self):
+        """
+        按触控板状态和配置开始或停止监视打字（调用方需持有锁）
+        
+        仅在切换模式下触控板激活期间监视，长按模式下用户按住热键时不会打字
+        """
+        should_watch = self.touchpad_active and self.mode == 1 and self.typing_guard.get("enabled", False)
+        if should_watch and not self.typing_watched:
+            engine = self._get_typing_guard_engine()
+            self.typing_watched = self.input_source.watch_typing(engine.on_keystroke)
+            if not self.typing_watched:
+                logger.warning(f"{self.input_source.name}输入源不支持打字防误触")
+        elif not should_watch and self.typing_watched:
+            self.input_source.unwatch_typing()
+            self.typing_watched = False
+            self.typing_guard_engine.cancel()
+    
+    def _get_typing_guard_engine(self):
+        """
+        获取打字防误触，首次使用时创建
+        
+        返回:
+            TypingGuard: 打字防误触实例
+        """
+        if self.typing_guard_engine is None:
+            from typing_guard import TypingGuard
+            self.typing_guard_engine = TypingGuard(self._suspend_for_typing, self.typing_guard)
+        return self.typing_guard_engine
+    
+    def _suspend_for_typing(self, suspend):
+        """
+        打字时暂停触控板、停止打字后恢复（在打字防误触的工作线程中调用）
+        
+        只切换设备，不改变触控板模式状态、按键绑定和指示器；
+        状态未变化或触控板已关闭时直接跳过，不调用控制器
+        
+        参数:
+            suspend: True暂停，False恢复
+        """
+        with self.lock:
+            if self.shutting_down:
+                return
+            if suspend == self.typing_suspended or (suspend and not self.touchpad_active):
+                self.typing_skips += 1
+                return
+            self.typing_suspended = suspend
+            if not self.controller.toggle(not suspend):
+                self.toggle_failures += 1
+            self.typing_toggles += 1
+            TYPING_TOGGLES.inc()
+            logger.debug(f"打字{'暂停' if suspend else '恢复'}触控板")
+    
+    # ============================== 空闲自动关闭 ==============================
+    def _update_auto_off(self):
+        """
+        按触控板状态和配置开始或停止空闲计时（调用方需持有锁）
+        
+        仅在切换模式下触控板激活期间计时，每次激活或配置变化时从头计时
+        """
+        if self.touchpad_active and self.mode == 1 and self.auto_off > 0:
+            watcher = self._get_idle_watcher()
+            if watcher is not None:
+                self.idle_generation = watcher.arm(self.auto_off)
+        elif self.idle_generation is not None:
+            self.idle_generation = None
+            self.idle_watcher.disarm()
+    
+    def _get_idle_watcher(self):
+        """
+        获取触控板空闲检测，首次使用时创建
+        
+        返回:
+            IdleWatcher: 空闲检测实例，当前平台不支持时为None
+        """
+        if self.idle_watcher is None:
+            from idle_watcher import IdleWatcher, is_supported
+            if not is_supported():
+                logger.warning("当前平台不支持检测触控板空闲，自动关闭不会生效")
+                return None
+            self.idle_watcher = IdleWatcher(self._on_touchpad_idle, self.devices or [{"type": "touchpad"}])
+        return self.idle_watcher
+    
+    def _on_touchpad_idle(self, generation):
+        """
+        触控板空闲回调（在空闲检测线程中运行）：交给主循环关闭触控板
+        
+        参数:
+            generation: 到期的计时编号
+        """
+        self.command_queue.put(('touchpad_idle', generation))
+    
+    def _auto_off(self, generation):
+        """
+        空闲超时后自动关闭触控板，计时已被重新开始或取消时忽略
+        
+        参数:
+            generation: 到期的计时编号
+        """
+        with self.lock:
+            if generation != self.idle_generation or not self.touchpad_active:
+                return
+            self.idle_generation = None
+            AUTO_OFF.inc()
+            logger.info(f"触控板{self.auto_off}秒未使用，自动禁用")
+            self._set_touchpad_active(False)
+    
+    def _bind_action_keys(self):
+        """绑定鼠标点击和指针移动等动作按键"""
+        if self.action_keys_bound:
+            return
+        action_keys = self.get_action_keys()
+        self.input_source.bind_actions(action_keys, self.on_action)
+        self.action_keys_bound = True
+        logger.info(f"{','.join(action_keys.values())}绑定")
+    
+    def _unbind_action_keys(self):
+        """解绑动作按键，并释放仍处于按下状态的鼠标按钮"""
+        if not self.action_keys_bound:
+            return
+        try:
+            self.input_source.unbind_actions()
+        except Exception as e:
+            logger.error(f"解绑按键失败: {e}或者按键未绑定")
+        self._release_buttons()
+        self.action_keys_bound = False
+        logger.info(f"{','.join(self.get_action_keys().values())}解绑")
+    
     # ============================== 触控板模式控制 ==============================
+    def set_active(self, active):
+        """
+        直接设置触控板状态，供API和外部控制使用
+        
+        参数:
+            active (bool): True启用触控板，False禁用触控板
+        """
+        with self.lock:
+            if active != self.touchpad_active:
+                self._set_touchpad_active(active)
+    
+    def toggle_active(self):
+        """在同一次加锁中读取并翻转触控板状态，供外部控制使用"""
+        with self.lock:
+            self._set_touchpad_active(not self.touchpad_active)
+    
+    def _set_touchpad_active(self, active, off_indicator_duration=1.1):
+        """
+        切换触控板状态并同步按键绑定、指示器和托盘图标（调用方需持有锁），退出过程中忽略
+        
+        参数:
+            active (bool): 目标状态
+            off_indicator_duration: 关闭时off图标的显示时间（秒）
+        """
+        if self.shutting_down:
+            return
+        self.touchpad_active = active
+        self.typing_suspended = False
+        toggle_start = time.perf_counter()
+        if self.controller.toggle(active):
+            TOGGLES_OK.inc()
+        else:
+            self.toggle_failures += 1
+            TOGGLES_FAILED.inc()
+        self.last_toggle_latency = time.perf_counter() - toggle_start
+        TOGGLE_SECONDS.observe(self.last_toggle_latency)
+        self.toggle_count += 1
+        
+        if active:
+            # 触控板激活后一直显示
+            self._show_indicator("on")
+            self._bind_action_keys()
+            logger.info("触控板启用")
+        else:
+            # 触控板关闭时显示off图标，然后自动隐藏
+            self._show_indicator("off", off_indicator_duration)
+            self._unbind_action_keys()
+            logger.info("触控板禁用")
+        self._update_typing_watch()
+        self._update_auto_off()
+        
+        # 更新系统托盘图标
+        self._update_tray_status()
+    
+    def toggle_mode(self):
+        """在长按模式和切换模式之间切换，并持久化到配置文件"""
+        with self.lock:
+            self.mode = 1 if self.mode == 0 else 0
+            # 更新配置文件
+            if self.config_manager is not None and self.config_manager.update_config("mode", self.mode):
+                logger.info(f"模式已切换为: {'切换模式' if self.mode == 1 else '长按模式'}")
+            # 如果切换到长按模式且触控板处于激活状态，则关闭触控板
+            if self.mode == 0 and self.touchpad_active:
+                self._set_touchpad_active(False, off_indicator_duration=2.0)
+    
+    def reload_config(self):
+        """
+        从配置文件重新加载配置并应用
+        
+        返回:
+            bool: 是否成功
+        """
+        if self.config_manager is None:
+            logger.warning("未提供设置管理器，无法重新加载配置")
+            return False
+        
+        success, config = self.config_manager.reload_config()
+        if success:
+            self._apply_new_config(config)
+            logger.info("配置已重新加载并应用")
+        else:
+            logger.error("重新加载配置失败")
+        return success
+    
+    def get_state(self):
+        """
+        获取当前运行状态
+        
+        返回:
+            dict: 触控板状态、模式和按键配置
+        """
+        return {
+            "active": self.touchpad_active,
+            "mode": self.mode,
+            "hot_key": self.hot_key,
+            "left_click": self.left_click,
+            "right_click": self.right_click
+        }
+    
+    def get_stats(self):
+        """
+        获取运行统计信息
+        
+        返回:
+            dict: 切换次数、失败次数、最近切换耗时、运行时长、所选后端和熔断器状态及各设备最近一次切换结果等
+        """
+        from gc_tuning import get_stats as gc_stats
+        
+        latency = self.last_toggle_latency
+        return {
+            "active": self.touchpad_active,
+            "toggles": self.toggle_count,
+            "toggle_failures": self.toggle_failures,
+            "last_toggle_ms": round(latency * 1000, 3) if latency is not None else None,
+            "uptime": round(time.perf_counter() - self.created_at, 1),
+            "queue_depth": self.command_queue.qsize(),
+            "gui": self.gui,
+            "backend": getattr(self.controller, "backend_name", None),
+            "backend_probe": getattr(self.controller, "probe_report", None),
+            "breakers": self.controller.get_breaker_states() if hasattr(self.controller, "get_breaker_states") else {},
+            "devices": self.controller.get_device_results() if hasattr(self.controller, "get_device_results") else {},
+            "input": self.input_source.get_stats() if self.input_source is not None else None,
+            "clicks": self.click_engine.get_stats() if self.click_engine is not None else None,
+            "motion": self.motion_engine.get_stats() if self.motion_engine is not None else None,
+            "scroll": self.scroll_engine.get_stats() if self.scroll_engine is not None else None,
+            "ticks": self.tick_scheduler.get_stats() if self.tick_scheduler is not None else None,
+            "typing_guard": self._get_typing_guard_stats(),
+            "idle": self.idle_watcher.get_stats() if self.idle_watcher is not None else None,
+            "metrics": self.metrics_exporter.get_stats() if self.metrics_exporter is not None else None,
+            "profile": self.active_profile.name if self.active_profile is not None else None,
+            "focus": self.focus_watcher.get_stats() if self.focus_watcher is not None else None,
+            "gc": gc_stats(),
+            "realtime": realtime.get_stats(),
+            "supervisor": supervisor.get_stats()
+        }
+    
+    def _get_typing_guard_stats(self):
+        """
+        获取打字防误触统计信息
+        
+        返回:
+            dict: 按键数、暂停次数和实际切换/跳过次数，未启用过时为None
+        """
+        if self.typing_guard_engine is None:
+            return None
+        return dict(self.typing_guard_engine.get_stats(), watching=self.typing_watched,
+                    toggles=self.typing_toggles, skips=self.typing_skips)
+    
     def handle_long_press(self):
         """处理热键长按事件 - 根据模式激活或切换触控板状态"""
         with self.lock:
             # 避免热键重复触发
-            self.hotkey_down = keyboard.on_press_key(HOT_KEY, lambda e: None, suppress=True)
+            self.input_source.hold_hot_key()
             
-            # 判断是否满足长按条件
-            if time.time() - self.hotkey_pressed_time >= RESPONSE_TIME and self.hotkey_is_pressed:
+            # 判断是否满足长按条件：与定时器使用同一单调时钟，不受系统时间调整和time.time()精度影响
+            if time.monotonic_ns() - self.hotkey_pressed_time >= self.response_time * 1e9 and self.hotkey_is_pressed:
                 self.long_press_triggered = True
                 
                 # 根据不同模式处理触控板状态
-                if MODE == 1:  # 切换模式
-                    self.touchpad_active = not self.touchpad_active
-                    self.controller.toggle(self.touchpad_active)
-                    
-                    # 根据状态显示不同的鼠标指示器
-                    if self.touchpad_active:
-                        # 触控板激活后一直显示
-                        self.cursor_indicator.start("on")
-                    else:
-                        # 触控板关闭时显示off图标，然后自动隐藏
-                        self.cursor_indicator.start("off", 1.1)
+                if self.mode == 1:  # 切换模式
+                    self._set_touchpad_active(not self.touchpad_active)
                 else:  # 长按模式
-                    self.touchpad_active = True
-                    self.controller.toggle(True)  # 启用触控板
-                    
-                    # 显示on图标
-                    self.cursor_indicator.start("on")
-                
-                # 更新系统托盘图标
-                self.tray_manager.update_touchpad_status(self.touchpad_active)
+                    self._set_touchpad_active(True)
                 
-                keyboard.release(HOT_KEY)  # 释放热键，防止粘滞
-                
-                # 根据触控板状态设置按键绑定
-                if self.touchpad_active:
-                    # 绑定鼠标点击热键
-                    keyboard.hook_key(LEFT_CLICK, self.on_left_click, suppress=True)
-                    keyboard.hook_key(RIGHT_CLICK, self.on_right_click, suppress=True)
-                    logger.info(f"触控板启用，{LEFT_CLICK},{RIGHT_CLICK}绑定")
-                else:
-                    logger.info(f"触控板禁用，{LEFT_CLICK},{RIGHT_CLICK}解绑")
-
+                self.input_source.release_key(self.hot_key)  # 释放热键，防止粘滞
+    
+    def _get_long_press_timer(self):
+        """
+        获取长按检测定时器，首次使用时创建
+        
+        返回:
+            DeadlineTimer: 常驻定时线程，每次按下热键不再新建线程
+        """
+        if self.long_press_timer is None:
+            from deadline_timer import DeadlineTimer
+            self.long_press_timer = DeadlineTimer(self.handle_long_press, name="long-press")
+            realtime.register("actuator", self.long_press_timer.thread)
+        return self.long_press_timer
+    
     def on_key_event(self, event):
         """
-        处理键盘事件，根据热键的按下和释放事件控制触控板模式
+        处理键盘事件，根据热键的按下和释放事件控制触控板模式，并记录回调耗时
         
         参数:
             event: 键盘事件对象
-            
+        
         返回:
             False: 阻止事件传递到系统
             None: 允许事件传递到系统
         """
-        logger.debug(f"按键事件: {event.name} {event.event_type}")
+        start = time.perf_counter()
+        try:
+            return self._handle_key_event(event)
+        finally:
+            HOT_KEY_SECONDS.observe(time.perf_counter() - start)
+    
+    def _handle_key_event(self, event):
+        """
+        处理热键的按下和释放事件，返回值同on_key_event
+        
+        参数:
+            event: 键盘事件对象
+        """
+        # 每个热键事件都会经过这里，日志参数延迟格式化，未开启调试日志时不创建字符串
+        logger.debug("按键事件: %s %s", event.name, event.event_type)
         
-        try:            
+        try:
             # 仅处理热键相关事件
-            if event.name == HOT_KEY:
+            if event.name == self.hot_key:
                 # 处理模拟按键期间的热键事件
                 if self.is_simulating:
                     if event.event_type == 'down':
@@ -175,7 +720,7 @@ class TouchpadController:
                     if event.event_type == 'up':
                         self.is_simulating = False
                         # 重新注册热键拦截
-                        self.press_hotkey = keyboard.add_hotkey(HOT_KEY, lambda: None, suppress=True)
+                        self.input_source.restore_hot_key()
                         return False
                 
                 # 处理热键按下事件
@@ -184,100 +729,58 @@ class TouchpadController:
                         # 防止重复触发
                         if self.hotkey_is_pressed:
                             return False
-                            
+                        
                         self.hotkey_is_pressed = True
-                        self.hotkey_pressed_time = time.time()
+                        self.hotkey_pressed_time = time.monotonic_ns()
                         
-                        # 设置长按检测定时器
-                        if self.long_press_timer:
-                            self.long_press_timer.cancel()
-                        self.long_press_timer = threading.Timer(
-                            RESPONSE_TIME,
-                            self.handle_long_press
-                        )
-                        self.long_press_timer.start()
+                        # 设置长按检测定时器，从按下时刻起计时
+                        self._get_long_press_timer().schedule(
+                            self.hotkey_pressed_time + int(self.response_time * 1e9))
                     
                     # 阻止热键传递到系统
                     return False
-
+                
                 # 处理热键释放事件
                 elif event.event_type == 'up':
-                    logger.info("热键释放")               
+                    logger.info("热键释放")
                     with self.lock:
                         self.hotkey_is_pressed = False
                         
                         # 取消长按定时器
-                        if self.long_press_timer:
+                        if self.long_press_timer is not None:
                             self.long_press_timer.cancel()
-                            self.long_press_timer = None
-
+                        
                         if self.long_press_triggered:
                             # 长按模式：释放热键后关闭触控板
-                            if MODE == 0:
-                                self.controller.toggle(False)
-                                # 解绑键盘钩子
-                                try:
-                                    keyboard.unhook(self.on_left_click)
-                                    keyboard.unhook(self.on_right_click)
-                                except Exception as e:
-                                    logger.error(f"解绑按键失败: {e}或者按键未绑定")
-                                self.touchpad_active = False
-                                
-                                # 显示off图标，然后自动隐藏
-                                self.cursor_indicator.start("off", 1.1)
-                                
-                                # 更新系统托盘图标
-                                self.tray_manager.update_touchpad_status(self.touchpad_active)
-                                logger.info(f"触控板禁用，{LEFT_CLICK},{RIGHT_CLICK}解绑")
-                                
+                            if self.mode == 0:
+                                self._set_touchpad_active(False)
+                            
                             # 无论哪种模式，都需要清理状态
                             self.long_press_triggered = False
-                            keyboard.unhook(self.hotkey_down)
+                            self.input_source.unhold_hot_key()
                         else:
-                            # 短按：传递原始热键到系统
-                            self.is_simulating = True
-                            try:
-                                if self.press_hotkey:
-                                    keyboard.remove_hotkey(self.press_hotkey)
-                            except KeyError:
-                                pass
-                            pyautogui.press(HOT_KEY)
-
+                            # 短按：传递原始热键到系统（输入源未拦截热键时无需模拟）
+                            self.is_simulating = self.input_source.replay_hot_key()
+                    
                     # 长按模式下阻止事件传递
                     return False if self.long_press_triggered else None
-                
+            
             # 在触控板模式下阻止所有热键按下事件
-            if event.name == HOT_KEY and event.event_type == 'down' and self.touchpad_active:
+            if event.name == self.hot_key and event.event_type == 'down' and self.touchpad_active:
                 return False
-
+        
         except Exception as e:
             logger.error(f"事件处理错误: {e}")
-            self.should_exit = True
-            
+            self.request_exit()
+        
         return None
-
+    
     # ============================== 主程序运行 ==============================
     def run(self):
-        """启动事件处理服务，包括键盘钩子和系统托盘"""
+        """启动事件处理服务并阻塞运行主循环，退出时清理所有资源"""
         try:
-            # 注册键盘钩子
-            keyboard.hook(self.on_key_event)
-            # 确保热键被拦截，不会传递到系统
-            self.press_hotkey = keyboard.add_hotkey(HOT_KEY, lambda: None, suppress=True)
-            logger.info(f"betterTouchpad服务已启动 [热键:{HOT_KEY}, 左键:{LEFT_CLICK}, 右键:{RIGHT_CLICK}, 模式:{MODE}]")
-            
-            # 启动系统托盘图标
-            self.tray_manager.start()
-            logger.info("系统托盘图标已启动")
-            
-            # 显示首次启动提示图标并自动隐藏
-            self.cursor_indicator.start("default", 0.7)
-            
-            # 主循环 - 处理队列中的命令
-            while not self.should_exit:
-                time.sleep(0.1)
-                self._process_command_queue()
-
+            self.start()
+            self.serve()
         except KeyboardInterrupt:
             logger.info("用户中断，退出...")
         except Exception as e:
@@ -287,12 +790,304 @@ class TouchpadController:
             self._cleanup_resources()
             logger.info("服务已停止")
     
+    def start(self):
+        """注册键盘钩子，并按需在后台加载图形界面组件"""
+        self.shutting_down = False
+        # 先设置实时调度参数，输入线程启动时即按此登记
+        realtime.configure(self.realtime)
+        # 优先注册键盘钩子，图形界面组件随后在后台加载
+        self.register_hooks()
+        # 提前创建点击引擎：uinput虚拟设备需要一点时间被桌面环境识别
+        self._get_click_engine()
+        if self.control_server is not None:
+            self.start_control_server()
+        if self.config_manager is not None:
+            self.start_config_watcher()
+        if self.profile_table is not None:
+            self.start_focus_watcher()
+        if self.metrics.get("textfile") or self.metrics.get("http_port"):
+            self.start_metrics_exporter()
+        if self.gui:
+            self.start_gui_components()
+        else:
+            self._freeze_long_lived()
+    
+    def start_config_watcher(self):
+        """监视配置文件变化并自动重新加载（仅Linux）"""
+        from config_watcher import ConfigWatcher, is_supported
+        if not is_supported():
+            logger.info("当前平台不支持inotify，请通过托盘菜单刷新配置")
+            return
+        try:
+            self.config_watcher = ConfigWatcher(self.config_manager.config_path, self._on_config_file_changed)
+            self.config_watcher.start()
+        except Exception as e:
+            logger.error(f"启动配置文件监视失败: {e}")
+            self.config_watcher = None
+    
+    def _on_config_file_changed(self):
+        """配置文件变化回调（在监视线程中运行）：解析校验后交给主循环应用"""
+        # 忽略本程序保存配置引起的文件变化
+        if self.config_manager.is_own_write():
+            return
+        success, config = self.config_manager.reload_config()
+        if success:
+            self.command_queue.put(('config_changed', config))
+        else:
+            logger.warning("配置文件无效，继续使用当前配置")
+    
+    def start_metrics_exporter(self):
+        """登记进程级仪表并按配置导出运行指标（Prometheus文本文件或回环HTTP）"""
+        from process_stats import get_rss_bytes
+        metrics.gauge("touchpad_active", "触控板是否激活", lambda: int(self.touchpad_active))
+        metrics.gauge("queue_depth", "命令队列中等待处理的命令数", self.command_queue.qsize)
+        metrics.gauge("rss_bytes", "进程常驻内存（字节）", get_rss_bytes)
+        metrics.gauge("uptime_seconds", "运行时长（秒）", lambda: round(time.perf_counter() - self.created_at, 1))
+        try:
+            self.metrics_exporter = metrics.MetricsExporter(self.metrics)
+            self.metrics_exporter.start()
+        except Exception as e:
+            logger.error(f"启动指标导出失败: {e}")
+            self.metrics_exporter = None
+    
+    def start_focus_watcher(self):
+        """跟踪焦点窗口，按应用切换配置方案（仅X11）"""
+        from focus_watcher import FocusWatcher, is_supported
+        if not is_supported():
+            logger.warning("无法跟踪焦点窗口（需要X11和python-xlib），应用配置方案不会生效")
+            return
+        try:
+            self.focus_watcher = FocusWatcher(self._on_focus_changed)
+            self.focus_watcher.start()
+        except Exception as e:
+            logger.error(f"启动焦点窗口监视失败: {e}")
+            self.focus_watcher = None
+    
+    def _on_focus_changed(self, wm_class):
+        """
+        焦点窗口变化回调（在监视线程中运行）：交给主循环切换方案
+        
+        参数:
+            wm_class: 焦点窗口的(instance, class)，未知时为None
+        """
+        self.command_queue.put(('focus_changed', wm_class))
+    
+    def start_control_server(self):
+        """启动本地控制服务"""
+        try:
+            self.control_server.start(self)
+        except Exception as e:
+            logger.error(f"启动控制服务失败: {e}")
+            self.control_server = None
+    
+    def serve(self):
+        """主循环 - 阻塞等待并处理队列中的命令，直到收到退出请求，空闲时不唤醒"""
+        while not self.should_exit:
+            self._process_command_queue(timeout=COMMAND_WAIT_TIMEOUT)
+    
+    def request_exit(self):
+        """请求主循环退出（可从任意线程调用），放入一条退出命令唤醒阻塞中的主循环"""
+        self.should_exit = True
+        self.command_queue.put(('exit', None))
+    
+    def register_hooks(self):
+        """
+        注册键盘钩子和热键拦截
+        
+        返回:
+            float: 从控制器创建到钩子注册完成的耗时（秒）
+        """
+        from input_source import create_input_source
+        self.input_source = create_input_source(self.input_source_name,
+                                                [self.hot_key] + list(self.get_action_keys().values()))
+        if self.config_manager is not None:
+            self.config_manager.set_input_source(self.input_source)
+        
+        # 配置文件中的热键当前输入源无法识别时（如keyboard库不支持鼠标按钮）改用默认热键，避免启动失败
+        from triggers import validate_trigger
+        errors = validate_trigger(self.hot_key, self.input_source.resolve_key)
+        if errors:
+            from setting import DEFAULT_CONFIG
+            logger.error(f"{self.input_source.name}输入源无法使用热键{self.hot_key!r}（{'; '.join(errors)}），"
+                         f"本次改用默认热键{DEFAULT_CONFIG['hot_key']!r}")
+            self.hot_key = DEFAULT_CONFIG["hot_key"]
+
+        # 注册键盘钩子，并确保热键被拦截，不会传递到系统
+        self.input_source.start(self.on_key_event, self.hot_key)
+        
+        elapsed = time.perf_counter() - self.created_at
+        logger.info(f"betterTouchpad服务已启动 [热键:{self.hot_key}, 左键:{self.left_click}, 右键:{self.right_click}, 模式:{self.mode}, 输入:{self.input_source.name}]")
+        logger.info(f"键盘钩子注册完成，耗时 {elapsed * 1000:.1f}ms")
+        return elapsed
+    
+    def start_gui_components(self):
+        """在后台线程中加载系统托盘、鼠标指示器等图形界面组件"""
+        self.gui_thread = supervisor.spawn(self._load_gui_components, "gui-loader")
+    
+    def _load_gui_components(self):
+        """导入并启动图形界面组件（在后台线程中运行）"""
+        try:
+            from system_tray import SystemTrayController
+            from cursor_indicator import CursorIndicator
+            
+            # 启动系统托盘图标
+            tray_manager = SystemTrayController(self.controller, self.command_queue)
+            tray_manager.start()
+            self.tray_manager = tray_manager
+            self._update_tray_status()
+            logger.info("系统托盘图标已启动")
+            
+            # 预热鼠标指示器，避免首次激活触控板时的初始化延迟
+            cursor_indicator = CursorIndicator(self.command_queue)
+            cursor_indicator.warm_up()
+            self.cursor_indicator = cursor_indicator
+            
+            # 显示首次启动提示图标并自动隐藏
+            cursor_indicator.start("default", 0.7)
+            
+            # 在后台预先构建设置窗口（仅Windows托盘提供设置入口）
+            if platform.system() == 'Windows' and self.config_manager is not None:
+                self.config_manager.prepare_settings_window()
+            
+            # 预加载短按转发和鼠标点击所需的模块
+            import pyautogui  # noqa: F401
+            from pynput import mouse  # noqa: F401
+            
+            logger.info(f"图形界面组件加载完成，耗时 {(time.perf_counter() - self.created_at) * 1000:.1f}ms")
+        except Exception as e:
+            logger.error(f"加载图形界面组件失败: {e}")
+        self._freeze_long_lived()
+    
+    def _freeze_long_lived(self):
+        """启动完成后冻结长期对象并调整垃圾回收阈值，减少按键回调等待完整回收的停顿"""
+        try:
+            from gc_tuning import freeze_long_lived
+            result = freeze_long_lived()
+            if result is not None:
+                logger.info(f"已冻结 {result['frozen']} 个启动对象，耗时 {result['seconds'] * 1000:.1f}ms")
+        except Exception as e:
+            logger.error(f"调整垃圾回收失败: {e}")
+    
+    def _show_indicator(self, icon_type, auto_hide_duration=None):
+        """
+        显示鼠标指示器（指示器尚未加载时忽略）
+        
+        参数:
+            icon_type: 图标类型 ("default", "on", 或 "off")
+            auto_hide_duration: 自动隐藏前的显示时间（秒）
+        """
+        if self.cursor_indicator is not None:
+            self.cursor_indicator.start(icon_type, auto_hide_duration)
+    
+    def _update_tray_status(self):
+        """同步系统托盘图标的触控板状态（托盘尚未加载时忽略）"""
+        if self.tray_manager is not None:
+            self.tray_manager.update_touchpad_status(self.touchpad_active)
+    
     def _cleanup_resources(self):
-        """清理所有资源，包括控制器、键盘钩子和系统托盘"""
-        self._cleanup_controller()
-        self._cleanup_keyboard_hook()
-        self._cleanup_tray_manager()
-        self._cleanup_cursor_indicator()
+        """
+        清理所有资源，包括控制器、键盘钩子和系统托盘
+        
+        先恢复触控板，再分阶段停止各组件：同一阶段的组件互不依赖，并行停止，
+        每个组件有各自的期限，卡住的组件（如托盘、指示器的图形界面线程）不会拖住退出
+        """
+        deadline = supervisor.SHUTDOWN_DEADLINE
+        report = supervisor.shutdown([
+            # 最先恢复触控板：之后的组件停止超时或进程被强制结束，触控板也不会保持禁用
+            [("touchpad", self._restore_touchpad, RESTORE_DEADLINE)],
+            # 停止产生按键、命令和切换请求的组件
+            [("keyboard_hook", self._cleanup_keyboard_hook, deadline),
+             ("long_press_timer", self._cleanup_long_press_timer, deadline),
+             ("control_server", self._cleanup_control_server, deadline),
+             ("config_watcher", self._cleanup_config_watcher, deadline),
+             ("focus_watcher", self._cleanup_focus_watcher, deadline),
+             ("typing_guard", self._cleanup_typing_guard, deadline),
+             ("idle_watcher", self._cleanup_idle_watcher, deadline)],
+            # 停止执行线程和图形界面，写入配置和最终指标
+            [("tick_scheduler", self._cleanup_tick_scheduler, deadline),
+             ("click_engine", self._cleanup_click_engine, deadline),
+             ("tray", self._cleanup_tray_manager, deadline),
+             ("cursor_indicator", self._cleanup_cursor_indicator, deadline),
+             ("metrics_exporter", self._cleanup_metrics_exporter, deadline),
+             ("settings", self._cleanup_settings_manager, SETTINGS_DEADLINE),
+             ("settings_window", self._cleanup_settings_window, deadline)],
+            # 最后清理控制器（后端和熔断检查线程）
+            [("controller", self._cleanup_controller, deadline)]
+        ])
+        timeouts = [name for name, step in report["steps"].items() if step["result"] == "timeout"]
+        if timeouts:
+            logger.warning(f"资源清理耗时 {report['seconds'] * 1000:.1f}ms，超过期限未完成: {', '.join(timeouts)}")
+        else:
+            logger.info(f"资源清理完成，耗时 {report['seconds'] * 1000:.1f}ms")
+    
+    def _restore_touchpad(self):
+        """退出时停止切换并重新启用触控板（本次运行未切换过设备时保持原状）"""
+        with self.lock:
+            self.shutting_down = True
+            if self.long_press_timer is not None:
+                self.long_press_timer.cancel()
+            if not (self.toggle_count or self.typing_toggles):
+                return
+            self.typing_suspended = False
+            if self.controller.toggle(True):
+                logger.info("已恢复触控板")
+            else:
+                self.toggle_failures += 1
+                logger.error("恢复触控板失败")
+    
+    def _cleanup_focus_watcher(self):
+        """停止焦点窗口监视"""
+        if self.focus_watcher is not None:
+            try:
+                self.focus_watcher.stop()
+            except Exception as e:
+                logger.exception(f"停止焦点窗口监视失败: {e}", exc_info=True)
+            self.focus_watcher = None
+    
+    def _cleanup_typing_guard(self):
+        """停止打字防误触，暂停中的触控板先恢复"""
+        if self.typing_guard_engine is not None:
+            try:
+                self.typing_guard_engine.stop()
+            except Exception as e:
+                logger.exception(f"停止打字防误触失败: {e}", exc_info=True)
+            self.typing_guard_engine = None
+    
+    def _cleanup_idle_watcher(self):
+        """停止触控板空闲检测"""
+        if self.idle_watcher is not None:
+            try:
+                self.idle_watcher.stop()
+            except Exception as e:
+                logger.exception(f"停止触控板空闲检测失败: {e}", exc_info=True)
+            self.idle_watcher = None
+    
+    def _cleanup_metrics_exporter(self):
+        """停止运行指标导出，文本文件写入最终值"""
+        if self.metrics_exporter is not None:
+            try:
+                self.metrics_exporter.stop()
+            except Exception as e:
+                logger.exception(f"停止指标导出失败: {e}", exc_info=True)
+            self.metrics_exporter = None
+    
+    def _cleanup_config_watcher(self):
+        """停止配置文件监视"""
+        if self.config_watcher is not None:
+            try:
+                self.config_watcher.stop()
+            except Exception as e:
+                logger.exception(f"停止配置文件监视失败: {e}", exc_info=True)
+            self.config_watcher = None
+    
+    def _cleanup_control_server(self):
+        """停止本地控制服务"""
+        if self.control_server is not None:
+            try:
+                self.control_server.stop()
+            except Exception as e:
+                logger.exception(f"停止控制服务失败: {e}", exc_info=True)
+            self.control_server = None
     
     def _cleanup_controller(self):
         """清理控制器资源"""
@@ -303,12 +1098,47 @@ class TouchpadController:
                 logger.exception(f"清理控制器失败: {e}", exc_info=True)
     
     def _cleanup_keyboard_hook(self):
-        """卸载所有键盘钩子"""
+        """停止键盘输入源，卸载所有键盘钩子"""
+        if self.input_source is None:
+            return
         try:
-            keyboard.unhook_all()
+            self.input_source.stop()
         except Exception as e:
             logger.exception(f"卸载钩子失败: {e}", exc_info=True)
     
+    def _cleanup_tick_scheduler(self):
+        """停止指针移动和滚动并结束节拍线程"""
+        if self.tick_scheduler is None:
+            return
+        try:
+            if self.motion_engine is not None:
+                self.motion_engine.release_all()
+            if self.scroll_engine is not None:
+                self.scroll_engine.release_all()
+            self.tick_scheduler.stop()
+        except Exception as e:
+            logger.exception(f"停止节拍线程失败: {e}", exc_info=True)
+        self.tick_scheduler = None
+    
+    def _cleanup_long_press_timer(self):
+        """停止长按检测定时线程"""
+        if self.long_press_timer is not None:
+            try:
+                self.long_press_timer.stop()
+            except Exception as e:
+                logger.exception(f"停止长按定时器失败: {e}", exc_info=True)
+            self.long_press_timer = None
+    
+    def _cleanup_click_engine(self):
+        """释放所有鼠标按钮并关闭点击引擎"""
+        if self.click_engine is None:
+            return
+        try:
+            self.click_engine.close()
+        except Exception as e:
+            logger.exception(f"关闭点击引擎失败: {e}", exc_info=True)
+        self.click_engine = None
+    
     def _cleanup_tray_manager(self):
         """停止系统托盘图标"""
         if hasattr(self, 'tray_manager') and self.tray_manager is not None:
@@ -324,18 +1154,39 @@ class TouchpadController:
                 self.cursor_indicator.destroy()
             except Exception as e:
                 logger.exception(f"停止鼠标指示器失败: {e}", exc_info=True)
-
-    def _process_command_queue(self):
-        """处理命令队列中的命令，响应用户操作和状态变更"""
+    
+    def _cleanup_settings_manager(self):
+        """写入尚未保存的配置修改"""
+        if self.config_manager is not None:
+            try:
+                self.config_manager.close()
+            except Exception as e:
+                logger.exception(f"保存配置失败: {e}", exc_info=True)
+    
+    def _cleanup_settings_window(self):
+        """销毁常驻的设置窗口并结束其Tk线程"""
+        if self.config_manager is not None:
+            try:
+                self.config_manager.destroy_settings_window()
+            except Exception as e:
+                logger.exception(f"销毁设置窗口失败: {e}", exc_info=True)
+    
+    def _process_command_queue(self, timeout=0):
+        """
+        处理命令队列中的一条命令，响应用户操作和状态变更
+        
+        参数:
+            timeout: 等待命令的最长时间（秒），0表示不等待，None表示一直等待
+        """
         try:
-            # 非阻塞方式获取命令
-            command, args = self.command_queue.get_nowait()
-            global RESPONSE_TIME, HOT_KEY, LEFT_CLICK, RIGHT_CLICK, MODE
+            command, args = self.command_queue.get(timeout != 0, timeout)
             
             # 处理各种命令
             if command == 'open_settings':
                 # 在主线程中打开设置窗口
-                if not self.settings_window_open:
+                if self.config_manager is None:
+                    logger.warning("未提供设置管理器，无法打开设置窗口")
+                elif not self.settings_window_open:
                     logger.info("准备创建设置窗口")
                     self.settings_window_open = True
                     if self.config_manager.create_settings_window():
@@ -350,82 +1201,56 @@ class TouchpadController:
                 # 设置窗口关闭，无论是否更新配置，确保标志被重置
                 self.settings_window_open = False
                 logger.info("设置窗口关闭事件已处理")
-                
+            
             elif command == 'settings_window_already_open':
                 # ConfigManager 认为窗口已经打开，需要同步状态
                 logger.warning("设置窗口已经在其他地方打开")
                 self.settings_window_open = True
-                
+            
             elif command == 'settings_window_failed':
                 # 窗口创建失败，确保状态重置
                 self.settings_window_open = False
                 logger.warning("设置窗口创建失败")
             
+            elif command == 'cursor_indicator_failed':
+                # 指示器窗口创建失败（如没有图形环境），停用指示器，之后不再尝试显示
+                if self.cursor_indicator is not None:
+                    self.cursor_indicator = None
+                    logger.warning("鼠标指示器不可用，已停用")
+            
             elif command == 'toggle_mode':
                 # 切换模式
-                MODE = 1 if MODE == 0 else 0
-                # 更新配置文件
-                if self.config_manager.update_config("mode", MODE):
-                    logger.info(f"模式已切换为: {'切换模式' if MODE == 1 else '长按模式'}")
-                # 如果切换到长按模式且触控板处于激活状态，则关闭触控板
-                if MODE == 0 and self.touchpad_active:
-                    self.touchpad_active = False
-                    self.controller.toggle(False)
-                    # 显示触控板关闭提示
-                    self.cursor_indicator.stop()
-                    self.cursor_indicator.start("off", 2.0)
-                    # 更新图标状态
-                    self.tray_manager.update_touchpad_status(self.touchpad_active)
-                
+                self.toggle_mode()
+            
             elif command == 'reload_config':
                 # 重新加载配置
-                success, config = self.config_manager.reload_config()
-                if success:
-                    # 更新全局变量
-                    RESPONSE_TIME = config["response_time"]
-                    HOT_KEY = config["hot_key"]
-                    LEFT_CLICK = config["left_click"]
-                    RIGHT_CLICK = config["right_click"]
-                    # MODE已在reload_config中更新
-                    
-                    # 处理热键绑定
-                    self._update_key_bindings()
-                    logger.info("配置已重新加载并应用")
-                else:
-                    logger.error("重新加载配置失败")
+                self.reload_config()
             
             elif command == 'config_updated':
                 # 配置已更新，需要应用
                 if args:
-                    # 更新全局变量
-                    RESPONSE_TIME = args["response_time"]
-                    HOT_KEY = args["hot_key"]
-                    LEFT_CLICK = args["left_click"]
-                    RIGHT_CLICK = args["right_click"]
-                    old_mode = MODE
-                    MODE = args["mode"]
-                    
-                    # 更新热键绑定
-                    self._update_key_bindings()
-                    
-                    # 处理模式变更
-                    if old_mode != MODE and self.touchpad_active:
-                        if MODE == 0:  # 切换到长按模式
-                            self.controller.toggle(False)
-                            self.touchpad_active = False
-                            
-                            # 显示触控板关闭提示
-                            self.cursor_indicator.stop()
-                            self.cursor_indicator.start("off", 2.0)
-                            
-                            self.tray_manager.update_touchpad_status(self.touchpad_active)
-                            logger.info("模式切换为长按模式，触控板已禁用")
-                    
+                    self._apply_new_config(args)
                     logger.info("配置已更新并应用")
-                    
+                
                 # 重置设置窗口状态
                 self.settings_window_open = False
             
+            elif command == 'config_changed':
+                # 配置文件被外部修改，已在监视线程中解析和校验
+                self._apply_new_config(args)
+            
+            elif command == 'focus_changed':
+                # 焦点窗口变化，按WM_CLASS切换应用配置方案
+                self._switch_profile(args)
+            
+            elif command == 'touchpad_idle':
+                # 切换模式下触控板空闲超时
+                self._auto_off(args)
+            
+            elif command == 'set_active':
+                # 外部请求设置触控板状态
+                self.set_active(bool(args))
+            
             elif command == 'exit':
                 # 退出应用
                 logger.info("收到退出命令")
@@ -433,40 +1258,152 @@ class TouchpadController:
             
             # 处理完成后标记任务完成
             self.command_queue.task_done()
-            
+        
         except queue.Empty:
             # 队列为空，不做任何处理
             pass
         except Exception as e:
+            COMMAND_ERRORS.inc()
             logger.error(f"处理命令队列出错: {e}")
     
-    def _update_key_bindings(self):
-        """更新热键绑定，适应配置变更"""
+    def _apply_new_config(self, config):
+        """
+        应用新的配置：重新编译应用配置方案，再应用当前焦点窗口对应的方案
+        
+        参数:
+            config: 新的配置字典
+        """
+        self._compile_profiles(config)
+        if self.active_profile is not None:
+            config = self.active_profile.config
+        self._apply_effective_config(config)
+        if self.profile_table is not None and self.focus_watcher is None and self.input_source is not None:
+            self.start_focus_watcher()
+    
+    def _compile_profiles(self, config):
+        """
+        把配置中的应用配置方案编译为方案表，并查找当前焦点窗口对应的方案
+        
+        参数:
+            config: 配置字典
+        """
+        if config.get("profiles"):
+            from profiles import ProfileTable
+            self.profile_table = ProfileTable(config)
+            self.active_profile = self.profile_table.resolve(self.focus_wm_class)
+        else:
+            self.profile_table = None
+            self.active_profile = None
+    
+    def _switch_profile(self, wm_class):
+        """
+        焦点窗口变化时切换到对应的应用配置方案
+        
+        参数:
+            wm_class: 焦点窗口的(instance, class)，未知时为None
+        """
+        self.focus_wm_class = wm_class
+        if self.profile_table is None:
+            return
+        profile = self.profile_table.resolve(wm_class)
+        if profile is self.active_profile:
+            return
+        self.active_profile = profile
+        logger.info(f"切换应用配置方案: {profile.name or '默认'}")
+        self._apply_effective_config(profile.config)
+    
+    def _apply_effective_config(self, config):
+        """
+        应用新的生效配置，只更新实际发生变化的按键绑定和参数
+        
+        参数:
+            config: 新的配置字典
+        """
+        with self.lock:
+            old_config = self.get_config()
+            changed = {key for key, value in config.items() if old_config.get(key) != value}
+            if not changed:
+                logger.debug("配置未发生变化，无需应用")
+                return
+            
+            self._apply_config(config)
+            
+            # 更新热键绑定
+            self._update_key_bindings(changed, old_config["hot_key"])
+            
+            # 处理模式变更：切换到长按模式时关闭触控板
+            if "mode" in changed and self.mode == 0 and self.touchpad_active:
+                self._set_touchpad_active(False, off_indicator_duration=2.0)
+                logger.info("模式切换为长按模式，触控板已禁用")
+            
+            if {"backend", "fallback_backends", "devices", "input_source", "click_engine"} & changed:
+                logger.warning("后端配置已修改，重启程序后生效")
+            
+            logger.info(f"已应用配置变更: {', '.join(sorted(changed))}")
+    
+    def _update_key_bindings(self, changed, previous_hot_key=None):
+        """
+        按配置变更增量更新热键绑定
+        
+        参数:
+            changed: 发生变化的配置项名称集合
+            previous_hot_key: 变更前的主热键，新热键无法注册时恢复使用
+            
+        返回:
+            bool: 是否成功
+        """
         try:
-            # 解绑当前绑定的按键
-            try:
-                keyboard.unhook(self.on_left_click)
-                keyboard.unhook(self.on_right_click)
-            except Exception as e:
-                logger.error(f"解绑按键失败: {e}或者按键未绑定")
-
-            # 清理现有热键
-            try:
-                if self.press_hotkey:
-                    keyboard.remove_hotkey(self.press_hotkey)
-                    self.press_hotkey = None
-            except Exception as e:
-                logger.error(f"清理热键失败: {e}")
+            # 点击按键变化且当前已绑定时，重新绑定
+            action_settings = {"left_click", "right_click", "middle_click", "back_click", "forward_click",
+                               "move_up", "move_down", "move_left", "move_right",
+                               "scroll_up", "scroll_down", "scroll_left", "scroll_right"}
+            if action_settings & changed and self.action_keys_bound:
+                self._unbind_action_keys()
+                self._bind_action_keys()
+                logger.info(f"触控板热键已更新: {', '.join(self.get_action_keys().values())}")
+            
+            # 移动和滚动参数变化时立即生效
+            if "motion" in changed and self.motion_engine is not None:
+                self.motion_engine.configure(self.motion)
+            if "scroll" in changed and self.scroll_engine is not None:
+                self.scroll_engine.configure(self.scroll)
+            
+            # 打字防误触参数或模式变化时更新监视
+            if "typing_guard" in changed and self.typing_guard_engine is not None:
+                self.typing_guard_engine.configure(self.typing_guard)
+            if {"typing_guard", "mode"} & changed:
+                self._update_typing_watch()
+            
+            # 自动关闭时间或模式变化时重新计时
+            if {"auto_off", "mode"} & changed:
+                self._update_auto_off()
+            
+            # 指标导出参数变化时重启导出（尚未启动服务时由start()按新配置启动）
+            if "metrics" in changed and self.input_source is not None:
+                self._cleanup_metrics_exporter()
+                if self.metrics.get("textfile") or self.metrics.get("http_port"):
+                    self.start_metrics_exporter()
+            
+            # 实时调度参数变化时重新设置已登记的线程（尚未启动服务时由start()设置）
+            if "realtime" in changed and self.input_source is not None:
+                realtime.configure(self.realtime)
             
-            # 如果触控板处于激活状态，重新设置热键绑定
-            if self.touchpad_active:
-                keyboard.hook_key(LEFT_CLICK, self.on_left_click, suppress=True)
-                keyboard.hook_key(RIGHT_CLICK, self.on_right_click, suppress=True)
-                logger.info(f"触控板热键已更新: {LEFT_CLICK}, {RIGHT_CLICK}")
+            # 关闭拖动锁定时释放已锁定的按钮
+            if "drag_lock" in changed and not self.drag_lock:
+                for button in list(self.locked_buttons):
+                    self.locked_buttons.discard(button)
+                    if button not in self.click_keys_down:
+                        self.click_engine.release(button)
             
-            # 重新注册主热键
-            self.press_hotkey = keyboard.add_hotkey(HOT_KEY, lambda: None, suppress=True)
+            # 主热键变化时重新注册拦截
+            if "hot_key" in changed:
+                try:
+                    self.input_source.set_hot_key(self.hot_key)
+                    logger.info(f"主热键已更新: {self.hot_key}")
+                except ValueError as e:
+                    logger.error(f"无法注册热键{self.hot_key!r}: {e}，继续使用原热键{previous_hot_key!r}")
+                    self.hot_key = previous_hot_key
             return True
         except Exception as e:
             logger.error(f"更新热键绑定失败: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,247 @@
+import logging
+from keycodes import codes_for
+
+logger = logging.getLogger(__name__)
+
+# 触发键语法（与keyboard库一致）：
+#   "f1"              单个按键
+#   "ctrl+alt+k"      组合键：修饰键按住时按下最后一个按键
+#   "f8, f8"          按键序列：相邻两步间隔不超过SEQUENCE_TIMEOUT，如双击
+#   "mouse back"      鼠标按钮（仅evdev/helper输入源）
+CHORD_SEPARATOR = "+"
+SEQUENCE_SEPARATOR = ", "
+
+# 修饰键 -> 状态位，组合键中的修饰键不区分左右
+MODIFIERS = {"ctrl": 1, "shift": 2, "alt": 4, "windows": 8}
+
+# 按键序列中相邻两步的最大间隔（秒）
+SEQUENCE_TIMEOUT = 0.4
+
+def modifier_bit(name):
+    """
+    获取修饰键名称对应的状态位
+
+    参数:
+        name: 按键名称，如"ctrl"、"left shift"
+
+    返回:
+        int: 状态位，不是修饰键时返回0
+    """
+    for side in ("left ", "right "):
+        if name.startswith(side):
+            name = name[len(side):]
+            break
+    return MODIFIERS.get(name, 0)
+
+def parse_trigger(trigger):
+    """
+    解析触发键
+
+    参数:
+        trigger: 触发键字符串
+
+    返回:
+        list: 每一步为(修饰键名称列表, 按键名称)
+
+    异常:
+        ValueError: 语法错误
+    """
+    steps = []
+    for step in trigger.lower().split(SEQUENCE_SEPARATOR):
+        names = [name.strip() for name in step.split(CHORD_SEPARATOR)]
+        if not all(names):
+            raise ValueError(f"触发键{trigger!r}格式错误")
+        modifiers, key = names[:-1], names[-1]
+        for name in modifiers:
+            if not modifier_bit(name):
+                raise ValueError(f"触发键{trigger!r}中的{name}不是修饰键（ctrl、shift、alt、windows）")
+        steps.append((modifiers, key))
+    return steps
+
+def is_compound(trigger):
+    """
+    判断触发键是否为组合键或按键序列
+
+    参数:
+        trigger: 触发键字符串
+
+    返回:
+        bool: 不是单个按键时返回True
+    """
+    steps = parse_trigger(trigger)
+    return len(steps) > 1 or bool(steps[0][0])
+
+def validate_trigger(trigger, resolve=codes_for):
+    """
+    校验触发键
+
+    参数:
+        trigger: 触发键字符串
+        resolve: 按键名称 -> 键码元组的函数
+
+    返回:
+        list: 错误信息列表，为空表示有效
+    """
+    try:
+        steps = parse_trigger(trigger)
+    except ValueError as e:
+        return [str(e)]
+    unknown = sorted({name for modifiers, key in steps for name in modifiers + [key] if not resolve(name)})
+    return [f"无法识别的按键: {', '.join(unknown)}"] if unknown else []
+
+
+class _Node:
+    """触发键自动机的状态"""
+    __slots__ = ("next", "purpose", "trigger")
+
+    def __init__(self):
+        self.next = {}        # (键码, 修饰键状态) -> 下一状态
+        self.purpose = None   # 终止状态对应的绑定用途
+        self.trigger = None
+
+
+class TriggerMatcher:
+    """
+    触发键匹配器
+
+    把所有绑定的触发键编译为以(键码, 修饰键状态)为边的前缀树，序列中的每一步是一层。
+    每个按键事件只需一到两次字典查询即可推进状态，与绑定数量无关；
+    按住的终止按键释放时产生对应的释放事件，长按判断照常进行。
+    绑定变化时整体替换前缀树，正在按住的修饰键和触发键状态保留。
+    """
+    def __init__(self, resolve=codes_for, timeout=SEQUENCE_TIMEOUT):
+        """
+        参数:
+            resolve: 按键名称 -> 键码元组的函数（evdev键码或keyboard库的扫描码）
+            timeout: 按键序列中相邻两步的最大间隔（秒）
+        """
+        self.resolve = resolve
+        self.timeout = timeout
+        self.root = _Node()
+        self.codes = frozenset()   # 需要监听的所有键码
+        self.modifier_codes = {}   # 修饰键键码 -> 状态位
+        self.modifiers = 0         # 当前按住的修饰键状态
+        self.held_modifiers = {}   # 按住的修饰键键码 -> 状态位
+        self.down = set()          # 按住的被监听按键，用于丢弃自动重复
+        self.active = {}           # 已触发且仍按住的终止按键键码 -> (用途, 触发键)
+        self.node = self.root
+        self.deadline = 0.0
+
+    def compile(self, bindings):
+        """
+        编译并替换全部绑定
+
+        参数:
+            bindings: 用途 -> 触发键字符串
+
+        异常:
+            ValueError: 触发键无效，或一个触发键是另一个的前缀
+        """
+        root = _Node()
+        codes = set()
+        modifier_codes = {}
+        for purpose, trigger in bindings.items():
+            errors = validate_trigger(trigger, self.resolve)
+            if errors:
+                raise ValueError(f"{trigger}: {'; '.join(errors)}")
+            node = root
+            steps = parse_trigger(trigger)
+            for index, (modifiers, key) in enumerate(steps):
+                mask = 0
+                for name in modifiers:
+                    bit = modifier_bit(name)
+                    mask |= bit
+                    for code in self.resolve(name):
+                        modifier_codes[code] = bit
+                key_codes = self.resolve(key)
+                codes.update(key_codes)
+                children = {node.next.get((code, mask)) for code in key_codes}
+                if children == {None}:
+                    child = _Node()
+                    for code in key_codes:
+                        node.next[code, mask] = child
+                elif len(children) == 1:
+                    child = children.pop()
+                else:
+                    raise ValueError(f"触发键{trigger}与其他触发键冲突")
+                if child.purpose is not None:
+                    raise ValueError(f"触发键{trigger}与{child.trigger}冲突")
+                if index == len(steps) - 1 and child.next:
+                    raise ValueError(f"触发键{trigger}是其他按键序列的前缀")
+                node = child
+            node.purpose = purpose
+            node.trigger = trigger
+        codes.update(modifier_codes)
+        self.root, self.codes, self.modifier_codes = root, frozenset(codes), modifier_codes
+        self.node = root
+        self.active = {code: binding for code, binding in self.active.items() if binding[0] in bindings}
+
+    def feed(self, code, down, now):
+        """
+        处理一个按键事件
+
+        参数:
+            code: 键码
+            down: 是否按下
+            now: 事件时间（秒）
+
+        返回:
+            tuple: 触发时为(用途, 触发键, "down"或"up")，否则为None
+        """
+        if not down:
+            self.down.discard(code)
+            bit = self.held_modifiers.pop(code, 0)
+            if bit:
+                self.modifiers = 0
+                for held in self.held_modifiers.values():
+                    self.modifiers |= held
+            binding = self.active.pop(code, None)
+            if binding is not None:
+                return binding[0], binding[1], "up"
+            return None
+
+        if code in self.down:
+            return None
+        self.down.add(code)
+        modifiers = self.modifiers
+        bit = self.modifier_codes.get(code)
+        if bit:
+            self.held_modifiers[code] = bit
+            self.modifiers |= bit
+
+        node = self.node
+        if node is not self.root and now > self.deadline:
+            node = self.root
+        child = self._step(node, code, modifiers)
+        if child is None and node is not self.root:
+            # 序列中断，从头匹配当前按键
+            child = self._step(self.root, code, modifiers)
+        if child is None:
+            self.node = self.root
+            return None
+        if child.purpose is not None:
+            self.node = self.root
+            self.active[code] = (child.purpose, child.trigger)
+            return child.purpose, child.trigger, "down"
+        self.node = child
+        self.deadline = now + self.timeout
+        return None
+
+    @staticmethod
+    def _step(node, code, modifiers):
+        """
+        从一个状态按按键事件转移
+
+        参数:
+            node: 当前状态
+            code: 按下的键码
+            modifiers: 按下前的修饰键状态
+
+        返回:
+            _Node: 下一状态，没有对应的边时返回None
+        """
+        child = node.next.get((code, modifiers))
+        if child is None and modifiers:
+            # 没有对应的组合键时按单个按键匹配，按住修饰键不影响单键触发键
+            child = node.next.get((code, 0))
+        return child
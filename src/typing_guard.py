@@ -0,0 +1,193 @@
+import time
+import threading
+import logging
+import realtime
+import supervisor
+
+logger = logging.getLogger(__name__)
+
+# 默认打字防误触参数
+DEFAULT_TYPING_GUARD = {
+    "enabled": False,   # 切换模式下触控板激活时，打字期间是否暂停触控板
+    "min_window": 0.3,  # 最后一次按键后暂停的最短时间（秒）
+    "max_window": 1.0,  # 最后一次按键后暂停的最长时间（秒）
+    "burst_keys": 2     # 连续输入多少个按键后开始暂停
+}
+
+# 两次按键间隔超过该值（秒）时视为新一轮输入
+BURST_GAP = 0.5
+# 暂停时间 = 平均按键间隔 × 该倍数，再限制在[min_window, max_window]之间
+WINDOW_FACTOR = 3.0
+# 平均按键间隔的指数平滑系数
+SMOOTHING = 0.3
+
+def validate_typing_guard(guard):
+    """
+    校验打字防误触参数
+
+    参数:
+        guard: 参数字典
+
+    返回:
+        list: 错误信息列表，为空表示有效
+    """
+    if not isinstance(guard, dict):
+        return ["typing_guard 必须是对象"]
+    errors = []
+    unknown = set(guard) - set(DEFAULT_TYPING_GUARD)
+    if unknown:
+        errors.append(f"typing_guard 包含未知参数: {', '.join(sorted(unknown))}")
+    settings = dict(DEFAULT_TYPING_GUARD, **guard)
+    if not isinstance(settings["enabled"], bool):
+        errors.append("typing_guard.enabled 必须是true或false")
+    windows_valid = True
+    for name in ("min_window", "max_window"):
+        value = settings[name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 < value <= 10:
+            errors.append(f"typing_guard.{name} 必须大于0且不超过10")
+            windows_valid = False
+    if windows_valid and settings["min_window"] > settings["max_window"]:
+        errors.append("typing_guard.min_window 不能大于max_window")
+    burst_keys = settings["burst_keys"]
+    if isinstance(burst_keys, bool) or not isinstance(burst_keys, int) or not 1 <= burst_keys <= 20:
+        errors.append("typing_guard.burst_keys 必须是1到20之间的整数")
+    return errors
+
+
+class TypingGuard:
+    """
+    打字防误触
+
+    根据按键时间判断是否在连续打字：连续输入burst_keys个按键后暂停触控板，
+    最后一次按键后等待一段自适应时间（按平均按键间隔计算，打字越慢等待越久）再恢复。
+    按键回调只记录时间并推迟截止时间，不做系统调用；暂停和恢复由一个工作线程执行，
+    一轮连续输入只调用一次暂停和一次恢复，截止时间被推迟时线程最多多醒一次。
+    """
+    def __init__(self, actuator, guard=None):
+        """
+        参数:
+            actuator: 暂停/恢复回调，参数为True暂停、False恢复，在工作线程中调用
+            guard: 打字防误触参数，缺省项使用DEFAULT_TYPING_GUARD
+        """
+        self.actuator = actuator
+        self.condition = threading.Condition()
+        self.last_key = None  # 最近一次按键的时间
+        self.burst = 0        # 本轮连续输入的按键数
+        self.interval = None  # 平滑后的平均按键间隔（秒）
+        self.deadline = None  # 恢复触控板的时间，None表示未暂停
+        self.running = True
+        self.keys = 0
+        self.suspensions = 0
+        self.configure(guard or {})
+        self.thread = supervisor.spawn(self._run, "typing-guard", restart=True)
+        realtime.register("actuator", self.thread)
+
+    def configure(self, guard):
+        """
+        更新参数
+
+        参数:
+            guard: 打字防误触参数，缺省项使用DEFAULT_TYPING_GUARD
+        """
+        settings = dict(DEFAULT_TYPING_GUARD, **guard)
+        with self.condition:
+            self.min_window = settings["min_window"]
+            self.max_window = settings["max_window"]
+            self.burst_keys = settings["burst_keys"]
+
+    def window(self):
+        """
+        获取当前的暂停时间
+
+        返回:
+            float: 最后一次按键后暂停的时间（秒）
+        """
+        interval = self.interval if self.interval is not None else BURST_GAP
+        return min(max(interval * WINDOW_FACTOR, self.min_window), self.max_window)
+
+    def on_keystroke(self, now=None):
+        """
+        记录一次打字按键（在输入线程中调用）
+
+        参数:
+            now: 按键时间（time.monotonic()），None表示当前时间
+        """
+        if now is None:
+            now = time.monotonic()
+        with self.condition:
+            self.keys += 1
+            last_key, self.last_key = self.last_key, now
+            if last_key is None or now - last_key > BURST_GAP:
+                self.burst = 1
+            else:
+                gap = now - last_key
+                self.interval = gap if self.interval is None else self.interval + SMOOTHING * (gap - self.interval)
+                self.burst += 1
+            if self.burst < self.burst_keys:
+                return
+            suspended = self.deadline is not None
+            self.deadline = now + self.window()
+            if not suspended:
+                # 暂停中只推迟截止时间，不唤醒工作线程
+                self.suspensions += 1
+                self.condition.notify()
+
+    def cancel(self):
+        """立即结束当前的暂停"""
+        with self.condition:
+            if self.deadline is not None:
+                self.deadline = time.monotonic()
+                self.condition.notify()
+            self.burst = 0
+
+    def _run(self):
+        """工作线程主循环：没有打字时阻塞等待，暂停期间睡到截止时间"""
+        while True:
+            with self.condition:
+                while self.running and self.deadline is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+            self._actuate(True)
+            with self.condition:
+                while self.running:
+                    remaining = self.deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                self.deadline = None
+                self.burst = 0
+            self._actuate(False)
+
+    def _actuate(self, suspend):
+        """
+        调用暂停/恢复回调
+
+        参数:
+            suspend: True暂停，False恢复
+        """
+        try:
+            self.actuator(suspend)
+        except Exception as e:
+            logger.error(f"{'暂停' if suspend else '恢复'}触控板失败: {e}")
+
+    def get_stats(self):
+        """
+        获取打字防误触统计信息
+
+        返回:
+            dict: 按键数、暂停次数、当前是否暂停和暂停时间
+        """
+        return {
+            "keys": self.keys,
+            "suspensions": self.suspensions,
+            "suspended": self.deadline is not None,
+            "window_ms": round(self.window() * 1000, 1)
+        }
+
+    def stop(self):
+        """停止工作线程，暂停中时先恢复触控板"""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join(1.0)
@@ -0,0 +1,163 @@
+import os
+import errno
+import fcntl
+import struct
+import logging
+from evdev_input import EVENT_FORMAT
+from controllers.input_devices import EV_KEY, EV_REL
+
+logger = logging.getLogger(__name__)
+
+UINPUT_PATH = "/dev/uinput"
+DEVICE_NAME = "betterTouchpad virtual pointer"
+
+# uinput ioctl请求码（见linux/uinput.h）
+UI_DEV_CREATE = 0x5501
+UI_DEV_DESTROY = 0x5502
+UI_DEV_SETUP = 0x405c5503    # _IOW('U', 3, struct uinput_setup)
+UI_SET_EVBIT = 0x40045564
+UI_SET_KEYBIT = 0x40045565
+UI_SET_RELBIT = 0x40045566
+
+# uinput_setup结构：input_id(bustype, vendor, product, version), name[80], ff_effects_max
+SETUP_FORMAT = struct.Struct("HHHH80sI")
+# 4.5以前内核使用的uinput_user_dev结构：name[80], input_id, ff_effects_max, absmax/absmin/absfuzz/absflat[64]
+LEGACY_DEVICE_FORMAT = struct.Struct("80sHHHHi256i")
+BUS_VIRTUAL = 0x06
+
+EV_SYN = 0
+SYN_REPORT = 0
+
+# 鼠标按钮键码
+BTN_LEFT = 0x110
+BTN_RIGHT = 0x111
+BTN_MIDDLE = 0x112
+BTN_SIDE = 0x113   # 后退
+BTN_EXTRA = 0x114  # 前进
+
+# 相对坐标轴
+REL_X = 0x00
+REL_Y = 0x01
+REL_HWHEEL = 0x06
+REL_WHEEL = 0x08
+REL_WHEEL_HI_RES = 0x0b   # 1/120格，内核5.0起支持
+REL_HWHEEL_HI_RES = 0x0c
+
+# 虚拟指针默认支持的相对坐标轴：指针移动、普通滚轮和高精度滚轮
+POINTER_AXES = (REL_X, REL_Y, REL_HWHEEL, REL_WHEEL, REL_WHEEL_HI_RES, REL_HWHEEL_HI_RES)
+
+BUTTON_CODES = {
+    "left": BTN_LEFT,
+    "right": BTN_RIGHT,
+    "middle": BTN_MIDDLE,
+    "back": BTN_SIDE,
+    "forward": BTN_EXTRA,
+}
+
+SYN_EVENT = EVENT_FORMAT.pack(0, 0, EV_SYN, SYN_REPORT, 0)
+
+def pack_frames(frames):
+    """
+    把事件帧打包为可直接写入uinput的数据
+
+    参数:
+        frames: 帧列表，每帧是(type, code, value)事件列表，每帧后自动追加SYN_REPORT
+
+    返回:
+        bytes: 打包后的事件数据
+    """
+    return b"".join(
+        b"".join(EVENT_FORMAT.pack(0, 0, event_type, code, value) for event_type, code, value in frame)
+        + SYN_EVENT
+        for frame in frames
+    )
+
+class UinputUnavailableError(Exception):
+    """无法打开/dev/uinput或创建虚拟设备"""
+
+
+class VirtualPointer:
+    """
+    uinput虚拟指针设备
+
+    创建一次后常驻，写入的事件直接进入内核输入子系统，
+    由X/Wayland按普通鼠标处理，不经过XTest连接。
+    每次write写入一个或多个以SYN_REPORT结尾的事件帧，一帧只需一次系统调用。
+    """
+    def __init__(self, name=DEVICE_NAME, rel_axes=POINTER_AXES):
+        """
+        创建虚拟指针设备
+
+        参数:
+            name: 设备名称
+            rel_axes: 支持的相对坐标轴（REL_X/REL_Y是被识别为鼠标所必需的）
+
+        异常:
+            UinputUnavailableError: 无法打开/dev/uinput或创建设备
+        """
+        self.name = name
+        self.writes = 0
+        try:
+            self.fd = os.open(UINPUT_PATH, os.O_WRONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+        except OSError as e:
+            raise UinputUnavailableError(f"无法打开{UINPUT_PATH}: {e}") from e
+        try:
+            for event_type in (EV_KEY, EV_REL):
+                fcntl.ioctl(self.fd, UI_SET_EVBIT, event_type)
+            for code in BUTTON_CODES.values():
+                fcntl.ioctl(self.fd, UI_SET_KEYBIT, code)
+            for axis in rel_axes:
+                fcntl.ioctl(self.fd, UI_SET_RELBIT, axis)
+            self._setup_device()
+            fcntl.ioctl(self.fd, UI_DEV_CREATE)
+        except OSError as e:
+            os.close(self.fd)
+            self.fd = None
+            raise UinputUnavailableError(f"创建虚拟指针设备失败: {e}") from e
+        logger.info(f"已创建uinput虚拟指针设备: {name}")
+
+    def _setup_device(self):
+        """写入设备名称和标识，内核不支持UI_DEV_SETUP时使用旧接口"""
+        encoded = self.name.encode("utf-8")[:79]
+        try:
+            fcntl.ioctl(self.fd, UI_DEV_SETUP, SETUP_FORMAT.pack(BUS_VIRTUAL, 0, 0, 1, encoded, 0))
+        except OSError as e:
+            if e.errno not in (errno.EINVAL, errno.ENOTTY):
+                raise
+            os.write(self.fd, LEGACY_DEVICE_FORMAT.pack(encoded, BUS_VIRTUAL, 0, 0, 1, 0, *([0] * 256)))
+
+    def write(self, data):
+        """
+        写入已打包的事件数据（一次系统调用）
+
+        参数:
+            data: pack_frames()的结果
+
+        异常:
+            OSError: 写入失败
+        """
+        os.write(self.fd, data)
+        self.writes += 1
+
+    def write_frames(self, frames):
+        """
+        打包并写入事件帧
+
+        参数:
+            frames: 帧列表，见pack_frames()
+
+        异常:
+            OSError: 写入失败
+        """
+        self.write(pack_frames(frames))
+
+    def close(self):
+        """销毁虚拟设备"""
+        if self.fd is None:
+            return
+        try:
+            fcntl.ioctl(self.fd, UI_DEV_DESTROY)
+        except OSError as e:
+            logger.debug(f"销毁虚拟指针设备失败: {e}")
+        os.close(self.fd)
+        self.fd = None